@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Analyse des logs JSON du plugin (debug.log, wc-logs/wc-qualiopi-formation-*.log)
+Usage :
+    python tests/E2E/analyze_logs.py wp-content/debug.log --level error,critical --since 2h
+    python tests/E2E/analyze_logs.py debug.log --request-id 6f1c2a... --json
+    python tests/E2E/analyze_logs.py debug.log --tail 500
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "helpers"))
+
+from log_analyzer import LEVELS, LogFilter, analyze, parse_time, summary_markdown
+
+
+def parse_list(value: str):
+    """Convertit "a,b" en ["a", "b"]"""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analyse en flux des logs JSON du plugin")
+    parser.add_argument("paths", nargs="+", help="Fichiers de logs")
+    parser.add_argument("--level", type=parse_list, help="Niveaux retenus (error,critical)")
+    parser.add_argument("--min-level", choices=LEVELS, help="Niveau minimal retenu")
+    parser.add_argument("--request-id", type=parse_list, help="Identifiants de requête")
+    parser.add_argument("--since", type=parse_time, help="Début (ISO 8601 ou relatif : 15m, 2h, 1d)")
+    parser.add_argument("--until", type=parse_time, help="Fin (ISO 8601 ou relatif)")
+    parser.add_argument("--module", help="Module (ex. Form/Siren)")
+    parser.add_argument("--grep", help="Expression régulière sur le message")
+    parser.add_argument("--tail", type=int, help="N derniers enregistrements retenus (lecture depuis la fin)")
+    parser.add_argument("--top", type=int, default=10, help="Taille des classements")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    args = parser.parse_args()
+
+    log_filter = LogFilter(
+        levels=args.level,
+        min_level=args.min_level,
+        request_ids=args.request_id,
+        since=args.since,
+        until=args.until,
+        module=args.module,
+        pattern=args.grep,
+    )
+
+    summaries = {}
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"❌ Fichier introuvable : {path}")
+            return 1
+        summaries[path] = analyze(path, log_filter, reverse=args.tail is not None, limit=args.tail, top=args.top)
+
+    if args.json:
+        print(json.dumps(summaries, indent=2, ensure_ascii=False))
+        return 0
+
+    for path, summary in summaries.items():
+        scan = summary["scan"]
+        print(f"📄 {path} : {scan['lines']} lignes lues, {scan['unparsed']} hors format")
+        print(summary_markdown(summary, os.path.basename(path)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
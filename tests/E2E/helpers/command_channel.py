@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Canal de commandes persistant pour le framework E2E
+Un seul processus shell (WSL/bash) reste ouvert pendant tout le run ;
+les commandes sont encadrées par des sentinelles sur stdin/stdout.
+
+Toute commande du framework est passée telle quelle en argument de
+`bash -c` (`bash_argv`), quel que soit le chemin : exécution directe,
+asynchrone ou canal persistant. Aucune couche de shell intermédiaire ne
+la réinterprète ($?, guillemets, variables).
+"""
+
+import atexit
+import queue
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+
+# --exec : argv transmis à la distribution sans passer par son shell de connexion
+WSL_PREFIX = ["wsl", "-d", "Ubuntu", "--exec"]
+DEFAULT_SHELL_COMMAND = WSL_PREFIX + ["bash"]
+
+
+def bash_argv(command: str) -> List[str]:
+    """Invocation unique d'une commande du framework : `bash -c <commande>`"""
+    return ["bash", "-c", command]
+
+
+class PersistentShellChannel:
+    """
+    Shell longue durée : évite un nouveau `wsl bash -c` par commande
+    """
+
+    def __init__(self, shell_command: Optional[List[str]] = None):
+        self.shell_command = shell_command or list(DEFAULT_SHELL_COMMAND)
+        self.process: Optional[subprocess.Popen] = None
+        self._stdout: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def is_alive(self) -> bool:
+        """Indique si le processus shell tourne encore"""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """Démarre le shell s'il n'est pas déjà actif"""
+        if self.is_alive():
+            return
+
+        self._stdout = queue.Queue()
+        self._stderr = queue.Queue()
+        self.process = subprocess.Popen(
+            self.shell_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        for stream, target in (
+            (self.process.stdout, self._stdout),
+            (self.process.stderr, self._stderr),
+        ):
+            threading.Thread(
+                target=self._pump, args=(stream, target), daemon=True
+            ).start()
+
+    @staticmethod
+    def _pump(stream, target: "queue.Queue[Optional[str]]"):
+        """Recopie un flux ligne par ligne dans une file (None = fin de flux)"""
+        for raw_line in iter(stream.readline, b""):
+            target.put(raw_line.decode("utf-8", errors="replace"))
+        target.put(None)
+
+    def run(self, command: str, timeout: float = 30) -> Dict:
+        """
+        Exécute une commande dans le shell persistant
+
+        Retourne {"returncode", "stdout", "stderr"} ; lève
+        subprocess.TimeoutExpired si la sentinelle n'arrive pas à temps.
+        """
+        with self._lock:
+            self.start()
+            marker = f"__E2E_{uuid.uuid4().hex}__"
+
+            # Même argv que l'exécution directe : un `cd` ou un `exit` dans la
+            # commande n'affecte pas le canal, stdin est coupé pour ne pas
+            # consommer le flux.
+            script = (
+                f"{shlex.join(bash_argv(command))} < /dev/null\n"
+                "__e2e_rc=$?\n"
+                f"printf '\\n%s %s\\n' '{marker}' \"$__e2e_rc\"\n"
+                f"printf '\\n%s\\n' '{marker}' >&2\n"
+            )
+
+            try:
+                self.process.stdin.write(script.encode("utf-8"))
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self.close()
+                raise
+
+            deadline = time.monotonic() + timeout
+            try:
+                stdout, returncode = self._read_until(self._stdout, marker, deadline)
+                stderr, _ = self._read_until(self._stderr, marker, deadline)
+            except subprocess.TimeoutExpired:
+                # Le shell est dans un état inconnu : on le recrée au prochain appel
+                self.close()
+                raise subprocess.TimeoutExpired(command, timeout)
+
+            return {"returncode": returncode, "stdout": stdout, "stderr": stderr}
+
+    def _read_until(
+        self, source: "queue.Queue[Optional[str]]", marker: str, deadline: float
+    ):
+        """Lit un flux jusqu'à la sentinelle et retourne (texte, code retour)"""
+        lines = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(marker, 0)
+            try:
+                line = source.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(marker, 0)
+
+            if line is None:
+                self.close()
+                raise BrokenPipeError("Le shell persistant s'est arrêté")
+
+            if line.startswith(marker):
+                parts = line.split()
+                returncode = int(parts[1]) if len(parts) > 1 else 0
+                # Retire le saut de ligne ajouté avant la sentinelle
+                text = "".join(lines)
+                if text.endswith("\n"):
+                    text = text[:-1]
+                return text, returncode
+
+            lines.append(line)
+
+    def close(self):
+        """Ferme le shell persistant"""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            if process.poll() is None:
+                process.stdin.close()
+                process.wait(timeout=2)
+        except Exception:
+            process.kill()
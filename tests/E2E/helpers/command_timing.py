@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Instrumentation des commandes d'un run E2E
+Chaque commande est mesurée (temps réel, temps CPU des processus enfants,
+taille de sortie) et rattachée à la phase courante ; export en histogrammes
+par phase et par (phase, description), tableau des commandes les plus
+lentes, JSON et OpenMetrics.
+Seuls des agrégats, les commandes récentes (tampon circulaire) et les plus
+lentes sont gardés : la mémoire ne croît pas avec la durée du run.
+"""
+
+import bisect
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from event_store import TopN
+
+
+# Bornes des histogrammes de durée (secondes), +Inf implicite
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+OUTSIDE_PHASE = "(hors phase)"
+
+# Descriptions au-delà de la limite d'agrégats, regroupées par phase
+OTHER_DESCRIPTIONS = "(autres commandes)"
+
+# os.times() ne renseigne pas les processus enfants sous Windows
+CHILD_TIMES_AVAILABLE = os.name != "nt"
+
+
+def _children_cpu() -> float:
+    """Temps CPU cumulé des processus enfants terminés"""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class CommandTimer:
+    """
+    Mesures des commandes du run, par phase et par description
+
+    `cpu_s` vaut None quand il n'est pas attribuable (canal persistant,
+    commandes concurrentes, plateforme sans temps des enfants).
+    `recent` : commandes détaillées gardées (tampon circulaire, None = toutes).
+    `max_descriptions` : agrégats (phase, description) distincts gardés ; les
+    suivants sont comptés sous OTHER_DESCRIPTIONS dans leur phase.
+    """
+
+    def __init__(
+        self,
+        buckets: Tuple[float, ...] = DURATION_BUCKETS,
+        recent: Optional[int] = 1000,
+        slowest_kept: int = 50,
+        max_descriptions: int = 200,
+    ):
+        self.buckets = buckets
+        self.recent: Deque[Dict] = deque(maxlen=recent)
+        self.dropped = 0
+        self.phase_starts: List[Tuple[str, float]] = []
+        self.started_at = time.time()
+        # Cumuls tenus à jour pour le résumé en O(1)
+        self.count = 0
+        self.total_command_s = 0.0
+        self.slowest_entry: Optional[Dict] = None
+        self.phases: Dict[str, Dict] = {}
+        self.descriptions: Dict[Tuple[str, str], Dict] = {}
+        self.max_descriptions = max_descriptions
+        self._slowest = TopN(slowest_kept, key=lambda entry: entry["wall_s"])
+
+    def start_phase(self, name: str, at: Optional[float] = None):
+        self.phase_starts.append((name, at if at is not None else time.time()))
+
+    @property
+    def current_phase(self) -> str:
+        return self.phase_starts[-1][0] if self.phase_starts else OUTSIDE_PHASE
+
+    def start(self) -> Tuple[float, float]:
+        """Jeton de mesure à passer à `elapsed`"""
+        return time.perf_counter(), _children_cpu()
+
+    def elapsed(self, started: Tuple[float, float], cpu_measurable: bool = True) -> Tuple[float, Optional[float]]:
+        """(temps réel, temps CPU des enfants ou None) depuis `started`"""
+        wall_start, cpu_start = started
+        wall = time.perf_counter() - wall_start
+        if not cpu_measurable or not CHILD_TIMES_AVAILABLE:
+            return wall, None
+        return wall, _children_cpu() - cpu_start
+
+    def record(
+        self,
+        description: str,
+        wall: float,
+        cpu: Optional[float],
+        output_bytes: int,
+        success: bool,
+    ) -> Dict:
+        entry = {
+            "phase": self.current_phase,
+            "description": description,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "output_bytes": output_bytes,
+            "success": success,
+            "at": time.time() - self.started_at,
+        }
+        if len(self.recent) == self.recent.maxlen:
+            self.dropped += 1
+        self.recent.append(entry)
+        self._slowest.add(entry)
+        self.count += 1
+        self.total_command_s += wall
+        if self.slowest_entry is None or wall > self.slowest_entry["wall_s"]:
+            self.slowest_entry = entry
+
+        phase = self.phases.get(entry["phase"])
+        if phase is None:
+            phase = self.phases[entry["phase"]] = self._aggregate()
+        self._accumulate(phase, wall, cpu, output_bytes, success)
+
+        key = (entry["phase"], description)
+        if key not in self.descriptions and len(self.descriptions) >= self.max_descriptions:
+            key = (entry["phase"], OTHER_DESCRIPTIONS)
+        aggregate = self.descriptions.get(key)
+        if aggregate is None:
+            aggregate = self.descriptions[key] = self._aggregate()
+        self._accumulate(aggregate, wall, cpu, output_bytes, success)
+        return entry
+
+    def _aggregate(self) -> Dict:
+        return {
+            "commands": 0, "failures": 0, "command_s": 0.0, "cpu_s": None,
+            "output_bytes": 0, "max_s": 0.0, "buckets": [0] * (len(self.buckets) + 1),
+        }
+
+    def _accumulate(self, aggregate: Dict, wall: float, cpu: Optional[float], output_bytes: int, success: bool):
+        aggregate["commands"] += 1
+        aggregate["failures"] += 0 if success else 1
+        aggregate["command_s"] += wall
+        if cpu is not None:
+            aggregate["cpu_s"] = (aggregate["cpu_s"] or 0.0) + cpu
+        aggregate["output_bytes"] += output_bytes
+        aggregate["max_s"] = max(aggregate["max_s"], wall)
+        aggregate["buckets"][bisect.bisect_left(self.buckets, wall)] += 1
+
+    @staticmethod
+    def cumulative(counts: List[int]) -> List[int]:
+        """Effectifs cumulés par borne (format Prometheus), dernier = +Inf"""
+        cumulative, total = [], 0
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def phase_durations(self, end: Optional[float] = None) -> Dict[str, float]:
+        """Durée réelle de chaque phase (jusqu'au début de la suivante ou `end`)"""
+        end = end if end is not None else time.time()
+        durations: Dict[str, float] = {}
+        for index, (name, start) in enumerate(self.phase_starts):
+            stop = self.phase_starts[index + 1][1] if index + 1 < len(self.phase_starts) else end
+            durations[name] = durations.get(name, 0.0) + stop - start
+        return durations
+
+    def by_phase(self) -> Dict[str, Dict]:
+        """Agrégats par phase : nombre, somme, CPU, octets, histogramme"""
+        wall_times = self.phase_durations()
+        summary = {}
+        for name, phase in self.phases.items():
+            summary[name] = {
+                "phase_s": wall_times.get(name),
+                **{key: value for key, value in phase.items() if key != "buckets"},
+                "histogram": self.cumulative(phase["buckets"]),
+            }
+        return summary
+
+    def by_description(self) -> List[Dict]:
+        """Agrégats par (phase, description), du plus grand temps cumulé au plus petit"""
+        summary = [
+            {
+                "phase": phase,
+                "description": description,
+                **{key: value for key, value in aggregate.items() if key != "buckets"},
+                "histogram": self.cumulative(aggregate["buckets"]),
+            }
+            for (phase, description), aggregate in self.descriptions.items()
+        ]
+        return sorted(summary, key=lambda item: item["command_s"], reverse=True)
+
+    def slowest(self, count: int = 10) -> List[Dict]:
+        return self._slowest.items(count)
+
+    def to_dict(self, top: int = 10) -> Dict:
+        return {
+            "buckets": list(self.buckets),
+            "total_commands": self.count,
+            "total_command_s": self.total_command_s,
+            "phases": self.by_phase(),
+            "descriptions": self.by_description(),
+            "slowest": self.slowest(top),
+            "recent_commands": list(self.recent),
+            "recent_dropped": self.dropped,
+        }
+
+    def to_openmetrics(self, test_id: str) -> str:
+        """
+        Exposition OpenMetrics (texte) : histogrammes par phase et par
+        (phase, description) + gauges de phase
+        """
+        lines = [
+            "# TYPE e2e_command_duration_seconds histogram",
+            "# UNIT e2e_command_duration_seconds seconds",
+            "# HELP e2e_command_duration_seconds Durée réelle des commandes par phase.",
+        ]
+        phases = self.by_phase()
+        for name, phase in phases.items():
+            labels = f'test_id="{_label(test_id)}",phase="{_label(name)}"'
+            for bound, count in zip(list(self.buckets) + ["+Inf"], phase["histogram"]):
+                lines.append(f'e2e_command_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"e2e_command_duration_seconds_count{{{labels}}} {phase['commands']}")
+            lines.append(f"e2e_command_duration_seconds_sum{{{labels}}} {phase['command_s']:.6f}")
+
+        lines += [
+            "# TYPE e2e_command_description_duration_seconds histogram",
+            "# UNIT e2e_command_description_duration_seconds seconds",
+            "# HELP e2e_command_description_duration_seconds Durée réelle des commandes par phase et description.",
+        ]
+        for item in self.by_description():
+            labels = (
+                f'test_id="{_label(test_id)}",phase="{_label(item["phase"])}",'
+                f'description="{_label(item["description"])}"'
+            )
+            for bound, count in zip(list(self.buckets) + ["+Inf"], item["histogram"]):
+                lines.append(f'e2e_command_description_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"e2e_command_description_duration_seconds_count{{{labels}}} {item['commands']}")
+            lines.append(f"e2e_command_description_duration_seconds_sum{{{labels}}} {item['command_s']:.6f}")
+
+        gauges = [
+            ("e2e_phase_duration_seconds", "Durée réelle de la phase.", "phase_s"),
+            ("e2e_phase_command_cpu_seconds", "Temps CPU des processus enfants de la phase.", "cpu_s"),
+            ("e2e_phase_command_output_bytes", "Taille des sorties des commandes de la phase.", "output_bytes"),
+            ("e2e_phase_command_failures", "Commandes en échec dans la phase.", "failures"),
+        ]
+        for metric, help_text, key in gauges:
+            lines += [f"# TYPE {metric} gauge", f"# HELP {metric} {help_text}"]
+            for name, phase in phases.items():
+                if phase[key] is not None:
+                    labels = f'test_id="{_label(test_id)}",phase="{_label(name)}"'
+                    lines.append(f"{metric}{{{labels}}} {phase[key]}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def to_markdown(self, top: int = 10) -> str:
+        """Tableaux par phase, par commande (temps cumulé) et des commandes les plus lentes"""
+        lines = [
+            "| Phase | Durée | Commandes | Temps commandes | CPU enfants | Sortie | Max |",
+            "|-------|-------|-----------|-----------------|-------------|--------|-----|",
+        ]
+        for name, phase in self.by_phase().items():
+            phase_s = f"{phase['phase_s']:.2f}s" if phase["phase_s"] is not None else "-"
+            cpu_s = f"{phase['cpu_s']:.2f}s" if phase["cpu_s"] is not None else "-"
+            lines.append(
+                f"| {name} | {phase_s} | {phase['commands']} | {phase['command_s']:.2f}s | "
+                f"{cpu_s} | {_size(phase['output_bytes'])} | {phase['max_s']:.2f}s |"
+            )
+        lines += [
+            "",
+            "**Temps cumulé par commande**",
+            "",
+            "| Phase | Commande | Exécutions | Temps cumulé | Moyenne | Max | Échecs |",
+            "|-------|----------|------------|--------------|---------|-----|--------|",
+        ]
+        for item in self.by_description()[:top]:
+            description = item["description"].replace("|", "\\|")
+            lines.append(
+                f"| {item['phase']} | {description} | {item['commands']} | {item['command_s']:.2f}s | "
+                f"{item['command_s'] / item['commands']:.2f}s | {item['max_s']:.2f}s | {item['failures']} |"
+            )
+        lines += [
+            "",
+            "**Commandes les plus lentes**",
+            "",
+            "| Durée | Phase | Commande | Sortie | Statut |",
+            "|-------|-------|----------|--------|--------|",
+        ]
+        for entry in self.slowest(top):
+            status = "✅" if entry["success"] else "❌"
+            description = entry["description"].replace("|", "\\|")
+            lines.append(
+                f"| {entry['wall_s']:.2f}s | {entry['phase']} | {description} | "
+                f"{_size(entry['output_bytes'])} | {status} |"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    """Échappement d'une valeur de label OpenMetrics"""
+    return re.sub(r'(["\\])', r"\\\1", value).replace("\n", "\\n")
+
+
+def _size(count: int) -> str:
+    if count >= 1048576:
+        return f"{count / 1048576:.1f} Mo"
+    if count >= 1024:
+        return f"{count / 1024:.1f} Ko"
+    return f"{count} o"
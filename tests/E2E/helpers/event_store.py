@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Modèle d'évènements du framework E2E
+Enregistrements compacts (__slots__), compteurs tenus à jour à chaque
+évènement (niveau, phase, sonde) pour un résumé en O(1), et tampon
+circulaire optionnel des évènements récents. Le flux JSONL (report_sinks)
+reste la trace exhaustive du run. Reservoir et TopN bornent de même les
+mesures (commandes, coûts serveur, vérifications HTTP).
+"""
+
+import heapq
+import itertools
+import random
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+LEVELS = ("success", "error", "info", "warning")
+
+OUTSIDE_PHASE = "(hors phase)"
+
+
+class EventRecord:
+    """Évènement de log ; ~4x plus léger qu'un dict équivalent"""
+
+    __slots__ = ("type", "message", "time", "phase", "metrics")
+
+    def __init__(self, type: str, message: str, time: float, phase: str, metrics: Optional[Dict] = None):
+        self.type = type
+        self.message = message
+        self.time = time
+        self.phase = phase
+        # Mesures structurées rattachées au log (coût serveur d'une sonde...)
+        self.metrics = metrics
+
+    def to_dict(self) -> Dict:
+        record = {"type": self.type, "message": self.message, "time": self.time, "phase": self.phase}
+        if self.metrics is not None:
+            record["metrics"] = self.metrics
+        return record
+
+
+class LevelCounters:
+    """Compteurs par niveau d'un périmètre (run, phase)"""
+
+    __slots__ = ("success", "error", "info", "warning")
+
+    def __init__(self):
+        self.success = 0
+        self.error = 0
+        self.info = 0
+        self.warning = 0
+
+    def add(self, level: str):
+        setattr(self, level, getattr(self, level) + 1)
+
+    @property
+    def checks(self) -> int:
+        return self.success + self.error
+
+    @property
+    def success_rate(self) -> float:
+        return self.success / self.checks * 100 if self.checks else 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "success": self.success,
+            "error": self.error,
+            "info": self.info,
+            "warning": self.warning,
+            "success_rate": self.success_rate,
+        }
+
+
+class EventStore:
+    """
+    Évènements du run : compteurs exhaustifs, détail borné
+
+    `recent` : taille du tampon circulaire (None = tout conserver,
+    0 = aucun évènement brut en mémoire).
+    """
+
+    def __init__(self, recent: Optional[int] = 1000):
+        self.totals = LevelCounters()
+        self.by_phase: Dict[str, LevelCounters] = {}
+        self.probes: Dict[str, List[int]] = {}
+        self.current_phase = OUTSIDE_PHASE
+        self.dropped = 0
+        self._recent: Deque[EventRecord] = deque(maxlen=recent)
+
+    def start_phase(self, name: str):
+        self.current_phase = name
+        self.by_phase.setdefault(name, LevelCounters())
+
+    def add(self, level: str, message: str, time: float, metrics: Optional[Dict] = None) -> EventRecord:
+        record = EventRecord(level, message, time, self.current_phase, metrics)
+        self.totals.add(level)
+        phase = self.by_phase.get(self.current_phase)
+        if phase is None:
+            phase = self.by_phase[self.current_phase] = LevelCounters()
+        phase.add(level)
+        # Tampon plein : l'ajout évince le plus ancien (maxlen=0 : rien n'est gardé)
+        if len(self._recent) == self._recent.maxlen:
+            self.dropped += 1
+        self._recent.append(record)
+        return record
+
+    def add_probe(self, name: str, passed: bool):
+        """Résultat d'une sonde : [réussites, échecs] par nom"""
+        counts = self.probes.get(name)
+        if counts is None:
+            counts = self.probes[name] = [0, 0]
+        counts[0 if passed else 1] += 1
+
+    def count(self, level: str) -> int:
+        return getattr(self.totals, level)
+
+    def success_rate(self) -> float:
+        return self.totals.success_rate
+
+    def __iter__(self) -> Iterator[EventRecord]:
+        return iter(self._recent)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def summary(self) -> Dict:
+        """Compteurs du run, par phase et par sonde"""
+        return {
+            "totals": self.totals.to_dict(),
+            "phases": {name: counters.to_dict() for name, counters in self.by_phase.items()},
+            "probes": {name: {"passed": counts[0], "failed": counts[1]} for name, counts in self.probes.items()},
+            "recent_kept": len(self._recent),
+            "recent_dropped": self.dropped,
+        }
+
+
+class Reservoir:
+    """
+    Échantillon uniforme d'au plus `size` valeurs d'un flux (algorithme R) ;
+    `count` reste le nombre total de valeurs vues
+    """
+
+    def __init__(self, size: int = 1000, seed: int = 0):
+        self.size = size
+        self.count = 0
+        self.values: List[float] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+            return
+        index = self._random.randrange(self.count)
+        if index < self.size:
+            self.values[index] = value
+
+    def extend(self, values):
+        for value in values:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TopN:
+    """Les `size` éléments de plus grande clé vus dans un flux (tas binaire)"""
+
+    def __init__(self, size: int, key: Callable[[Any], float]):
+        self.size = size
+        self.key = key
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._order = itertools.count()
+
+    def add(self, item: Any):
+        entry = (self.key(item), next(self._order), item)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self, count: Optional[int] = None) -> List[Any]:
+        """Éléments par clé décroissante (les `count` premiers)"""
+        ranked = [item for _, _, item in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+        return ranked if count is None else ranked[:count]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Backends d'exécution des commandes du framework E2E
+Le framework ne lance plus lui-même `wsl` : il délègue à un exécuteur.
+
+- `WslExecutor` : WordPress réel (ddev) via WSL, canal persistant optionnel ;
+- `EmulatorExecutor` (wp_emulator) : WordPress/WP-CLI émulé en mémoire,
+  pour exercer la logique des scénarios en quelques millisecondes.
+
+Sélection : E2E_BACKEND=wsl (défaut) | emulator.
+Côté WSL, les trois chemins (direct, asynchrone, canal persistant)
+exécutent le même argv `bash -c <commande>`.
+"""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+from typing import Dict, Iterable, Optional
+
+from command_channel import WSL_PREFIX, PersistentShellChannel, bash_argv
+
+
+BACKENDS = ("wsl", "emulator")
+
+
+class CommandExecutor:
+    """
+    Exécute une commande shell et retourne {"returncode", "stdout", "stderr"}
+
+    Lève subprocess.TimeoutExpired au-delà de `timeout`. `child_cpu` indique
+    si le temps CPU des processus enfants mesure la commande.
+    """
+
+    name = "base"
+    child_cpu = False
+
+    def run(self, command: str, timeout: float) -> Dict:
+        raise NotImplementedError
+
+    async def run_async(self, command: str, timeout: float) -> Dict:
+        return self.run(command, timeout)
+
+    def pipe(self, command: str, chunks: Iterable[str], timeout: float) -> Dict:
+        """Commande alimentée par un flux sur l'entrée standard"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WslExecutor(CommandExecutor):
+    """Commandes `bash -c` dans la distribution WSL (un processus par commande ou canal persistant)"""
+
+    name = "wsl"
+
+    def __init__(self, channel: Optional[PersistentShellChannel] = None):
+        self.channel = channel
+        # Le canal persistant n'est pas un enfant mesurable commande par commande
+        self.child_cpu = channel is None
+
+    def run(self, command: str, timeout: float) -> Dict:
+        if self.channel is not None:
+            return self.channel.run(command, timeout=timeout)
+
+        result = subprocess.run(
+            WSL_PREFIX + bash_argv(command),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        return {
+            "returncode": result.returncode,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+        }
+
+    async def run_async(self, command: str, timeout: float) -> Dict:
+        """Processus WSL dédié, même avec un canal persistant (commandes concurrentes)"""
+        process = await asyncio.create_subprocess_exec(
+            *WSL_PREFIX, *bash_argv(command),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(command, timeout)
+
+        return {
+            "returncode": process.returncode,
+            "stdout": stdout.decode("utf-8", errors="replace"),
+            "stderr": stderr.decode("utf-8", errors="replace"),
+        }
+
+    def pipe(self, command: str, chunks: Iterable[str], timeout: float) -> Dict:
+        """
+        Processus WSL dédié : le canal persistant garde son entrée pour
+        les commandes. Sorties dans des fichiers temporaires pour éviter
+        tout blocage de tube pendant l'écriture.
+        """
+        process = None
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            try:
+                process = subprocess.Popen(
+                    WSL_PREFIX + bash_argv(command),
+                    stdin=subprocess.PIPE,
+                    stdout=stdout,
+                    stderr=stderr,
+                )
+                try:
+                    for chunk in chunks:
+                        process.stdin.write(chunk.encode("utf-8"))
+                except BrokenPipeError:
+                    pass  # Le processus s'est arrêté : son code retour et stderr font foi
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                process.wait(timeout=timeout)
+            except Exception:
+                if process is not None and process.poll() is None:
+                    process.kill()
+                raise
+
+            stdout.seek(0)
+            stderr.seek(0)
+            return {
+                "returncode": process.returncode,
+                "stdout": stdout.read().decode("utf-8", errors="replace"),
+                "stderr": stderr.read().decode("utf-8", errors="replace"),
+            }
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+
+
+def create_executor(backend: Optional[str] = None, channel: Optional[PersistentShellChannel] = None) -> CommandExecutor:
+    """Exécuteur du backend demandé (défaut : variable E2E_BACKEND, sinon wsl)"""
+    backend = backend or os.environ.get("E2E_BACKEND", "wsl")
+    if backend == "wsl":
+        return WslExecutor(channel)
+    if backend == "emulator":
+        # Import tardif : sqlite3 et l'index des sources ne servent qu'à l'émulateur
+        from wp_emulator import EmulatorExecutor
+
+        return EmulatorExecutor(os.environ.get("E2E_EMULATOR_DB", ":memory:"))
+    raise ValueError(f"Backend inconnu : {backend!r} (attendu : {', '.join(BACKENDS)})")
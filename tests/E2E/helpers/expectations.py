@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Attentes déclaratives pour le mode headless du framework E2E
+Chaque question d'observation peut être associée à une attente vérifiable
+automatiquement ; le mode interactif reste la solution de repli.
+Une observation ne produit qu'une entrée de journal : l'évaluation d'une
+attente ne journalise rien elle-même, et une attente `recorded` reprend un
+résultat déjà journalisé (vérification HTTP, étape) sans le recompter.
+"""
+
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+
+_MISSING = object()
+
+
+def resolve_json_path(data: Any, path: str) -> Any:
+    """
+    Résout un chemin pointé ("form_mappings.1.siret") dans un JSON décodé
+
+    Retourne _MISSING si un segment n'existe pas.
+    """
+    current = data
+    for segment in [part for part in path.split(".") if part]:
+        if isinstance(current, dict):
+            if segment not in current:
+                return _MISSING
+            current = current[segment]
+        elif isinstance(current, list) and segment.isdigit():
+            index = int(segment)
+            if index >= len(current):
+                return _MISSING
+            current = current[index]
+        else:
+            return _MISSING
+    return current
+
+
+class Expectation:
+    """
+    Attente vérifiable par la machine : evaluate() retourne (succès, détail)
+    """
+
+    description = "attente"
+    # Résultat déjà journalisé ailleurs : l'observation ne compte pas une seconde fois
+    recorded = False
+
+    def evaluate(self, framework) -> Tuple[bool, str]:
+        raise NotImplementedError
+
+
+class CommandOutputMatches(Expectation):
+    """
+    La sortie d'une commande SSH/WP-CLI correspond à une regex ; un code de
+    retour hors `returncodes` fait échouer l'attente
+    """
+
+    def __init__(
+        self,
+        command: str,
+        pattern: str,
+        description: Optional[str] = None,
+        returncodes: Tuple[int, ...] = (0,),
+    ):
+        self.command = command
+        self.pattern = re.compile(pattern, re.MULTILINE)
+        self.description = description or f"sortie ~ /{pattern}/"
+        self.returncodes = tuple(returncodes)
+
+    def evaluate(self, framework) -> Tuple[bool, str]:
+        # Chemin commun (cache d'options, mesure, attribution des logs) sans entrée de journal :
+        # l'observation journalise le verdict
+        result = framework.execute_ssh_command(
+            self.description, self.command, returncodes=self.returncodes, quiet=True
+        )
+        if not result["success"]:
+            code = result.get("returncode", "-")
+            return False, f"{self.description} : commande en échec (code {code} : {result['error'][:120]!r})"
+        output = result["output"]
+        if self.pattern.search(output):
+            return True, f"{self.description} : trouvé"
+        excerpt = output.strip().splitlines()[-1:] or [""]
+        return False, f"{self.description} : absent (sortie : {excerpt[0][:120]!r})"
+
+
+class OptionEquals(Expectation):
+    """Une valeur (chemin JSON) d'une option WordPress est égale à l'attendu"""
+
+    def __init__(self, option: str, path: str = "", expected: Any = _MISSING):
+        self.option = option
+        self.path = path
+        self.expected = expected
+        target = f"{option}.{path}" if path else option
+        self.description = (
+            f"{target} présent" if expected is _MISSING else f"{target} == {expected!r}"
+        )
+
+    def evaluate(self, framework) -> Tuple[bool, str]:
+        value = framework.get_wp_option(self.option)
+        if value is None:
+            return False, f"{self.description} : option absente"
+        actual = resolve_json_path(value, self.path)
+        if actual is _MISSING:
+            return False, f"{self.description} : chemin introuvable"
+        if self.expected is _MISSING:
+            return True, f"{self.description} : {actual!r}"
+        # Tolère les écarts de type JSON (4267 vs "4267")
+        passed = actual == self.expected or str(actual) == str(self.expected)
+        return passed, f"{self.description} : valeur {actual!r}"
+
+
+class HttpExpectation(Expectation):
+    """
+    Assertion HTTP : statut, contenu (regex) et/ou URL finale après redirections
+
+    Requêtes envoyées par le driver HTTP du framework (http_base_url, serveur
+    de remplacement, E2E_HTTP_INSECURE) ; les chemins relatifs visent le
+    site. Les URLs de `before` sont appelées d'abord par le même utilisateur
+    virtuel (ex : ajout au panier avant de consulter /panier/).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status: Optional[int] = 200,
+        pattern: Optional[str] = None,
+        absent: Optional[str] = None,
+        final_url_contains: Optional[str] = None,
+        before: Optional[List[str]] = None,
+        description: Optional[str] = None,
+    ):
+        self.url = url
+        self.status = status
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.absent = re.compile(absent, re.IGNORECASE) if absent else None
+        self.final_url_contains = final_url_contains
+        self.before = before or []
+        self.description = description or f"GET {url}"
+
+    def evaluate(self, framework) -> Tuple[bool, str]:
+        user = framework.new_virtual_user("attente")
+        for url in self.before:
+            user.get(url)
+        response = user.get(self.url)
+        if response.error:
+            return False, f"{self.description} : requête impossible ({response.error})"
+        status, final_url, body = response.status, response.final_url, response.body
+
+        failures = []
+        if self.status is not None and status != self.status:
+            failures.append(f"statut {status} ≠ {self.status}")
+        if self.pattern and not self.pattern.search(body):
+            failures.append(f"motif /{self.pattern.pattern}/ absent")
+        if self.absent and self.absent.search(body):
+            failures.append(f"motif /{self.absent.pattern}/ présent")
+        if self.final_url_contains and self.final_url_contains not in final_url:
+            failures.append(f"URL finale {final_url}")
+
+        if failures:
+            return False, f"{self.description} : " + ", ".join(failures)
+        return True, f"{self.description} : OK ({status})"
+
+
+class Check(Expectation):
+    """
+    Attente libre : une fonction (framework) -> bool ; `recorded` si elle
+    reprend un résultat déjà journalisé (record_http_check, étape de scénario)
+    """
+
+    def __init__(self, predicate: Callable[[Any], bool], description: str, recorded: bool = False):
+        self.predicate = predicate
+        self.description = description
+        self.recorded = recorded
+
+    def evaluate(self, framework) -> Tuple[bool, str]:
+        passed = bool(self.predicate(framework))
+        return passed, f"{self.description} : {'OK' if passed else 'KO'}"
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Driver HTTP du tunnel panier → test → checkout
+Connexions keep-alive mutualisées, un jar de cookies par utilisateur
+virtuel, analyse du HTML rendu par CartGuard et mesures par requête.
+"""
+
+import http.client
+import http.cookiejar
+import queue
+import re
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from php_profiler import COST_HEADER, PROFILE_REQUEST_HEADER, parse_cost_header
+
+
+# Classes CSS des boutons de checkout (classique, Blocks, CTA CartGuard)
+TEST_CTA_CLASS = "wcqf-test-cta"
+CHECKOUT_BUTTON_CLASSES = (
+    "wc-block-cart__submit-button",
+    "checkout-button",
+    TEST_CTA_CLASS,
+)
+NOTICE_CLASSES = (
+    "woocommerce-message",
+    "woocommerce-error",
+    "woocommerce-info",
+    "wc-block-components-notice-banner",
+)
+_SHOULD_BLOCK = re.compile(r"Should block checkout:'\s*,\s*(true|false)")
+_BLOCKS_TEST_URL = re.compile(r"button\.href\s*=\s*'([^']*)'")
+
+
+class ConnectionPool:
+    """
+    Connexions HTTP(S) keep-alive réutilisables, partagées entre threads
+    """
+
+    def __init__(self, max_per_host: int = 16, timeout: float = 15, verify_tls: bool = True):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        if not verify_tls:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._idle: Dict[Tuple[str, str, int], "queue.LifoQueue"] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _key(self, parts: urllib.parse.SplitResult) -> Tuple[str, str, int]:
+        default_port = 443 if parts.scheme == "https" else 80
+        return parts.scheme, parts.hostname, parts.port or default_port
+
+    def acquire(self, parts: urllib.parse.SplitResult) -> Tuple[Tuple, http.client.HTTPConnection]:
+        """Retourne une connexion inactive pour l'hôte, ou en ouvre une nouvelle"""
+        key = self._key(parts)
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue(self.max_per_host))
+            try:
+                connection = idle.get_nowait()
+            except queue.Empty:
+                # Compteurs mis à jour sous le verrou : les utilisateurs virtuels tournent en parallèle
+                self.created += 1
+            else:
+                self.reused += 1
+                return key, connection
+
+        scheme, host, port = key
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self.ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return key, connection
+
+    def release(self, key: Tuple, connection: http.client.HTTPConnection):
+        """Rend une connexion au pool (fermée si le pool est plein)"""
+        try:
+            self._idle[key].put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        """Ferme toutes les connexions inactives"""
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().close()
+
+
+class HttpResult:
+    """Réponse HTTP mesurée (une entrée par saut de redirection dans `hops`)"""
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.final_url = url
+        self.status = 0
+        self.headers: Dict[str, str] = {}
+        self.body = ""
+        self.elapsed = 0.0
+        self.error: Optional[str] = None
+        self.hops: List[Dict] = []
+        # Coût serveur de la dernière réponse (mu-plugin php_profiler)
+        self.server_cost: Optional[Dict] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 400
+
+    def to_dict(self) -> Dict:
+        """Représentation compacte (sans le corps) pour les logs et rapports"""
+        return {
+            "method": self.method,
+            "url": self.url,
+            "final_url": self.final_url,
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed * 1000, 2),
+            "bytes": len(self.body),
+            "error": self.error,
+            "hops": self.hops,
+            "server_cost": self.server_cost,
+        }
+
+
+class _CookieResponse:
+    """Adaptateur minimal attendu par CookieJar.extract_cookies"""
+
+    def __init__(self, message):
+        self._message = message
+
+    def info(self):
+        return self._message
+
+
+class VirtualUser:
+    """
+    Utilisateur virtuel : jar de cookies propre, connexions du pool partagé
+    """
+
+    def __init__(self, base_url: str, pool: ConnectionPool, name: str = "vu", profile_server: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.pool = pool
+        self.name = name
+        # Demande le relevé du coût serveur (en-tête X-E2E-Cost en réponse)
+        self.profile_server = profile_server
+        self.cookies = http.cookiejar.CookieJar()
+        self.history: List[HttpResult] = []
+
+    def url(self, path: str) -> str:
+        """URL absolue à partir d'un chemin relatif au site"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, str]] = None,
+        follow_redirects: bool = True,
+        max_redirects: int = 5,
+    ) -> HttpResult:
+        """Envoie une requête (redirections suivies) et mesure chaque saut"""
+        result = HttpResult(method, self.url(path))
+        url, body = result.url, None
+        if data is not None:
+            body = urllib.parse.urlencode(data).encode("utf-8")
+
+        started = time.perf_counter()
+        for _ in range(max_redirects + 1):
+            try:
+                status, headers, text, hop_elapsed = self._send(method, url, body)
+            except (OSError, http.client.HTTPException) as e:
+                result.error = f"{type(e).__name__}: {e}"
+                break
+
+            hop = {"url": url, "status": status, "elapsed_ms": round(hop_elapsed * 1000, 2)}
+            result.server_cost = parse_cost_header(headers.get(COST_HEADER))
+            if result.server_cost is not None:
+                hop["server_ms"] = result.server_cost["time_ms"]
+            result.hops.append(hop)
+            result.status, result.headers, result.body, result.final_url = (
+                status, headers, text, url
+            )
+
+            location = headers.get("location")
+            if not follow_redirects or status not in (301, 302, 303, 307, 308) or not location:
+                break
+            url = urllib.parse.urljoin(url, location)
+            # 303 (et 301/302 en pratique) : on repasse en GET sans corps
+            if status in (301, 302, 303):
+                method, body = "GET", None
+
+        result.elapsed = time.perf_counter() - started
+        self.history.append(result)
+        return result
+
+    def _send(self, method: str, url: str, body: Optional[bytes]):
+        """Un aller-retour HTTP sur une connexion du pool (une reprise si coupée)"""
+        parts = urllib.parse.urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+
+        cookie_request = urllib.request.Request(url, method=method)
+        self.cookies.add_cookie_header(cookie_request)
+        headers = dict(cookie_request.header_items())
+        headers.setdefault("User-Agent", f"wcqf-e2e/{self.name}")
+        if self.profile_server:
+            headers[PROFILE_REQUEST_HEADER] = "1"
+        if body is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        for attempt in range(2):
+            key, connection = self.pool.acquire(parts)
+            started = time.perf_counter()
+            try:
+                connection.request(method, target, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Connexion keep-alive fermée côté serveur : nouvelle tentative
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            elapsed = time.perf_counter() - started
+
+            self.cookies.extract_cookies(_CookieResponse(response.msg), cookie_request)
+            if response.will_close:
+                connection.close()
+            else:
+                self.pool.release(key, connection)
+
+            charset = response.msg.get_content_charset() or "utf-8"
+            response_headers = {name.lower(): value for name, value in response.getheaders()}
+            return response.status, response_headers, payload.decode(charset, errors="replace"), elapsed
+
+    def get(self, path: str, **kwargs) -> HttpResult:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, data: Dict[str, str], **kwargs) -> HttpResult:
+        return self.request("POST", path, data=data, **kwargs)
+
+    def login(self, username: str, password: str) -> HttpResult:
+        """Connexion WordPress (wp-login.php) : les cookies restent dans le jar"""
+        self.get("/wp-login.php")
+        return self.post(
+            "/wp-login.php",
+            {
+                "log": username,
+                "pwd": password,
+                "wp-submit": "Se connecter",
+                "testcookie": "1",
+            },
+        )
+
+
+class _CartPageParser(HTMLParser):
+    """Extrait boutons de checkout et notices de la page panier"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.buttons: List[Dict] = []
+        self.notices: List[Dict] = []
+        self._open: List[Dict] = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+
+        kind = None
+        if any(css in classes for css in CHECKOUT_BUTTON_CLASSES):
+            kind = "button"
+        elif any(css in classes for css in NOTICE_CLASSES):
+            kind = "notice"
+        if kind:
+            self._open.append(
+                {
+                    "kind": kind,
+                    "tag": tag,
+                    "classes": classes,
+                    "href": attributes.get("href"),
+                    "onclick": attributes.get("onclick"),
+                    "text": [],
+                    "depth": 0,
+                }
+            )
+        for element in self._open:
+            if element["tag"] == tag:
+                element["depth"] += 1
+
+    def handle_endtag(self, tag):
+        for element in list(self._open):
+            if element["tag"] != tag:
+                continue
+            element["depth"] -= 1
+            if element["depth"] == 0:
+                self._open.remove(element)
+                entry = {
+                    "classes": element["classes"],
+                    "text": " ".join(" ".join(element["text"]).split()),
+                }
+                if element["kind"] == "button":
+                    entry.update({"href": element["href"], "onclick": element["onclick"]})
+                    self.buttons.append(entry)
+                else:
+                    self.notices.append(entry)
+
+    def handle_data(self, data):
+        for element in self._open:
+            element["text"].append(data)
+
+
+class CartPage:
+    """Vue structurée d'une page panier rendue par WooCommerce + CartGuard"""
+
+    def __init__(self, result: HttpResult):
+        self.result = result
+        parser = _CartPageParser()
+        parser.feed(result.body)
+        parser.close()
+        self.buttons = parser.buttons
+        self.notices = parser.notices
+
+        # Indices émis par CartAssets (debug console et script Blocks)
+        match = _SHOULD_BLOCK.search(result.body)
+        self.should_block: Optional[bool] = (match.group(1) == "true") if match else None
+        match = _BLOCKS_TEST_URL.search(result.body)
+        self.blocks_test_url: Optional[str] = match.group(1).replace("\\/", "/") if match else None
+
+    def find_button(self, pattern: str) -> Optional[Dict]:
+        """Premier bouton dont le texte ou le lien correspond au motif"""
+        regex = re.compile(pattern, re.IGNORECASE)
+        for button in self.buttons:
+            if regex.search(button["text"]) or regex.search(button.get("href") or ""):
+                return button
+        return None
+
+    def find_notice(self, pattern: str) -> Optional[Dict]:
+        """Première notice dont le texte correspond au motif"""
+        regex = re.compile(pattern, re.IGNORECASE)
+        for notice in self.notices:
+            if regex.search(notice["text"]):
+                return notice
+        return None
+
+
+class CartFlow:
+    """
+    Parcours panier d'un utilisateur virtuel, chaque étape rendant un
+    résultat structuré {"check", "passed", "detail", "timing"}
+    """
+
+    def __init__(self, user: VirtualUser, cart_path: str = "/panier/", checkout_path: str = "/commander/"):
+        self.user = user
+        self.cart_path = cart_path
+        self.checkout_path = checkout_path
+
+    @staticmethod
+    def _check(name: str, passed: bool, detail: str, result: HttpResult) -> Dict:
+        return {
+            "check": name,
+            "passed": bool(passed),
+            "detail": detail,
+            "timing": result.to_dict(),
+        }
+
+    def login(self, username: str, password: str) -> Dict:
+        """Connexion WordPress de l'utilisateur virtuel"""
+        result = self.user.login(username, password)
+        logged_in = any(
+            cookie.name.startswith("wordpress_logged_in") for cookie in self.user.cookies
+        )
+        return self._check(
+            f"Connexion WordPress ({username})",
+            result.ok and logged_in,
+            result.error or f"HTTP {result.status}, cookie de session {'présent' if logged_in else 'absent'}",
+            result,
+        )
+
+    def add_to_cart(self, product_id: int) -> Dict:
+        """Ajoute un produit au panier via ?add-to-cart="""
+        result = self.user.get(f"/?add-to-cart={product_id}")
+        return self._check(
+            f"Ajout au panier du produit {product_id}",
+            result.ok,
+            result.error or f"HTTP {result.status}",
+            result,
+        )
+
+    def view_cart(self) -> Tuple[Dict, CartPage]:
+        """Charge /panier/ et l'analyse"""
+        result = self.user.get(self.cart_path)
+        page = CartPage(result)
+        detail = result.error or (
+            f"HTTP {result.status}, {len(page.buttons)} bouton(s), {len(page.notices)} notice(s)"
+        )
+        return self._check("Affichage du panier", result.ok, detail, result), page
+
+    def check_blocked(self, page: CartPage) -> List[Dict]:
+        """Vérifie le blocage rendu par CartGuard sur la page panier"""
+        result = page.result
+        cta = page.find_button(r"test") or (
+            {"href": page.blocks_test_url} if page.blocks_test_url else None
+        )
+        notice = page.find_notice(r"test de positionnement|test requis")
+        return [
+            self._check(
+                "Checkout bloqué (CartGuard)",
+                page.should_block is not False and (cta is not None or notice is not None),
+                f"should_block={page.should_block}",
+                result,
+            ),
+            self._check(
+                "Bouton vers le test de positionnement",
+                cta is not None,
+                f"href={cta.get('href') if cta else None}",
+                result,
+            ),
+            self._check(
+                "Notice expliquant le blocage",
+                notice is not None,
+                notice["text"][:120] if notice else "aucune notice",
+                result,
+            ),
+        ]
+
+    def check_unblocked(self, page: CartPage) -> Dict:
+        """
+        Vérifie que le bouton de checkout du panier (pas un lien de menu)
+        pointe vers le checkout et qu'aucun CTA de test CartGuard n'est affiché
+        """
+        slug = self.checkout_path.strip("/")
+        ctas = [button for button in page.buttons if TEST_CTA_CLASS in button["classes"]]
+        buttons = [button for button in page.buttons if TEST_CTA_CLASS not in button["classes"]]
+        button = next((button for button in buttons if slug in (button.get("href") or "")), None)
+        passed = page.should_block is not True and button is not None and not ctas
+        hrefs = [button.get("href") for button in page.buttons]
+        return self._check(
+            "Bouton Commander vers le checkout",
+            passed,
+            f"should_block={page.should_block}, boutons={hrefs}, CTA de test={len(ctas)}",
+            page.result,
+        )
+
+    def open_checkout(self, expected_fragment: str) -> Dict:
+        """Ouvre le checkout et vérifie l'URL finale après redirections"""
+        result = self.user.get(self.checkout_path)
+        return self._check(
+            f"Checkout → {expected_fragment}",
+            result.ok and expected_fragment in result.final_url,
+            result.error or f"URL finale {result.final_url} ({len(result.hops)} saut(s))",
+            result,
+        )
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Simulateur de parcours apprenants concurrents sur ProgressStorage
+Des workers PHP (`wp eval-file` parallèles) font avancer en entrelacement
+des milliers de parcours cart → form → checkout → completed (ou abandon)
+via start / update_step / add_data / complete / mark_abandoned, après un
+départ synchronisé sur l'horloge du serveur. Des jetons « chauds »
+partagés reçoivent des add_data concurrents de tous les workers : chaque
+clé absente à la fin est une mise à jour perdue (lecture-modification-
+écriture du JSON collected_data).
+
+ProgressStorage ne garde que les chiffres du jeton après start() : les
+jetons HMAC alphanumériques ne retrouvent plus leur ligne. Une sonde le
+mesure, puis chaque ligne simulée reçoit un jeton numérique préfixé
+(même convention que table_seeder).
+"""
+
+from typing import Dict, List
+
+from load_generator import percentile
+from wp_batch import php_string
+
+
+SIM_BEGIN = "__E2E_JOURNEYS_BEGIN__"
+SIM_END = "__E2E_JOURNEYS_END__"
+
+# Préfixe des jetons simulés, distinct de SEED_TOKEN_PREFIX (nettoyage par LIKE)
+SIM_TOKEN_PREFIX = "9980000000"
+HOT_WORKER = 99
+
+WRITE_OPS = ["start", "update_step", "add_data", "complete", "mark_abandoned"]
+
+_PREAMBLE = f"""<?php
+use WcQualiopiFormation\\Core\\Constants;
+use WcQualiopiFormation\\Data\\Progress\\ProgressStorage;
+use WcQualiopiFormation\\Helpers\\SanitizationHelper;
+
+global $wpdb;
+$table = Constants::get_table_name( Constants::TABLE_PROGRESS );
+$like  = $wpdb->esc_like( {php_string(SIM_TOKEN_PREFIX)} ) . '%';
+// Jeton numérique retrouvable par ProgressStorage (sanitize_siret)
+$sim_token = function ( $worker, $index ) {{
+	return sprintf( '%s%02d%010d', {php_string(SIM_TOKEN_PREFIX)}, $worker, $index );
+}};
+// Ligne créée par start(), jeton remplacé par sa version simulée
+$start_row = function ( $user_id, $product_id, $token ) use ( $wpdb, $table ) {{
+	$row = ProgressStorage::start( $user_id, $product_id, '', array( 'source' => 'bench' ) );
+	if ( false === $row ) {{
+		return false;
+	}}
+	$wpdb->update( $table, array( 'token' => $token ), array( 'id' => $row['id'] ), array( '%s' ), array( '%d' ) );
+	return $row;
+}};
+$table_status = function () use ( $wpdb, $table ) {{
+	$status = $wpdb->get_row( $wpdb->prepare( 'SHOW TABLE STATUS LIKE %s', $table ), ARRAY_A );
+	$locks  = array();
+	foreach ( (array) $wpdb->get_results( "SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'", ARRAY_A ) as $row ) {{
+		$locks[ $row['Variable_name'] ] = (int) $row['Value'];
+	}}
+	return array(
+		'rows'         => $status ? (int) $status['Rows'] : null,
+		'data_length'  => $status ? (int) $status['Data_length'] : null,
+		'index_length' => $status ? (int) $status['Index_length'] : null,
+		'avg_row'      => $status ? (int) $status['Avg_row_length'] : null,
+		'row_locks'    => $locks,
+	);
+}};
+"""
+
+
+def setup_php(run_as: int, product_id: int, hot_tokens: int) -> str:
+    """
+    Sonde du jeton HMAC, création des lignes chaudes, état initial de la
+    table et heure du serveur (référence du départ synchronisé)
+    """
+    return _PREAMBLE + f"""
+wp_set_current_user( {int(run_as)} );
+$report = array( 'errors' => array() );
+
+// Un parcours avec le jeton réel de start() : update_step retrouve-t-il la ligne ?
+$row = ProgressStorage::start( {int(run_as)}, {int(product_id)} );
+if ( false === $row ) {{
+	$report['errors'][] = 'ProgressStorage::start() refusé (utilisateur {int(run_as)} sans droit ?) : ' . $wpdb->last_error;
+}} else {{
+	ProgressStorage::update_step( $row['token'], Constants::STEP_FORM );
+	$report['plugin_token'] = array(
+		'survives_sanitize' => SanitizationHelper::sanitize_siret( $row['token'] ) === $row['token'],
+		'update_step_rows'  => (int) $wpdb->rows_affected,
+	);
+	$wpdb->delete( $table, array( 'id' => $row['id'] ), array( '%d' ) );
+}}
+
+$report['before'] = $table_status();
+$wpdb->query( $wpdb->prepare( "DELETE FROM {{$table}} WHERE token LIKE %s", $like ) );
+for ( $i = 0; $i < {int(hot_tokens)}; $i++ ) {{
+	if ( false === $start_row( 0, {int(product_id)}, $sim_token( {HOT_WORKER}, $i ) ) ) {{
+		$report['errors'][] = "Ligne chaude $i non créée : " . $wpdb->last_error;
+	}}
+}}
+$report['server_time'] = microtime( true );
+
+echo {php_string(SIM_BEGIN)} . wp_json_encode( $report ) . {php_string(SIM_END)};
+"""
+
+
+def worker_php(
+    worker: int,
+    journeys: int,
+    run_as: int,
+    product_id: int,
+    abandon_rate: float,
+    hot_tokens: int,
+    hot_writes: int,
+    start_at: float,
+    seed: int,
+) -> str:
+    """
+    Un worker : attente du départ commun, add_data concurrents sur les
+    jetons chauds, puis `journeys` parcours entrelacés (tour à tour, une
+    étape chacun) ; latences en ms et écritures sans ligne par méthode
+    """
+    return _PREAMBLE + f"""
+wp_set_current_user( {int(run_as)} );
+mt_srand( {int(seed)} + {int(worker)} );
+$worker    = {int(worker)};
+$latencies = array();
+$missed    = array();
+$errors    = array();
+
+// rows_affected : la dernière requête des méthodes d'écriture est leur UPDATE
+$call = function ( $op, $callable ) use ( $wpdb, &$latencies, &$missed, &$errors ) {{
+	$wpdb->last_error = '';
+	$start  = microtime( true );
+	$result = call_user_func( $callable );
+	$latencies[ $op ][] = round( ( microtime( true ) - $start ) * 1000, 3 );
+	if ( false === $result || '' !== $wpdb->last_error ) {{
+		$errors[ $op ] = ( $errors[ $op ] ?? 0 ) + 1;
+	}} elseif ( 'start' !== $op && 0 === (int) $wpdb->rows_affected ) {{
+		$missed[ $op ] = ( $missed[ $op ] ?? 0 ) + 1;
+	}}
+	return $result;
+}};
+
+$late = microtime( true ) > {float(start_at)!r};
+if ( ! $late ) {{
+	time_sleep_until( {float(start_at)!r} );
+}}
+$started = microtime( true );
+
+// Jetons chauds : clés distinctes par worker, aucune ne devrait disparaître
+for ( $i = 0; $i < {int(hot_writes)}; $i++ ) {{
+	for ( $hot = 0; $hot < {int(hot_tokens)}; $hot++ ) {{
+		$token = $sim_token( {HOT_WORKER}, $hot );
+		$call( 'add_data', function () use ( $token, $worker, $i ) {{
+			return ProgressStorage::add_data( $token, "w{{$worker}}_{{$i}}", 'ok' );
+		}} );
+	}}
+}}
+
+// Parcours : plan d'appels complet ou interrompu puis marqué abandonné
+$steps = array(
+	array( 'update_step', Constants::STEP_FORM ),
+	array( 'add_data', 'personal', array( 'first_name' => 'Camille', 'last_name' => 'Martin' ) ),
+	array( 'add_data', 'company', array( 'name' => 'Formation Conseil', 'city' => 'Lyon' ) ),
+	array( 'update_step', Constants::STEP_CHECKOUT ),
+	array( 'add_data', 'form', array( 'entry' => 'positionnement', 'score' => 'bon' ) ),
+	array( 'complete' ),
+);
+$active   = array();
+$outcomes = array( 'completed' => 0, 'abandoned' => 0, 'failed' => 0 );
+for ( $j = 0; $j < {int(journeys)}; $j++ ) {{
+	$plan = $steps;
+	if ( mt_rand() / mt_getrandmax() < {float(abandon_rate)!r} ) {{
+		$plan   = array_slice( $steps, 0, mt_rand( 0, count( $steps ) - 1 ) );
+		$plan[] = array( 'mark_abandoned' );
+	}}
+	$active[] = array( 'token' => $sim_token( $worker, $j ), 'user' => 900000000 + $worker * 1000000 + $j, 'plan' => $plan, 'next' => -1 );
+}}
+while ( $active ) {{
+	foreach ( $active as $key => &$journey ) {{
+		$token = $journey['token'];
+		if ( -1 === $journey['next'] ) {{
+			$ok = $call( 'start', function () use ( $start_row, $journey, $token ) {{
+				return $start_row( $journey['user'], {int(product_id)}, $token );
+			}} );
+		}} else {{
+			$step = $journey['plan'][ $journey['next'] ];
+			switch ( $step[0] ) {{
+				case 'update_step':
+					$ok = $call( 'update_step', function () use ( $token, $step ) {{
+						return ProgressStorage::update_step( $token, $step[1] );
+					}} );
+					break;
+				case 'add_data':
+					$ok = $call( 'add_data', function () use ( $token, $step ) {{
+						return ProgressStorage::add_data( $token, $step[1], $step[2] );
+					}} );
+					break;
+				case 'complete':
+					$ok = $call( 'complete', function () use ( $token, $journey ) {{
+						return ProgressStorage::complete( $token, $journey['user'] );
+					}} );
+					break;
+				default:
+					$ok = $call( 'mark_abandoned', function () use ( $token ) {{
+						return ProgressStorage::mark_abandoned( $token );
+					}} );
+			}}
+		}}
+		$journey['next']++;
+		if ( false === $ok ) {{
+			$outcomes['failed']++;
+			unset( $active[ $key ] );
+		}} elseif ( $journey['next'] >= count( $journey['plan'] ) ) {{
+			$outcomes[ 'mark_abandoned' === end( $journey['plan'] )[0] ? 'abandoned' : 'completed' ]++;
+			unset( $active[ $key ] );
+		}}
+	}}
+	unset( $journey );
+}}
+
+echo {php_string(SIM_BEGIN)} . wp_json_encode( array(
+	'worker'    => $worker,
+	'late'      => $late,
+	'started'   => $started,
+	'ended'     => microtime( true ),
+	'latencies' => $latencies,
+	'missed'    => $missed,
+	'errors'    => $errors,
+	'outcomes'  => $outcomes,
+) ) . {php_string(SIM_END)};
+"""
+
+
+def finish_php(hot_tokens: int) -> str:
+    """État final : clés présentes sur les jetons chauds, lignes simulées, table"""
+    return _PREAMBLE + f"""
+$hot = array();
+for ( $i = 0; $i < {int(hot_tokens)}; $i++ ) {{
+	$data  = ProgressStorage::get( $sim_token( {HOT_WORKER}, $i ) );
+	$hot[] = $data && is_array( $data['collected_data'] ) ? count( $data['collected_data'] ) - 1 : 0;
+}}
+$rows = $wpdb->get_row( $wpdb->prepare(
+	"SELECT COUNT(*) AS total, SUM( is_completed ) AS completed, SUM( is_abandoned ) AS abandoned,
+		SUM( current_step = %s ) AS at_cart, AVG( LENGTH( collected_data ) ) AS avg_data, MAX( LENGTH( collected_data ) ) AS max_data
+	FROM {{$table}} WHERE token LIKE %s",
+	Constants::STEP_CART,
+	$like
+), ARRAY_A );
+
+echo {php_string(SIM_BEGIN)} . wp_json_encode( array( 'hot_keys' => $hot, 'rows' => $rows, 'after' => $table_status() ) ) . {php_string(SIM_END)};
+"""
+
+
+def cleanup_php() -> str:
+    """Suppression des lignes simulées (jetons SIM_TOKEN_PREFIX*)"""
+    return _PREAMBLE + f"""
+$deleted = $wpdb->query( $wpdb->prepare( "DELETE FROM {{$table}} WHERE token LIKE %s", $like ) );
+echo {php_string(SIM_BEGIN)} . wp_json_encode( array( 'deleted' => (int) $deleted ) ) . {php_string(SIM_END)};
+"""
+
+
+def summarize_workers(workers: List[Dict]) -> Dict:
+    """
+    Fusionne les sorties des workers : latences par méthode, écritures par
+    seconde sur la fenêtre commune, écritures sans ligne, issues des parcours
+    """
+    operations = {}
+    for op in WRITE_OPS:
+        values = sorted(value for worker in workers for value in worker["latencies"].get(op, []))
+        if not values:
+            continue
+        operations[op] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1],
+            "errors": sum(worker["errors"].get(op, 0) for worker in workers),
+            "missed": sum(worker["missed"].get(op, 0) for worker in workers),
+        }
+
+    window = max(worker["ended"] for worker in workers) - min(worker["started"] for worker in workers)
+    writes = sum(entry["count"] for entry in operations.values())
+    outcomes = {
+        key: sum(worker["outcomes"][key] for worker in workers) for key in ("completed", "abandoned", "failed")
+    }
+    return {
+        "workers": len(workers),
+        "late_workers": sum(1 for worker in workers if worker["late"]),
+        "window_s": window,
+        "writes": writes,
+        "writes_per_s": writes / window if window > 0 else None,
+        "operations": operations,
+        "outcomes": outcomes,
+    }
+
+
+def lost_updates(hot_keys: List[int], expected_per_token: int) -> Dict:
+    """Clés attendues / présentes sur les jetons chauds"""
+    expected = expected_per_token * len(hot_keys)
+    present = sum(hot_keys)
+    return {
+        "expected": expected,
+        "present": present,
+        "lost": expected - present,
+        "lost_rate": (expected - present) / expected * 100 if expected else 0.0,
+    }
+
+
+def lock_waits(before: Dict, after: Dict) -> Dict:
+    """Écart des compteurs InnoDB Innodb_row_lock_* (globaux au serveur)"""
+    delta = {
+        name: after["row_locks"].get(name, 0) - value
+        for name, value in before["row_locks"].items()
+        if name != "Innodb_row_lock_current_waits"
+    }
+    waits = delta.get("Innodb_row_lock_waits", 0)
+    return {
+        "waits": waits,
+        "time_ms": delta.get("Innodb_row_lock_time", 0),
+        "avg_ms": delta.get("Innodb_row_lock_time", 0) / waits if waits else 0.0,
+        "max_ms": after["row_locks"].get("Innodb_row_lock_time_max"),
+    }
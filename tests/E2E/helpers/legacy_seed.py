@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Génération de données héritées (wc_qualiopi_steps / gravity_forms_siren_autocomplete)
+à grande échelle pour mesurer DataMigrator
+Tout se passe dans un seul `wp eval-file` : amorçage des options wcqs_* /
+gf_siren_* et de la table gf_siren_tracking, migration mesurée (temps,
+mémoire, requêtes), vérification des données wcqf_* puis restauration.
+"""
+
+from typing import Dict, List
+
+from wp_batch import php_string
+
+
+MIGRATION_BEGIN = "__E2E_MIGRATION_BEGIN__"
+MIGRATION_END = "__E2E_MIGRATION_END__"
+
+# Plage d'entry_id réservée aux lignes synthétiques (nettoyage ciblé)
+ENTRY_ID_BASE = 9_000_000_000
+
+# Miroir de DataMigrator::$wcqs_options / $gfsa_options
+WCQS_OPTIONS = {
+    "wcqs_flags": "wcqf_flags",
+    "wcqs_testpos_mapping": "wcqf_testpos_mapping",
+    "wcqs_hmac_secret": "wcqf_hmac_secret",
+    "wcqs_hmac_secret_prev": "wcqf_hmac_secret_prev",
+    "wcqs_key_version": "wcqf_key_version",
+    "wcqs_log_level": "wcqf_log_level",
+}
+GFSA_OPTIONS = {
+    "gf_siren_settings": "wcqf_form_settings",
+    "gf_siren_api_key": "wcqf_siren_api_key",
+}
+MIGRATION_FLAGS = ["wcqf_migration_completed", "wcqf_migration_date"]
+
+
+def touched_options() -> List[str]:
+    """Options sauvegardées avant l'amorçage et restaurées ensuite"""
+    names = []
+    for mapping in (WCQS_OPTIONS, GFSA_OPTIONS):
+        names += list(mapping) + list(mapping.values())
+    return names + MIGRATION_FLAGS
+
+
+def _php_array(mapping: Dict[str, str]) -> str:
+    return "array( " + ", ".join(f"{php_string(old)} => {php_string(new)}" for old, new in mapping.items()) + " )"
+
+
+def migration_bench_php(entries: int, tracking_rows: int, insert_batch: int = 1000) -> str:
+    """
+    Script `wp eval-file` : amorce `entries` mappings produit → test et
+    formulaires, `tracking_rows` lignes gf_siren_tracking, mesure
+    DataMigrator::run_migration() et contrôle le résultat
+    """
+    options = ", ".join(php_string(name) for name in touched_options())
+    return f"""<?php
+global $wpdb;
+
+$entries      = {int(entries)};
+$rows         = {int(tracking_rows)};
+$batch        = {max(1, int(insert_batch))};
+$entry_base   = {ENTRY_ID_BASE};
+$legacy_table = $wpdb->prefix . 'gf_siren_tracking';
+$new_table    = $wpdb->prefix . 'wcqf_tracking';
+$options      = array( {options} );
+$wcqs_map     = {_php_array(WCQS_OPTIONS)};
+$finish       = function ( $data ) {{
+	echo {php_string(MIGRATION_BEGIN)} . wp_json_encode( $data ) . {php_string(MIGRATION_END)};
+}};
+
+if ( $wpdb->get_var( "SHOW TABLES LIKE '{{$legacy_table}}'" ) === $legacy_table ) {{
+	$finish( array( 'error' => "Table {{$legacy_table}} déjà présente : données réelles, benchmark refusé" ) );
+	return;
+}}
+
+$snapshot = array();
+foreach ( $options as $name ) {{
+	$snapshot[ $name ] = get_option( $name, null );
+}}
+
+// Amorçage des données héritées
+$seed_start = microtime( true );
+$mapping    = array();
+$forms      = array();
+for ( $i = 0; $i < $entries; $i++ ) {{
+	$mapping[ 100000 + $i ] = 200000 + $i;
+	$forms[ 1000 + $i ]     = array(
+		'siret'            => '1',
+		'denomination'     => '3',
+		'adresse'          => '4',
+		'prenom'           => '7.3',
+		'nom'              => '7.6',
+		'mentions_legales' => '12',
+	);
+}}
+$legacy = array(
+	'wcqs_flags'            => array( 'enforce_cart' => true, 'enable_logging' => true ),
+	'wcqs_testpos_mapping'  => $mapping,
+	'wcqs_hmac_secret'      => wp_generate_password( 64, false ),
+	'wcqs_hmac_secret_prev' => wp_generate_password( 64, false ),
+	'wcqs_key_version'      => 2,
+	'wcqs_log_level'        => 'info',
+	'gf_siren_settings'     => array(
+		'form_mappings'  => $forms,
+		'tracked_forms'  => array_keys( $forms ),
+		'cache_duration' => 86400,
+		'legacy_debug'   => true,
+	),
+	'gf_siren_api_key'      => wp_generate_password( 40, false ),
+);
+foreach ( $options as $name ) {{
+	delete_option( $name );
+}}
+foreach ( $legacy as $name => $value ) {{
+	add_option( $name, $value );
+}}
+
+$wpdb->query(
+	"CREATE TABLE {{$legacy_table}} (
+		id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+		form_id INT NOT NULL,
+		entry_id BIGINT UNSIGNED,
+		fields_data LONGTEXT,
+		created_at DATETIME NOT NULL,
+		user_ip VARCHAR(45),
+		user_agent TEXT
+	) " . $wpdb->get_charset_collate()
+);
+for ( $offset = 0; $offset < $rows; $offset += $batch ) {{
+	$values = array();
+	for ( $i = $offset; $i < min( $rows, $offset + $batch ); $i++ ) {{
+		$values[] = $wpdb->prepare(
+			'(%d, %d, %s, %s, %s, %s)',
+			1000 + $i % max( 1, $entries ),
+			$entry_base + $i,
+			wp_json_encode( array( '1' => sprintf( '%014d', $i ), '3' => 'SOCIETE E2E ' . $i ) ),
+			gmdate( 'Y-m-d H:i:s', 1700000000 + $i * 60 ),
+			'192.0.2.' . ( $i % 250 + 1 ),
+			'Mozilla/5.0 (E2E legacy seed)'
+		);
+	}}
+	$wpdb->query( "INSERT INTO {{$legacy_table}} (form_id, entry_id, fields_data, created_at, user_ip, user_agent) VALUES " . implode( ',', $values ) );
+}}
+$seed_seconds = microtime( true ) - $seed_start;
+
+// Migration mesurée (même appel que Activator::run_data_migration)
+$report = array( 'entries' => $entries, 'tracking_rows' => $rows, 'seed_seconds' => $seed_seconds );
+try {{
+	wp_cache_flush();
+	if ( function_exists( 'memory_reset_peak_usage' ) ) {{
+		memory_reset_peak_usage();
+	}}
+	$queries_before = $wpdb->num_queries;
+	$memory_before  = memory_get_usage();
+	$start          = microtime( true );
+	$results        = ( new \\WcQualiopiFormation\\Core\\DataMigrator() )->run_migration();
+	$report['migration'] = array(
+		'seconds'      => microtime( true ) - $start,
+		'queries'      => $wpdb->num_queries - $queries_before,
+		'memory_delta' => memory_get_usage() - $memory_before,
+		'memory_peak'  => memory_get_peak_usage(),
+		'results'      => $results,
+		'last_error'   => $wpdb->last_error,
+	);
+
+	// Contrôle des données migrées
+	wp_cache_flush();
+	$checks = array();
+	foreach ( $wcqs_map as $old => $new ) {{
+		$checks[] = array(
+			'name'   => "{{$old}} → {{$new}}",
+			'passed' => maybe_serialize( get_option( $new, null ) ) === maybe_serialize( $legacy[ $old ] ),
+		);
+	}}
+	$expected_settings = array_intersect_key( $legacy['gf_siren_settings'], array_flip( array( 'form_mappings', 'tracked_forms', 'cache_duration' ) ) );
+	$checks[] = array(
+		'name'   => 'gf_siren_settings → wcqf_form_settings',
+		'passed' => maybe_serialize( get_option( 'wcqf_form_settings', null ) ) === maybe_serialize( $expected_settings ),
+	);
+	$checks[] = array(
+		'name'   => 'gf_siren_api_key → wcqf_siren_api_key',
+		'passed' => get_option( 'wcqf_siren_api_key', null ) === $legacy['gf_siren_api_key'],
+	);
+	$migrated   = (int) $wpdb->get_var( $wpdb->prepare( "SELECT COUNT(*) FROM {{$new_table}} WHERE entry_id >= %d", $entry_base ) );
+	$mismatched = (int) $wpdb->get_var(
+		$wpdb->prepare(
+			"SELECT COUNT(*) FROM {{$legacy_table}} o JOIN {{$new_table}} n ON n.entry_id = o.entry_id
+			WHERE o.entry_id >= %d AND ( n.form_id <> o.form_id OR n.form_data <> o.fields_data OR n.submitted_at <> o.created_at )",
+			$entry_base
+		)
+	);
+	$checks[] = array(
+		'name'   => "gf_siren_tracking → wcqf_tracking ({{$migrated}}/{{$rows}} lignes, {{$mismatched}} divergentes)",
+		'passed' => $migrated === $rows && 0 === $mismatched,
+	);
+	$checks[] = array(
+		'name'   => 'wcqf_migration_completed',
+		'passed' => (bool) get_option( 'wcqf_migration_completed', false ),
+	);
+	$report['checks'] = $checks;
+}} catch ( \\Throwable $e ) {{
+	$report['error'] = get_class( $e ) . ' : ' . $e->getMessage();
+}} finally {{
+	// Restauration : lignes synthétiques, table héritée, options d'origine
+	$wpdb->query( $wpdb->prepare( "DELETE FROM {{$new_table}} WHERE entry_id >= %d", $entry_base ) );
+	$wpdb->query( "DROP TABLE IF EXISTS {{$legacy_table}}" );
+	foreach ( $options as $name ) {{
+		delete_option( $name );
+		if ( null !== $snapshot[ $name ] ) {{
+			add_option( $name, $snapshot[ $name ] );
+		}}
+	}}
+}}
+
+$finish( $report );
+"""
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge : utilisateurs virtuels concurrents sur le tunnel
+panier (CartGuard / CartRestriction / CartBlocker)
+Montée en charge progressive puis palier (soak), statistiques par étape.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from event_store import Reservoir
+from http_driver import CartFlow, ConnectionPool, VirtualUser
+
+
+# Étapes d'un parcours, dans l'ordre
+JOURNEY_STEPS = [
+    "add_to_cart",
+    "view_cart",
+    "blocked_checkout",
+    "validate_test",
+    "unblocked_checkout",
+]
+
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """Percentile (interpolation linéaire) d'une liste déjà triée"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * rank / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+class LoadProfile:
+    """
+    Profil de charge : `users` VU démarrés sur `ramp_up` secondes, puis
+    maintenus pendant `soak` secondes (0 = un seul parcours par VU)
+    """
+
+    def __init__(self, users: int = 10, ramp_up: float = 5.0, soak: float = 0.0, think_time: float = 0.0):
+        self.users = users
+        self.ramp_up = ramp_up
+        self.soak = soak
+        self.think_time = think_time
+
+    def start_delay(self, index: int) -> float:
+        """Décalage de démarrage du VU n° index (montée linéaire)"""
+        if self.users <= 1:
+            return 0.0
+        return self.ramp_up * index / (self.users - 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "users": self.users,
+            "ramp_up": self.ramp_up,
+            "soak": self.soak,
+            "think_time": self.think_time,
+        }
+
+
+# Latences gardées par étape (échantillon uniforme) : mémoire bornée en soak
+LATENCY_SAMPLES = 2000
+
+
+class StepStats:
+    """
+    Latences et erreurs d'une étape, alimentées par plusieurs threads ;
+    percentiles estimés sur un Reservoir, nombre et maximum exacts
+    """
+
+    def __init__(self, name: str, samples: int = LATENCY_SAMPLES):
+        self.name = name
+        self.latencies = Reservoir(samples)
+        self.max_latency = 0.0
+        self.errors = 0
+        self.error_samples: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, passed: bool, detail: str = ""):
+        with self._lock:
+            self.latencies.add(elapsed)
+            self.max_latency = max(self.max_latency, elapsed)
+            if not passed:
+                self.errors += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(detail)
+
+    def summary(self, duration: float) -> Dict:
+        """Débit, percentiles (ms) et taux d'erreur de l'étape"""
+        with self._lock:
+            values = sorted(self.latencies.values)
+            count = self.latencies.count
+        return {
+            "step": self.name,
+            "count": count,
+            "errors": self.errors,
+            "error_rate": (self.errors / count * 100) if count else 0.0,
+            "throughput": count / duration if duration > 0 else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": self.max_latency * 1000,
+            "error_samples": list(self.error_samples),
+        }
+
+
+# N'existe que sur CartStubServer : un site réel exige son propre mécanisme de validation
+STUB_VALIDATE_PATH = "/wcqf-validate/?product_id={product_id}"
+
+
+def make_path_validator(path_template: str = STUB_VALIDATE_PATH) -> Callable[[CartFlow, int, str], Dict]:
+    """
+    Validateur de test par URL : visite la page de test puis le chemin de
+    validation (par défaut celui du serveur de remplacement) ; la durée
+    mesurée couvre les deux requêtes
+    """
+
+    def validate(flow: CartFlow, product_id: int, test_page: str) -> Dict:
+        page = flow.user.get(test_page)
+        if not page.ok:
+            return CartFlow._check(
+                "Validation du test", False, page.error or f"page de test HTTP {page.status}", page
+            )
+        result = flow.user.get(path_template.format(product_id=product_id))
+        check = CartFlow._check(
+            "Validation du test",
+            result.ok,
+            result.error or f"page de test HTTP {page.status}, validation HTTP {result.status}",
+            result,
+        )
+        check["timing"]["elapsed_ms"] = round((page.elapsed + result.elapsed) * 1000, 2)
+        check["timing"]["test_page"] = page.to_dict()
+        return check
+
+    return validate
+
+
+class CartLoadGenerator:
+    """
+    Lance les VU selon le profil ; chaque parcours : ajout panier, panier,
+    checkout bloqué, validation du test, checkout débloqué
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        product_id: int,
+        test_page: str,
+        profile: LoadProfile,
+        validator: Optional[Callable[[CartFlow, int, str], Dict]] = None,
+        verify_tls: bool = True,
+    ):
+        self.base_url = base_url
+        self.product_id = product_id
+        self.test_page = test_page
+        self.profile = profile
+        self.validator = validator or make_path_validator()
+        self.pool = ConnectionPool(max_per_host=max(16, profile.users), verify_tls=verify_tls)
+        self.stats = {step: StepStats(step) for step in JOURNEY_STEPS}
+        self.journeys = 0
+        self._journeys_lock = threading.Lock()
+        self.duration = 0.0
+
+    def _timed(self, step: str, check: Dict) -> bool:
+        self.stats[step].record(
+            check["timing"]["elapsed_ms"] / 1000, check["passed"], check["detail"]
+        )
+        return check["passed"]
+
+    def preflight(self) -> Dict:
+        """
+        Un parcours d'essai, hors statistiques, jusqu'à la validation :
+        détecte un mécanisme de validation absent avant de lancer la charge
+        """
+        flow = CartFlow(VirtualUser(self.base_url, self.pool, "preflight"))
+        added = flow.add_to_cart(self.product_id)
+        if not added["passed"]:
+            return added
+        return self.validator(flow, self.product_id, self.test_page)
+
+    def run_journey(self, index: int):
+        """Un parcours complet pour un nouvel utilisateur virtuel"""
+        flow = CartFlow(VirtualUser(self.base_url, self.pool, f"vu{index}"))
+
+        if not self._timed("add_to_cart", flow.add_to_cart(self.product_id)):
+            return
+        cart_check, page = flow.view_cart()
+        blocked = flow.check_blocked(page)[0]
+        self._timed("view_cart", dict(cart_check, passed=cart_check["passed"] and blocked["passed"]))
+        self._timed("blocked_checkout", flow.open_checkout(self.test_page))
+        if not self._timed("validate_test", self.validator(flow, self.product_id, self.test_page)):
+            return
+        self._timed("unblocked_checkout", flow.open_checkout(flow.checkout_path))
+
+        with self._journeys_lock:
+            self.journeys += 1
+
+    def _virtual_user(self, index: int, started: float, deadline: Optional[float]):
+        time.sleep(max(0.0, started + self.profile.start_delay(index) - time.monotonic()))
+        while True:
+            self.run_journey(index)
+            if deadline is None or time.monotonic() >= deadline:
+                return
+            if self.profile.think_time:
+                time.sleep(self.profile.think_time)
+
+    def run(self) -> Dict:
+        """Exécute le profil complet et retourne le rapport agrégé"""
+        started = time.monotonic()
+        deadline = None
+        if self.profile.soak > 0:
+            deadline = started + self.profile.ramp_up + self.profile.soak
+
+        threads = [
+            threading.Thread(target=self._virtual_user, args=(index, started, deadline), daemon=True)
+            for index in range(self.profile.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.duration = time.monotonic() - started
+        self.pool.close()
+        return self.report()
+
+    def report(self) -> Dict:
+        return {
+            "profile": self.profile.to_dict(),
+            "duration": self.duration,
+            "journeys": self.journeys,
+            "journeys_per_second": self.journeys / self.duration if self.duration else 0.0,
+            "connections": {"created": self.pool.created, "reused": self.pool.reused},
+            "steps": [self.stats[step].summary(self.duration) for step in JOURNEY_STEPS],
+        }
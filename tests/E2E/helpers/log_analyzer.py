@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Analyseur des logs JSON monoligne de LoggingHelper
+Lecture en flux via mmap (fichiers de plusieurs Go sans les charger en
+mémoire), balayage inverse depuis la fin, filtres (niveau, request_id,
+plage horaire), agrégats (erreurs par module, durée par requête) et
+résumés compacts intégrables aux rapports E2E.
+
+Formats reconnus : JSON brut, préfixe error_log "[17-Oct-2026 10:00:00 UTC] {...}"
+et lignes WooCommerce "2026-10-17T10:00:00+00:00 INFO {...}".
+"""
+
+import json
+import mmap
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Ordre de gravité des niveaux LoggingHelper
+LEVELS = ["debug", "info", "notice", "warning", "error", "critical"]
+ERROR_LEVELS = {"error", "critical"}
+
+# Tolérance sur l'ordre chronologique (écritures concurrentes)
+ORDER_SLACK = timedelta(seconds=60)
+
+_RELATIVE = re.compile(r"^(\d+)([smhd])$")
+_NORMALIZE = re.compile(r"\d+")
+
+
+def parse_time(value: str) -> datetime:
+    """Date ISO 8601 ou durée relative ("15m", "2h", "1d") avant maintenant"""
+    match = _RELATIVE.match(value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = amount * {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+        return datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def record_time(record: Dict) -> Optional[datetime]:
+    """Horodatage d'un enregistrement (None si absent ou illisible)"""
+    value = record.get("timestamp")
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def parse_line(line: bytes) -> Optional[Dict]:
+    """Décode l'objet JSON d'une ligne (None si la ligne n'est pas un log du plugin)"""
+    start = line.find(b"{")
+    if start == -1:
+        return None
+    try:
+        record = json.loads(line[start:])
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "level" not in record:
+        return None
+    return record
+
+
+def module_of(record: Dict) -> str:
+    """Module : namespace de la classe source, sinon préfixe [Module] du message, sinon channel"""
+    cls = record.get("class")
+    if isinstance(cls, str) and cls:
+        parts = cls.split("\\")
+        if parts[0] == "WcQualiopiFormation":
+            parts = parts[1:]
+        return "/".join(parts[:-1]) or parts[-1]
+    message = str(record.get("message", ""))
+    if message.startswith("["):
+        end = message.find("]")
+        if end > 1:
+            return message[1:end]
+    return str(record.get("channel", "inconnu"))
+
+
+class LogFilter:
+    """
+    Critères de sélection ; `prefilter` écarte les lignes sur les octets
+    bruts avant tout décodage JSON (l'essentiel du gain sur gros fichiers)
+    """
+
+    def __init__(
+        self,
+        levels: Optional[List[str]] = None,
+        min_level: Optional[str] = None,
+        request_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        module: Optional[str] = None,
+        pattern: Optional[str] = None,
+    ):
+        if min_level:
+            levels = LEVELS[LEVELS.index(min_level):]
+        self.levels = {level.lower() for level in levels} if levels else None
+        self.request_ids = set(request_ids) if request_ids else None
+        self.since = since
+        self.until = until
+        self.module = module
+        self.pattern = re.compile(pattern) if pattern else None
+        self._level_tokens = (
+            [f'"level":"{level}"'.encode() for level in self.levels] if self.levels else None
+        )
+        self._request_tokens = (
+            [request_id.encode() for request_id in self.request_ids] if self.request_ids else None
+        )
+
+    def prefilter(self, line: bytes) -> bool:
+        if self._level_tokens and not any(token in line for token in self._level_tokens):
+            return False
+        if self._request_tokens and not any(token in line for token in self._request_tokens):
+            return False
+        return True
+
+    def matches(self, record: Dict, moment: Optional[datetime]) -> bool:
+        if self.levels and str(record.get("level", "")).lower() not in self.levels:
+            return False
+        if self.request_ids and record.get("request_id") not in self.request_ids:
+            return False
+        if moment is not None:
+            if self.since and moment < self.since:
+                return False
+            if self.until and moment > self.until:
+                return False
+        if self.module and module_of(record) != self.module:
+            return False
+        if self.pattern and not self.pattern.search(str(record.get("message", ""))):
+            return False
+        return True
+
+
+class LogFile:
+    """Fichier de logs projeté en mémoire (lecture seule, pages chargées à la demande)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = self._file.seek(0, 2)
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "LogFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lines(self, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """(offset, ligne) du début vers la fin, à partir de `start`"""
+        mm = self.mm
+        if mm is None:
+            return
+        position = start
+        while position < self.size:
+            end = mm.find(b"\n", position)
+            if end == -1:
+                end = self.size
+            if end > position:
+                yield position, mm[position:end]
+            position = end + 1
+
+    def lines_reversed(self, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """(offset, ligne) de la fin vers le début"""
+        mm = self.mm
+        if mm is None:
+            return
+        stop = self.size if end is None else end
+        while stop > 0:
+            start = mm.rfind(b"\n", 0, stop) + 1
+            if stop > start:
+                line = mm[start:stop].rstrip(b"\r")
+                if line:
+                    yield start, line
+            stop = start - 1
+
+    def _line_at(self, offset: int) -> Tuple[int, int]:
+        """Bornes de la première ligne complète commençant à ou après `offset`"""
+        mm = self.mm
+        if offset > 0:
+            previous = mm.find(b"\n", offset - 1)
+            offset = self.size if previous == -1 else previous + 1
+        end = mm.find(b"\n", offset)
+        return offset, self.size if end == -1 else end
+
+    def offset_for_time(self, since: datetime) -> int:
+        """
+        Recherche dichotomique du premier offset dont l'horodatage est ≥ `since`
+        (fichier supposé chronologique à ORDER_SLACK près)
+        """
+        if self.mm is None:
+            return 0
+        target = since - ORDER_SLACK
+        low, high = 0, self.size
+        while high - low > 4096:
+            middle = (low + high) // 2
+            start, end = self._line_at(middle)
+            moment = None
+            # Saute les lignes non JSON (notices PHP) jusqu'à un horodatage lisible
+            while start < high and moment is None:
+                record = parse_line(self.mm[start:end])
+                moment = record_time(record) if record else None
+                if moment is None:
+                    start, end = self._line_at(end + 1)
+            if moment is None or moment >= target:
+                high = middle
+            else:
+                low = middle
+        return self._line_at(low)[0] if low else 0
+
+
+def scan(
+    path: str,
+    log_filter: Optional[LogFilter] = None,
+    reverse: bool = False,
+    limit: Optional[int] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Dict]:
+    """
+    Enregistrements correspondant au filtre
+
+    `reverse=True` : balayage depuis la fin (tail-first), arrêté dès que
+    l'on passe sous `since`. Sinon, démarrage à l'offset de `since` par
+    dichotomie et arrêt après `until`. `stats` reçoit les compteurs de lignes.
+    """
+    log_filter = log_filter or LogFilter()
+    stats = stats if stats is not None else {}
+    stats.setdefault("lines", 0)
+    stats.setdefault("parsed", 0)
+    stats.setdefault("unparsed", 0)
+    yielded = 0
+
+    with LogFile(path) as log_file:
+        if reverse:
+            lines = log_file.lines_reversed()
+        else:
+            start = log_file.offset_for_time(log_filter.since) if log_filter.since else 0
+            lines = log_file.lines(start)
+
+        for _, line in lines:
+            stats["lines"] += 1
+            if not log_filter.prefilter(line):
+                continue
+            record = parse_line(line)
+            if record is None:
+                stats["unparsed"] += 1
+                continue
+            stats["parsed"] += 1
+            moment = record_time(record)
+
+            if moment is not None:
+                if reverse and log_filter.since and moment < log_filter.since - ORDER_SLACK:
+                    return
+                if not reverse and log_filter.until and moment > log_filter.until + ORDER_SLACK:
+                    return
+            if not log_filter.matches(record, moment):
+                continue
+
+            yield record
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+
+class _RequestStats:
+    __slots__ = ("first", "last", "count", "errors", "duration_ms", "memory_bytes", "worst")
+
+    def __init__(self):
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+        self.count = 0
+        self.errors = 0
+        self.duration_ms = 0.0
+        self.memory_bytes = 0
+        self.worst = "debug"
+
+
+class LogAggregator:
+    """Agrégats incrémentaux : niveaux, erreurs par module, messages, requêtes"""
+
+    def __init__(self, max_requests: int = 200000):
+        self.records = 0
+        self.by_level: Dict[str, int] = {}
+        self.errors_by_module: Dict[str, int] = {}
+        self.records_by_module: Dict[str, int] = {}
+        self.error_messages: Dict[str, int] = {}
+        self.requests: Dict[str, _RequestStats] = {}
+        self.max_requests = max_requests
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def add(self, record: Dict):
+        self.records += 1
+        level = str(record.get("level", "")).lower()
+        module = module_of(record)
+        moment = record_time(record)
+
+        self.by_level[level] = self.by_level.get(level, 0) + 1
+        self.records_by_module[module] = self.records_by_module.get(module, 0) + 1
+        if level in ERROR_LEVELS:
+            self.errors_by_module[module] = self.errors_by_module.get(module, 0) + 1
+            message = _NORMALIZE.sub("#", str(record.get("message", "")))[:160]
+            self.error_messages[message] = self.error_messages.get(message, 0) + 1
+
+        if moment is not None:
+            self.first = moment if self.first is None or moment < self.first else self.first
+            self.last = moment if self.last is None or moment > self.last else self.last
+
+        request_id = record.get("request_id")
+        if not request_id:
+            return
+        stats = self.requests.get(request_id)
+        if stats is None:
+            if len(self.requests) >= self.max_requests:
+                return
+            stats = self.requests[request_id] = _RequestStats()
+        stats.count += 1
+        if level in ERROR_LEVELS:
+            stats.errors += 1
+        if level in LEVELS and LEVELS.index(level) > LEVELS.index(stats.worst):
+            stats.worst = level
+        if moment is not None:
+            stats.first = moment if stats.first is None or moment < stats.first else stats.first
+            stats.last = moment if stats.last is None or moment > stats.last else stats.last
+        duration = record.get("duration_ms")
+        if isinstance(duration, (int, float)):
+            stats.duration_ms = max(stats.duration_ms, float(duration))
+        memory = record.get("memory_bytes")
+        if isinstance(memory, int):
+            stats.memory_bytes = max(stats.memory_bytes, memory)
+
+    def request_duration_ms(self, stats: _RequestStats) -> float:
+        """duration_ms du logger si renseigné, sinon écart entre premier et dernier log"""
+        if stats.duration_ms:
+            return stats.duration_ms
+        if stats.first and stats.last:
+            return (stats.last - stats.first).total_seconds() * 1000
+        return 0.0
+
+    def summary(self, top: int = 10) -> Dict:
+        """Résumé compact (JSON) : volumes, top erreurs, requêtes les plus longues"""
+        slowest = sorted(
+            self.requests.items(), key=lambda item: self.request_duration_ms(item[1]), reverse=True
+        )[:top]
+        return {
+            "records": self.records,
+            "period": [
+                self.first.isoformat() if self.first else None,
+                self.last.isoformat() if self.last else None,
+            ],
+            "by_level": dict(sorted(self.by_level.items(), key=lambda item: -item[1])),
+            "errors_by_module": dict(sorted(self.errors_by_module.items(), key=lambda item: -item[1])[:top]),
+            "top_errors": dict(sorted(self.error_messages.items(), key=lambda item: -item[1])[:top]),
+            "requests": len(self.requests),
+            "requests_with_errors": len([stats for stats in self.requests.values() if stats.errors]),
+            "slowest_requests": [
+                {
+                    "request_id": request_id,
+                    "duration_ms": round(self.request_duration_ms(stats), 2),
+                    "records": stats.count,
+                    "errors": stats.errors,
+                    "worst_level": stats.worst,
+                    "memory_mb": round(stats.memory_bytes / 1048576, 1),
+                }
+                for request_id, stats in slowest
+            ],
+        }
+
+
+def summary_markdown(summary: Dict, title: str = "Logs du plugin") -> str:
+    """Bloc Markdown court à intégrer dans un rapport E2E"""
+    lines = [
+        f"### {title}",
+        "",
+        f"**Enregistrements** : {summary['records']} ({summary['period'][0]} → {summary['period'][1]})  ",
+        "**Niveaux** : " + ", ".join(f"{level} {count}" for level, count in summary["by_level"].items()) + "  ",
+        f"**Requêtes** : {summary['requests']} ({summary['requests_with_errors']} avec erreurs)",
+    ]
+    if summary["errors_by_module"]:
+        lines += ["", "| Module | Erreurs |", "|--------|---------|"]
+        lines += [f"| {module} | {count} |" for module, count in summary["errors_by_module"].items()]
+    if summary["top_errors"]:
+        lines += ["", "Erreurs les plus fréquentes :", ""]
+        lines += [f"- {count}× {message}" for message, count in summary["top_errors"].items()]
+    if summary["slowest_requests"]:
+        lines += ["", "| Requête | Durée | Logs | Erreurs |", "|---------|-------|------|---------|"]
+        lines += [
+            f"| {request['request_id']} | {request['duration_ms']:.0f} ms | {request['records']} | {request['errors']} |"
+            for request in summary["slowest_requests"]
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def analyze(
+    path: str,
+    log_filter: Optional[LogFilter] = None,
+    reverse: bool = False,
+    limit: Optional[int] = None,
+    top: int = 10,
+) -> Dict:
+    """Balayage + agrégats en une passe ; retourne le résumé et les compteurs de lignes"""
+    aggregator = LogAggregator()
+    stats: Dict[str, int] = {}
+    for record in scan(path, log_filter, reverse, limit, stats):
+        aggregator.add(record)
+    summary = aggregator.summary(top)
+    summary["scan"] = stats
+    return summary
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Suivi en direct des logs JSON de LoggingHelper pendant un scénario
+Chaque fichier suivi (chemin ou motif glob : debug.log,
+wc-logs/wc-qualiopi-formation-*.log) est relu depuis son dernier offset,
+jamais depuis le début :
+- rotation par renommage (debug.log → debug.log.1) : la fin de l'ancien
+  fichier est retrouvée par son identité (périphérique, inode) puis le
+  nouveau est lu depuis 0 ;
+- troncature sur place (copytruncate) : reprise à 0 ;
+- nouveau fichier correspondant au motif (logs WooCommerce datés) : lu
+  depuis 0, les fichiers présents au démarrage depuis leur fin.
+Les enregistrements sont attribués à la phase et à la sonde actives à leur
+arrivée ; seuls des compteurs sont gardés en mémoire.
+"""
+
+import glob
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from log_analyzer import ERROR_LEVELS, module_of, parse_line
+
+
+# Lecture par blocs : un fichier qui a beaucoup grossi ne passe pas d'un coup en mémoire
+READ_CHUNK = 1024 * 1024
+# Messages distincts gardés par phase (erreurs / avertissements les plus fréquents)
+MAX_MESSAGES = 200
+
+_NORMALIZE = re.compile(r"\d+")
+_CACHE = re.compile(r"\bcache\b", re.IGNORECASE)
+
+
+def classify(record: Dict) -> List[str]:
+    """Compteurs alimentés par un enregistrement"""
+    level = str(record.get("level", "")).lower()
+    message = str(record.get("message", ""))
+    context = record.get("context") if isinstance(record.get("context"), dict) else {}
+    counters = ["records"]
+    if level in ERROR_LEVELS:
+        counters.append("errors")
+    elif level == "warning":
+        counters.append("warnings")
+    # LoggingHelper::log_api_call( ..., 'SIREN', ... )
+    if record.get("channel") == "api" and str(context.get("api", "")).upper() == "SIREN":
+        counters.append("siren_calls")
+    # LoggingHelper::log_cache_operation, SirenCache, stores avec cache
+    if record.get("channel") == "cache" or _CACHE.search(message):
+        counters.append("cache_ops")
+        if message.startswith("Cache hit"):
+            counters.append("cache_hits")
+        elif message.startswith("Cache miss"):
+            counters.append("cache_misses")
+    return counters
+
+
+class TailStats:
+    """Compteurs d'une phase ou d'une sonde"""
+
+    COUNTERS = ("records", "errors", "warnings", "siren_calls", "cache_ops", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.counts: Dict[str, int] = dict.fromkeys(self.COUNTERS, 0)
+        self.modules: Dict[str, int] = {}
+        self.messages: Dict[str, int] = {}
+
+    def add(self, record: Dict, counters: List[str]):
+        for counter in counters:
+            self.counts[counter] += 1
+        module = module_of(record)
+        self.modules[module] = self.modules.get(module, 0) + 1
+        if "errors" in counters or "warnings" in counters:
+            message = f"{record.get('level')}: " + _NORMALIZE.sub("#", str(record.get("message", "")))[:160]
+            if message in self.messages or len(self.messages) < MAX_MESSAGES:
+                self.messages[message] = self.messages.get(message, 0) + 1
+
+    def to_dict(self, top: int = 5) -> Dict:
+        return {
+            **self.counts,
+            "top_modules": dict(sorted(self.modules.items(), key=lambda item: -item[1])[:top]),
+            "top_messages": dict(sorted(self.messages.items(), key=lambda item: -item[1])[:top]),
+        }
+
+
+class FollowedFile:
+    """Position de lecture d'un fichier (rouvert à chaque relevé : la rotation n'est jamais bloquée)"""
+
+    def __init__(self, path: str, from_end: bool):
+        self.path = path
+        self.identity: Optional[Tuple[int, int]] = None
+        self.offset = 0
+        self.partial = b""
+        self.rotations = 0
+        self.truncations = 0
+        self.bytes_read = 0
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.offset = stat.st_size if from_end else 0
+
+    def read_lines(self) -> List[bytes]:
+        """Lignes complètes écrites depuis le relevé précédent"""
+        try:
+            handle = open(self.path, "rb")
+        except OSError:
+            # Renommé, pas encore recréé : la fin sera lue au prochain relevé
+            return []
+        lines: List[bytes] = []
+        with handle:
+            stat = os.fstat(handle.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            if self.identity is not None and identity != self.identity and stat.st_ino:
+                lines += self._drain_rotated()
+                self.rotations += 1
+                self.offset, self.partial = 0, b""
+            elif stat.st_size < self.offset:
+                self.truncations += 1
+                self.offset, self.partial = 0, b""
+            self.identity = identity
+            lines += self._drain(handle)
+        return lines
+
+    def _drain(self, handle) -> List[bytes]:
+        handle.seek(self.offset)
+        lines: List[bytes] = []
+        while True:
+            chunk = handle.read(READ_CHUNK)
+            if not chunk:
+                return lines
+            self.offset += len(chunk)
+            self.bytes_read += len(chunk)
+            complete, newline, self.partial = (self.partial + chunk).rpartition(b"\n")
+            if newline:
+                lines += complete.split(b"\n")
+
+    def _drain_rotated(self) -> List[bytes]:
+        """Fin de l'ancien fichier, retrouvé sous son nouveau nom (même inode)"""
+        for candidate in glob.glob(glob.escape(self.path) + "*"):
+            if candidate == self.path:
+                continue
+            try:
+                stat = os.stat(candidate)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) == self.identity:
+                with open(candidate, "rb") as handle:
+                    lines = self._drain(handle)
+                # Dernière ligne sans retour final : complète, plus rien n'y sera ajouté
+                if self.partial:
+                    lines.append(self.partial)
+                return lines
+        return []
+
+
+class PluginLogTail:
+    """
+    Suivi de fichiers de logs du plugin ; `label` fournit (phase, sonde
+    active ou None) au moment de chaque relevé
+    """
+
+    def __init__(self, patterns: Iterable[str], label: Callable[[], Tuple[str, Optional[str]]], interval: float = 0.5):
+        self.patterns = [pattern for pattern in patterns if pattern]
+        self.label = label
+        self.interval = interval
+        self.files: Dict[str, FollowedFile] = {}
+        self.phases: Dict[str, TailStats] = {}
+        self.probes: Dict[Tuple[str, str], TailStats] = {}
+        self.unparsed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _paths(self) -> List[str]:
+        paths = []
+        for pattern in self.patterns:
+            paths += glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        return paths
+
+    def start(self) -> "PluginLogTail":
+        """Positionne chaque fichier existant sur sa fin et lance le relevé périodique"""
+        for path in self._paths():
+            self.files[path] = FollowedFile(path, from_end=True)
+        self._thread = threading.Thread(target=self._loop, name="plugin-log-tail", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> int:
+        """Lit les nouvelles lignes et les attribue à la phase / sonde courante ; retourne leur nombre"""
+        with self._lock:
+            phase, probe = self.label()
+            for path in self._paths():
+                if path not in self.files:
+                    # Apparu pendant le run : lu depuis le début
+                    self.files[path] = FollowedFile(path, from_end=False)
+            count = 0
+            for followed in self.files.values():
+                for line in followed.read_lines():
+                    record = parse_line(line)
+                    if record is None:
+                        if line.strip():
+                            self.unparsed += 1
+                        continue
+                    count += 1
+                    counters = classify(record)
+                    self.phases.setdefault(phase, TailStats()).add(record, counters)
+                    if probe:
+                        self.probes.setdefault((phase, probe), TailStats()).add(record, counters)
+            return count
+
+    def stop(self):
+        """Arrête le relevé périodique après une dernière lecture"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.poll()
+
+    def summary(self, top: int = 5) -> Dict:
+        return {
+            "files": {
+                path: {
+                    "bytes_read": followed.bytes_read,
+                    "rotations": followed.rotations,
+                    "truncations": followed.truncations,
+                }
+                for path, followed in self.files.items()
+            },
+            "unparsed_lines": self.unparsed,
+            "phases": {phase: stats.to_dict(top) for phase, stats in self.phases.items()},
+            "probes": [
+                {"phase": phase, "probe": probe, **stats.to_dict(top)}
+                for (phase, probe), stats in sorted(
+                    self.probes.items(), key=lambda item: -item[1].counts["records"]
+                )[:top * 4]
+            ],
+        }
+
+
+def tail_markdown(summary: Dict) -> str:
+    """Compteurs côté plugin par phase, sondes les plus bavardes, messages fréquents"""
+    files = summary["files"]
+    lines = [
+        f"{len(files)} fichier(s) suivi(s), {sum(entry['bytes_read'] for entry in files.values()) / 1024:.0f} Kio lus, "
+        f"{sum(entry['rotations'] for entry in files.values())} rotation(s), "
+        f"{sum(entry['truncations'] for entry in files.values())} troncature(s), "
+        f"{summary['unparsed_lines']} ligne(s) hors JSON.",
+        "",
+        "| Phase | Logs | Erreurs | Avertissements | Appels SIREN | Cache (hit / miss) | Modules |",
+        "|-------|------|---------|----------------|--------------|--------------------|---------|",
+    ]
+    for phase, stats in summary["phases"].items():
+        modules = ", ".join(f"{module} {count}" for module, count in stats["top_modules"].items()).replace("|", "\\|")
+        lines.append(
+            f"| {phase} | {stats['records']} | {stats['errors']} | {stats['warnings']} | {stats['siren_calls']} | "
+            f"{stats['cache_ops']} ({stats['cache_hits']} / {stats['cache_misses']}) | {modules} |"
+        )
+    if summary["probes"]:
+        lines += [
+            "",
+            "**Sondes les plus bavardes**",
+            "",
+            "| Sonde | Phase | Logs | Erreurs | Avertissements | Appels SIREN | Cache |",
+            "|-------|-------|------|---------|----------------|--------------|-------|",
+        ]
+        for entry in summary["probes"]:
+            probe = entry["probe"].replace("|", "\\|")
+            lines.append(
+                f"| {probe} | {entry['phase']} | {entry['records']} | {entry['errors']} | {entry['warnings']} | "
+                f"{entry['siren_calls']} | {entry['cache_ops']} |"
+            )
+    noisy = [(phase, stats) for phase, stats in summary["phases"].items() if stats["top_messages"]]
+    if noisy:
+        lines += ["", "**Erreurs et avertissements les plus fréquents**", ""]
+        for phase, stats in noisy:
+            lines.append(f"- {phase}")
+            lines += [f"  - {count}× {message}" for message, count in stats["top_messages"].items()]
+    return "\n".join(lines) + "\n"
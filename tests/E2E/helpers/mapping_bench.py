@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Coût de MappingCache selon la taille du catalogue
+Un `wp eval-file` par échelle amorce wcqf_product_form_mapping, puis mesure
+get() à froid (début de requête HTTP), get() à chaud, refresh() et
+migrate_old_mapping(), avec deux états du cache objet :
+- none : cache d'exécution vidé, l'option est relue en base ;
+- standin : remplaçant d'un cache objet persistant (Redis, Memcached) ;
+  les entrées du groupe options sont gardées sérialisées et réinjectées à
+  chaque requête simulée, désérialisation comprise.
+L'option du mapping autochargée, un « get() à froid sans cache » inclut le
+chargement de toutes les options autochargées du site.
+"""
+
+from typing import Dict, List
+
+from load_generator import percentile
+from wp_batch import php_string
+
+
+MAPPING_BEGIN = "__E2E_MAPPING_BEGIN__"
+MAPPING_END = "__E2E_MAPPING_END__"
+
+CACHE_MODES = ("none", "standin")
+
+# Identifiants synthétiques : hors des plages des vrais produits et pages
+PRODUCT_ID_BASE = 9_700_000
+PAGE_ID_BASE = 9_800_000
+
+# Taille d'élément par défaut de Memcached : au-delà, l'option n'est pas mise en cache
+MEMCACHED_ITEM_LIMIT = 1024 * 1024
+
+
+def mapping_bench_php(
+    entries: int,
+    repeat: int = 20,
+    warm_calls: int = 1000,
+    migrate_repeat: int = 3,
+    modes=CACHE_MODES,
+) -> str:
+    """
+    Script `wp eval-file` : échantillons bruts (ms, Kio) par mode de cache
+    et par opération, taille et autoload de l'option
+    """
+    mode_list = ", ".join(php_string(mode) for mode in modes)
+    return f"""<?php
+global $wpdb;
+
+$entries    = {int(entries)};
+$repeat     = {max(1, int(repeat))};
+$warm_calls = {max(1, int(warm_calls))};
+$mig_repeat = {max(1, int(migrate_repeat))};
+$option     = \\WcQualiopiFormation\\Core\\Constants::OPTION_PRODUCT_FORM_MAPPING;
+$old_option = 'wcqs_testpos_mapping';
+$cache      = \\WcQualiopiFormation\\Utils\\Mapping\\MappingCache::class;
+$scoped     = function_exists( 'memory_reset_peak_usage' );
+
+$mapping = array();
+$old     = array();
+for ( $i = 0; $i < $entries; $i++ ) {{
+	$mapping[ {PRODUCT_ID_BASE} + $i ] = {PAGE_ID_BASE} + $i;
+	$old[ 'product_' . ( {PRODUCT_ID_BASE} + $i ) ] = array(
+		'page_id'     => {PAGE_ID_BASE} + $i,
+		'active'      => true,
+		'form_source' => 'gravityforms',
+		'product_id'  => {PRODUCT_ID_BASE} + $i,
+	);
+}}
+delete_option( $old_option );
+update_option( $option, $mapping );
+
+// Début de requête : cache d'exécution vide (et cache persistant, s'il y en a un, vidé pour ces clés)
+$keys  = array( 'alloptions', 'notoptions', $option, $old_option );
+$reset = function () use ( $keys ) {{
+	foreach ( $keys as $key ) {{
+		wp_cache_delete( $key, 'options' );
+	}}
+}};
+// Remplaçant du cache persistant : entrées sérialisées, relues à chaque requête
+$standin = array();
+$capture = function () use ( &$standin, $keys ) {{
+	$standin = array();
+	foreach ( $keys as $key ) {{
+		$found = false;
+		$value = wp_cache_get( $key, 'options', false, $found );
+		if ( $found ) {{
+			$standin[ $key ] = serialize( $value );
+		}}
+	}}
+}};
+$prepare = function ( $mode ) use ( &$standin, $reset ) {{
+	$reset();
+	if ( 'standin' === $mode ) {{
+		foreach ( $standin as $key => $blob ) {{
+			wp_cache_set( $key, unserialize( $blob ), 'options' );
+		}}
+	}}
+}};
+$measure = function ( $callback ) use ( $scoped ) {{
+	if ( $scoped ) {{
+		memory_reset_peak_usage();
+	}}
+	$memory = memory_get_usage();
+	$start  = hrtime( true );
+	$result = $callback();
+	$ms     = ( hrtime( true ) - $start ) / 1e6;
+	return array(
+		'ms'      => $ms,
+		'kb'      => ( memory_get_usage() - $memory ) / 1024,
+		'peak_kb' => ( memory_get_peak_usage() - $memory ) / 1024,
+		'result'  => $result,
+	);
+}};
+
+$report = array(
+	'entries'          => $entries,
+	'serialized_bytes' => strlen( serialize( $mapping ) ),
+	'autoload'         => $wpdb->get_var( $wpdb->prepare( "SELECT autoload FROM {{$wpdb->options}} WHERE option_name = %s", $option ) ),
+	'ext_object_cache' => wp_using_ext_object_cache(),
+	'peak_scoped'      => $scoped,
+	'wp_version'       => get_bloginfo( 'version' ),
+	'php_version'      => PHP_VERSION,
+	'modes'            => array(),
+	'errors'           => array(),
+);
+$reset();
+get_option( $option );
+$capture();
+$report['standin_bytes'] = array_sum( array_map( 'strlen', $standin ) );
+
+foreach ( array( {mode_list} ) as $mode ) {{
+	$samples = array( 'cold_get' => array(), 'option_fetch' => array(), 'warm_get' => array(), 'refresh' => array(), 'migrate_old_mapping' => array() );
+	$memory  = array( 'cold_get' => array(), 'cold_get_peak' => array(), 'migrate_old_mapping_peak' => array() );
+
+	for ( $run = 0; $run < $repeat; $run++ ) {{
+		// Requête simulée : préparation du cache (relecture du remplaçant) comprise
+		$cache::clear();
+		$cold = $measure( function () use ( $mode, $prepare, $cache ) {{
+			$prepare( $mode );
+			return count( $cache::get() );
+		}} );
+		$samples['cold_get'][]     = $cold['ms'];
+		$memory['cold_get'][]      = $cold['kb'];
+		$memory['cold_get_peak'][] = $cold['peak_kb'];
+		if ( $cold['result'] !== $entries && 0 === $run ) {{
+			$report['errors'][] = "$mode : get() retourne {{$cold['result']}} produits sur $entries";
+		}}
+
+		$samples['option_fetch'][] = $measure( function () use ( $mode, $prepare, $option ) {{
+			$prepare( $mode );
+			return get_option( $option );
+		}} )['ms'];
+
+		$samples['refresh'][] = $measure( function () use ( $cache ) {{
+			return count( $cache::refresh() );
+		}} )['ms'];
+
+		$samples['warm_get'][] = $measure( function () use ( $cache, $warm_calls ) {{
+			for ( $call = 0; $call < $warm_calls; $call++ ) {{
+				$cache::get();
+			}}
+		}} )['ms'] / $warm_calls;
+	}}
+
+	// Ancien format seul : migrate_old_mapping() réécrit l'option au nouveau format
+	update_option( $old_option, $old );
+	for ( $run = 0; $run < $mig_repeat; $run++ ) {{
+		delete_option( $option );
+		$cache::clear();
+		$reset();
+		get_option( $old_option );
+		get_option( $option );
+		$capture();
+		$migration = $measure( function () use ( $mode, $prepare, $cache ) {{
+			$prepare( $mode );
+			return $cache::migrate_old_mapping();
+		}} );
+		$samples['migrate_old_mapping'][]     = $migration['ms'];
+		$memory['migrate_old_mapping_peak'][] = $migration['peak_kb'];
+		$migrated = get_option( $option, array() );
+		if ( ! $migration['result'] || count( $migrated ) !== $entries ) {{
+			$report['errors'][] = "$mode : migrate_old_mapping() " . ( $migration['result'] ? 'true' : 'false' ) . ', ' . count( $migrated ) . " produits sur $entries";
+			break;
+		}}
+	}}
+	delete_option( $old_option );
+	update_option( $option, $mapping );
+	$cache::clear();
+	$reset();
+	get_option( $option );
+	$capture();
+
+	$report['modes'][ $mode ] = array( 'samples' => $samples, 'memory_kb' => $memory );
+}}
+
+echo {php_string(MAPPING_BEGIN)} . wp_json_encode( $report ) . {php_string(MAPPING_END)};
+"""
+
+
+def summarize(values: List[float]) -> Dict:
+    """Médiane, p95 et maximum d'échantillons bruts"""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "median": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def summarize_scale(report: Dict) -> Dict:
+    """Statistiques par mode de cache et par opération (ms) et mémoire (Kio)"""
+    modes = {}
+    for mode, data in report["modes"].items():
+        modes[mode] = {
+            "operations": {name: summarize(values) for name, values in data["samples"].items() if values},
+            "memory_kb": {name: summarize(values) for name, values in data["memory_kb"].items() if values},
+        }
+    return {
+        "entries": report["entries"],
+        "serialized_bytes": report["serialized_bytes"],
+        "standin_bytes": report.get("standin_bytes"),
+        "autoload": report["autoload"],
+        "ext_object_cache": report["ext_object_cache"],
+        "modes": modes,
+    }
+
+
+def is_autoloaded(value) -> bool:
+    """Valeurs de la colonne autoload chargées au démarrage (WordPress < 6.6 et ≥ 6.6)"""
+    return value in ("yes", "on", "auto", "auto-on")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cache d'options WordPress limité à un run E2E
+Lecture groupée en un aller-retour, invalidation automatique sur les
+commandes qui modifient des options. Le PHP d'un `wp eval-file` étant
+encodé en base64, tout eval vide le cache sauf s'il est déclaré en lecture
+seule par l'appelant.
+"""
+
+import re
+import shlex
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from wp_batch import php_string
+
+
+OPTIONS_BEGIN = "__E2E_OPTIONS_BEGIN__"
+OPTIONS_END = "__E2E_OPTIONS_END__"
+
+# `wp option add|update|delete|patch <noms...>`
+_OPTION_WRITE = re.compile(r"\bwp\s+option\s+(add|update|delete|patch)\s+([^;&|\n]*)")
+# Activation/désactivation : déclenche DataMigrator et les hooks du plugin
+_PLUGIN_STATE = re.compile(r"\bwp\s+plugin\s+(activate|deactivate|install|uninstall|toggle)\b")
+# PHP arbitraire (eval-file : script encodé, illisible depuis la commande)
+_EVAL = re.compile(r"\bwp\s+eval(-file)?\b")
+# Écritures indirectes (eval PHP ou SQL direct sur la table des options)
+_INDIRECT_WRITE = re.compile(
+    r"(update_option|add_option|delete_option|"
+    r"(insert\s+into|update|delete\s+from)\s+\S*options\b)",
+    re.IGNORECASE,
+)
+
+
+class OptionCache:
+    """
+    Valeurs d'options lues pendant le run (None = option absente)
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def lookup(self, name: str) -> Tuple[bool, Any]:
+        """Retourne (trouvé, valeur) et met à jour les compteurs"""
+        if name in self._values:
+            self.hits += 1
+            return True, self._values[name]
+        self.misses += 1
+        return False, None
+
+    def peek(self, name: str) -> Any:
+        """Valeur en cache sans toucher aux compteurs (None si inconnue)"""
+        return self._values.get(name)
+
+    def store(self, name: str, value: Any):
+        """Mémorise une valeur (None pour une option absente)"""
+        self._values[name] = value
+
+    def store_many(self, values: Dict[str, Any]):
+        """Mémorise plusieurs valeurs d'un coup"""
+        self._values.update(values)
+
+    def missing(self, names: Iterable[str]) -> List[str]:
+        """Noms non encore présents dans le cache (ordre conservé, sans doublon)"""
+        seen = set()
+        result = []
+        for name in names:
+            if name not in self._values and name not in seen:
+                seen.add(name)
+                result.append(name)
+        return result
+
+    def invalidate(self, names: Optional[Iterable[str]] = None):
+        """Supprime des entrées (toutes si names est None)"""
+        if names is None:
+            self._values.clear()
+            return
+        for name in names:
+            self._values.pop(name, None)
+
+    def invalidate_for_command(self, command: str, read_only: bool = False) -> bool:
+        """
+        Invalide les entrées touchées par une commande ; True si invalidation
+        (`read_only` : l'appelant garantit qu'aucune option n'est écrite)
+        """
+        if read_only:
+            return False
+        if _PLUGIN_STATE.search(command) or _EVAL.search(command) or _INDIRECT_WRITE.search(command):
+            self.invalidate()
+            return True
+
+        invalidated = False
+        for match in _OPTION_WRITE.finditer(command):
+            verb, arguments = match.groups()
+            try:
+                tokens = shlex.split(arguments)
+            except ValueError:
+                self.invalidate()
+                return True
+            names = [token for token in tokens if not token.startswith("--")]
+            # add/update/patch : seul le premier argument est un nom d'option
+            if verb != "delete":
+                names = names[:1]
+            self.invalidate(names)
+            invalidated = True
+        return invalidated
+
+
+def bulk_fetch_php(names: List[str]) -> str:
+    """Script PHP qui lit toutes les options demandées et les renvoie en JSON"""
+    literals = ", ".join(php_string(name) for name in names)
+    return (
+        "<?php\n"
+        "$__e2e_missing = new \\stdClass();\n"
+        "$__e2e_options = array();\n"
+        f"foreach ( array( {literals} ) as $__e2e_name ) {{\n"
+        "\t$__e2e_value = get_option( $__e2e_name, $__e2e_missing );\n"
+        "\t$__e2e_options[ $__e2e_name ] = $__e2e_value === $__e2e_missing\n"
+        "\t\t? array( 'exists' => false, 'value' => null )\n"
+        "\t\t: array( 'exists' => true, 'value' => $__e2e_value );\n"
+        "}\n"
+        f"echo {php_string(OPTIONS_BEGIN)} . wp_json_encode( $__e2e_options ) . {php_string(OPTIONS_END)};\n"
+    )
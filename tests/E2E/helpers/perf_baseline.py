@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Référence de performance glissante et détection statistique des régressions
+Chaque run réussi dépose ses mesures (durées des commandes, coût des sondes
+et des pages, latences des benchmarks) dans reports/baselines/<test_id>.json ;
+les runs suivants sont comparés aux N derniers. Une métrique régresse quand
+l'écart dépasse le bruit des deux côtés :
+- entre échantillons : test U de Mann-Whitney unilatéral (exact sur les
+  petits échantillons sans ex aequo, approximation normale sinon) ;
+- entre runs : écart robuste (médiane / MAD) de la médiane du run à celles
+  des runs de référence ;
+et que la médiane bouge d'au moins MIN_EFFECT.
+"""
+
+import json
+import math
+import re
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+E2E_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = E2E_DIR / "reports" / "baselines"
+
+# Runs gardés dans la référence et échantillons gardés par run et par métrique
+WINDOW = 20
+MAX_SAMPLES_PER_RUN = 200
+# Mesures gardées par métrique pendant le run (échantillon uniforme, Reservoir)
+RUN_SAMPLES = 1000
+# Minimum pour tester : échantillons de chaque côté (Mann-Whitney), runs de référence
+MIN_SAMPLES = 5
+MIN_RUNS = 3
+ALPHA = 0.01
+MIN_EFFECT = 0.10
+# Plancher de dispersion entre runs (part de la médiane) : évite MAD = 0
+MIN_RUN_SPREAD = 0.02
+# Au-delà, le test exact coûte trop cher : approximation normale
+EXACT_MAX_PAIRS = 400
+
+# Chemins critiques : une régression y fait échouer le run (sinon avertissement)
+HOT_PATHS = ("panier", "cart", "siren", "migrat")
+
+REGRESSION = "régression"
+IMPROVEMENT = "amélioration"
+STABLE = "stable"
+INSUFFICIENT = "référence insuffisante"
+NEW = "nouvelle"
+
+
+def metric_key(source: str, name: str, unit: str) -> str:
+    """Clé « source::nom::unité » d'une métrique"""
+    return f"{source}::{name}::{unit}"
+
+
+def metric_unit(key: str) -> str:
+    return key.rsplit("::", 1)[-1]
+
+
+def is_hot_path(key: str, patterns: Iterable[str] = HOT_PATHS) -> bool:
+    return any(re.search(pattern, key, re.IGNORECASE) for pattern in patterns)
+
+
+def thin(values: List[float], limit: int = MAX_SAMPLES_PER_RUN) -> List[float]:
+    """Au plus `limit` valeurs régulièrement espacées dans l'ordre trié (distribution conservée)"""
+    values = sorted(values)
+    if len(values) <= limit:
+        return values
+    step = (len(values) - 1) / (limit - 1)
+    return [values[round(index * step)] for index in range(limit)]
+
+
+# ---------------------------------------------------------------------------
+# Statistiques
+# ---------------------------------------------------------------------------
+
+def _normal_sf(z: float) -> float:
+    """P(Z ≥ z) pour la loi normale centrée réduite"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _exact_u_sf(u: int, n1: int, n2: int) -> float:
+    """P(U ≥ u) sous H0, sans ex aequo (nombre de permutations par valeur de U)"""
+    # counts[j][v] : classements de i valeurs courantes et j de référence donnant U = v
+    counts = [[1] for _ in range(n2 + 1)]
+    for _ in range(n1):
+        row = [[1]]
+        for j in range(1, n2 + 1):
+            # La plus grande valeur est courante (elle bat les j autres) ou de référence
+            from_current = [0] * j + counts[j]
+            from_reference = row[j - 1]
+            row.append([
+                (from_current[v] if v < len(from_current) else 0)
+                + (from_reference[v] if v < len(from_reference) else 0)
+                for v in range(max(len(from_current), len(from_reference)))
+            ])
+        counts = row
+    distribution = counts[n2]
+    return sum(distribution[u:]) / sum(distribution)
+
+
+def mann_whitney_greater(current: List[float], reference: List[float]) -> float:
+    """
+    p-valeur unilatérale du test U de Mann-Whitney : les valeurs courantes
+    sont-elles stochastiquement plus grandes que la référence ?
+    """
+    n1, n2 = len(current), len(reference)
+    pooled = sorted([(value, 0) for value in current] + [(value, 1) for value in reference])
+    ranks = [0.0] * len(pooled)
+    ties = []
+    start = 0
+    while start < len(pooled):
+        end = start
+        while end + 1 < len(pooled) and pooled[end + 1][0] == pooled[start][0]:
+            end += 1
+        for index in range(start, end + 1):
+            ranks[index] = (start + end) / 2 + 1
+        if end > start:
+            ties.append(end - start + 1)
+        start = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+
+    if not ties and n1 * n2 <= EXACT_MAX_PAIRS:
+        return _exact_u_sf(int(round(u)), n1, n2)
+
+    total = n1 + n2
+    tie_term = sum(t ** 3 - t for t in ties) / (total * (total - 1))
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term)
+    if variance <= 0:
+        return 1.0
+    # Correction de continuité
+    return _normal_sf((u - n1 * n2 / 2 - 0.5) / math.sqrt(variance))
+
+
+def run_shift_p(current: float, run_medians: List[float]) -> float:
+    """p-valeur unilatérale de la médiane du run face aux médianes des runs de référence (z robuste)"""
+    center = median(run_medians)
+    mad = median(abs(value - center) for value in run_medians) * 1.4826
+    spread = max(mad, abs(center) * MIN_RUN_SPREAD, 1e-9)
+    return _normal_sf((current - center) / spread)
+
+
+def compare(current: List[float], runs: List[List[float]], alpha: float = ALPHA,
+            min_effect: float = MIN_EFFECT) -> Dict:
+    """Verdict d'une métrique : mesures du run courant face aux runs de référence"""
+    entry = {
+        "current_median": median(current),
+        "current_n": len(current),
+        "baseline_median": None,
+        "baseline_n": 0,
+        "baseline_runs": len(runs),
+        "change": None,
+        "p_samples": None,
+        "p_runs": None,
+        "p_value": None,
+        "verdict": NEW,
+    }
+    if not runs:
+        return entry
+    reference = [value for run in runs for value in run]
+    entry["baseline_median"] = median(reference)
+    entry["baseline_n"] = len(reference)
+    if entry["baseline_median"]:
+        entry["change"] = entry["current_median"] / entry["baseline_median"] - 1
+    elif entry["current_median"]:
+        entry["change"] = math.inf
+
+    # Sens testé : celui de l'écart observé
+    worse = entry["current_median"] >= entry["baseline_median"]
+    sign = 1 if worse else -1
+    tests = []
+    if len(current) >= MIN_SAMPLES and len(reference) >= MIN_SAMPLES:
+        entry["p_samples"] = mann_whitney_greater(
+            [sign * value for value in current], [sign * value for value in reference]
+        )
+        tests.append(entry["p_samples"])
+    if len(runs) >= MIN_RUNS:
+        entry["p_runs"] = run_shift_p(sign * entry["current_median"], [sign * median(run) for run in runs])
+        tests.append(entry["p_runs"])
+    if not tests:
+        entry["verdict"] = INSUFFICIENT
+        return entry
+
+    # Les deux bruits doivent être dépassés : la p-valeur la moins favorable décide
+    entry["p_value"] = max(tests)
+    change = entry["change"] if entry["change"] is not None else 0.0
+    if entry["p_value"] < alpha and abs(change) >= min_effect:
+        entry["verdict"] = REGRESSION if worse else IMPROVEMENT
+    else:
+        entry["verdict"] = STABLE
+    return entry
+
+
+# ---------------------------------------------------------------------------
+# Référence
+# ---------------------------------------------------------------------------
+
+class BaselineStore:
+    """Fenêtre glissante des mesures des derniers runs réussis d'un scénario"""
+
+    def __init__(self, test_id: str, tag: str = "", directory: Path = BASELINE_DIR, window: int = WINDOW):
+        suffix = f"_{tag}" if tag else ""
+        self.path = Path(directory) / f"{test_id}{suffix}.json"
+        self.window = window
+        self.runs: List[Dict] = []
+        if self.path.is_file():
+            try:
+                self.runs = json.loads(self.path.read_text(encoding="utf-8")).get("runs", [])
+            except ValueError:
+                self.runs = []
+
+    def history(self, key: str) -> List[List[float]]:
+        """Échantillons de la métrique, un jeu par run de référence qui la contient"""
+        return [run["metrics"][key] for run in self.runs if run["metrics"].get(key)]
+
+    def compare(self, samples: Dict[str, List[float]], hot_paths: Iterable[str] = HOT_PATHS,
+                alpha: float = ALPHA, min_effect: float = MIN_EFFECT) -> Dict[str, Dict]:
+        results = {}
+        for key, values in sorted(samples.items()):
+            if not values:
+                continue
+            entry = compare(values, self.history(key), alpha, min_effect)
+            entry["hot"] = is_hot_path(key, hot_paths)
+            results[key] = entry
+        return results
+
+    def record(self, samples: Dict[str, List[float]], context: Optional[Dict] = None):
+        """Ajoute le run à la référence (les plus anciens sortent de la fenêtre)"""
+        self.runs.append({
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "context": context or {},
+            "metrics": {key: thin(values) for key, values in samples.items() if values},
+        })
+        self.runs = self.runs[-self.window:]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"runs": self.runs}, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Rapport
+# ---------------------------------------------------------------------------
+
+def _format_value(value: Optional[float], unit: str) -> str:
+    if value is None:
+        return "-"
+    if unit == "s":
+        return f"{value:.3f} s"
+    if unit == "ms":
+        return f"{value:.1f} ms"
+    return f"{value:.0f} {unit}"
+
+
+def format_change(entry: Dict) -> str:
+    change = entry["change"]
+    if change is None:
+        return "-"
+    if math.isinf(change):
+        return "+∞"
+    return f"{change * 100:+.1f}%"
+
+
+def describe(key: str, entry: Dict) -> str:
+    """Une ligne : « clé : 12.0 ms → 15.3 ms (+27.5%, p=0.0004) »"""
+    unit = metric_unit(key)
+    p_value = f", p={entry['p_value']:.2g}" if entry["p_value"] is not None else ""
+    return (
+        f"{key.rsplit('::', 1)[0]} : {_format_value(entry['baseline_median'], unit)} → "
+        f"{_format_value(entry['current_median'], unit)} ({format_change(entry)}{p_value})"
+    )
+
+
+_VERDICT_ORDER = {REGRESSION: 0, IMPROVEMENT: 1, STABLE: 2, INSUFFICIENT: 3, NEW: 4}
+
+
+def baseline_markdown(comparison: Dict[str, Dict], top: int = 30) -> str:
+    """Tableau avant / après, régressions en tête"""
+    counts: Dict[str, int] = {}
+    for entry in comparison.values():
+        counts[entry["verdict"]] = counts.get(entry["verdict"], 0) + 1
+    ranked: List[Tuple[str, Dict]] = sorted(
+        comparison.items(),
+        key=lambda item: (_VERDICT_ORDER[item[1]["verdict"]], -abs(item[1]["change"] or 0.0)),
+    )
+    lines = [
+        f"{len(comparison)} métrique(s) : "
+        + ", ".join(f"{count} {verdict}" for verdict, count in sorted(counts.items(), key=lambda i: _VERDICT_ORDER[i[0]]))
+        + f" (α = {ALPHA}, effet minimal {MIN_EFFECT * 100:.0f}%).",
+        "",
+        "| Métrique | Référence (médiane) | Run (médiane) | Δ | p | Verdict |",
+        "|----------|---------------------|---------------|---|---|---------|",
+    ]
+    for key, entry in ranked[:top]:
+        unit = metric_unit(key)
+        name = key.rsplit("::", 1)[0].replace("|", "\\|")
+        verdict = entry["verdict"] + (" 🔥" if entry["hot"] and entry["verdict"] == REGRESSION else "")
+        p_value = f"{entry['p_value']:.2g}" if entry["p_value"] is not None else "-"
+        lines.append(
+            f"| {name} | {_format_value(entry['baseline_median'], unit)} ({entry['baseline_runs']} runs) | "
+            f"{_format_value(entry['current_median'], unit)} (n={entry['current_n']}) | "
+            f"{format_change(entry)} | {p_value} | {verdict} |"
+        )
+    if len(ranked) > top:
+        lines.append(f"\n{len(ranked) - top} métrique(s) stable(s) ou sans référence non affichée(s).")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Coût côté serveur du code PHP exécuté par les tests
+- sondes `wp eval-file` : chaque closure est encadrée par microtime,
+  memory_get_peak_usage et $wpdb->num_queries ; SAVEQUERIES (défini à la
+  volée s'il ne l'est pas) donne les requêtes les plus lentes ;
+- pages HTTP : un mu-plugin, actif seulement pour les requêtes portant
+  l'en-tête X-E2E-Profile, renvoie le même relevé dans l'en-tête X-E2E-Cost
+  (JSON en base64, posé depuis un tampon de sortie avant l'envoi des en-têtes).
+"""
+
+import base64
+import binascii
+import json
+from typing import Dict, Optional
+
+from event_store import TopN
+from wp_batch import php_string
+
+
+PROFILER_BEGIN = "__E2E_PROFILER_BEGIN__"
+PROFILER_END = "__E2E_PROFILER_END__"
+
+PROFILE_REQUEST_HEADER = "X-E2E-Profile"
+COST_HEADER = "x-e2e-cost"
+MU_PLUGIN_FILE = "e2e-cost.php"
+
+# Requêtes les plus lentes gardées par relevé (l'en-tête HTTP doit rester court)
+SLOWEST_QUERIES = 3
+
+
+def cost_closures_php() -> str:
+    """
+    Closures $__e2e_cost_start / $__e2e_cost_end : relevé avant/après un
+    morceau de code (temps, mémoire, requêtes, requêtes les plus lentes)
+    """
+    return f"""if ( ! defined( 'SAVEQUERIES' ) ) {{
+	define( 'SAVEQUERIES', true );
+}}
+$__e2e_cost_start = static function () {{
+	global $wpdb;
+	// PHP >= 8.2 : pic mesuré sur le seul morceau de code
+	if ( function_exists( 'memory_reset_peak_usage' ) ) {{
+		memory_reset_peak_usage();
+	}}
+	return array(
+		'time'    => microtime( true ),
+		'memory'  => memory_get_usage(),
+		'queries' => (int) $wpdb->num_queries,
+		'saved'   => is_array( $wpdb->queries ) ? count( $wpdb->queries ) : 0,
+	);
+}};
+$__e2e_cost_end = static function ( $state ) {{
+	global $wpdb;
+	$elapsed = microtime( true ) - $state['time'];
+	$slowest = array();
+	if ( is_array( $wpdb->queries ) ) {{
+		$slowest = array_slice( $wpdb->queries, $state['saved'] );
+		usort( $slowest, static function ( $a, $b ) {{
+			return $b[1] <=> $a[1];
+		}} );
+		$slowest = array_map( static function ( $query ) {{
+			return array(
+				'sql'    => substr( preg_replace( '/\\s+/', ' ', $query[0] ), 0, 160 ),
+				'ms'     => round( $query[1] * 1000, 3 ),
+				'caller' => substr( (string) $query[2], -100 ),
+			);
+		}}, array_slice( $slowest, 0, {SLOWEST_QUERIES} ) );
+	}}
+	return array(
+		'time_ms'         => round( $elapsed * 1000, 3 ),
+		'queries'         => (int) $wpdb->num_queries - $state['queries'],
+		'memory_peak_kb'  => round( memory_get_peak_usage() / 1024, 1 ),
+		'memory_delta_kb' => round( ( memory_get_usage() - $state['memory'] ) / 1024, 1 ),
+		'peak_scoped'     => function_exists( 'memory_reset_peak_usage' ),
+		'savequeries'     => defined( 'SAVEQUERIES' ) && SAVEQUERIES,
+		'slowest'         => $slowest,
+	);
+}};
+"""
+
+
+def mu_plugin_php() -> str:
+    """Source du mu-plugin de relevé des pages (inerte sans l'en-tête X-E2E-Profile)"""
+    server_key = "HTTP_" + PROFILE_REQUEST_HEADER.upper().replace("-", "_")
+    return f"""<?php
+/**
+ * E2E : coût serveur des requêtes marquées {PROFILE_REQUEST_HEADER} (installé et retiré par le framework de tests)
+ */
+if ( empty( $_SERVER[{php_string(server_key)}] ) ) {{
+	return;
+}}
+{cost_closures_php()}
+$__e2e_cost_state = $__e2e_cost_start();
+ob_start( static function ( $buffer, $phase ) use ( $__e2e_cost_end, $__e2e_cost_state ) {{
+	static $sent = false;
+	if ( $sent || headers_sent() ) {{
+		return $buffer;
+	}}
+	$sent = true;
+	$cost = $__e2e_cost_end( $__e2e_cost_state );
+	$cost['request_ms'] = round( ( microtime( true ) - $_SERVER['REQUEST_TIME_FLOAT'] ) * 1000, 3 );
+	$cost['partial']    = ! ( $phase & PHP_OUTPUT_HANDLER_FINAL );
+	header( 'X-E2E-Cost: ' . base64_encode( wp_json_encode( $cost ) ) );
+	return $buffer;
+}} );
+"""
+
+
+def install_php() -> str:
+    """Dépose le mu-plugin dans WPMU_PLUGIN_DIR"""
+    encoded = base64.b64encode(mu_plugin_php().encode("utf-8")).decode("ascii")
+    return f"""<?php
+$path = WPMU_PLUGIN_DIR . '/' . {php_string(MU_PLUGIN_FILE)};
+$ok   = wp_mkdir_p( WPMU_PLUGIN_DIR ) && false !== file_put_contents( $path, base64_decode( {php_string(encoded)} ) );
+echo {php_string(PROFILER_BEGIN)} . wp_json_encode( array( 'installed' => $ok, 'path' => $path ) ) . {php_string(PROFILER_END)};
+"""
+
+
+def uninstall_php() -> str:
+    return f"""<?php
+$path = WPMU_PLUGIN_DIR . '/' . {php_string(MU_PLUGIN_FILE)};
+$ok   = ! file_exists( $path ) || unlink( $path );
+echo {php_string(PROFILER_BEGIN)} . wp_json_encode( array( 'removed' => $ok, 'path' => $path ) ) . {php_string(PROFILER_END)};
+"""
+
+
+def parse_cost_header(value: Optional[str]) -> Optional[Dict]:
+    """Relevé d'une réponse HTTP (None si l'en-tête est absent ou illisible)"""
+    if not value:
+        return None
+    try:
+        return json.loads(base64.b64decode(value))
+    except (binascii.Error, ValueError):
+        return None
+
+
+def format_cost(cost: Dict) -> str:
+    """Résumé d'une ligne : « 12.3 ms, 4 SQL, pic 2 048 Kio »"""
+    parts = [f"{cost['time_ms']:.1f} ms"]
+    if cost.get("request_ms") is not None:
+        parts[0] += f" (requête {cost['request_ms']:.0f} ms)"
+    parts.append(f"{cost['queries']} SQL")
+    parts.append(f"pic {cost['memory_peak_kb']:.0f} Kio")
+    if cost.get("slowest"):
+        parts.append(f"SQL max {cost['slowest'][0]['ms']:.1f} ms")
+    return ", ".join(parts)
+
+
+class CostLog:
+    """
+    Relevés du run : totaux exhaustifs, détail des `kept` plus coûteux
+    seulement (la mémoire ne croît pas avec le nombre de relevés)
+    """
+
+    def __init__(self, kept: int = 50):
+        self.count = 0
+        self.queries = 0
+        self.time_ms = 0.0
+        self.savequeries = False
+        self.top = TopN(kept, key=lambda entry: entry["cost"]["time_ms"])
+
+    def add(self, entry: Dict):
+        """entry = {"source", "name", "phase", "cost"}"""
+        cost = entry["cost"]
+        self.count += 1
+        self.queries += cost.get("queries", 0)
+        self.time_ms += cost.get("time_ms", 0.0)
+        self.savequeries = self.savequeries or bool(cost.get("savequeries"))
+        self.top.add(entry)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "queries": self.queries,
+            "time_ms": self.time_ms,
+            "most_expensive": self.top.items(),
+        }
+
+
+def costs_markdown(log: CostLog, top: int = 15) -> str:
+    """Tableau des relevés les plus coûteux et de leurs requêtes les plus lentes"""
+    ranked = log.top.items(top)
+    lines = [
+        f"{log.count} relevé(s), {log.queries} requêtes SQL au total.",
+        "",
+        "| Temps | Requêtes | Pic mémoire | Source | Élément | Phase |",
+        "|-------|----------|-------------|--------|---------|-------|",
+    ]
+    for entry in ranked:
+        cost = entry["cost"]
+        name = entry["name"].replace("|", "\\|")
+        lines.append(
+            f"| {cost['time_ms']:.1f} ms | {cost['queries']} | {cost['memory_peak_kb']:.0f} Kio | "
+            f"{entry['source']} | {name} | {entry['phase']} |"
+        )
+
+    slow = [(entry, query) for entry in ranked for query in entry["cost"].get("slowest", [])]
+    if slow:
+        lines += [
+            "",
+            "**Requêtes SQL les plus lentes**",
+            "",
+            "| Durée | Élément | Requête | Appelant |",
+            "|-------|---------|---------|----------|",
+        ]
+        for entry, query in sorted(slow, key=lambda item: item[1]["ms"], reverse=True)[:top]:
+            sql = query["sql"].replace("|", "\\|")
+            caller = query["caller"].replace("|", "\\|")
+            name = entry["name"].replace("|", "\\|")
+            lines.append(f"| {query['ms']:.2f} ms | {name} | `{sql}` | {caller} |")
+    elif log.count and not log.savequeries:
+        lines += ["", "SAVEQUERIES est défini à false sur le site : détail des requêtes indisponible."]
+    return "\n".join(lines) + "\n"
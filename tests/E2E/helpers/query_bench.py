@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Mesure des méthodes de requête du plugin sur les tables amorcées
+Un `wp eval-file` chronomètre chaque méthode (médiane sur N exécutions, les
+suppressions étant exécutées dans une transaction annulée), capture le SQL
+émis via le filtre `query` et récupère son plan EXPLAIN.
+"""
+
+import math
+from typing import Dict, List
+
+from table_seeder import TABLE_GENERATORS, seed_token, seed_token_like
+from wp_batch import php_string
+
+
+SCHEMA_BEGIN = "__E2E_SCHEMA_BEGIN__"
+SCHEMA_END = "__E2E_SCHEMA_END__"
+QUERIES_BEGIN = "__E2E_QUERIES_BEGIN__"
+QUERIES_END = "__E2E_QUERIES_END__"
+
+# Types d'accès EXPLAIN signalant un parcours complet
+FULL_SCAN_TYPES = ("ALL", "index")
+
+
+def schema_php() -> str:
+    """Préfixe, colonnes et nombre de lignes amorcées de chaque table"""
+    tables = ", ".join(php_string(table) for table in TABLE_GENERATORS)
+    return f"""<?php
+global $wpdb;
+$schema = array( 'prefix' => $wpdb->prefix, 'tables' => array() );
+foreach ( array( {tables} ) as $table ) {{
+	$name = $wpdb->prefix . $table;
+	if ( $wpdb->get_var( $wpdb->prepare( 'SHOW TABLES LIKE %s', $name ) ) !== $name ) {{
+		continue;
+	}}
+	$schema['tables'][ $table ] = array(
+		'columns' => $wpdb->get_col( "SHOW COLUMNS FROM {{$name}}" ),
+		'seeded'  => (int) $wpdb->get_var( $wpdb->prepare( "SELECT COUNT(*) FROM {{$name}} WHERE token LIKE %s", {php_string(seed_token_like())} ) ),
+		'total'   => (int) $wpdb->get_var( "SELECT COUNT(*) FROM {{$name}}" ),
+	);
+}}
+echo {php_string(SCHEMA_BEGIN)} . wp_json_encode( $schema ) . {php_string(SCHEMA_END)};
+"""
+
+
+def queries_php(sample_index: int, repeat: int = 5, include_deletes: bool = True) -> str:
+    """
+    Chronomètre les méthodes du plugin ; `sample_index` désigne une ligne
+    amorcée existante (jeton, formulaire, utilisateur cohérents)
+    """
+    token = php_string(seed_token(sample_index))
+    form_id = sample_index % 20 + 1
+    user_id = sample_index % 50000 + 1
+    return f"""<?php
+global $wpdb;
+$token     = {token};
+$repeat    = {max(1, int(repeat))};
+$deletes   = {'true' if include_deletes else 'false'};
+$captured  = array();
+$capturing = false;
+
+add_filter( 'query', function ( $sql ) use ( &$captured, &$capturing ) {{
+	if ( $capturing ) {{
+		$captured[] = $sql;
+	}}
+	return $sql;
+}} );
+$wpdb->suppress_errors( true );
+
+$tracking = \\WcQualiopiFormation\\Form\\Tracking\\TrackingStorage::class;
+$queries  = array(
+	'TrackingStorage::get_by_form' => array( false, function () use ( $tracking ) {{
+		return count( ( new $tracking() )->get_by_form( {form_id}, 100 ) );
+	}} ),
+	'TrackingStorage::count' => array( false, function () use ( $tracking ) {{
+		return ( new $tracking() )->count();
+	}} ),
+	'TrackingStorage::count(form_id)' => array( false, function () use ( $tracking ) {{
+		return ( new $tracking() )->count( array( 'form_id' => {form_id} ) );
+	}} ),
+	'TrackingStorage::count(form_id, user_id)' => array( false, function () use ( $tracking ) {{
+		return ( new $tracking() )->count( array( 'form_id' => {form_id}, 'user_id' => {user_id} ) );
+	}} ),
+	'TrackingStorage::cleanup_old(90)' => array( true, function () use ( $tracking ) {{
+		return ( new $tracking() )->cleanup_old( 90 );
+	}} ),
+	'TrackingStore::load' => array( false, function () use ( $token ) {{
+		return null !== \\WcQualiopiFormation\\Data\\Store\\TrackingStore::load( $token );
+	}} ),
+	'TrackingStore::delete_old(90)' => array( true, function () {{
+		return \\WcQualiopiFormation\\Data\\Store\\TrackingStore::delete_old( 90 );
+	}} ),
+	'ProgressStorage::get' => array( false, function () use ( $token ) {{
+		return null !== \\WcQualiopiFormation\\Data\\Progress\\ProgressStorage::get( $token );
+	}} ),
+	'ProgressStore::get_count_stats' => array( false, function () {{
+		return \\WcQualiopiFormation\\Data\\Store\\ProgressStore::get_count_stats();
+	}} ),
+	'ProgressStore::delete_old(90)' => array( true, function () {{
+		return \\WcQualiopiFormation\\Data\\Store\\ProgressStore::delete_old( 90 );
+	}} ),
+	'AuditStore::load' => array( false, function () use ( $token ) {{
+		return count( \\WcQualiopiFormation\\Data\\Store\\AuditStore::load( $token ) );
+	}} ),
+	'AuditStore::delete_old(90)' => array( true, function () {{
+		return \\WcQualiopiFormation\\Data\\Store\\AuditStore::delete_old( 90 );
+	}} ),
+);
+
+$report = array();
+foreach ( $queries as $name => $query ) {{
+	list( $destructive, $callable ) = $query;
+	if ( $destructive && ! $deletes ) {{
+		continue;
+	}}
+	$captured = array();
+	$timings  = array();
+	$error    = '';
+	$value    = null;
+
+	for ( $run = 0; $run < ( $destructive ? 1 : $repeat ); $run++ ) {{
+		if ( $destructive ) {{
+			$wpdb->query( 'START TRANSACTION' );
+		}}
+		$wpdb->last_error = '';
+		$capturing        = true;
+		$start            = microtime( true );
+		try {{
+			$value = call_user_func( $callable );
+		}} catch ( \\Throwable $e ) {{
+			$error = get_class( $e ) . ' : ' . $e->getMessage();
+		}}
+		$timings[] = microtime( true ) - $start;
+		$capturing = false;
+		if ( '' === $error && $wpdb->last_error ) {{
+			$error = $wpdb->last_error;
+		}}
+		if ( $destructive ) {{
+			$wpdb->query( 'ROLLBACK' );
+		}}
+	}}
+
+	sort( $timings );
+	$explains = array();
+	foreach ( array_unique( $captured ) as $sql ) {{
+		if ( preg_match( '/^\\s*(SELECT|DELETE|UPDATE)\\b/i', $sql ) ) {{
+			$explains[] = array(
+				'sql'  => $sql,
+				'plan' => $wpdb->get_results( 'EXPLAIN ' . $sql, ARRAY_A ),
+			);
+		}}
+	}}
+
+	$report[ $name ] = array(
+		'destructive' => $destructive,
+		'median'      => $timings[ intdiv( count( $timings ), 2 ) ],
+		'min'         => $timings[0],
+		'max'         => $timings[ count( $timings ) - 1 ],
+		'runs'        => count( $timings ),
+		'result'      => is_scalar( $value ) ? $value : wp_json_encode( $value ),
+		'error'       => $error,
+		'explain'     => $explains,
+	);
+}}
+
+echo {php_string(QUERIES_BEGIN)} . wp_json_encode( $report ) . {php_string(QUERIES_END)};
+"""
+
+
+def full_scans(entry: Dict) -> List[str]:
+    """Tables parcourues intégralement d'après les plans EXPLAIN d'une mesure"""
+    scans = []
+    for explain in entry.get("explain", []):
+        for row in explain.get("plan") or []:
+            if row.get("type") in FULL_SCAN_TYPES:
+                scans.append(f"{row.get('table')} ({row.get('type')}, ~{row.get('rows')} lignes)")
+    return scans
+
+
+def scaling_curves(measures: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Courbe par requête : [{rows, median_ms, slope, full_scans}]
+
+    `slope` : pente log-log depuis le point précédent (≈0 constant,
+    ≈1 linéaire : parcours complet probable).
+    """
+    curves: Dict[str, List[Dict]] = {}
+    for measure in sorted(measures, key=lambda item: item["rows"]):
+        for name, entry in measure["queries"].items():
+            points = curves.setdefault(name, [])
+            median_ms = entry["median"] * 1000
+            slope = None
+            if points and points[-1]["median_ms"] > 0 and median_ms > 0 and measure["rows"] != points[-1]["rows"]:
+                slope = math.log(median_ms / points[-1]["median_ms"]) / math.log(measure["rows"] / points[-1]["rows"])
+            points.append(
+                {
+                    "rows": measure["rows"],
+                    "median_ms": median_ms,
+                    "slope": slope,
+                    "full_scans": full_scans(entry),
+                    "error": entry["error"],
+                }
+            )
+    return curves
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Puits de rapport incrémentaux
+Les évènements du run (phases, logs, observations, commandes) sont écrits
+au fil de l'eau : un crash en cours de run ne perd rien et la mémoire ne
+dépend pas de la durée du run. Le rapport Markdown est rendu à la fin en
+relisant le flux JSONL ligne à ligne.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, IO, Iterator, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from php_profiler import format_cost
+
+
+class ReportSink:
+    """Destination d'évènements ; `close` reçoit le résumé final du run"""
+
+    def emit(self, event: Dict):
+        raise NotImplementedError
+
+    def close(self, summary: Optional[Dict] = None):
+        pass
+
+
+class JsonlSink(ReportSink):
+    """Un évènement JSON par ligne, vidé sur disque à chaque écriture"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file: Optional[IO[str]] = open(path, "w", encoding="utf-8", buffering=1)
+
+    def emit(self, event: Dict):
+        if self._file is not None:
+            self._file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+    def close(self, summary: Optional[Dict] = None):
+        if self._file is None:
+            return
+        if summary is not None:
+            self.emit({"kind": "run_end", **summary})
+        self._file.close()
+        self._file = None
+
+
+def read_events(path: str) -> Iterator[Dict]:
+    """Relit un flux JSONL (ligne tronquée par un crash ignorée)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class JUnitSink(ReportSink):
+    """
+    JUnit XML au format de tests/reports/junit.xml (Pest) : une suite par
+    script, une sous-suite par phase, un cas par vérification (log succès
+    ou erreur). Les cas sont écrits au fil de l'eau dans un fichier
+    `.partial` ; seuls les compteurs de phase restent en mémoire.
+    """
+
+    def __init__(self, path: str, test_id: str, source_file: str):
+        self.path = path
+        self.test_id = test_id
+        self.source_file = source_file
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._body: Optional[IO[str]] = open(f"{path}.partial", "w", encoding="utf-8", buffering=1)
+        self._phases: List[Dict] = []
+        self._last_time: Optional[float] = None
+        self._phase("(hors phase)", None)
+
+    def _phase(self, name: str, at: Optional[float]):
+        self._phases.append(
+            {"name": name, "start": self._body.tell(), "end": None,
+             "tests": 0, "failures": 0, "warnings": 0, "time": 0.0}
+        )
+        self._last_time = at
+
+    def emit(self, event: Dict):
+        if self._body is None:
+            return
+        kind = event.get("kind")
+        if kind == "phase":
+            self._phases[-1]["end"] = self._body.tell()
+            self._phase(event["name"], event["time"])
+        elif kind == "log" and event["type"] == "warning":
+            self._phases[-1]["warnings"] += 1
+        elif kind == "log" and event["type"] in ("success", "error"):
+            self._testcase(event)
+
+    def _testcase(self, event: Dict):
+        phase = self._phases[-1]
+        elapsed = event["time"] - self._last_time if self._last_time is not None else 0.0
+        self._last_time = event["time"]
+        phase["tests"] += 1
+        phase["time"] += elapsed
+        head = (
+            f"      <testcase name={quoteattr(event['message'])} class={quoteattr(self.test_id)} "
+            f"classname={quoteattr(self.test_id)} file={quoteattr(self.source_file)} "
+            f'assertions="1" time="{elapsed:.6f}"'
+        )
+        if event["type"] == "success":
+            self._body.write(head + "/>\n")
+            return
+        phase["failures"] += 1
+        self._body.write(
+            head + ">\n"
+            f'        <failure type="E2E\\CheckFailed">{escape(event["message"])}</failure>\n'
+            "      </testcase>\n"
+        )
+
+    def close(self, summary: Optional[Dict] = None):
+        """Assemble le XML final : en-têtes avec compteurs puis cas relus par plage"""
+        if self._body is None:
+            return
+        self._phases[-1]["end"] = self._body.tell()
+        self._body.close()
+        self._body = None
+        phases = [phase for phase in self._phases if phase["tests"] or phase["warnings"]]
+        totals = {key: sum(phase[key] for phase in phases) for key in ("tests", "failures", "warnings", "time")}
+        errors = 0 if summary is None or summary.get("completed", True) else 1
+
+        with open(f"{self.path}.partial", "rb") as body, open(self.path, "wb") as out:
+            out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+            out.write(f"  <testsuite name={quoteattr(self.source_file)}{self._counts(totals, errors)}>\n".encode("utf-8"))
+            for phase in phases:
+                out.write(
+                    f"    <testsuite name={quoteattr(phase['name'])} file={quoteattr(self.source_file)}"
+                    f"{self._counts(phase, 0)}>\n".encode("utf-8")
+                )
+                body.seek(phase["start"])
+                remaining = phase["end"] - phase["start"]
+                while remaining > 0:
+                    chunk = body.read(min(remaining, 65536))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                out.write(b"    </testsuite>\n")
+            out.write(b"  </testsuite>\n</testsuites>\n")
+        os.remove(f"{self.path}.partial")
+
+    @staticmethod
+    def _counts(counts: Dict, errors: int) -> str:
+        return (
+            f' tests="{counts["tests"]}" assertions="{counts["tests"]}" errors="{errors}"'
+            f' warnings="{counts["warnings"]}" failures="{counts["failures"]}" skipped="0"'
+            f' time="{counts["time"]:.6f}"'
+        )
+
+
+def render_markdown(events_path: str, output_path: str, header: Dict, sections: List[str]):
+    """
+    Rapport Markdown rendu depuis le flux d'évènements, écrit au fil de la
+    lecture (aucune concaténation du rapport en mémoire)
+
+    `header` : test_name, test_id, description, duration, success_rate ;
+    `sections` : blocs Markdown additionnels (temps, logs du plugin).
+    """
+    # Une passe par section : le flux n'est jamais chargé en entier
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write(
+            f"# {header['test_name']}\n\n"
+            f"**Test ID** : {header['test_id']}  \n"
+            f"**Date** : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  \n"
+            f"**Durée** : {header['duration']:.2f}s  \n"
+            f"**Taux de succès** : {header['success_rate']:.1f}%\n\n"
+            f"## Description\n\n{header['description']}\n\n"
+            "## Phases Exécutées\n\n"
+        )
+        for event in read_events(events_path):
+            if event.get("kind") == "phase":
+                out.write(f"- {event['name']}\n")
+
+        out.write("\n## Observations\n\n")
+        for event in read_events(events_path):
+            if event.get("kind") == "observation":
+                out.write(f"- **Q**: {event['question']}\n")
+                out.write(f"  **R**: {event['response']}\n\n")
+
+        out.write("\n## Logs\n\n```\n")
+        for event in read_events(events_path):
+            if event.get("kind") == "log":
+                timestamp = datetime.fromtimestamp(event["time"]).strftime("%H:%M:%S")
+                metrics = event.get("metrics")
+                suffix = f" [{format_cost(metrics)}]" if metrics and "time_ms" in metrics else ""
+                out.write(f"[{timestamp}] [{event['type'].upper()}] {event['message']}{suffix}\n")
+        out.write("```\n")
+
+        for section in sections:
+            out.write(section)
+
+        success_rate = header["success_rate"]
+        out.write("\n## Recommandations\n\n")
+        if success_rate >= 90:
+            out.write("✅ **Test réussi** - Le workflow fonctionne comme prévu.\n")
+        elif success_rate >= 70:
+            out.write("⚠️ **Test partiellement réussi** - Quelques problèmes mineurs à corriger.\n")
+        else:
+            out.write("❌ **Test échoué** - Des problèmes critiques nécessitent une attention immédiate.\n")
+
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Scénarios E2E déclaratifs compilés en plan d'exécution
+Un scénario décrit des phases et des étapes typées : lecture (sonde PHP,
+commande shell en lecture seule), mutation (PHP, WP-CLI), instruction et
+observation. Le planificateur :
+
+- découpe chaque phase en époques séparées par les mutations et les
+  consignes (barrières) : une époque ne déborde jamais sur la phase
+  suivante, le coût de ses lectures reste imputé à sa phase ;
+- déduplique les lectures identiques d'une même époque ;
+- exécute toutes les sondes PHP d'une époque en un seul `wp eval-file`,
+  et ses lectures shell en parallèle ;
+- regroupe les mutations PHP consécutives d'une phase en un seul `wp eval-file`.
+
+Les résultats sont journalisés étape par étape, dans l'ordre déclaré.
+"""
+
+import asyncio
+import json
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from expectations import Check, Expectation
+from test_framework import E2ETestFramework
+from wp_batch import php_string
+
+
+READ = "read"
+MUTATE = "mutate"
+
+
+class Step:
+    """Étape d'une phase ; `key` identifie les lectures équivalentes"""
+
+    mode = READ
+    key: Optional[Tuple] = None
+
+    def __init__(self, description: str, name: Optional[str] = None):
+        self.description = description
+        self.name = name
+
+
+class PhpStep(Step):
+    """
+    Closure PHP (corps avec return) et condition de succès sur $value
+
+    `invalidates=False` : écriture sans effet sur les lectures du scénario
+    (log, compteur) ; les lectures suivantes restent dans la même époque.
+    """
+
+    def __init__(self, description: str, body: str, check: str, mode: str = READ,
+                 name: Optional[str] = None, invalidates: bool = True):
+        super().__init__(description, name)
+        self.body = body
+        self.check = check
+        self.mode = mode
+        self.invalidates = invalidates
+        self.key = ("php", body, check)
+
+
+class ShellStep(Step):
+    """Commande shell (WSL) ; en lecture, `pattern` est attendu dans la sortie"""
+
+    def __init__(self, description: str, command: str, pattern: Optional[str] = None,
+                 mode: str = READ, name: Optional[str] = None):
+        super().__init__(description, name)
+        self.command = command
+        self.pattern = pattern
+        self.mode = mode
+        self.key = ("shell", command, pattern)
+
+
+class InstructionStep(Step):
+    """
+    Consignes utilisateur : barrière par défaut, l'utilisateur peut modifier
+    l'état entre deux lectures ; `barrier=False` pour une consigne purement
+    informative (les lectures qui l'encadrent restent dans la même époque)
+    """
+
+    def __init__(self, lines: Tuple[str, ...], barrier: bool = True):
+        super().__init__(lines[0] if lines else "")
+        self.lines = lines
+        self.mode = MUTATE if barrier else READ
+
+
+class ObservationStep(Step):
+    """Question d'observation, vérifiée en headless par `expect`"""
+
+    def __init__(self, question: str, expect: Union[None, str, Expectation] = None):
+        super().__init__(question)
+        self.expect = expect
+
+
+class Phase:
+    """Constructeur des étapes d'une phase"""
+
+    def __init__(self, title: str, project_dir: str):
+        self.title = title
+        self.project_dir = project_dir
+        self.steps: List[Step] = []
+
+    def _add(self, step: Step) -> "Phase":
+        self.steps.append(step)
+        return self
+
+    # Lectures
+    def probe(self, description: str, body: str, check: str = "false !== $value && null !== $value",
+              name: Optional[str] = None) -> "Phase":
+        return self._add(PhpStep(description, body, check, READ, name))
+
+    def class_exists(self, class_name: str, name: Optional[str] = None) -> "Phase":
+        return self.probe(f"Classe {class_name.split(chr(92))[-1]} chargée",
+                          f"return class_exists( {php_string(class_name)} );", "true === $value", name)
+
+    def hook_registered(self, hook: str, kind: str = "filter", name: Optional[str] = None) -> "Phase":
+        function = "has_action" if kind == "action" else "has_filter"
+        return self.probe(f"Hook {hook} enregistré", f"return {function}( {php_string(hook)} );",
+                          "false !== $value", name)
+
+    def option(self, option: str, check: str = "null !== $value", description: Optional[str] = None,
+               name: Optional[str] = None) -> "Phase":
+        """Option WordPress ($value = valeur décodée, null si absente)"""
+        return self.probe(description or f"Option {option}", f"return get_option( {php_string(option)}, null );",
+                          check, name)
+
+    def table_columns(self, table: str, columns: List[str], name: Optional[str] = None) -> "Phase":
+        """Table `{prefix}{table}` présente avec au moins `columns`"""
+        expected = "array( " + ", ".join(php_string(column) for column in columns) + " )"
+        body = (
+            "global $wpdb; "
+            f"$table = $wpdb->prefix . {php_string(table)}; "
+            "if ( $wpdb->get_var( $wpdb->prepare( 'SHOW TABLES LIKE %s', $table ) ) !== $table ) { return null; } "
+            f"return array_values( array_diff( {expected}, $wpdb->get_col( \"SHOW COLUMNS FROM {{$table}}\" ) ) );"
+        )
+        return self.probe(f"Table {table} : colonnes {', '.join(columns)}", body,
+                          "is_array( $value ) && empty( $value )", name)
+
+    def shell(self, description: str, command: str, pattern: Optional[str] = None,
+              name: Optional[str] = None) -> "Phase":
+        """Commande shell en lecture seule (exécutée en parallèle des autres lectures)"""
+        return self._add(ShellStep(description, command, pattern, READ, name))
+
+    # Mutations
+    def php(self, description: str, body: str, check: str = "false !== $value",
+            name: Optional[str] = None, invalidates: bool = True) -> "Phase":
+        return self._add(PhpStep(description, body, check, MUTATE, name, invalidates))
+
+    def set_option(self, option: str, value: Any, autoload: bool = True) -> "Phase":
+        """update_option avec une valeur JSON (tableaux associatifs côté PHP)"""
+        literal = php_string(json.dumps(value))
+        body = (
+            f"update_option( {php_string(option)}, json_decode( {literal}, true ), {'true' if autoload else 'false'} ); "
+            f"return get_option( {php_string(option)}, null ) === json_decode( {literal}, true );"
+        )
+        return self.php(f"Option {option} écrite", body, "true === $value")
+
+    def delete_options(self, *options: str) -> "Phase":
+        names = "array( " + ", ".join(php_string(option) for option in options) + " )"
+        body = f"foreach ( {names} as $name ) {{ delete_option( $name ); }} return true;"
+        return self.php(f"Options supprimées : {', '.join(options)}", body, "true === $value")
+
+    def wp_cli(self, description: str, arguments: str) -> "Phase":
+        """Commande `ddev wp` qui modifie l'état (activation, import...)"""
+        return self._add(ShellStep(description, f"cd {self.project_dir} && ddev wp {arguments}", None, MUTATE))
+
+    # Interaction
+    def instruction(self, *lines: str, barrier: bool = True) -> "Phase":
+        return self._add(InstructionStep(lines, barrier))
+
+    def observe(self, question: str, expect: Union[None, str, Expectation] = None) -> "Phase":
+        """`expect` : attente, ou nom d'une étape dont le succès répond à la question"""
+        return self._add(ObservationStep(question, expect))
+
+
+class Scenario:
+    """Scénario déclaratif : phases ordonnées, fixture d'état optionnelle"""
+
+    def __init__(self, project_dir: str, fixture: Optional[str] = None):
+        self.project_dir = project_dir
+        self.fixture = fixture
+        self.phases: List[Phase] = []
+
+    def phase(self, title: str) -> Phase:
+        phase = Phase(title, self.project_dir)
+        self.phases.append(phase)
+        return phase
+
+    def steps(self) -> List[Step]:
+        return [step for phase in self.phases for step in phase.steps]
+
+
+class ExecutionPlan:
+    """
+    Résultat de la compilation
+
+    `epoch_of[id(step)]` : époque d'une lecture ; `group_of[id(step)]` :
+    lot de mutations PHP consécutives (exécuté à la première étape du lot).
+    Époques et lots ne franchissent pas les limites de phase.
+    """
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.epochs: List[Dict[Tuple, Step]] = [{}]
+        self.epoch_of: Dict[int, int] = {}
+        self.groups: List[List[PhpStep]] = []
+        self.group_of: Dict[int, int] = {}
+        self.declared_reads = 0
+        self._compile()
+
+    def _compile(self):
+        for phase in self.scenario.phases:
+            # Nouvelle phase : ni les lectures ni les mutations ne sont exécutées en avance
+            if self.epochs[-1]:
+                self.epochs.append({})
+            previous: Optional[Step] = None
+            for step in phase.steps:
+                self._compile_step(step, previous)
+                previous = step
+
+    def _compile_step(self, step: Step, previous: Optional[Step]):
+        if isinstance(step, (PhpStep, ShellStep)) and step.mode == READ:
+            self.declared_reads += 1
+            # Première occurrence conservée, les suivantes partagent son résultat
+            self.epochs[-1].setdefault(step.key, step)
+            self.epoch_of[id(step)] = len(self.epochs) - 1
+        elif step.mode == MUTATE:
+            if isinstance(step, PhpStep):
+                if isinstance(previous, PhpStep) and previous.mode == MUTATE:
+                    self.groups[-1].append(step)
+                else:
+                    self.groups.append([step])
+                self.group_of[id(step)] = len(self.groups) - 1
+            # Une mutation (ou une consigne barrière) invalide les lectures précédentes
+            if self.epochs[-1] and getattr(step, "invalidates", True):
+                self.epochs.append({})
+
+    @property
+    def unique_reads(self) -> int:
+        return sum(len(epoch) for epoch in self.epochs)
+
+    def round_trips(self) -> Tuple[int, int]:
+        """(appels WSL sans plan, appels avec plan)"""
+        steps = self.scenario.steps()
+        naive = len([step for step in steps if isinstance(step, (PhpStep, ShellStep))])
+        planned = len(self.groups) + len(
+            [step for step in steps if isinstance(step, ShellStep) and step.mode == MUTATE]
+        )
+        for epoch in self.epochs:
+            php = [step for step in epoch.values() if isinstance(step, PhpStep)]
+            shell = [step for step in epoch.values() if isinstance(step, ShellStep)]
+            planned += (1 if php else 0) + len(shell)
+        return naive, planned
+
+    def describe(self) -> str:
+        naive, planned = self.round_trips()
+        return (
+            f"{len(self.scenario.phases)} phases, {len(self.scenario.steps())} étapes, "
+            f"{self.declared_reads} lectures ({self.unique_reads} uniques) en {len([e for e in self.epochs if e])} époques, "
+            f"lots de mutations PHP : {len(self.groups)} ; {naive} → {planned} appels WSL"
+        )
+
+
+class ScenarioTest(E2ETestFramework):
+    """
+    Base des scénarios déclaratifs : la sous-classe implémente
+    `build(scenario)` et hérite de l'exécution planifiée et du rapport
+    """
+
+    TEST_ID = ""
+    TEST_NAME = ""
+    DESCRIPTION = ""
+    # Instantané de l'état du plugin autour du scénario (suffixé par worker)
+    FIXTURE: Optional[str] = None
+
+    def __init__(self):
+        super().__init__(test_id=self.TEST_ID, test_name=self.TEST_NAME, description=self.DESCRIPTION)
+        fixture = f"{self.FIXTURE}_w{self.worker.worker_id}" if self.FIXTURE else None
+        self.scenario = Scenario(self.WP_PROJECT_DIR, fixture)
+        self.build(self.scenario)
+        self.plan = ExecutionPlan(self.scenario)
+        self.step_results: Dict[int, Dict] = {}
+        self._epoch_results: Dict[int, Dict[Tuple, Dict]] = {}
+        self._group_results: Dict[int, Dict[str, Dict]] = {}
+
+    def build(self, scenario: Scenario):
+        raise NotImplementedError("build() doit déclarer les phases du scénario")
+
+    def run(self):
+        """Exécution planifiée, rapport dans tous les cas"""
+        print(f"\n🚀 Démarrage du test : {self.test_name}\n")
+        print(f"🧭 Plan : {self.plan.describe()}\n")
+        fixture = self.state_fixture(self.scenario.fixture) if self.scenario.fixture else nullcontext()
+        try:
+            with fixture:
+                for phase in self.scenario.phases:
+                    self.print_phase(phase.title)
+                    for step in phase.steps:
+                        self.execute_step(step)
+        except KeyboardInterrupt:
+            self.log_warning("Test interrompu manuellement")
+        except Exception as e:
+            self.log_error(f"Exception: {str(e)}")
+            raise
+        finally:
+            self.generate_report()
+
+    def execute_step(self, step: Step):
+        if isinstance(step, InstructionStep):
+            self.print_instruction(*step.lines)
+        elif isinstance(step, ObservationStep):
+            self.collect_observations([(step.description, self._expectation(step.expect))])
+        elif isinstance(step, PhpStep) and step.mode == MUTATE:
+            self._log_result(step, self._run_group(self.plan.group_of[id(step)])[str(id(step))])
+        elif isinstance(step, ShellStep) and step.mode == MUTATE:
+            result = self.execute_ssh_command(step.description, step.command)
+            self._store(step, {"passed": result["success"], "value": result.get("output")})
+        else:
+            epoch = self.plan.epoch_of[id(step)]
+            results = self._run_epoch(epoch)
+            shared = self.plan.epochs[epoch][step.key] is not step
+            self._log_result(step, results[step.key], shared)
+
+    def _store(self, step: Step, result: Dict):
+        self.step_results[id(step)] = result
+        if step.name:
+            self.step_results[step.name] = result
+
+    def _log_result(self, step: Step, result: Dict, shared: bool = False):
+        self._store(step, result)
+        cost = None
+        if isinstance(step, PhpStep):
+            self.logs.add_probe(step.name or step.description, bool(result["passed"]))
+            # Un résultat partagé a déjà été relevé par la première étape
+            if not shared:
+                cost = self.record_php_cost("sonde", step.description, result.get("cost"))
+        suffix = " (résultat partagé)" if shared else ""
+        if result["passed"]:
+            self.log_success(f"{step.description} → OK{suffix}", cost)
+        else:
+            detail = result.get("error") or f"valeur = {result.get('value')!r}"
+            self.log_error(f"{step.description} → ERREUR: {detail}{suffix}", cost)
+
+    def _expectation(self, expect: Union[None, str, Expectation]) -> Optional[Expectation]:
+        if not isinstance(expect, str):
+            return expect
+        # Étape déjà journalisée (_log_result ou execute_ssh_command) : l'observation ne la recompte pas
+        return Check(
+            lambda _: self.step_results.get(expect, {}).get("passed", False), f"Étape {expect}", recorded=True
+        )
+
+    def _run_group(self, index: int) -> Dict[str, Dict]:
+        """Mutations PHP consécutives : un seul `wp eval-file`, exécution dans l'ordre"""
+        if index not in self._group_results:
+            batch = self.new_probe_batch()
+            for step in self.plan.groups[index]:
+                batch.add(str(id(step)), step.body, step.description, step.check)
+            self._group_results[index] = self.run_probe_batch(
+                batch, "Mutations groupées", log_results=False
+            )
+        return self._group_results[index]
+
+    def _run_epoch(self, index: int) -> Dict[Tuple, Dict]:
+        """Lectures uniques d'une époque : sondes PHP en un lot, shell en parallèle"""
+        if index in self._epoch_results:
+            return self._epoch_results[index]
+        steps = list(self.plan.epochs[index].values())
+        results: Dict[Tuple, Dict] = {}
+
+        # Époque de lectures déclarées : le cache d'options reste valable
+        batch = self.new_probe_batch(read_only=True)
+        for position, step in enumerate(steps):
+            if isinstance(step, PhpStep):
+                batch.add(f"r{position}", step.body, step.description, step.check)
+        if len(batch):
+            parsed = self.run_probe_batch(batch, "Lectures groupées", log_results=False)
+            for position, step in enumerate(steps):
+                if isinstance(step, PhpStep):
+                    results[step.key] = parsed[f"r{position}"]
+
+        shell = [step for step in steps if isinstance(step, ShellStep)]
+        if shell:
+            for step, outcome in zip(shell, asyncio.run(self._run_shell_reads(shell))):
+                results[step.key] = outcome
+
+        self._epoch_results[index] = results
+        return results
+
+    async def _run_shell_reads(self, steps: List[ShellStep]) -> List[Dict]:
+        raw_results = await asyncio.gather(
+            *(self._run_command_async(step.command, read_only=True) for step in steps), return_exceptions=True
+        )
+        outcomes = []
+        for step, raw in zip(steps, raw_results):
+            if isinstance(raw, BaseException):
+                outcomes.append({"passed": False, "value": None, "error": str(raw)})
+                continue
+            result, timing = raw
+            if isinstance(result, BaseException):
+                self._record_timing(step.description, timing[0], timing[1], 0, False)
+                outcomes.append({"passed": False, "value": None, "error": "TIMEOUT"})
+                continue
+            output = result["stdout"].strip()
+            passed = result["returncode"] == 0 and (step.pattern is None or step.pattern in output)
+            self._record_timing(step.description, timing[0], timing[1], len(result["stdout"].encode("utf-8")), passed)
+            outcomes.append({"passed": passed, "value": output[-200:], "error": None if passed else result["stderr"].strip() or None})
+        return outcomes
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
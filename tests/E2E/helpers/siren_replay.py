@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Rejeu d'un corpus de recherches SIRET à travers le chemin AJAX
+wcqf_verify_siret (AjaxHandler → SirenAutocomplete → SirenCache →
+SirenApiClient), appels API redirigés vers l'API SIREN de remplacement.
+Analyse : distribution des latences, ratio de hits SirenCache, temps
+ajouté par les retries.
+"""
+
+import random
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from load_generator import percentile
+from siren_stub import CORPUS_PATH, make_siret
+from wp_batch import php_string
+
+
+REPLAY_BEGIN = "__E2E_SIREN_BEGIN__"
+REPLAY_END = "__E2E_SIREN_END__"
+
+# Miroir de Constants::API_SIREN_* et de la durée par défaut de SirenCache
+SIREN_TIMEOUT = 10
+SIREN_MAX_RETRIES = 3
+SIREN_RETRY_WAIT = 2
+SIREN_RETRY_STATUSES = (500, 502, 503)
+SIREN_CACHE_DURATION = 24 * 3600
+
+# Durées de cache simulées sur les horodatages du corpus
+SIMULATED_TTLS = [3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600, 30 * 24 * 3600]
+
+
+def generate_corpus(
+    lookups: int, distinct: int, span: float = 7 * 24 * 3600, skew: float = 1.1, seed: int = 42
+) -> List[Tuple[float, str]]:
+    """
+    Corpus synthétique [(décalage en s, siret)] : popularité en loi de Zipf
+    (quelques entreprises reviennent souvent), arrivées uniformes sur `span`
+    """
+    rng = random.Random(seed)
+    sirets = [make_siret(rng) for _ in range(max(1, distinct))]
+    weights = [1 / (rank + 1) ** skew for rank in range(len(sirets))]
+    offsets = sorted(rng.uniform(0, span) for _ in range(lookups))
+    return list(zip(offsets, rng.choices(sirets, weights=weights, k=lookups)))
+
+
+def load_corpus(path: str) -> List[Tuple[float, str]]:
+    """
+    Charge un corpus : une ligne par recherche, `siret[,décalage_s]`
+    (lignes vides et commentaires # ignorés ; sans décalage, pas d'1 s)
+    """
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            siret, _, offset = line.partition(",")
+            siret = "".join(char for char in siret if char.isdigit())
+            corpus.append((float(offset) if offset.strip() else float(len(corpus)), siret))
+    corpus.sort(key=lambda entry: entry[0])
+    return corpus
+
+
+def simulate_ttl_hit_ratios(corpus: List[Tuple[float, str]], ttls: List[int] = SIMULATED_TTLS) -> Dict[str, float]:
+    """
+    Ratio de hits qu'aurait obtenu SirenCache pour chaque durée de cache,
+    d'après les horodatages du corpus (toutes les recherches supposées réussies)
+    """
+    ratios = {}
+    for ttl in ttls:
+        expires: Dict[str, float] = {}
+        hits = 0
+        for offset, siret in corpus:
+            if expires.get(siret, -1.0) > offset:
+                hits += 1
+            else:
+                expires[siret] = offset + ttl
+        ratios[str(ttl)] = hits / len(corpus) * 100 if corpus else 0.0
+    return ratios
+
+
+def replay_php(stub_url: str, form_id: int, flush_cache: bool) -> str:
+    """
+    Script `wp eval-file` : rejoue le corpus servi par le stub via le hook
+    wp_ajax_nopriv_wcqf_verify_siret, dans un seul démarrage de WordPress
+
+    Les appels vers Constants::API_SIREN_BASE_URL sont réémis vers le stub
+    (pre_http_request) et horodatés tentative par tentative.
+    """
+    return f"""<?php
+$stub     = {php_string(stub_url.rstrip("/"))};
+$action   = 'wcqf_verify_siret';
+$form_id  = {int(form_id)};
+$finish   = function ( $data ) {{
+	echo {php_string(REPLAY_BEGIN)} . wp_json_encode( $data ) . {php_string(REPLAY_END)};
+}};
+
+if ( ! has_action( 'wp_ajax_nopriv_' . $action ) ) {{
+	$finish( array( 'error' => 'Hook wp_ajax_nopriv_' . $action . ' non enregistré' ) );
+	return;
+}}
+
+$corpus = wp_remote_get( $stub . {php_string(CORPUS_PATH)}, array( 'timeout' => 30 ) );
+$sirets = is_wp_error( $corpus ) ? null : json_decode( wp_remote_retrieve_body( $corpus ), true );
+if ( ! is_array( $sirets ) ) {{
+	$finish( array( 'error' => 'Corpus indisponible sur ' . $stub ) );
+	return;
+}}
+
+if ( {'true' if flush_cache else 'false'} ) {{
+	foreach ( array_unique( $sirets ) as $siret ) {{
+		delete_transient( 'wcqf_siren_' . sanitize_key( $siret ) );
+	}}
+}}
+
+$attempts = array();
+add_filter( 'pre_http_request', function ( $pre, $args, $url ) use ( $stub, &$attempts ) {{
+	$base = \\WcQualiopiFormation\\Core\\Constants::API_SIREN_BASE_URL;
+	if ( 0 !== strpos( $url, $base ) ) {{
+		return $pre;
+	}}
+	$path     = substr( $url, strlen( $base ) );
+	$segments = explode( '/', trim( $path, '/' ) );
+	$start    = microtime( true );
+	$response = wp_remote_get( $stub . $path, $args );
+	$attempts[] = array(
+		'endpoint' => $segments[1] ?? $path,
+		'status'   => is_wp_error( $response ) ? 0 : (int) wp_remote_retrieve_response_code( $response ),
+		'start'    => $start,
+		'end'      => microtime( true ),
+	);
+	return $response;
+}}, 10, 3 );
+
+// wp_send_json() termine par wp_die() : on l'interrompt pour enchaîner les requêtes
+add_filter( 'wp_doing_ajax', '__return_true' );
+add_filter( 'wp_die_ajax_handler', function () {{
+	return function () {{
+		throw new \\RuntimeException( 'wcqf_e2e_ajax_done' );
+	}};
+}} );
+
+$lookups = array();
+foreach ( $sirets as $siret ) {{
+	$hit      = false !== get_transient( 'wcqf_siren_' . sanitize_key( $siret ) );
+	$_POST    = array(
+		'action'    => $action,
+		'nonce'     => wp_create_nonce( $action ),
+		'form_id'   => $form_id,
+		'siret'     => $siret,
+		'prenom'    => 'Camille',
+		'nom'       => 'Martin',
+		'telephone' => '0612345678',
+		'email'     => 'e2e-siren@example.com',
+	);
+	$_REQUEST = $_POST;
+	$attempts = array();
+	$error    = '';
+
+	ob_start();
+	$start = microtime( true );
+	try {{
+		do_action( 'wp_ajax_nopriv_' . $action );
+	}} catch ( \\RuntimeException $e ) {{
+		if ( 'wcqf_e2e_ajax_done' !== $e->getMessage() ) {{
+			$error = $e->getMessage();
+		}}
+	}}
+	$elapsed  = microtime( true ) - $start;
+	$body     = ob_get_clean();
+	$response = json_decode( $body, true );
+	$success  = is_array( $response ) && ! empty( $response['success'] );
+
+	if ( ! $success && '' === $error ) {{
+		$error = is_array( $response ) ? wp_json_encode( $response['data'] ?? null ) : substr( $body, 0, 200 );
+	}}
+
+	$lookups[] = array(
+		'siret'    => $siret,
+		'hit'      => $hit,
+		'elapsed'  => $elapsed,
+		'success'  => $success,
+		'attempts' => $attempts,
+		'error'    => substr( (string) $error, 0, 200 ),
+	);
+}}
+
+$finish( array( 'lookups' => $lookups ) );
+"""
+
+
+class ReferenceSirenClient:
+    """
+    Rejeu sans WordPress : reproduit SirenCache + SirenApiClient::call_api
+    (retries sur erreur réseau et 500/502/503, attente RETRY_WAIT × tentative,
+    429 non rejoué) contre le stub, pour caler le profil de dégradation
+    """
+
+    def __init__(
+        self,
+        stub_url: str,
+        cache_duration: float = SIREN_CACHE_DURATION,
+        retry_wait: float = SIREN_RETRY_WAIT,
+        timeout: float = SIREN_TIMEOUT,
+    ):
+        self.stub_url = stub_url.rstrip("/")
+        self.cache_duration = cache_duration
+        self.retry_wait = retry_wait
+        self.timeout = timeout
+        self.cache: Dict[str, float] = {}
+
+    def flush(self):
+        self.cache.clear()
+
+    def _call(self, endpoint: str, identifier: str, attempts: List[Dict]) -> bool:
+        attempt = 0
+        while attempt < SIREN_MAX_RETRIES:
+            attempt += 1
+            start = time.time()
+            try:
+                with urllib.request.urlopen(
+                    f"{self.stub_url}/v3/{endpoint}/{identifier}", timeout=self.timeout
+                ) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                e.read()
+                status = e.code
+            except (urllib.error.URLError, OSError):
+                status = 0
+            attempts.append({"endpoint": endpoint, "status": status, "start": start, "end": time.time()})
+
+            if status == 200:
+                return True
+            if status not in (0,) + SIREN_RETRY_STATUSES:
+                return False
+            if attempt < SIREN_MAX_RETRIES:
+                time.sleep(self.retry_wait * attempt)
+        return False
+
+    def lookup(self, siret: str, now: Optional[float] = None) -> Dict:
+        """Une recherche : même enregistrement que le script PHP de rejeu"""
+        now = time.time() if now is None else now
+        hit = self.cache.get(siret, -1.0) > now
+        attempts: List[Dict] = []
+        start = time.time()
+        success = hit or (
+            self._call("etablissements", siret, attempts)
+            and self._call("unites_legales", siret[:9], attempts)
+        )
+        if success and not hit:
+            self.cache[siret] = now + self.cache_duration
+        return {
+            "siret": siret,
+            "hit": hit,
+            "elapsed": time.time() - start,
+            "success": success,
+            "attempts": attempts,
+            "error": "" if success else f"HTTP {attempts[-1]['status'] if attempts else '?'}",
+        }
+
+    def replay(self, corpus: List[Tuple[float, str]]) -> List[Dict]:
+        """Rejoue le corpus à la suite (les décalages ne servent qu'au cache)"""
+        origin = time.time()
+        lookups = []
+        for offset, siret in corpus:
+            lookups.append(self.lookup(siret, now=origin + offset))
+        return lookups
+
+
+def retry_time(lookup: Dict) -> float:
+    """
+    Temps ajouté par les retries : pour chaque endpoint, écart entre la
+    première et la dernière tentative (tentatives perdues + attentes)
+    """
+    first: Dict[str, float] = {}
+    last: Dict[str, float] = {}
+    for attempt in lookup["attempts"]:
+        first.setdefault(attempt["endpoint"], attempt["start"])
+        last[attempt["endpoint"]] = attempt["start"]
+    return sum(last[endpoint] - first[endpoint] for endpoint in first)
+
+
+def has_retry(lookup: Dict) -> bool:
+    """Vrai si un endpoint a été appelé plus d'une fois"""
+    endpoints = [attempt["endpoint"] for attempt in lookup["attempts"]]
+    return len(endpoints) != len(set(endpoints))
+
+
+def _latency_summary(values: List[float]) -> Dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] * 1000) if values else 0.0,
+        "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+    }
+
+
+def analyze_lookups(lookups: List[Dict]) -> Dict:
+    """Latences (global, hits, misses), ratio de hits, coût des retries, statuts API"""
+    count = len(lookups)
+    hits = [lookup for lookup in lookups if lookup["hit"]]
+    misses = [lookup for lookup in lookups if not lookup["hit"]]
+    retried = [lookup for lookup in lookups if has_retry(lookup)]
+    total_time = sum(lookup["elapsed"] for lookup in lookups)
+    total_retry = sum(retry_time(lookup) for lookup in lookups)
+
+    statuses: Dict[str, int] = {}
+    for lookup in lookups:
+        for attempt in lookup["attempts"]:
+            statuses[str(attempt["status"])] = statuses.get(str(attempt["status"]), 0) + 1
+
+    errors: Dict[str, int] = {}
+    for lookup in lookups:
+        if not lookup["success"]:
+            errors[lookup["error"]] = errors.get(lookup["error"], 0) + 1
+
+    return {
+        "lookups": count,
+        "distinct_sirets": len({lookup["siret"] for lookup in lookups}),
+        "success_rate": (len([lookup for lookup in lookups if lookup["success"]]) / count * 100) if count else 0.0,
+        "cache_hit_ratio": (len(hits) / count * 100) if count else 0.0,
+        "latency": _latency_summary([lookup["elapsed"] for lookup in lookups]),
+        "latency_hits": _latency_summary([lookup["elapsed"] for lookup in hits]),
+        "latency_misses": _latency_summary([lookup["elapsed"] for lookup in misses]),
+        "retries": {
+            "lookups_with_retries": len(retried),
+            "api_attempts": sum(len(lookup["attempts"]) for lookup in lookups),
+            "time_s": total_retry,
+            "share_of_total": (total_retry / total_time * 100) if total_time else 0.0,
+            "latency_with_retries": _latency_summary([lookup["elapsed"] for lookup in retried]),
+        },
+        "api_statuses": dict(sorted(statuses.items())),
+        "errors": dict(sorted(errors.items(), key=lambda item: -item[1])[:10]),
+    }
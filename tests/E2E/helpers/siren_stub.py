@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Serveur local simulant l'API SIREN (data.siren-api.fr)
+Routes /v3/etablissements/<siret> et /v3/unites_legales/<siren>, au format
+attendu par SirenDataMerger ; latence, taux d'erreur et rafales de 429
+configurables. Sert aussi le corpus de rejeu (/e2e/corpus).
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+ETAB_ROUTE = re.compile(r"^/v3/etablissements/(\d{14})$")
+UL_ROUTE = re.compile(r"^/v3/unites_legales/(\d{9})$")
+CORPUS_PATH = "/e2e/corpus"
+
+
+def luhn_valid(number: str) -> bool:
+    """Même contrôle que SirenValidator::validate_luhn"""
+    total = 0
+    for index, char in enumerate(number):
+        digit = int(char)
+        if index % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def make_siret(rng: random.Random) -> str:
+    """SIRET aléatoire (14 chiffres) passant le contrôle de Luhn"""
+    prefix = "".join(str(rng.randint(0, 9)) for _ in range(13))
+    for last in "0123456789":
+        if luhn_valid(prefix + last):
+            return prefix + last
+    raise ValueError("Aucune clé de Luhn trouvée")
+
+
+class SirenStubState:
+    """Compteurs partagés et pilotage des rafales de 429"""
+
+    def __init__(self, burst_every: int = 0, burst_length: int = 0):
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.requests = 0
+        self.by_endpoint: Dict[str, int] = {"etablissements": 0, "unites_legales": 0}
+        self.by_status: Dict[int, int] = {}
+        self.corpus: List[str] = []
+        self.lock = threading.Lock()
+
+    def next_request(self, endpoint: str) -> int:
+        """Numérote la requête et retourne son rang (base 0)"""
+        with self.lock:
+            rank = self.requests
+            self.requests += 1
+            self.by_endpoint[endpoint] += 1
+            return rank
+
+    def in_burst(self, rank: int) -> bool:
+        """Vrai si la requête tombe dans une rafale de 429"""
+        if not self.burst_every or not self.burst_length:
+            return False
+        return rank % self.burst_every >= self.burst_every - self.burst_length
+
+    def count_status(self, status: int):
+        with self.lock:
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "by_endpoint": dict(self.by_endpoint),
+                "by_status": {str(status): count for status, count in sorted(self.by_status.items())},
+            }
+
+
+def fake_etablissement(siret: str) -> Dict:
+    seed = int(siret[-5:])
+    return {
+        "etablissement": {
+            "siret": siret,
+            "numero_voie": str(seed % 200 + 1),
+            "type_voie": "RUE",
+            "libelle_voie": f"DES TESTS {seed % 50}",
+            "complement_adresse": "",
+            "code_postal": f"{75000 + seed % 20:05d}",
+            "libelle_commune": "PARIS",
+        }
+    }
+
+
+def fake_unite_legale(siren: str) -> Dict:
+    return {
+        "unite_legale": {
+            "siren": siren,
+            "denomination": f"SOCIETE E2E {siren}",
+            "categorie_juridique": "5710",
+            "etat_administratif": "A",
+        }
+    }
+
+
+class _SirenHandler(BaseHTTPRequestHandler):
+    """Routes : /v3/etablissements/<siret>, /v3/unites_legales/<siren>, /e2e/corpus"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SirenStub/1.0"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, data, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        state: SirenStubState = server.state
+        path = self.path.split("?", 1)[0]
+
+        if path == CORPUS_PATH:
+            return self._json(200, state.corpus)
+
+        etab = ETAB_ROUTE.match(path)
+        unite = UL_ROUTE.match(path)
+        if not etab and not unite:
+            return self._json(404, {"message": "Route inconnue"})
+
+        rank = state.next_request("etablissements" if etab else "unites_legales")
+        if server.latency:
+            time.sleep(server.latency * (0.5 + random.random()))
+
+        if state.in_burst(rank):
+            status, body, headers = 429, {"message": "Too Many Requests"}, {"Retry-After": "1"}
+        elif server.error_rate and random.random() < server.error_rate:
+            status, body, headers = 503, {"message": "Service Unavailable"}, {}
+        elif etab:
+            status, body, headers = 200, fake_etablissement(etab.group(1)), {}
+        else:
+            status, body, headers = 200, fake_unite_legale(unite.group(1)), {}
+
+        state.count_status(status)
+        self._json(status, body, headers)
+
+
+class SirenStubServer:
+    """
+    API SIREN de remplacement, utilisable comme context manager
+
+        with SirenStubServer(latency=0.05, burst_every=100, burst_length=5) as api:
+            api.set_corpus(sirets)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.httpd = ThreadingHTTPServer((host, port), _SirenHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = SirenStubState(burst_every, burst_length)
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> SirenStubState:
+        return self.httpd.state
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        if host == "0.0.0.0":
+            host = "127.0.0.1"
+        return f"http://{host}:{port}"
+
+    def set_corpus(self, sirets: List[str]):
+        self.state.corpus = list(sirets)
+
+    def start(self) -> "SirenStubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "SirenStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
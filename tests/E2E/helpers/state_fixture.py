@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Instantanés de l'empreinte du plugin en base (fixtures E2E)
+Un seul `wp eval-file` copie côté serveur, par INSERT ... SELECT dans des
+tables `{prefix}e2esnap_<nom>_*`, les options wcqf_* et héritées, les
+transients wcqf_*, les user meta wcqf_* et les trois tables du plugin ;
+un second les restaure. Aucune donnée ne transite par WSL.
+
+Deux périmètres (FixtureScope) :
+- site (défaut) : toute l'empreinte ; une restauration écraserait l'état
+  des autres workers, run_suite exécute donc seuls ces scénarios et
+  state_fixture refuse de s'exécuter en parallèle ;
+- worker : user meta wcqf_* de l'utilisateur du worker, options et
+  transients wcqf_* suffixés par son produit, lignes de wcqf_progress et
+  wcqf_tracking de son utilisateur. Les options globales (mapping,
+  réglages), wcqf_audit et les options héritées ne sont pas couvertes :
+  un scénario qui les modifie reste au périmètre site.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from wp_batch import php_string
+
+
+FIXTURE_BEGIN = "__E2E_FIXTURE_BEGIN__"
+FIXTURE_END = "__E2E_FIXTURE_END__"
+
+# Motifs LIKE (échappés pour MySQL) de l'empreinte
+OPTION_PATTERNS = [
+    "wcqf\\_%",
+    "\\_transient\\_wcqf\\_%",
+    "\\_transient\\_timeout\\_wcqf\\_%",
+    "\\_site\\_transient\\_wcqf\\_%",
+    "\\_site\\_transient\\_timeout\\_wcqf\\_%",
+    # Options des plugins remplacés (DataMigrator)
+    "wcqs\\_%",
+    "gf\\_siren\\_%",
+]
+USERMETA_PATTERNS = ["wcqf\\_%"]
+PLUGIN_TABLES = ["wcqf_progress", "wcqf_tracking", "wcqf_audit"]
+# Tables du plugin filtrées par utilisateur au périmètre worker (table → colonne)
+WORKER_TABLES = {"wcqf_progress": "user_id", "wcqf_tracking": "user_id"}
+
+SCOPES = ("site", "worker")
+
+_NAME = re.compile(r"[^a-z0-9_]")
+
+
+def snapshot_name(name: str) -> str:
+    """Nom d'instantané utilisable dans un nom de table (20 caractères max)"""
+    cleaned = _NAME.sub("_", name.lower()).strip("_")
+    if not cleaned:
+        raise ValueError(f"Nom d'instantané invalide : {name!r}")
+    return cleaned[:20]
+
+
+class FixtureScope:
+    """Périmètre d'un instantané : tout le site, ou l'utilisateur et le produit d'un worker"""
+
+    def __init__(self, user_id: Optional[int] = None, product_id: Optional[int] = None):
+        self.user_id = user_id
+        self.product_id = product_id
+
+    @property
+    def site(self) -> bool:
+        return self.user_id is None
+
+    def option_patterns(self) -> List[str]:
+        """Options et transients wcqf_* du produit (suffixe _<produit>) au périmètre worker"""
+        if self.site:
+            return list(OPTION_PATTERNS)
+        return [f"{pattern[:-1]}%\\_{int(self.product_id)}" for pattern in OPTION_PATTERNS if "wcqf" in pattern]
+
+    def row_tables(self) -> Dict[str, str]:
+        """Tables copiées ligne à ligne (filtrées par utilisateur) plutôt qu'en entier"""
+        return {} if self.site else dict(WORKER_TABLES)
+
+    def plugin_tables(self) -> List[str]:
+        return list(PLUGIN_TABLES) if self.site else []
+
+
+def _php_list(values: List[str]) -> str:
+    return "array( " + ", ".join(php_string(value) for value in values) + " )"
+
+
+def _php_map(values: Dict[str, str]) -> str:
+    return "array( " + ", ".join(f"{php_string(key)} => {php_string(value)}" for key, value in values.items()) + " )"
+
+
+def _preamble(name: str, scope: FixtureScope) -> str:
+    """Variables communes : tables vivantes, tables d'instantané, clauses WHERE"""
+    return f"""<?php
+global $wpdb;
+$snap       = $wpdb->prefix . 'e2esnap_' . {php_string(snapshot_name(name))} . '_';
+$manifest   = 'e2e_snapshot_' . {php_string(snapshot_name(name))};
+$scope_user = {int(scope.user_id or 0)};
+$where      = function ( $column, $patterns ) use ( $wpdb ) {{
+	$clauses = array();
+	foreach ( $patterns as $pattern ) {{
+		$clauses[] = $wpdb->prepare( "{{$column}} LIKE %s", $pattern );
+	}}
+	return '(' . implode( ' OR ', $clauses ) . ')';
+}};
+$exists = function ( $table ) use ( $wpdb ) {{
+	return $wpdb->get_var( $wpdb->prepare( 'SHOW TABLES LIKE %s', $table ) ) === $table;
+}};
+$user_clause = $scope_user ? $wpdb->prepare( ' AND user_id = %d', $scope_user ) : '';
+$sets = array(
+	'options'  => array( $wpdb->options, $where( 'option_name', {_php_list(scope.option_patterns())} ) ),
+	'usermeta' => array( $wpdb->usermeta, $where( 'meta_key', {_php_list(USERMETA_PATTERNS)} ) . $user_clause ),
+);
+foreach ( {_php_map(scope.row_tables())} as $table => $column ) {{
+	if ( $exists( $wpdb->prefix . $table ) ) {{
+		$sets[ $table ] = array( $wpdb->prefix . $table, $wpdb->prepare( "{{$column}} = %d", $scope_user ) );
+	}}
+}}
+$report = array( 'rows' => array(), 'tables' => array(), 'errors' => array() );
+$check  = function ( $step ) use ( $wpdb, &$report ) {{
+	if ( $wpdb->last_error ) {{
+		$report['errors'][] = $step . ' : ' . $wpdb->last_error;
+		$wpdb->last_error   = '';
+	}}
+}};
+$wpdb->suppress_errors( true );
+"""
+
+
+def snapshot_php(name: str, scope: Optional[FixtureScope] = None) -> str:
+    """Copie l'empreinte du plugin (ou du worker) dans les tables d'instantané `name`"""
+    scope = scope or FixtureScope()
+    return _preamble(name, scope) + f"""
+foreach ( $sets as $key => $set ) {{
+	list( $live, $condition ) = $set;
+	$wpdb->query( "DROP TABLE IF EXISTS {{$snap}}{{$key}}" );
+	$wpdb->query( "CREATE TABLE {{$snap}}{{$key}} LIKE {{$live}}" );
+	$report['rows'][ $key ] = (int) $wpdb->query( "INSERT INTO {{$snap}}{{$key}} SELECT * FROM {{$live}} WHERE {{$condition}}" );
+	$check( $key );
+}}
+foreach ( {_php_list(scope.plugin_tables())} as $table ) {{
+	$live = $wpdb->prefix . $table;
+	$wpdb->query( "DROP TABLE IF EXISTS {{$snap}}{{$table}}" );
+	$report['tables'][ $table ] = $exists( $live );
+	if ( $report['tables'][ $table ] ) {{
+		$wpdb->query( "CREATE TABLE {{$snap}}{{$table}} LIKE {{$live}}" );
+		$report['rows'][ $table ] = (int) $wpdb->query( "INSERT INTO {{$snap}}{{$table}} SELECT * FROM {{$live}}" );
+		$check( $table );
+	}}
+}}
+if ( empty( $report['errors'] ) ) {{
+	update_option( $manifest, array( 'tables' => $report['tables'], 'sets' => array_keys( $sets ), 'rows' => $report['rows'], 'time' => time() ), false );
+}}
+echo {php_string(FIXTURE_BEGIN)} . wp_json_encode( $report ) . {php_string(FIXTURE_END)};
+"""
+
+
+def restore_php(name: str, drop: bool = False, scope: Optional[FixtureScope] = None) -> str:
+    """
+    Remet l'empreinte dans l'état de l'instantané `name` : lignes ajoutées
+    depuis supprimées, tables du plugin vidées puis rechargées (ou
+    supprimées si absentes lors de l'instantané), caches vidés
+    """
+    scope = scope or FixtureScope()
+    return _preamble(name, scope) + f"""
+$state = get_option( $manifest );
+if ( ! is_array( $state ) ) {{
+	$report['errors'][] = 'Instantané introuvable : ' . $manifest;
+	echo {php_string(FIXTURE_BEGIN)} . wp_json_encode( $report ) . {php_string(FIXTURE_END)};
+	return;
+}}
+foreach ( $sets as $key => $set ) {{
+	list( $live, $condition ) = $set;
+	$removed = (int) $wpdb->query( "DELETE FROM {{$live}} WHERE {{$condition}}" );
+	// Table apparue depuis l'instantané : aucune ligne à remettre
+	$restored = $exists( $snap . $key ) ? (int) $wpdb->query( "INSERT INTO {{$live}} SELECT * FROM {{$snap}}{{$key}}" ) : 0;
+	$report['rows'][ $key ] = array( 'removed' => $removed, 'restored' => $restored );
+	$check( $key );
+}}
+foreach ( $state['tables'] as $table => $existed ) {{
+	$live = $wpdb->prefix . $table;
+	if ( ! $existed ) {{
+		$wpdb->query( "DROP TABLE IF EXISTS {{$live}}" );
+		$report['tables'][ $table ] = 'dropped';
+		continue;
+	}}
+	if ( $exists( $live ) ) {{
+		$wpdb->query( "TRUNCATE TABLE {{$live}}" );
+	}} else {{
+		$wpdb->query( "CREATE TABLE {{$live}} LIKE {{$snap}}{{$table}}" );
+	}}
+	$report['rows'][ $table ] = (int) $wpdb->query( "INSERT INTO {{$live}} SELECT * FROM {{$snap}}{{$table}}" );
+	$report['tables'][ $table ] = 'restored';
+	$check( $table );
+}}
+if ( {'true' if drop else 'false'} ) {{
+	foreach ( array_merge( array_keys( $sets ), $state['sets'] ?? array(), array_keys( $state['tables'] ) ) as $key ) {{
+		$wpdb->query( "DROP TABLE IF EXISTS {{$snap}}{{$key}}" );
+	}}
+	delete_option( $manifest );
+}}
+wp_cache_flush();
+echo {php_string(FIXTURE_BEGIN)} . wp_json_encode( $report ) . {php_string(FIXTURE_END)};
+"""
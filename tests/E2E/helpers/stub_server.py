@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Serveur local simulant le tunnel WooCommerce + CartGuard
+Utilisé pour exercer le driver HTTP et la génération de charge sans DDEV :
+même markup que CartRenderer/CartAssets, mêmes redirections que
+CartGuard::guard_template_redirect.
+La connexion (/wp-login.php) n'accepte que les identifiants de `users`
+et rattache la session à l'ID de l'utilisateur. Avec `user_meta` (backend
+emulator), cet utilisateur a validé le test d'un produit si sa user meta
+wcqf_test_solved_<produit> est posée, comme après TestValidator ou
+`wp user meta update`.
+"""
+
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+SESSION_COOKIE = "wp_woocommerce_session_stub"
+LOGGED_IN_COOKIE = "wordpress_logged_in_stub"
+
+# Produit → page de test ; un autre produit reçoit la page produit + PAGE_OFFSET
+DEFAULT_MAPPING = {4017: 4267}
+PAGE_OFFSET = 250
+# Identifiant → (ID utilisateur, mot de passe)
+DEFAULT_USERS = {"admin": (1, "password")}
+
+
+def stub_mapping(*product_ids: int) -> Dict[int, int]:
+    """Mapping par défaut complété d'une page de test pour chaque produit donné"""
+    mapping = dict(DEFAULT_MAPPING)
+    for product_id in product_ids:
+        mapping.setdefault(product_id, product_id + PAGE_OFFSET)
+    return mapping
+
+
+class _Session:
+    """Panier et validation de test d'un visiteur"""
+
+    def __init__(self):
+        self.cart: Dict[int, int] = {}
+        self.validated = set()
+
+
+class CartStubState:
+    """État partagé du serveur : sessions, mapping produit → page de test"""
+
+    def __init__(
+        self,
+        mapping: Optional[Dict[int, int]] = None,
+        max_items: int = 1,
+        user_meta: Optional[Callable[[int, str], Any]] = None,
+        users: Optional[Dict[str, Tuple[int, str]]] = None,
+    ):
+        self.mapping = mapping or dict(DEFAULT_MAPPING)
+        self.max_items = max_items
+        # Lecture des user meta (user_id, clé) → valeur ou None
+        self.user_meta = user_meta
+        self.users = users or dict(DEFAULT_USERS)
+        self.sessions: Dict[str, _Session] = {}
+        self.lock = threading.Lock()
+
+    def session(self, session_id: str) -> _Session:
+        with self.lock:
+            return self.sessions.setdefault(session_id, _Session())
+
+    def authenticate(self, username: str, password: str) -> Optional[int]:
+        """ID de l'utilisateur si les identifiants sont connus, sinon None"""
+        user = self.users.get(username)
+        return user[0] if user is not None and user[1] == password else None
+
+    def test_solved(self, user_id: int, product_id: int) -> bool:
+        """Test validé par l'utilisateur (user meta wcqf_test_solved_<produit>)"""
+        return self.user_meta is not None and self.user_meta(user_id, f"wcqf_test_solved_{product_id}") is not None
+
+    def pending_tests(self, session: _Session, user_id: Optional[int] = None):
+        """Produits du panier soumis à un test non validé (user_id : utilisateur connecté)"""
+        return [
+            product_id
+            for product_id in session.cart
+            if product_id in self.mapping
+            and product_id not in session.validated
+            and not (user_id is not None and self.test_solved(user_id, product_id))
+        ]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Routes : /?add-to-cart=, /panier/, /commander/, /<page test>/, /wcqf-validate/, /wp-login.php"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "WcqfStub/1.0"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _cookie(self, cookie: str) -> str:
+        for chunk in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = chunk.strip().partition("=")
+            if name == cookie and value:
+                return value
+        return ""
+
+    def _respond(self, status: int, body: str = "", headers: Optional[Dict[str, str]] = None):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * (0.5 + random.random()))
+        if server.error_rate and random.random() < server.error_rate:
+            status, body, headers = 500, "<h1>Erreur critique</h1>", {}
+
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if self._new_session:
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}={self._new_session}; Path=/")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _redirect(self, location: str):
+        self._respond(302, "", {"Location": location})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        self.do_GET()
+
+    def _logged_in_user(self) -> Optional[int]:
+        value = self._cookie(LOGGED_IN_COOKIE)
+        return int(value) if value.isdigit() else None
+
+    def do_GET(self):
+        state: CartStubState = self.server.state
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        session_id = self._cookie(SESSION_COOKIE)
+        user_id = self._logged_in_user()
+        self._new_session = None
+        if not session_id:
+            session_id = self._new_session = uuid.uuid4().hex
+        session = state.session(session_id)
+
+        if "add-to-cart" in query:
+            product_id = int(query["add-to-cart"][0])
+            with state.lock:
+                session.cart[product_id] = session.cart.get(product_id, 0) + 1
+            return self._redirect("/panier/")
+
+        path = parts.path.rstrip("/") + "/"
+        if path == "/wp-login.php/":
+            if self.command != "POST":
+                return self._respond(200, "<form id=\"loginform\"></form>")
+            form = getattr(self, "_form", {})
+            user_id = state.authenticate(form.get("log", [""])[0], form.get("pwd", [""])[0])
+            if user_id is None:
+                return self._respond(
+                    200, "<div id=\"login_error\">Identifiant ou mot de passe incorrect.</div><form id=\"loginform\"></form>"
+                )
+            return self._respond(
+                302,
+                "",
+                {"Location": "/wp-admin/", "Set-Cookie": f"{LOGGED_IN_COOKIE}={user_id}; Path=/"},
+            )
+
+        if path == "/wp-admin/":
+            return self._respond(200, "<h1>Tableau de bord</h1>")
+
+        if path == "/panier/":
+            return self._respond(200, self._render_cart(state, session, user_id))
+
+        if path == "/commander/":
+            pending = state.pending_tests(session, user_id)
+            if pending:
+                # CartGuard::guard_template_redirect
+                return self._redirect(f"/{state.mapping[pending[0]]}/")
+            if sum(session.cart.values()) > state.max_items:
+                # CartRestrictionHandler::redirect_checkout_if_too_many
+                return self._redirect("/panier/")
+            return self._respond(200, "<h1>Commander</h1><form class=\"checkout\"></form>")
+
+        if path == "/wcqf-validate/":
+            product_id = int(query.get("product_id", ["0"])[0])
+            with state.lock:
+                session.validated.add(product_id)
+            return self._redirect("/panier/")
+
+        test_pages = {f"/{page_id}/": product for product, page_id in state.mapping.items()}
+        if path in test_pages:
+            product_id = test_pages[path]
+            return self._respond(
+                200,
+                "<h1>Test de positionnement</h1>"
+                f"<a class=\"button\" href=\"/wcqf-validate/?product_id={product_id}\">Valider</a>",
+            )
+
+        if path == "/":
+            return self._respond(200, "<h1>Accueil</h1>")
+        return self._respond(404, "<h1>Page introuvable</h1>")
+
+    def _render_cart(self, state: CartStubState, session: _Session, user_id: Optional[int]) -> str:
+        """Markup équivalent à CartRenderer + CartAssets::debug_cart_state"""
+        pending = state.pending_tests(session, user_id)
+        should_block = bool(pending)
+        parts = ["<html><body><div class=\"woocommerce\">"]
+
+        if sum(session.cart.values()) > state.max_items:
+            parts.append(
+                "<ul class=\"woocommerce-error\" role=\"alert\"><li>"
+                "Vous ne pouvez commander qu'une seule formation à la fois."
+                "</li></ul>"
+            )
+        if should_block:
+            page_id = state.mapping[pending[0]]
+            parts.append(
+                "<div class=\"wcqf-test-notice\" role=\"alert\"><div class=\"woocommerce-message\">"
+                f"<strong>Test requis : Formation {pending[0]}</strong>"
+                "<p>Pour poursuivre, réalisez d'abord le test de positionnement lié à cette formation.</p>"
+                f"<a href=\"/{page_id}/\" class=\"button wc-forward wcqf-test-cta\">Passer le test</a>"
+                "</div></div>"
+            )
+        elif session.cart:
+            parts.append(
+                "<div class=\"woocommerce-message\">✅ Test de positionnement validé ! "
+                "Vous pouvez maintenant procéder au paiement.</div>"
+                "<a href=\"/commander/\" class=\"checkout-button button alt wc-forward\">Commander</a>"
+            )
+
+        parts.append(
+            "</div><script type=\"text/javascript\">"
+            f"console.log('  - Should block checkout:', {'true' if should_block else 'false'});"
+            "</script></body></html>"
+        )
+        return "".join(parts)
+
+
+class CartStubServer:
+    """
+    Serveur de remplacement local, utilisable comme context manager
+
+        with CartStubServer(latency=0.01) as server:
+            driver_base_url = server.base_url
+    """
+
+    def __init__(
+        self,
+        mapping: Optional[Dict[int, int]] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+        user_meta: Optional[Callable[[int, str], Any]] = None,
+        users: Optional[Dict[str, Tuple[int, str]]] = None,
+    ):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = CartStubState(mapping, user_meta=user_meta, users=users)
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CartStubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "CartStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
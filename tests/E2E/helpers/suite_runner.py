@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Runner parallèle des scénarios E2E
+Découvre les sous-classes d'E2ETestFramework dans tests/E2E/scripts/,
+les exécute dans un pool de processus (un contexte isolé par worker) et
+fusionne les résultats dans un rapport de suite unique. Les scénarios
+exclusifs (état global du site : `EXCLUSIVE = True`, `FIXTURE` ou appel à
+state_fixture hors scope="worker") sont exécutés ensuite, un par un, sans aucun autre
+scénario en cours.
+"""
+
+import ast
+import contextlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from worker_context import WorkerContext
+
+
+E2E_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = E2E_DIR / "scripts"
+REPORTS_DIR = E2E_DIR / "reports"
+FRAMEWORK_CLASSES = {"E2ETestFramework", "ScenarioTest"}
+
+
+def discover_scenarios(pattern: str = "E2E_*.py") -> List[Dict]:
+    """
+    Liste les scénarios (script, classe) sans importer les scripts
+
+    L'analyse AST évite d'exécuter les scripts écrits au niveau module.
+    """
+    scenarios = []
+    for script in sorted(SCRIPTS_DIR.glob(pattern)):
+        tree = ast.parse(script.read_text(encoding="utf-8"), filename=str(script))
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            bases = {
+                base.id if isinstance(base, ast.Name) else getattr(base, "attr", "")
+                for base in node.bases
+            }
+            if FRAMEWORK_CLASSES & bases:
+                scenarios.append(
+                    {"script": str(script), "class_name": node.name, "exclusive": _is_exclusive(node)}
+                )
+    return scenarios
+
+
+def _is_exclusive(node: ast.ClassDef) -> bool:
+    """
+    `EXCLUSIVE = True`, `FIXTURE` non nul ou appel à state_fixture au
+    périmètre site dans la classe : le scénario modifie un état global du site
+    """
+    for statement in node.body:
+        if isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            names = {target.id for target in targets if isinstance(target, ast.Name)}
+            value = statement.value
+            if names & {"EXCLUSIVE", "FIXTURE"} and isinstance(value, ast.Constant) and value.value:
+                return True
+    return any(
+        isinstance(child, ast.Call)
+        and isinstance(child.func, ast.Attribute)
+        and child.func.attr == "state_fixture"
+        and not any(
+            keyword.arg == "scope" and isinstance(keyword.value, ast.Constant) and keyword.value.value == "worker"
+            for keyword in child.keywords
+        )
+        for child in ast.walk(node)
+    )
+
+
+def build_worker_contexts(
+    workers: int,
+    user_ids: Optional[List[int]] = None,
+    product_ids: Optional[List[int]] = None,
+    user_logins: Optional[List[str]] = None,
+    password: Optional[str] = None,
+) -> List[WorkerContext]:
+    """
+    Un contexte par worker : utilisateur (ID et identifiant de connexion) et
+    produit distincts
+
+    Plusieurs workers partageant un utilisateur ou un produit écraseraient
+    mutuellement leur panier et leur user meta : ValueError dans ce cas.
+    """
+    if workers > 1:
+        for label, ids in (("--user-ids", user_ids), ("--user-logins", user_logins), ("--product-ids", product_ids)):
+            if len(set(ids or [])) < workers:
+                raise ValueError(f"{workers} workers : {label} doit fournir {workers} identifiants distincts")
+    if bool(user_ids) != bool(user_logins):
+        # La connexion HTTP décide de l'utilisateur testé : ID et identifiant vont ensemble
+        raise ValueError("--user-ids et --user-logins vont ensemble (même ordre)")
+    contexts = []
+    for worker_id in range(workers):
+        context = WorkerContext(worker_id=worker_id, password=password)
+        if user_logins:
+            context.username = list(dict.fromkeys(user_logins))[worker_id]
+        if user_ids:
+            context.user_id = list(dict.fromkeys(user_ids))[worker_id]
+        if product_ids:
+            context.product_id = list(dict.fromkeys(product_ids))[worker_id]
+        contexts.append(context)
+    return contexts
+
+
+def _init_worker(contexts: "multiprocessing.Queue"):
+    """Initialisation d'un processus du pool : réserve un contexte pour sa durée de vie"""
+    context = contexts.get()
+    os.environ.update(context.to_env())
+    # Aucun terminal dans le pool : les observations passent par les attentes
+    os.environ.setdefault("E2E_HEADLESS", "1")
+
+
+def _load_class(script: str, class_name: str):
+    """Importe un script de scénario et retourne sa classe"""
+    module_name = f"e2e_scenario_{Path(script).stem}"
+    spec = importlib.util.spec_from_file_location(module_name, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+def run_scenario(script: str, class_name: str) -> Dict:
+    """Exécute un scénario dans le worker courant et retourne ses résultats"""
+    context = WorkerContext.from_env()
+    output_file = REPORTS_DIR / f"{Path(script).stem}_w{context.worker_id}.out"
+    started = time.time()
+    test = None
+
+    with open(output_file, "w", encoding="utf-8") as out, contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+        try:
+            # Sans argument : les scripts à options (BENCH_*) lisent E2E_ARGS_<test_id>
+            test = _load_class(script, class_name)()
+            test.run()
+            status, error = "passed", None
+        except SystemExit as e:
+            # Arguments refusés par argparse (message dans la sortie console)
+            status, error = "error", f"arguments invalides (exit {e.code})"
+        except Exception as e:
+            traceback.print_exc(file=out)
+            status, error = "error", str(e)
+
+    results = test.export_results() if test is not None else {
+        "test_id": Path(script).stem,
+        "test_name": class_name,
+        "duration": time.time() - started,
+        "success_rate": 0,
+        "phases": [],
+        "observations": [],
+        "logs": [],
+        "worker": context.to_dict(),
+    }
+    if status == "passed" and results["success_rate"] < 70:
+        status = "failed"
+    results.update(
+        {"script": script, "class_name": class_name, "status": status, "error": error, "output": str(output_file)}
+    )
+    return results
+
+
+def run_suite(scenarios: List[Dict], contexts: List[WorkerContext]) -> List[Dict]:
+    """
+    Exécute les scénarios partagés dans un pool de processus (un contexte
+    par processus), puis les scénarios exclusifs un par un
+    """
+    shared = [scenario for scenario in scenarios if not scenario.get("exclusive")]
+    exclusive = [scenario for scenario in scenarios if scenario.get("exclusive")]
+
+    results = _run_pool(shared, contexts) if shared else []
+    for scenario in exclusive:
+        print(f"🔒 {Path(scenario['script']).name} : état global modifié, exécuté seul")
+        results += _run_pool([scenario], contexts[:1])
+
+    # Ordre stable dans le rapport, quel que soit l'ordre de fin
+    results.sort(key=lambda result: result["script"])
+    return results
+
+
+def _run_pool(scenarios: List[Dict], contexts: List[WorkerContext]) -> List[Dict]:
+    """Pool de processus dédié : terminé (tous ses scénarios finis) au retour"""
+    queue = multiprocessing.Queue()
+    for context in contexts:
+        # Un seul worker : ses scénarios s'exécutent l'un après l'autre, seuls sur le site
+        context.alone = len(contexts) == 1
+        queue.put(context)
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=len(contexts), initializer=_init_worker, initargs=(queue,)
+    ) as pool:
+        futures = {
+            pool.submit(run_scenario, scenario["script"], scenario["class_name"]): scenario
+            for scenario in scenarios
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            print(
+                f"{'✅' if result['status'] == 'passed' else '❌'} "
+                f"{result['test_id']} ({result['status']}, "
+                f"worker {result['worker']['worker_id']}, {result['duration']:.2f}s)"
+            )
+            results.append(result)
+    return results
+
+
+def save_suite_report(results: List[Dict], wall_time: float) -> str:
+    """Fusionne les résultats des scénarios dans un rapport Markdown de suite"""
+    filename = REPORTS_DIR / f"SUITE_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
+    cumulated = sum(result["duration"] for result in results)
+    passed = len([result for result in results if result["status"] == "passed"])
+
+    lines = [
+        "# Rapport de suite E2E",
+        "",
+        f"**Date** : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  ",
+        f"**Scénarios** : {len(results)} ({passed} réussis)  ",
+        f"**Durée réelle** : {wall_time:.2f}s  ",
+        f"**Durée cumulée** : {cumulated:.2f}s",
+        "",
+        "## Résumé",
+        "",
+        "| Test | Statut | Worker | Durée | Taux de succès |",
+        "|------|--------|--------|-------|----------------|",
+    ]
+    for result in results:
+        lines.append(
+            f"| {result['test_id']} - {result['test_name']} | {result['status']} "
+            f"| {result['worker']['worker_id']} | {result['duration']:.2f}s "
+            f"| {result['success_rate']:.1f}% |"
+        )
+
+    for result in results:
+        lines += ["", f"## {result['test_id']} - {result['test_name']}", ""]
+        if result.get("error"):
+            lines += [f"**Erreur** : {result['error']}", ""]
+        lines += [f"Sortie console : `{result['output']}`", ""]
+        dropped = result.get("counters", {}).get("recent_dropped", 0)
+        if dropped:
+            lines += [f"_{dropped} évènements plus anciens omis (flux JSONL complet à côté du rapport du test)_", ""]
+        lines.append("```")
+        for log in result["logs"]:
+            timestamp = datetime.fromtimestamp(log["time"]).strftime("%H:%M:%S")
+            lines.append(f"[{timestamp}] [{log['type'].upper()}] {log['message']}")
+        lines.append("```")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return str(filename)
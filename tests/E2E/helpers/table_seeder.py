@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Amorçage massif des tables du plugin (wcqf_progress, wcqf_tracking, wcqf_audit)
+Les lignes sont générées en Python et envoyées en flux à `ddev mysql` sous
+forme d'INSERT multi-valeurs ; seules les colonnes réellement présentes en
+base sont alimentées (les schémas Activator / TrackingStorage divergent).
+"""
+
+from typing import Callable, Dict, Iterator, List
+
+
+# Jetons numériques (ProgressStorage::get() ne garde que les chiffres),
+# préfixe long pour un nettoyage sans risque de collision
+SEED_TOKEN_PREFIX = "9990000000"
+AUDIT_EVENTS_PER_TOKEN = 5
+SEED_SPAN_DAYS = 365
+
+STEPS = ["cart", "form", "checkout", "completed"]
+EVENT_TYPES = [
+    "cart_blocked",
+    "token_generated",
+    "form_started",
+    "form_submitted",
+    "checkout_accessed",
+    "order_created",
+]
+
+
+def seed_token(index: int) -> str:
+    return f"{SEED_TOKEN_PREFIX}{index:012d}"
+
+
+def seed_token_like() -> str:
+    """Motif LIKE des jetons amorcés"""
+    return f"{SEED_TOKEN_PREFIX}%"
+
+
+def _ago(index: int) -> str:
+    """Date pseudo-aléatoire répartie sur SEED_SPAN_DAYS (expression SQL)"""
+    seconds = (index * 7919) % (SEED_SPAN_DAYS * 86400)
+    return f"NOW() - INTERVAL {seconds} SECOND"
+
+
+def _text(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _json_form(index: int) -> str:
+    return _text(
+        f'{{"1":"{index:014d}","3":"SOCIETE E2E {index}","7.3":"Camille","7.6":"Martin",'
+        f'"9":"0612345678","10":"e2e-{index}@example.com"}}'
+    )
+
+
+# Générateurs de valeurs (littéraux SQL) par colonne, sur-ensemble des schémas connus
+PROGRESS_COLUMNS: Dict[str, Callable[[int], str]] = {
+    "token": lambda i: f"'{seed_token(i)}'",
+    "convention_id": lambda i: f"'CONV-{i}'",
+    "user_id": lambda i: str(i % 50000 + 1),
+    "session_id": lambda i: f"'sess{i:x}'",
+    "product_id": lambda i: str(4000 + i % 200),
+    "cart_key": lambda i: f"'cart{i:x}'",
+    "current_step": lambda i: f"'{STEPS[i % len(STEPS)]}'",
+    "last_activity": _ago,
+    "started_at": _ago,
+    "completed_at": lambda i: _ago(i) if i % 4 == 3 else "NULL",
+    "collected_data": _json_form,
+    "metadata": lambda i: "'{\"source\":\"e2e_seed\"}'",
+    "is_completed": lambda i: "1" if i % 4 == 3 else "0",
+    "is_abandoned": lambda i: "1" if i % 7 == 0 else "0",
+    "order_id": lambda i: str(100000 + i) if i % 8 == 3 else "NULL",
+    "ip_address": lambda i: f"'192.0.2.{i % 250 + 1}'",
+    "user_agent": lambda i: "'Mozilla/5.0 (E2E seed)'",
+}
+
+TRACKING_COLUMNS: Dict[str, Callable[[int], str]] = {
+    "token": lambda i: f"'{seed_token(i)}'",
+    "form_id": lambda i: str(i % 20 + 1),
+    "entry_id": lambda i: str(i + 1),
+    "user_id": lambda i: str(i % 50000 + 1),
+    "siret": lambda i: f"'{i:014d}'",
+    "company_name": lambda i: f"'SOCIETE E2E {i}'",
+    "form_data": _json_form,
+    "submitted_at": _ago,
+    "ip_address": lambda i: f"'192.0.2.{i % 250 + 1}'",
+    "user_agent": lambda i: "'Mozilla/5.0 (E2E seed)'",
+    "session_id": lambda i: f"'sess{i:x}'",
+    "data_personal": lambda i: "'{\"prenom\":\"Camille\",\"nom\":\"Martin\"}'",
+    "data_company": lambda i: f"'{{\"siret\":\"{i:014d}\"}}'",
+    "data_test": lambda i: "'{}'",
+    "data_metadata": lambda i: "'{\"source\":\"e2e_seed\"}'",
+    "data_full": _json_form,
+    "created_at": _ago,
+}
+
+AUDIT_COLUMNS: Dict[str, Callable[[int], str]] = {
+    "token": lambda i: f"'{seed_token(i // AUDIT_EVENTS_PER_TOKEN)}'",
+    "event_type": lambda i: f"'{EVENT_TYPES[i % len(EVENT_TYPES)]}'",
+    "event_data": lambda i: f"'{{\"step\":{i % AUDIT_EVENTS_PER_TOKEN}}}'",
+    "created_at": _ago,
+}
+
+TABLE_GENERATORS = {
+    "wcqf_progress": PROGRESS_COLUMNS,
+    "wcqf_tracking": TRACKING_COLUMNS,
+    "wcqf_audit": AUDIT_COLUMNS,
+}
+
+
+class TableSeeder:
+    """
+    Génère le flux SQL d'amorçage d'une table, par lots multi-valeurs
+
+    `columns` : colonnes présentes en base (SHOW COLUMNS), l'intersection
+    avec les générateurs connus détermine l'INSERT.
+    """
+
+    def __init__(self, table: str, prefix: str, columns: List[str], batch_size: int = 2000):
+        generators = TABLE_GENERATORS[table]
+        self.table = table
+        self.full_name = f"{prefix}{table}"
+        self.columns = [column for column in generators if column in columns]
+        self.generators = [generators[column] for column in self.columns]
+        self.batch_size = batch_size
+
+    def insert_statements(self, start: int, stop: int) -> Iterator[str]:
+        """INSERT multi-valeurs pour les index [start, stop)"""
+        head = f"INSERT INTO {self.full_name} ({', '.join(self.columns)}) VALUES\n"
+        generators = self.generators
+        for offset in range(start, stop, self.batch_size):
+            rows = [
+                "(" + ",".join(generate(index) for generate in generators) + ")"
+                for index in range(offset, min(stop, offset + self.batch_size))
+            ]
+            yield head + ",\n".join(rows) + ";\nCOMMIT;\n"
+
+    def sql_stream(self, start: int, stop: int) -> Iterator[str]:
+        """Flux complet, avec réglages de session adaptés au chargement massif"""
+        yield "SET autocommit=0; SET unique_checks=0; SET foreign_key_checks=0;\n"
+        yield from self.insert_statements(start, stop)
+        yield "SET unique_checks=1; SET foreign_key_checks=1;\n"
+        # Statistiques à jour pour des plans EXPLAIN représentatifs
+        yield f"ANALYZE TABLE {self.full_name};\n"
+
+    def cleanup_statements(self, rows: int, chunk: int = 100000) -> Iterator[str]:
+        """Suppression des lignes amorcées par tranches (transactions courtes)"""
+        yield "SET autocommit=1;\n"
+        for _ in range(rows // chunk + 1):
+            yield f"DELETE FROM {self.full_name} WHERE token LIKE '{seed_token_like()}' LIMIT {chunk};\n"
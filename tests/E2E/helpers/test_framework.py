@@ -4,11 +4,42 @@ Framework de base pour tests E2E interactifs WC Qualiopi Formation
 Basé sur la stratégie PTI_001_2.py
 """
 
+import asyncio
+import atexit
+import contextlib
+import inspect
+import os
+import shlex
 import subprocess
+import sys
 import time
 import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from pathlib import Path
+from collections import deque
+from typing import Deque, Iterable, List, Dict, Optional, Tuple, Union
+
+# Modules voisins importables quel que soit le mode de chargement du framework
+sys.path.insert(0, str(Path(__file__).parent))
+
+from command_channel import PersistentShellChannel
+from command_timing import CommandTimer
+from event_store import EventStore, Reservoir
+from executors import CommandExecutor, create_executor
+from expectations import Expectation
+from http_driver import CartFlow, ConnectionPool, VirtualUser
+from log_analyzer import LogFilter, analyze, summary_markdown
+from log_tail import PluginLogTail, tail_markdown
+from stub_server import CartStubServer, stub_mapping
+from option_cache import OPTIONS_BEGIN, OPTIONS_END, OptionCache, bulk_fetch_php
+from perf_baseline import (
+    HOT_PATHS, IMPROVEMENT, REGRESSION, RUN_SAMPLES, BaselineStore, baseline_markdown, describe, metric_key,
+)
+from php_profiler import PROFILER_BEGIN, PROFILER_END, CostLog, costs_markdown, format_cost, install_php, uninstall_php
+from report_sinks import JUnitSink, JsonlSink, ReportSink, render_markdown
+from state_fixture import FIXTURE_BEGIN, FIXTURE_END, SCOPES, FixtureScope, restore_php, snapshot_php
+from worker_context import WorkerContext
+from wp_batch import EXIT_CHECK_CODE, ProbeBatch, eval_file_command, exit_check_php, extract_marked_json
 
 
 class E2ETestFramework:
@@ -16,22 +47,133 @@ class E2ETestFramework:
     Framework de base pour tests E2E avec SSH/WP-CLI + observations utilisateur
     """
 
-    def __init__(self, test_id: str, test_name: str, description: str):
+    COMMAND_TIMEOUT = 30
+    ASYNC_MAX_CONCURRENCY = int(os.environ.get("E2E_MAX_CONCURRENCY", "4"))
+    WP_PROJECT_DIR = "~/projects/tb-wp-dev"
+    SITE_URL = os.environ.get("E2E_SITE_URL", "https://tb-wp-dev.ddev.site")
+    WP_ADMIN_USER = os.environ.get("E2E_WP_USER", "admin")
+    WP_ADMIN_PASSWORD = os.environ.get("E2E_WP_PASSWORD", "password")
+    # Évènements bruts gardés en mémoire (tampon circulaire, 0 = aucun)
+    RECENT_EVENTS = int(os.environ.get("E2E_RECENT_EVENTS", "1000"))
+    # Coût serveur (temps, mémoire, requêtes SQL) relevé pour chaque sonde PHP
+    PROFILE_PHP = os.environ.get("E2E_PROFILE_PHP") == "1"
+    # Comparaison à la référence de performance (E2E_BASELINE=0 pour désactiver)
+    PERF_BASELINE = os.environ.get("E2E_BASELINE", "1") != "0"
+    # Métriques dont la régression fait échouer le run (motifs, casse ignorée)
+    PERF_HOT_PATHS = HOT_PATHS
+    # Modifie un état global du site (plugin, options partagées) : run_suite l'exécute seul
+    EXCLUSIVE = False
+    # Logs du plugin suivis en direct (chemins ou motifs glob séparés par os.pathsep)
+    PLUGIN_LOGS = [pattern for pattern in os.environ.get("E2E_PLUGIN_LOG", "").split(os.pathsep) if pattern]
+
+    def __init__(
+        self,
+        test_id: str,
+        test_name: str,
+        description: str,
+        persistent_channel: Optional[bool] = None,
+        headless: Optional[bool] = None,
+        executor: Optional[CommandExecutor] = None,
+    ):
         self.test_id = test_id
         self.test_name = test_name
         self.description = description
         self.start_time = time.time()
         self.phases = []
         self.observations = []
-        self.logs = []
+        # Compteurs par niveau / phase / sonde + évènements récents
+        self.logs = EventStore(self.RECENT_EVENTS)
         self.debug_mode = False
 
+        # Puits incrémentaux : flux JSONL (source du rapport Markdown) + JUnit XML
+        self.report_basename = f"tests/E2E/reports/{test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.events_path = f"{self.report_basename}_events.jsonl"
+        self.report_sinks: List[ReportSink] = [JsonlSink(self.events_path)]
+        junit_dir = os.environ.get("E2E_JUNIT_DIR", "tests/E2E/reports")
+        if junit_dir:
+            self.report_sinks.append(
+                JUnitSink(os.path.join(junit_dir, f"junit-e2e-{test_id}.xml"), test_id, self._source_file())
+            )
+        atexit.register(self.close_report_sinks, False)
+        self.emit_event("run_start", test_id=test_id, test_name=test_name, description=description)
+
+        # Mode headless : observations vérifiées par attentes, sans input()
+        if headless is None:
+            headless = os.environ.get("E2E_HEADLESS") == "1"
+        self.headless = headless
+
+        # Isolation (utilisateur/produit dédiés) quand le runner parallèle l'impose
+        self.worker = WorkerContext.from_env()
+
+        # Canal shell persistant (optionnel) : E2E_PERSISTENT_CHANNEL=1
+        if persistent_channel is None:
+            persistent_channel = os.environ.get("E2E_PERSISTENT_CHANNEL") == "1"
+        self.channel = PersistentShellChannel() if persistent_channel else None
+
+        # Backend d'exécution : WordPress réel via WSL ou émulateur (E2E_BACKEND)
+        self.executor = executor or create_executor(channel=self.channel)
+        if self.executor.name != "wsl":
+            self.log_warning(f"Backend « {self.executor.name} » : résultats hors WordPress réel")
+
+        # Cache des options WordPress pour la durée du run
+        self.option_cache = OptionCache()
+
+        # Un `wp eval-file` en échec doit rester en échec (E2E_EXIT_CHECK=0 pour s'en passer)
+        if os.environ.get("E2E_EXIT_CHECK", "1") == "1":
+            self.check_exit_status()
+
+        # Driver HTTP : pool keep-alive partagé par les utilisateurs virtuels
+        self.http_pool: Optional[ConnectionPool] = None
+        # Vérifications HTTP récentes (tampon circulaire) et compteurs exhaustifs
+        self.http_checks: Deque[Dict] = deque(maxlen=self.RECENT_EVENTS)
+        self.http_counts = {"passed": 0, "failed": 0}
+        self.http_base_url = self.SITE_URL
+        self.http_stub: Optional[CartStubServer] = None
+        if os.environ.get("E2E_HTTP_STUB") == "1":
+            self.start_http_stub()
+
+        # Temps réel / CPU / taille de sortie de chaque commande, par phase
+        self.timer = CommandTimer(recent=self.RECENT_EVENTS)
+
+        # Résumés des fichiers de logs du plugin analysés pendant le run
+        self.log_summaries: Dict[str, Dict] = {}
+
+        # Suivi en direct des logs du plugin, attribués à la phase / sonde active
+        self.log_tail: Optional[PluginLogTail] = None
+        self.log_tail_summary: Optional[Dict] = None
+        self._active_probes: List[str] = []
+        if self.PLUGIN_LOGS:
+            self.start_log_tail(*self.PLUGIN_LOGS)
+
+        # Relevés de coût serveur (sondes PHP, pages HTTP profilées) : totaux et plus coûteux
+        self.php_costs = CostLog()
+        self.profile_pages = False
+
+        # Mesures du run par métrique (échantillon borné) et verdicts face à la référence
+        self.perf_samples: Dict[str, Reservoir] = {}
+        self.perf_comparison: Dict[str, Dict] = {}
+
+        # Sémaphore du moteur asynchrone, recréé pour chaque boucle asyncio
+        self._async_semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    @staticmethod
+    def scenario_argv(test_id: str) -> List[str]:
+        """Arguments d'un script lancé par run_suite (variable E2E_ARGS_<test_id>, syntaxe shell)"""
+        return shlex.split(os.environ.get(f"E2E_ARGS_{test_id}", ""))
+
     def print_phase(self, phase_name: str):
         """Affiche un titre de phase"""
         print(f"\n{'=' * 60}")
         print(f"  {phase_name}")
         print(f"{'=' * 60}\n")
-        self.phases.append({"name": phase_name, "start": time.time()})
+        if self.log_tail is not None:
+            # Lignes arrivées jusqu'ici : phase précédente
+            self.log_tail.poll()
+        start = time.time()
+        self.phases.append({"name": phase_name, "start": start})
+        self.timer.start_phase(phase_name, start)
+        self.logs.start_phase(phase_name)
+        self.emit_event("phase", name=phase_name, time=start)
 
     def print_instruction(self, *instructions):
         """Affiche des instructions utilisateur"""
@@ -53,55 +195,568 @@ class E2ETestFramework:
         result = self.execute_ssh_command(description, command)
         return result["success"]
 
-    def execute_ssh_command(self, description: str, command: str) -> Dict:
-        """Exécute une commande SSH/DDEV et retourne le résultat"""
-        try:
-            result = subprocess.run(
-                f'wsl -d Ubuntu bash -c "{command}"',
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
+    def execute_ssh_command(
+        self,
+        description: str,
+        command: str,
+        read_only: bool = False,
+        returncodes: Tuple[int, ...] = (0,),
+        quiet: bool = False,
+    ) -> Dict:
+        """
+        Exécute une commande SSH/DDEV et retourne le résultat
+        (`read_only` : la commande n'écrit aucune option, le cache est conservé ;
+        `returncodes` : codes de retour considérés comme un succès ;
+        `quiet` : mesurée mais non journalisée, l'appelant journalise le verdict)
+        """
+        with self.probe_scope(description):
+            started = self.timer.start()
+            try:
+                result = self._run_command(command, read_only)
+            except Exception as e:
+                result = e
+            timing = self.timer.elapsed(started, cpu_measurable=self.executor.child_cpu)
+        return self._record_command_result(description, result, timing, returncodes, quiet)
+
+    def _record_command_result(
+        self,
+        description: str,
+        result,
+        timing: Optional[Tuple[float, Optional[float]]] = None,
+        returncodes: Tuple[int, ...] = (0,),
+        quiet: bool = False,
+    ) -> Dict:
+        """Journalise un résultat brut (ou une exception) et le normalise"""
+        if timing is not None:
+            output_bytes = 0
+            if isinstance(result, dict):
+                output_bytes = len(result["stdout"].encode("utf-8")) + len(result["stderr"].encode("utf-8"))
+            success = isinstance(result, dict) and result["returncode"] in returncodes
+            self._record_timing(description, timing[0], timing[1], output_bytes, success)
+
+        if isinstance(result, subprocess.TimeoutExpired):
+            if not quiet:
+                self.log_error(f"{description} → TIMEOUT")
+            return {"success": False, "error": "Timeout"}
+        if isinstance(result, Exception):
+            if not quiet:
+                self.log_error(f"{description} → EXCEPTION: {str(result)}")
+            return {"success": False, "error": str(result)}
 
-            success = result.returncode == 0
+        success = result["returncode"] in returncodes
 
+        if not quiet:
             if success:
                 self.log_success(f"{description} → OK")
             else:
-                self.log_error(f"{description} → ERREUR: {result.stderr}")
+                self.log_error(f"{description} → ERREUR: {result['stderr']}")
+
+        return {
+            "success": success,
+            "output": result["stdout"].strip(),
+            "error": result["stderr"].strip(),
+            "returncode": result["returncode"],
+        }
+
+    def _run_command(self, command: str, read_only: bool = False) -> Dict:
+        """Exécute la commande brute via le backend (WSL ou émulateur)"""
+        self.option_cache.invalidate_for_command(command, read_only)
+        return self.executor.run(command, timeout=self.COMMAND_TIMEOUT)
+
+    def check_exit_status(self) -> bool:
+        """
+        Vérifie qu'un `wp eval-file` en échec retourne un code non nul : sans
+        cela, toute sonde ou fixture en échec passerait pour un succès
+        """
+        command = eval_file_command(self.WP_PROJECT_DIR, exit_check_php(), "exit_check")
+        try:
+            result = self._run_command(command, read_only=True)
+        except Exception as e:
+            self.log_warning(f"Contrôle du code retour de wp eval-file impossible : {e}")
+            return False
+        if result["returncode"] == 0:
+            self.log_error(
+                f"wp eval-file en échec (exit {EXIT_CHECK_CODE}) remonté avec le code 0 : "
+                "les codes retour des commandes ne sont pas fiables"
+            )
+            return False
+        return True
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Sémaphore de concurrence lié à la boucle asyncio courante"""
+        loop = asyncio.get_running_loop()
+        if self._async_semaphore is None or self._async_semaphore[0] is not loop:
+            self._async_semaphore = (loop, asyncio.Semaphore(self.ASYNC_MAX_CONCURRENCY))
+        return self._async_semaphore[1]
+
+    async def _run_command_async(
+        self, command: str, read_only: bool = False
+    ) -> Tuple[Dict, Tuple[float, Optional[float]]]:
+        """
+        Exécute la commande brute en concurrence bornée (processus WSL dédié)
+        Retourne (résultat, mesure) ; la mesure exclut l'attente du sémaphore
+        et le temps CPU n'est pas attribuable entre commandes concurrentes.
+        """
+        self.option_cache.invalidate_for_command(command, read_only)
+
+        async with self._get_async_semaphore():
+            started = self.timer.start()
+            try:
+                result = await self.executor.run_async(command, self.COMMAND_TIMEOUT)
+            except subprocess.TimeoutExpired as e:
+                return e, self.timer.elapsed(started, cpu_measurable=False)
+            timing = self.timer.elapsed(started, cpu_measurable=False)
 
-            return {
-                "success": success,
-                "output": result.stdout.strip(),
-                "error": result.stderr.strip(),
-            }
-        except subprocess.TimeoutExpired:
-            self.log_error(f"{description} → TIMEOUT")
-            return {"success": False, "error": "Timeout"}
+        return result, timing
+
+    async def execute_ssh_command_async(self, description: str, command: str) -> Dict:
+        """Version asynchrone de execute_ssh_command"""
+        with self.probe_scope(description):
+            try:
+                result, timing = await self._run_command_async(command)
+            except Exception as e:
+                result, timing = e, None
+        return self._record_command_result(description, result, timing)
+
+    async def execute_many_async(self, commands: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Exécute des commandes indépendantes (description, commande) en parallèle
+
+        Les résultats sont journalisés dans l'ordre de la liste, pas dans
+        l'ordre d'arrivée : le journal reste déterministe.
+        """
+        with self.probe_scope(f"{len(commands)} commandes parallèles"):
+            raw_results = await asyncio.gather(
+                *(self._run_command_async(command) for _, command in commands),
+                return_exceptions=True,
+            )
+        return [
+            self._record_command_result(description, *(raw if isinstance(raw, tuple) else (raw, None)))
+            for (description, _), raw in zip(commands, raw_results)
+        ]
+
+    async def verify_many(self, checks: List[Tuple[str, str]]) -> List[bool]:
+        """Vérifications SSH indépendantes (lecture seule) exécutées en parallèle"""
+        for description, _ in checks:
+            print(f"🔍 Vérification : {description}")
+        results = await self.execute_many_async(checks)
+        return [result["success"] for result in results]
+
+    def verify_parallel(self, checks: List[Tuple[str, str]]) -> List[bool]:
+        """Point d'entrée synchrone de verify_many pour les scripts de test"""
+        return asyncio.run(self.verify_many(checks))
+
+    def pipe_to_command(
+        self, description: str, command: str, chunks: Iterable[str], timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Exécute une commande en lui envoyant un flux sur l'entrée standard
+        (chargement massif via `ddev mysql`, sans fichier intermédiaire)
+        """
+        self.option_cache.invalidate_for_command(command)
+        started = self.timer.start()
+        try:
+            result = self.executor.pipe(command, chunks, timeout or self.COMMAND_TIMEOUT)
         except Exception as e:
-            self.log_error(f"{description} → EXCEPTION: {str(e)}")
-            return {"success": False, "error": str(e)}
+            result = e
+        return self._record_command_result(
+            description, result, self.timer.elapsed(started, cpu_measurable=self.executor.child_cpu)
+        )
 
-    def get_wp_option(self, option_name: str) -> Optional[str]:
-        """Récupère une option WordPress via WP-CLI"""
-        cmd = f"cd ~/projects/tb-wp-dev && ddev wp option get {option_name} --format=json"
-        result = self.execute_ssh_command(f"Get option {option_name}", cmd)
+    def _record_timing(self, description: str, wall: float, cpu: Optional[float], output_bytes: int, success: bool):
+        entry = self.timer.record(description, wall, cpu, output_bytes, success)
+        self.emit_event("command", **entry)
+        if success:
+            self._add_perf_sample(metric_key("commande", description, "s"), wall)
+
+    def close_channel(self):
+        """Ferme le backend d'exécution (canal shell persistant s'il est ouvert)"""
+        self.executor.close()
+
+    def get_wp_option(self, option_name: str, use_cache: bool = True) -> Optional[str]:
+        """Récupère une option WordPress via WP-CLI (servie par le cache si possible)"""
+        if use_cache:
+            found, value = self.option_cache.lookup(option_name)
+            if found:
+                if value is None:
+                    self.log_error(f"Get option {option_name} → ERREUR: option absente (cache)")
+                else:
+                    self.log_success(f"Get option {option_name} → OK (cache)")
+                return value
+
+        cmd = f"cd {self.WP_PROJECT_DIR} && ddev wp option get {option_name} --format=json"
+        result = self.execute_ssh_command(f"Get option {option_name}", cmd, read_only=True)
         
         if result["success"]:
             try:
-                return json.loads(result["output"])
+                value = json.loads(result["output"])
             except json.JSONDecodeError:
-                return result["output"]
+                value = result["output"]
+            self.option_cache.store(option_name, value)
+            return value
         return None
 
-    def collect_observations(self, questions: List[str]) -> List[Dict]:
-        """Collecte les observations utilisateur"""
+    def prefetch_wp_options(self, option_names: List[str]) -> Dict[str, Optional[object]]:
+        """
+        Charge plusieurs options en un seul aller-retour et remplit le cache
+
+        Seules les options absentes du cache sont demandées ; retourne
+        {nom: valeur} pour les options connues (None si absente).
+        """
+        missing = self.option_cache.missing(option_names)
+        if missing:
+            command = eval_file_command(
+                self.WP_PROJECT_DIR, bulk_fetch_php(missing), "options"
+            )
+            result = self.execute_ssh_command(
+                f"Préchargement de {len(missing)} options", command, read_only=True
+            )
+            fetched = None
+            if result["success"]:
+                fetched = extract_marked_json(result["output"], OPTIONS_BEGIN, OPTIONS_END)
+            if fetched is None:
+                self.log_warning("Préchargement des options impossible - lecture unitaire")
+            else:
+                self.option_cache.store_many(
+                    {
+                        name: entry["value"] if entry.get("exists") else None
+                        for name, entry in fetched.items()
+                    }
+                )
+
+        return {
+            name: self.option_cache.peek(name)
+            for name in option_names
+            if name in self.option_cache
+        }
+
+    def new_probe_batch(self, profile: Optional[bool] = None, read_only: bool = False) -> ProbeBatch:
+        """
+        Crée un lot de sondes PHP à exécuter en un seul démarrage WordPress
+        (`profile` : relevé du coût serveur de chaque sonde, défaut PROFILE_PHP ;
+        `read_only` : aucune sonde n'écrit d'option, le cache est conservé)
+        """
+        return ProbeBatch(profile=self.PROFILE_PHP if profile is None else profile, read_only=read_only)
+
+    def run_probe_batch(
+        self, batch: ProbeBatch, description: str = "Lot de sondes WP-CLI", log_results: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        Exécute toutes les sondes du lot via un seul `wp eval-file`
+
+        Chaque sonde est journalisée séparément, comme un appel individuel
+        (`log_results=False` : l'appelant journalise lui-même les résultats).
+        Retourne {nom: {"passed", "value", "error"?}}.
+        """
+        if not len(batch):
+            return {}
+
+        print(f"🔍 {description} ({len(batch)} sondes)")
+        command = eval_file_command(self.WP_PROJECT_DIR, batch.to_php(), "batch")
+        started = self.timer.start()
+        output_bytes = 0
+        try:
+            raw = self._run_command(command, batch.read_only)
+            output_bytes = len(raw["stdout"].encode("utf-8")) + len(raw["stderr"].encode("utf-8"))
+            results = batch.parse_output(raw["stdout"])
+            failure = None if results is not None else (
+                raw["stderr"].strip() or "Sortie JSON introuvable"
+            )
+        except subprocess.TimeoutExpired:
+            results, failure = None, "TIMEOUT"
+        except Exception as e:
+            results, failure = None, f"EXCEPTION: {str(e)}"
+        wall, cpu = self.timer.elapsed(started, cpu_measurable=self.executor.child_cpu)
+        self._record_timing(f"{description} ({len(batch)} sondes)", wall, cpu, output_bytes, failure is None)
+
+        parsed = {}
+        for probe in batch.probes:
+            if results is None:
+                result = {"passed": False, "value": None, "error": failure}
+            else:
+                result = results.get(
+                    probe.name,
+                    {"passed": False, "value": None, "error": "Sonde absente du résultat"},
+                )
+
+            parsed[probe.name] = result
+            if not log_results:
+                continue
+            self.logs.add_probe(probe.name, bool(result.get("passed")))
+            cost = self.record_php_cost("sonde", probe.description, result.get("cost"))
+            if result.get("passed"):
+                self.log_success(f"{probe.description} → OK", cost)
+            else:
+                detail = result.get("error") or f"valeur = {result.get('value')!r}"
+                self.log_error(f"{probe.description} → ERREUR: {detail}", cost)
+
+        return parsed
+
+    def fixture_scope(self, scope: str = "site") -> FixtureScope:
+        """Périmètre d'instantané : tout le site, ou l'utilisateur et le produit du worker"""
+        if scope not in SCOPES:
+            raise ValueError(f"Périmètre inconnu : {scope!r} (attendu : {', '.join(SCOPES)})")
+        return FixtureScope() if scope == "site" else FixtureScope(self.worker.user_id, self.worker.product_id)
+
+    def snapshot_state(self, name: str = "base", scope: str = "site") -> bool:
+        """Instantané de l'empreinte du plugin (options, user meta, transients, tables) en un appel"""
+        command = eval_file_command(self.WP_PROJECT_DIR, snapshot_php(name, self.fixture_scope(scope)), "snapshot")
+        result = self.execute_ssh_command(f"Instantané de l'état du plugin « {name} »", command)
+        report = extract_marked_json(result.get("output", ""), FIXTURE_BEGIN, FIXTURE_END)
+        if report is None or report["errors"]:
+            self.log_error(f"Instantané « {name} » incomplet : {report['errors'] if report else 'sortie illisible'}")
+            return False
+        rows = ", ".join(f"{key} {count}" for key, count in report["rows"].items())
+        self.log_info(f"Instantané « {name} » : {rows}")
+        return True
+
+    def restore_state(self, name: str = "base", drop: bool = False, scope: str = "site") -> bool:
+        """Restaure l'instantané `name` en un appel (`drop` : supprime ensuite l'instantané)"""
+        command = eval_file_command(self.WP_PROJECT_DIR, restore_php(name, drop, self.fixture_scope(scope)), "restore")
+        result = self.execute_ssh_command(f"Restauration de l'état du plugin « {name} »", command)
+        # La restauration réécrit des options : le cache du run n'est plus fiable
+        self.option_cache.invalidate()
+        report = extract_marked_json(result.get("output", ""), FIXTURE_BEGIN, FIXTURE_END)
+        if report is None or report["errors"]:
+            self.log_error(f"Restauration « {name} » incomplète : {report['errors'] if report else 'sortie illisible'}")
+            return False
+        return True
+
+    @contextlib.contextmanager
+    def state_fixture(self, name: str = "base", scope: str = "site"):
+        """
+        Fixture : instantané à l'entrée, restauration (et suppression de
+        l'instantané) à la sortie, même en cas d'exception
+
+        scope="site" : restauration de tout le site, refusée si d'autres
+        scénarios s'exécutent en parallèle (run_suite l'exécute seul).
+        scope="worker" : user meta, options produit et lignes de
+        l'utilisateur du worker seulement, compatible avec le pool.
+        """
+        if scope == "site" and not self.worker.alone:
+            raise RuntimeError(
+                f"Fixture « {name} » refusée : d'autres scénarios s'exécutent en parallèle (EXCLUSIVE = True requis)"
+            )
+        if not self.snapshot_state(name, scope):
+            raise RuntimeError(f"Instantané « {name} » impossible")
+        try:
+            yield
+        finally:
+            self.restore_state(name, drop=True, scope=scope)
+
+    def start_http_stub(self, **options) -> CartStubServer:
+        """Démarre le serveur local simulant WooCommerce + CartGuard et le cible"""
+        if self.http_stub is not None:
+            # Options différentes (latence, erreurs) : remplace le serveur démarré par E2E_HTTP_STUB
+            self.http_stub.stop()
+        # Produit et utilisateur du worker connus du serveur (page de test, connexion)
+        options.setdefault("mapping", stub_mapping(self.worker.product_id))
+        options.setdefault("users", {self.worker.username: (self.worker.user_id, self.worker.password)})
+        wordpress = getattr(self.executor, "wp", None)
+        if wordpress is not None and "user_meta" not in options:
+            # Backend emulator : tests validés lus dans les user meta émulées (wp user meta update)
+            def user_meta(user_id: int, key: str):
+                with wordpress.lock:
+                    return wordpress.get_user_meta(user_id, key)
+
+            options["user_meta"] = user_meta
+        self.http_stub = CartStubServer(**options).start()
+        if wordpress is not None:
+            # Même mapping produit → page de test côté site émulé et côté serveur
+            with wordpress.lock:
+                if not wordpress.option_exists("wcqf_product_form_mapping"):
+                    wordpress.update_option("wcqf_product_form_mapping", self.http_stub.httpd.state.mapping)
+        self.http_base_url = self.http_stub.base_url
+        self.log_info(f"Serveur HTTP de remplacement : {self.http_base_url}")
+        return self.http_stub
+
+    def new_virtual_user(self, name: str = "vu", base_url: Optional[str] = None) -> VirtualUser:
+        """Crée un utilisateur virtuel (cookies propres, connexions mutualisées)"""
+        if self.http_pool is None:
+            self.http_pool = ConnectionPool(
+                verify_tls=os.environ.get("E2E_HTTP_INSECURE") != "1"
+            )
+        return VirtualUser(base_url or self.http_base_url, self.http_pool, name, self.profile_pages)
+
+    def new_cart_flow(self, name: str = "vu", base_url: Optional[str] = None) -> CartFlow:
+        """Parcours panier → test → checkout pour un nouvel utilisateur virtuel"""
+        return CartFlow(self.new_virtual_user(name, base_url))
+
+    def record_http_check(self, check: Dict) -> bool:
+        """Journalise un résultat structuré du driver HTTP et le conserve"""
+        self.http_checks.append(check)
+        self.http_counts["passed" if check["passed"] else "failed"] += 1
+        self.emit_event("http_check", check=check)
+        timing = check["timing"]
+        self._add_perf_sample(metric_key("http", check["check"], "ms"), timing["elapsed_ms"])
+        message = f"{check['check']} → {check['detail']} [{timing['elapsed_ms']:.0f} ms]"
+        cost = self.record_php_cost("page", f"{check['check']} ({timing['final_url']})", timing.get("server_cost"))
+        if check["passed"]:
+            self.log_success(message, cost)
+        else:
+            self.log_error(message, cost)
+        return check["passed"]
+
+    def record_php_cost(self, source: str, name: str, cost: Optional[Dict]) -> Optional[Dict]:
+        """Conserve un relevé de coût serveur pour le rapport ; retourne le relevé"""
+        if cost:
+            self.php_costs.add({"source": source, "name": name, "phase": self.logs.current_phase, "cost": cost})
+            self._add_perf_sample(metric_key(source, name, "ms"), cost.get("time_ms"))
+            self._add_perf_sample(metric_key(source, name, "requêtes"), cost.get("queries"))
+            self._add_perf_sample(metric_key(source, name, "Kio"), cost.get("memory_peak_kb"))
+        return cost
+
+    def install_page_profiler(self) -> bool:
+        """
+        Installe le mu-plugin de relevé des pages ; les utilisateurs virtuels
+        créés ensuite envoient X-E2E-Profile et reçoivent leur coût serveur
+        """
+        command = eval_file_command(self.WP_PROJECT_DIR, install_php(), "profiler")
+        result = self.execute_ssh_command("Installation du relevé de coût des pages", command)
+        report = extract_marked_json(result.get("output", ""), PROFILER_BEGIN, PROFILER_END)
+        self.profile_pages = bool(report and report["installed"])
+        if not self.profile_pages:
+            self.log_warning("Relevé de coût des pages indisponible (mu-plugin non écrit)")
+        return self.profile_pages
+
+    def remove_page_profiler(self):
+        """Retire le mu-plugin de relevé des pages"""
+        command = eval_file_command(self.WP_PROJECT_DIR, uninstall_php(), "profiler")
+        result = self.execute_ssh_command("Retrait du relevé de coût des pages", command)
+        report = extract_marked_json(result.get("output", ""), PROFILER_BEGIN, PROFILER_END)
+        if not (report and report["removed"]):
+            self.log_warning(f"mu-plugin {report['path'] if report else ''} à retirer manuellement")
+        self.profile_pages = False
+
+    def add_perf_samples(self, name: str, values: Iterable[float], unit: str = "ms"):
+        """Ajoute des mesures d'un benchmark à la comparaison avec la référence"""
+        for value in values:
+            self._add_perf_sample(metric_key("bench", name, unit), value)
+
+    def _add_perf_sample(self, key: str, value):
+        if value is not None:
+            if key not in self.perf_samples:
+                self.perf_samples[key] = Reservoir(RUN_SAMPLES)
+            self.perf_samples[key].add(float(value))
+
+    def collect_perf_samples(self) -> Dict[str, List[float]]:
+        """Mesures du run par métrique : commandes, sondes, pages, vérifications HTTP, benchmarks"""
+        samples = {key: list(reservoir.values) for key, reservoir in self.perf_samples.items()}
+        samples[metric_key("run", "durée", "s")] = [self.get_duration()]
+        return samples
+
+    def check_perf_baseline(self) -> Optional[str]:
+        """
+        Compare le run à la référence glissante ; régression sur un chemin
+        critique = erreur, ailleurs = avertissement. Un run sans erreur rejoint
+        la référence (E2E_BASELINE_ACCEPT=1 : l'y ajoute malgré ses régressions).
+        Retourne la section « avant / après » du rapport.
+        """
+        if not self.PERF_BASELINE or self.executor.name != "wsl":
+            return None
+        store = BaselineStore(self.test_id, os.environ.get("E2E_BASELINE_TAG", ""))
+        samples = self.collect_perf_samples()
+        clean = self.logs.count("error") == 0
+        self.perf_comparison = store.compare(samples, self.PERF_HOT_PATHS)
+
+        self.print_phase("Comparaison à la référence de performance")
+        regressions = 0
+        for key, entry in self.perf_comparison.items():
+            if entry["verdict"] == REGRESSION:
+                regressions += 1
+                if entry["hot"]:
+                    self.log_error(f"Régression (chemin critique) {describe(key, entry)}")
+                else:
+                    self.log_warning(f"Régression {describe(key, entry)}")
+            elif entry["verdict"] == IMPROVEMENT:
+                self.log_info(f"Amélioration {describe(key, entry)}")
+        if not regressions:
+            self.log_info(
+                f"Aucune régression sur {len(self.perf_comparison)} métrique(s) ({len(store.runs)} run(s) de référence)"
+            )
+
+        if (clean and not regressions) or os.environ.get("E2E_BASELINE_ACCEPT") == "1":
+            store.record(samples, {"site": self.SITE_URL, "worker": self.worker.to_dict()})
+            self.log_info(f"Run ajouté à la référence : {store.path}")
+        else:
+            self.log_info("Run non ajouté à la référence (erreurs ou régressions, E2E_BASELINE_ACCEPT=1 pour forcer)")
+        return baseline_markdown(self.perf_comparison)
+
+    def start_log_tail(self, *patterns: str) -> PluginLogTail:
+        """Suit les logs du plugin depuis leur fin actuelle jusqu'au rapport"""
+        self.log_tail = PluginLogTail(patterns, self._log_tail_label).start()
+        self.log_info(f"Logs du plugin suivis : {', '.join(patterns)} ({len(self.log_tail.files)} fichier(s))")
+        return self.log_tail
+
+    def _log_tail_label(self) -> Tuple[str, Optional[str]]:
+        # Appelé depuis le thread de suivi : copie atomique plutôt que test puis indexation
+        active = self._active_probes[-1:]
+        return self.logs.current_phase, active[0] if active else None
+
+    @contextlib.contextmanager
+    def probe_scope(self, name: str):
+        """Sonde active : les logs du plugin arrivés pendant le bloc lui sont attribués"""
+        self._active_probes.append(name)
+        try:
+            yield
+        finally:
+            if self.log_tail is not None:
+                self.log_tail.poll()
+            self._active_probes.remove(name)
+
+    def stop_log_tail(self) -> Optional[str]:
+        """Dernière lecture des logs suivis ; retourne la section du rapport"""
+        if self.log_tail is None:
+            return None
+        tail, self.log_tail = self.log_tail, None
+        tail.stop()
+        self.log_tail_summary = tail.summary()
+        self.emit_event("plugin_log_tail", summary=self.log_tail_summary)
+        for phase, stats in self.log_tail_summary["phases"].items():
+            if stats["errors"]:
+                self.log_warning(f"Logs du plugin, phase « {phase} » : {stats['errors']} erreur(s) sur {stats['records']}")
+        return tail_markdown(self.log_tail_summary)
+
+    def summarize_log_file(
+        self, path: str, reverse: bool = False, limit: Optional[int] = None, top: int = 10, **filters
+    ) -> Optional[Dict]:
+        """
+        Analyse un fichier de logs du plugin (debug.log, logs WooCommerce)
+        et conserve son résumé pour le rapport ; `filters` : voir LogFilter
+        """
+        if not os.path.exists(path):
+            self.log_warning(f"Fichier de logs introuvable : {path}")
+            return None
+        summary = analyze(path, LogFilter(**filters), reverse, limit, top)
+        self.log_summaries[path] = summary
+        errors = sum(count for level, count in summary["by_level"].items() if level in ("error", "critical"))
+        message = f"Logs {os.path.basename(path)} : {summary['records']} enregistrements, {errors} erreurs"
+        if errors:
+            self.log_warning(message)
+        else:
+            self.log_info(message)
+        return summary
+
+    def collect_observations(
+        self, questions: List[Union[str, Tuple[str, Expectation]]]
+    ) -> List[Dict]:
+        """
+        Collecte les observations utilisateur
+
+        Une question peut être associée à une attente : (question, Expectation).
+        En mode headless, l'attente est évaluée automatiquement ; sinon la
+        question est posée à l'utilisateur.
+        """
         observations = []
         print("💭 OBSERVATIONS UTILISATEUR :")
-        for question in questions:
+        for item in questions:
+            question, expectation = item if isinstance(item, tuple) else (item, None)
             print(f"\n❓ {question}")
-            response = input("   Réponse (oui/non/commentaire) : ")
+            if self.headless:
+                response = self._evaluate_expectation(question, expectation)
+                print(f"   Réponse (auto) : {response}")
+            else:
+                response = input("   Réponse (oui/non/commentaire) : ")
             observations.append(
                 {
                     "question": question,
@@ -110,32 +765,91 @@ class E2ETestFramework:
                 }
             )
         self.observations.extend(observations)
+        for observation in observations:
+            self.emit_event("observation", **observation)
         return observations
 
+    def _evaluate_expectation(
+        self, question: str, expectation: Optional[Expectation]
+    ) -> str:
+        """Évalue l'attente d'une question en mode headless et retourne la réponse"""
+        if expectation is None:
+            self.log_warning(f"Observation non vérifiable en headless : {question}")
+            return "non vérifié (headless)"
+
+        try:
+            passed, detail = expectation.evaluate(self)
+        except Exception as e:
+            passed, detail = False, f"{expectation.description} : EXCEPTION {str(e)}"
+
+        if expectation.recorded:
+            # Verdict déjà compté par la vérification d'origine : pas de seconde entrée
+            self.log_info(f"Observation auto (déjà relevée) → {detail}")
+        elif passed:
+            self.log_success(f"Observation auto → {detail}")
+        else:
+            self.log_error(f"Observation auto → {detail}")
+        return f"{'oui' if passed else 'non'} - {detail}"
+
     def wait_user_confirmation(self, message: str):
         """Attend confirmation utilisateur"""
         print(f"\n⏸️  {message}")
+        if self.headless:
+            print("   (headless : poursuite automatique)")
+            return
         input("   Appuyez sur Entrée pour continuer...")
 
-    def log_success(self, message: str):
-        """Log un succès"""
-        print(f"✅ {message}")
-        self.logs.append({"type": "success", "message": message, "time": time.time()})
+    def log_success(self, message: str, metrics: Optional[Dict] = None):
+        """Log un succès (`metrics` : mesures structurées rattachées, ex. coût serveur)"""
+        print(f"✅ {message}{self._metrics_suffix(metrics)}")
+        self._log("success", message, metrics)
 
-    def log_error(self, message: str):
+    def log_error(self, message: str, metrics: Optional[Dict] = None):
         """Log une erreur"""
-        print(f"❌ {message}")
-        self.logs.append({"type": "error", "message": message, "time": time.time()})
+        print(f"❌ {message}{self._metrics_suffix(metrics)}")
+        self._log("error", message, metrics)
 
-    def log_info(self, message: str):
+    def log_info(self, message: str, metrics: Optional[Dict] = None):
         """Log une info"""
-        print(f"ℹ️  {message}")
-        self.logs.append({"type": "info", "message": message, "time": time.time()})
+        print(f"ℹ️  {message}{self._metrics_suffix(metrics)}")
+        self._log("info", message, metrics)
 
-    def log_warning(self, message: str):
+    def log_warning(self, message: str, metrics: Optional[Dict] = None):
         """Log un avertissement"""
-        print(f"⚠️  {message}")
-        self.logs.append({"type": "warning", "message": message, "time": time.time()})
+        print(f"⚠️  {message}{self._metrics_suffix(metrics)}")
+        self._log("warning", message, metrics)
+
+    @staticmethod
+    def _metrics_suffix(metrics: Optional[Dict]) -> str:
+        return f" [{format_cost(metrics)}]" if metrics and "time_ms" in metrics else ""
+
+    def _log(self, kind: str, message: str, metrics: Optional[Dict] = None):
+        record = self.logs.add(kind, message, time.time(), metrics)
+        self.emit_event("log", **record.to_dict())
+
+    def emit_event(self, kind: str, **data):
+        """Diffuse un évènement du run vers les puits de rapport"""
+        event = {"kind": kind, "time": time.time(), **data}
+        for sink in self.report_sinks:
+            sink.emit(event)
+
+    def close_report_sinks(self, completed: bool = True):
+        """Finalise les puits (appelé par le rapport, ou à la sortie si le run a échoué)"""
+        sinks, self.report_sinks = self.report_sinks, []
+        summary = {
+            "completed": completed,
+            "duration": self.get_duration(),
+            "success_rate": self.calculate_success_rate(),
+        }
+        for sink in sinks:
+            sink.close(summary)
+
+    def _source_file(self) -> str:
+        """Script du scénario (attribut `file` des suites JUnit)"""
+        try:
+            return os.path.relpath(inspect.getfile(type(self)))
+        except (TypeError, ValueError):
+            return type(self).__name__
 
     def get_duration(self) -> float:
         """Retourne la durée du test en secondes"""
@@ -150,11 +864,29 @@ class E2ETestFramework:
         return self.observations
 
     def calculate_success_rate(self) -> float:
-        """Calcule le taux de succès basé sur les logs"""
-        success_logs = [log for log in self.logs if log["type"] == "success"]
-        error_logs = [log for log in self.logs if log["type"] == "error"]
-        total = len(success_logs) + len(error_logs)
-        return (len(success_logs) / total * 100) if total > 0 else 0
+        """Calcule le taux de succès basé sur les logs (compteurs, O(1))"""
+        return self.logs.success_rate()
+
+    def export_results(self) -> Dict:
+        """Résultats sérialisables du run (agrégés par le runner de suite)"""
+        return {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "description": self.description,
+            "duration": self.get_duration(),
+            "success_rate": self.calculate_success_rate(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "logs": [record.to_dict() for record in self.logs],
+            "counters": self.logs.summary(),
+            "http_checks": {**self.http_counts, "recent": list(self.http_checks)},
+            "log_summaries": self.log_summaries,
+            "plugin_log_tail": self.log_tail_summary,
+            "php_costs": self.php_costs.to_dict(),
+            "perf_comparison": self.perf_comparison,
+            "timings": self.timer.to_dict(),
+            "worker": self.worker.to_dict(),
+        }
 
     def save_debug_snapshot(self, data: Dict):
         """Sauvegarde un snapshot de debug"""
@@ -165,51 +897,66 @@ class E2ETestFramework:
             self.log_info(f"Debug snapshot sauvegardé : {filename}")
 
     def save_markdown_report(self, report: Dict):
-        """Sauvegarde le rapport final en Markdown"""
-        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-
-        content = f"""# {self.test_name}
-
-**Test ID** : {self.test_id}  
-**Date** : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
-**Durée** : {report['duration']:.2f}s  
-**Taux de succès** : {report['success_rate']:.1f}%
-
-## Description
-
-{self.description}
-
-## Phases Exécutées
-
-"""
-        for phase in report["phases"]:
-            content += f"- {phase['name']}\n"
-
-        content += "\n## Observations\n\n"
-        for obs in report["observations"]:
-            content += f"- **Q**: {obs['question']}\n"
-            content += f"  **R**: {obs['response']}\n\n"
-
-        content += "\n## Logs\n\n```\n"
-        for log in self.logs:
-            timestamp = datetime.fromtimestamp(log["time"]).strftime("%H:%M:%S")
-            content += f"[{timestamp}] [{log['type'].upper()}] {log['message']}\n"
-        content += "```\n"
-
-        # Recommendations
-        success_rate = report["success_rate"]
-        content += "\n## Recommandations\n\n"
-        if success_rate >= 90:
-            content += "✅ **Test réussi** - Le workflow fonctionne comme prévu.\n"
-        elif success_rate >= 70:
-            content += "⚠️ **Test partiellement réussi** - Quelques problèmes mineurs à corriger.\n"
-        else:
-            content += "❌ **Test échoué** - Des problèmes critiques nécessitent une attention immédiate.\n"
-
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(content)
+        """Sauvegarde le rapport final en Markdown (rendu depuis le flux d'évènements)"""
+        filename = f"{self.report_basename}.md"
+        # Avant la fermeture des puits : ces verdicts comptent dans le taux de succès
+        tail_section = self.stop_log_tail()
+        baseline_section = self.check_perf_baseline()
+        self.close_report_sinks()
+
+        sections = []
+        phases = self.logs.summary()["phases"]
+        if phases:
+            rows = "".join(
+                f"| {name} | {stats['success']} | {stats['error']} | {stats['warning']} | {stats['success_rate']:.1f}% |\n"
+                for name, stats in phases.items()
+            )
+            sections.append(
+                "\n## Résultats par phase\n\n"
+                "| Phase | Succès | Erreurs | Avertissements | Taux |\n"
+                "|-------|--------|---------|----------------|------|\n" + rows
+            )
+        if self.timer.count:
+            sections.append("\n## Temps d'exécution\n\n" + self.timer.to_markdown() + "\n")
+        if self.php_costs:
+            sections.append("\n## Coût côté serveur\n\n" + costs_markdown(self.php_costs))
+        if baseline_section:
+            sections.append("\n## Comparaison à la référence\n\n" + baseline_section)
+        if self.log_summaries:
+            sections.append(
+                "\n## Logs du plugin\n\n"
+                + "".join(summary_markdown(summary, os.path.basename(path)) + "\n"
+                          for path, summary in self.log_summaries.items())
+            )
+        if tail_section:
+            sections.append("\n## Logs du plugin par phase\n\n" + tail_section)
+
+        render_markdown(
+            self.events_path,
+            filename,
+            {
+                "test_name": self.test_name,
+                "test_id": self.test_id,
+                "description": self.description,
+                "duration": report["duration"],
+                "success_rate": self.calculate_success_rate(),
+            },
+            sections,
+        )
 
         print(f"\n📄 Rapport sauvegardé : {filename}")
+        print(f"🧾 Flux d'évènements : {self.events_path}")
+        self.save_timing_reports(self.report_basename)
+
+    def save_timing_reports(self, basename: str):
+        """Exporte les mesures des commandes à côté du rapport (JSON + OpenMetrics)"""
+        if not self.timer.count:
+            return
+        with open(f"{basename}_timings.json", "w", encoding="utf-8") as f:
+            json.dump(self.timer.to_dict(), f, indent=2, ensure_ascii=False)
+        with open(f"{basename}_metrics.txt", "w", encoding="utf-8") as f:
+            f.write(self.timer.to_openmetrics(self.test_id))
+        print(f"⏱️  Mesures des commandes : {basename}_timings.json, {basename}_metrics.txt")
 
     def print_summary(self):
         """Affiche le résumé final"""
@@ -223,8 +970,12 @@ class E2ETestFramework:
         print(f"Taux de succès : {success_rate:.1f}%")
         print(f"Phases : {len(self.phases)}")
         print(f"Observations : {len(self.observations)}")
-        print(f"Succès : {len([l for l in self.logs if l['type'] == 'success'])}")
-        print(f"Erreurs : {len([l for l in self.logs if l['type'] == 'error'])}")
+        print(f"Succès : {self.logs.count('success')}")
+        print(f"Erreurs : {self.logs.count('error')}")
+        if self.timer.count:
+            slowest = self.timer.slowest_entry
+            print(f"Commandes : {self.timer.count} ({self.timer.total_command_s:.2f}s)")
+            print(f"Plus lente : {slowest['description']} ({slowest['wall_s']:.2f}s)")
         print(f"{'=' * 60}\n")
 
     def run(self):
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Analyse d'impact des scénarios E2E
+Chaque scénario est associé aux modules de src/ qu'il couvre : attribut
+de classe `COVERS` (déclaratif) et classes WcQualiopiFormation\\... citées
+dans le script ou ses helpers, complétés par la fermeture transitive des
+classes PHP que ces fichiers utilisent (`use`, noms qualifiés, classes du
+même namespace). Les sources couvertes sont hachées ; un scénario déjà
+réussi avec la même empreinte peut être sauté. Par sécurité, tout est
+relancé quand un fichier de src/ modifié n'est couvert par aucun scénario.
+"""
+
+import ast
+import functools
+import hashlib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+E2E_DIR = Path(__file__).resolve().parent.parent
+HELPERS_DIR = E2E_DIR / "helpers"
+PLUGIN_DIR = E2E_DIR.parent.parent
+SRC_DIR = PLUGIN_DIR / "src"
+STATE_FILE = E2E_DIR / "reports" / "impact_state.json"
+
+ROOT_NAMESPACE = "WcQualiopiFormation"
+
+# Amorçage commun à tous les scénarios : toute modification relance tout
+BOOTSTRAP_FILES = [
+    PLUGIN_DIR / "wc_qualiopi_formation.php",
+    SRC_DIR / "Core" / "Plugin.php",
+    SRC_DIR / "Core" / "ModuleLoader.php",
+]
+
+# Classes citées dans du code Python/PHP, quel que soit l'échappement des antislashs
+_FQCN = re.compile(ROOT_NAMESPACE + r"((?:\\+[A-Za-z_]\w*)+)")
+
+# PHP : namespace du fichier, imports de classes, noms de classe (relatifs ou qualifiés)
+_NAMESPACE = re.compile(r"^\s*namespace\s+([\w\\]+)\s*;", re.MULTILINE)
+_USE = re.compile(r"^\s*use\s+(?!function\b|const\b)\\?([\w\\]+)(?:\s+as\s+(\w+))?\s*;", re.MULTILINE)
+_CLASS_NAME = re.compile(r"(?<![\\\w$>:])([A-Z]\w*(?:\\[A-Za-z_]\w*)*)")
+
+
+def modules_in_source(source: str) -> Set[str]:
+    """Modules ("Form/Siren/SirenAutocomplete") des classes du plugin citées"""
+    modules = set()
+    for match in _FQCN.finditer(source):
+        parts = [part for part in re.split(r"\\+", match.group(1)) if part]
+        if parts:
+            modules.add("/".join(parts))
+    return modules
+
+
+def module_files(module: str) -> List[Path]:
+    """Fichiers PHP d'un module : dossier (récursif) ou classe ; vide si inconnu"""
+    path = SRC_DIR / module
+    if path.is_dir():
+        return sorted(path.rglob("*.php"))
+    if path.with_suffix(".php").is_file():
+        return [path.with_suffix(".php")]
+    return []
+
+
+def _class_file(parts: List[str]) -> Optional[Path]:
+    """Fichier d'une classe du plugin (segments sous le namespace racine) ; None si inconnu"""
+    if not parts:
+        return None
+    path = SRC_DIR.joinpath(*parts).with_suffix(".php")
+    return path if path.is_file() else None
+
+
+@functools.lru_cache(maxsize=None)
+def php_dependencies(path: Path) -> frozenset:
+    """Fichiers de src/ des classes qu'un fichier PHP utilise directement"""
+    try:
+        source = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return frozenset()
+    match = _NAMESPACE.search(source)
+    namespace = match.group(1).split("\\")[1:] if match and match.group(1).startswith(ROOT_NAMESPACE) else []
+
+    aliases = {}
+    for full, alias in _USE.findall(source):
+        parts = full.split("\\")
+        if parts[0] == ROOT_NAMESPACE:
+            aliases[alias or parts[-1]] = parts[1:]
+
+    found = set()
+    for module in modules_in_source(source):
+        found.add(_class_file(module.split("/")))
+    for name in set(_CLASS_NAME.findall(source)):
+        first, *rest = name.split("\\")
+        base = aliases.get(first)
+        found.add(_class_file(base + rest if base is not None else namespace + [first] + rest))
+    found.discard(None)
+    found.discard(path)
+    return frozenset(found)
+
+
+def php_closure(files: Iterable[Path], stop: Iterable[Path] = ()) -> Set[Path]:
+    """
+    Fichiers de départ et, transitivement, tous ceux dont ils dépendent
+    (les fichiers de `stop` sont inclus sans suivre leurs dépendances)
+    """
+    stop = set(stop)
+    closure: Set[Path] = set()
+    pending = [path for path in files if path.suffix == ".php"]
+    while pending:
+        path = pending.pop()
+        if path in closure:
+            continue
+        closure.add(path)
+        if path not in stop:
+            pending.extend(php_dependencies(path) - closure)
+    return closure
+
+
+def src_files() -> List[Path]:
+    return sorted(SRC_DIR.rglob("*.php"))
+
+
+def _declared_covers(node: ast.ClassDef) -> List[str]:
+    """Valeur littérale de `COVERS = [...]` dans le corps de la classe"""
+    for statement in node.body:
+        if isinstance(statement, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "COVERS" for target in statement.targets
+        ):
+            try:
+                return [str(module) for module in ast.literal_eval(statement.value)]
+            except ValueError:
+                return []
+    return []
+
+
+def _imported_helpers(tree: ast.Module) -> List[Path]:
+    """Helpers du dossier helpers/ importés par le script (un niveau)"""
+    helpers = []
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module.split(".")[-1]]
+        elif isinstance(node, ast.Import):
+            names = [alias.name.split(".")[-1] for alias in node.names]
+        for name in names:
+            path = HELPERS_DIR / f"{name}.py"
+            if path.is_file() and path not in helpers:
+                helpers.append(path)
+    return helpers
+
+
+class ScenarioCoverage:
+    """Modules couverts par un scénario, globalement et par phase (méthodes phase_*)"""
+
+    def __init__(self, script: str, class_name: str):
+        self.script = Path(script)
+        self.class_name = class_name
+        source = self.script.read_text(encoding="utf-8")
+        tree = ast.parse(source, filename=str(self.script))
+
+        self.declared: List[str] = []
+        self.phases: Dict[str, Set[str]] = {}
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == class_name:
+                self.declared = _declared_covers(node)
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and item.name.startswith("phase"):
+                        self.phases[item.name] = modules_in_source(ast.get_source_segment(source, item) or "")
+
+        self.helpers = _imported_helpers(tree)
+        self.modules: Set[str] = set(self.declared) | modules_in_source(source)
+        for helper in self.helpers:
+            self.modules |= modules_in_source(helper.read_text(encoding="utf-8"))
+
+    @property
+    def known(self) -> bool:
+        """False si aucune couverture n'est connue : le scénario est toujours exécuté"""
+        return any(module_files(module) for module in self.modules)
+
+    def files(self) -> List[Path]:
+        """
+        Sources hachées : modules couverts et leurs dépendances PHP,
+        amorçage, script et helpers Python
+        """
+        covered: Set[Path] = set()
+        for module in self.modules:
+            covered.update(module_files(module))
+        # Amorçage inclus tel quel : il charge tous les modules, ses dépendances ne sont pas suivies
+        files = php_closure(covered, stop=BOOTSTRAP_FILES) | set(BOOTSTRAP_FILES) | {self.script}
+        files.update(HELPERS_DIR.glob("*.py"))
+        return sorted(path for path in files if path.is_file())
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for path in self.files():
+            digest.update(str(path.relative_to(PLUGIN_DIR)).encode("utf-8") + b"\0")
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        return digest.hexdigest()
+
+    def phases_touching(self, changed_files: Set[Path]) -> List[str]:
+        """Phases dont les modules contiennent un des fichiers modifiés"""
+        return [
+            phase
+            for phase, modules in self.phases.items()
+            if any(path in changed_files for module in modules for path in module_files(module))
+        ]
+
+
+class ImpactState:
+    """
+    Dernière empreinte réussie de chaque scénario et hachage de src/ au
+    dernier run entièrement réussi (fichier local, hors dépôt)
+    """
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.sources: Dict[str, str] = {}
+        if path.is_file():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = {}
+            # Ancien format : entrées des scénarios à la racine
+            self.entries = data.get("scenarios", data if "sources" not in data else {})
+            self.sources = data.get("sources", {})
+
+    @staticmethod
+    def _key(coverage: ScenarioCoverage) -> str:
+        return f"{coverage.script.name}::{coverage.class_name}"
+
+    def last_pass(self, coverage: ScenarioCoverage) -> Optional[Dict]:
+        return self.entries.get(self._key(coverage))
+
+    def record_pass(self, coverage: ScenarioCoverage, fingerprint: str):
+        self.entries[self._key(coverage)] = {
+            "fingerprint": fingerprint,
+            "files": {
+                str(path.relative_to(PLUGIN_DIR)): hashlib.sha256(path.read_bytes()).hexdigest()
+                for path in coverage.files()
+            },
+            "passed_at": datetime.now().isoformat(),
+        }
+
+    def record_sources(self):
+        """Hachage de src/ : référence de la détection des fichiers non couverts"""
+        self.sources = {
+            str(path.relative_to(PLUGIN_DIR)): hashlib.sha256(path.read_bytes()).hexdigest()
+            for path in src_files()
+        }
+
+    def changed_sources(self) -> Optional[Set[Path]]:
+        """Fichiers de src/ ajoutés, modifiés ou supprimés depuis record_sources (None : jamais relevé)"""
+        if not self.sources:
+            return None
+        current = {
+            str(path.relative_to(PLUGIN_DIR)): hashlib.sha256(path.read_bytes()).hexdigest()
+            for path in src_files()
+        }
+        return {
+            PLUGIN_DIR / relative
+            for relative in set(current) | set(self.sources)
+            if current.get(relative) != self.sources.get(relative)
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"scenarios": self.entries, "sources": self.sources}, indent=2), encoding="utf-8"
+        )
+
+    def changed_files(self, coverage: ScenarioCoverage) -> Set[Path]:
+        """Fichiers dont le hachage diffère du dernier passage réussi"""
+        previous = (self.last_pass(coverage) or {}).get("files", {})
+        changed = set()
+        for path in coverage.files():
+            relative = str(path.relative_to(PLUGIN_DIR))
+            if previous.get(relative) != hashlib.sha256(path.read_bytes()).hexdigest():
+                changed.add(path)
+        return changed
+
+
+def select_impacted(scenarios: List[Dict], state: ImpactState) -> List[Dict]:
+    """
+    Annote chaque scénario (coverage, fingerprint, impacted, reason)
+    et retourne ceux à exécuter
+
+    Un fichier de src/ modifié qu'aucun scénario ne couvre relance tout :
+    l'analyse ne sait pas quel scénario l'exerce.
+    """
+    for scenario in scenarios:
+        coverage = ScenarioCoverage(scenario["script"], scenario["class_name"])
+        scenario.update({"coverage": coverage, "fingerprint": coverage.fingerprint()})
+
+    changed = state.changed_sources()
+    covered = set().union(*(scenario["coverage"].files() for scenario in scenarios)) if scenarios else set()
+    if changed is None:
+        fail_safe = "aucun relevé de src/ : exécution complète"
+    else:
+        orphans = sorted(str(path.relative_to(PLUGIN_DIR)) for path in changed - covered)
+        fail_safe = f"non couvert modifié : {', '.join(orphans[:5])}" if orphans else None
+
+    selected = []
+    for scenario in scenarios:
+        coverage, fingerprint = scenario["coverage"], scenario["fingerprint"]
+        previous = state.last_pass(coverage)
+
+        if fail_safe:
+            scenario["reason"] = fail_safe
+        elif not coverage.known:
+            scenario["reason"] = "couverture inconnue"
+        elif previous is None:
+            scenario["reason"] = "aucun passage réussi enregistré"
+        elif previous["fingerprint"] != fingerprint:
+            changed = state.changed_files(coverage)
+            names = ", ".join(sorted(str(path.relative_to(PLUGIN_DIR)) for path in changed)[:5])
+            phases = coverage.phases_touching(changed)
+            scenario["reason"] = f"modifié : {names}" + (f" (phases : {', '.join(phases)})" if phases else "")
+        else:
+            scenario["reason"] = None
+        scenario["impacted"] = scenario["reason"] is not None
+        if scenario["impacted"]:
+            selected.append(scenario)
+    return selected
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark et conformité de Security\\TokenManager
+Un `wp eval-file` enchaîne des lots d'appels generate / validate /
+is_expired / rotate_key dans un seul démarrage WordPress et chronomètre
+chaque appel (hrtime). Chaque jeton produit ou validé est renvoyé avec le
+verdict PHP ; `ReferenceTokenVerifier` (réimplémentation Python de
+TokenGenerator) rejoue toutes les validations pour détecter un écart.
+
+Les secrets de signature sont fixés par le script (SecretManager::
+set_for_testing) puis pris après rotation : ils transitent par la sortie
+de WP-CLI mais ne sont jamais écrits dans les rapports (empreintes seules).
+"""
+
+import base64
+import hashlib
+import hmac
+from typing import Dict, List, Optional
+
+from wp_batch import php_string
+
+
+TOKENS_BEGIN = "__E2E_TOKENS_BEGIN__"
+TOKENS_END = "__E2E_TOKENS_END__"
+
+SECRET_NAME = "WCQF_HMAC_KEY"
+
+# Verdict attendu par cas (True : jeton accepté)
+CASE_EXPECTATIONS = {
+    "validate_valid": True,
+    "validate_wrong_user": False,
+    "validate_tampered": False,
+    "validate_expired": False,
+    "validate_previous_key": True,
+    "validate_after_rotation": True,
+}
+
+
+def token_bench_php(
+    count: int, user_id: int, product_id: int, secret: str, rotate: bool = True, cold_lookups: int = 200
+) -> str:
+    """
+    Script du benchmark ; `secret` : clé HMAC fixée pour la première partie
+    (la clé précédente est effacée pour que le chemin de rotation soit maîtrisé)
+    """
+    return f"""<?php
+use WcQualiopiFormation\\Core\\Constants;
+use WcQualiopiFormation\\Security\\SecretManager;
+use WcQualiopiFormation\\Security\\TokenManager;
+use WcQualiopiFormation\\Security\\Token\\TokenGenerator;
+
+$count   = {max(1, int(count))};
+$user    = {int(user_id)};
+$product = {int(product_id)};
+$ttl     = Constants::TOKEN_TTL_HOURS * 3600;
+$report  = array( 'ttl' => $ttl, 'cases' => array(), 'secrets' => array() );
+
+$stats = function ( array $latencies ) {{
+	sort( $latencies );
+	$n     = count( $latencies );
+	$total = array_sum( $latencies ) / 1e9;
+	$at    = function ( $q ) use ( $latencies, $n ) {{
+		return $latencies[ min( $n - 1, (int) floor( $q * $n ) ) ] / 1e3;
+	}};
+	return array(
+		'count'      => $n,
+		'total_s'    => $total,
+		'ops_per_s'  => $total > 0 ? $n / $total : null,
+		'p50_us'     => $at( 0.50 ),
+		'p95_us'     => $at( 0.95 ),
+		'p99_us'     => $at( 0.99 ),
+		'max_us'     => $latencies[ $n - 1 ] / 1e3,
+	);
+}};
+// Valide chaque jeton [token, user, product] et conserve le verdict PHP
+$validate_case = function ( $name, array $items ) use ( &$report, $stats ) {{
+	$latencies = array();
+	$checks    = array();
+	$time      = time();
+	foreach ( $items as $item ) {{
+		list( $token, $expected_user, $expected_product ) = $item;
+		$start       = hrtime( true );
+		$result      = TokenManager::validate( $token, $expected_user, $expected_product );
+		$latencies[] = hrtime( true ) - $start;
+		$checks[]    = array( $token, $expected_user, $expected_product, false !== $result );
+	}}
+	$report['cases'][ $name ] = array( 'stats' => $stats( $latencies ), 'time' => $time, 'checks' => $checks );
+}};
+$generate_case = function ( $name ) use ( &$report, $stats, $count, $user, $product ) {{
+	$latencies = array();
+	$tokens    = array();
+	for ( $i = 0; $i < $count; $i++ ) {{
+		$start       = hrtime( true );
+		$tokens[]    = TokenManager::generate( $user, $product );
+		$latencies[] = hrtime( true ) - $start;
+	}}
+	$report['cases'][ $name ] = array( 'stats' => $stats( $latencies ) );
+	return $tokens;
+}};
+
+SecretManager::set_for_testing( {php_string(SECRET_NAME)}, {php_string(secret)} );
+delete_option( TokenManager::PREVIOUS_SECRET_OPTION );
+TokenManager::clear_cache();
+$report['secrets']['initial'] = SecretManager::get( {php_string(SECRET_NAME)}, null, true );
+
+// Jetons courants
+$tokens = $generate_case( 'generate' );
+$validate_case( 'validate_valid', array_map( function ( $token ) use ( $user, $product ) {{
+	return array( $token, $user, $product );
+}}, $tokens ) );
+$validate_case( 'validate_wrong_user', array_map( function ( $token ) use ( $user, $product ) {{
+	return array( $token, $user + 1, $product );
+}}, $tokens ) );
+
+// Altérations : signature (jetons pairs) ou charge utile re-signée par personne (impairs)
+$tampered = array();
+foreach ( $tokens as $i => $token ) {{
+	list( $payload, $signature ) = explode( '.', $token );
+	if ( 0 === $i % 2 ) {{
+		$last       = substr( $signature, -1 );
+		$tampered[] = array( $payload . '.' . substr( $signature, 0, -1 ) . ( 'a' === $last ? 'b' : 'a' ), $user, $product );
+	}} else {{
+		$decoded    = TokenGenerator::decode_payload( $payload );
+		$forged     = sprintf( '%d:%d:%d:%s', $user, $product + 1, $decoded['timestamp'], $decoded['nonce'] );
+		$tampered[] = array( TokenGenerator::base64url_encode( $forged ) . '.' . $signature, $user, $product + 1 );
+	}}
+}}
+$validate_case( 'validate_tampered', $tampered );
+
+// Jetons expirés (générés hors chronométrage)
+$expired = array();
+for ( $i = 0; $i < $count; $i++ ) {{
+	$expired[] = TokenManager::generate( $user, $product, time() - $ttl - 60 );
+}}
+$validate_case( 'validate_expired', array_map( function ( $token ) use ( $user, $product ) {{
+	return array( $token, $user, $product );
+}}, $expired ) );
+$latencies = array();
+$flagged   = 0;
+foreach ( $expired as $token ) {{
+	$start       = hrtime( true );
+	$flagged    += TokenManager::is_expired( $token ) ? 1 : 0;
+	$latencies[] = hrtime( true ) - $start;
+}}
+$report['cases']['is_expired'] = array( 'stats' => $stats( $latencies ), 'flagged' => $flagged );
+
+// Recherche du secret : cache vidé à chaque appel (env → constante → option) puis en cache
+$report['secret_sources'] = SecretManager::get_sources_status( {php_string(SECRET_NAME)} );
+$latencies = array();
+for ( $i = 0; $i < {max(1, int(cold_lookups))}; $i++ ) {{
+	SecretManager::clear_cache( {php_string(SECRET_NAME)} );
+	$start = hrtime( true );
+	SecretManager::get( {php_string(SECRET_NAME)}, null, true );
+	$latencies[] = hrtime( true ) - $start;
+}}
+$report['cases']['secret_lookup_cold'] = array( 'stats' => $stats( $latencies ) );
+SecretManager::set_for_testing( {php_string(SECRET_NAME)}, {php_string(secret)} );
+$latencies = array();
+for ( $i = 0; $i < $count; $i++ ) {{
+	$start = hrtime( true );
+	SecretManager::get( {php_string(SECRET_NAME)}, null, true );
+	$latencies[] = hrtime( true ) - $start;
+}}
+$report['cases']['secret_lookup_warm'] = array( 'stats' => $stats( $latencies ) );
+
+if ( {'true' if rotate else 'false'} ) {{
+	$start = hrtime( true );
+	TokenManager::rotate_key();
+	$report['cases']['rotate_key'] = array( 'stats' => $stats( array( hrtime( true ) - $start ) ) );
+	$report['secrets']['current']  = SecretManager::get( {php_string(SECRET_NAME)}, null, true );
+	$report['secrets']['previous'] = get_option( TokenManager::PREVIOUS_SECRET_OPTION, null );
+
+	// Anciens jetons : signature vérifiée via la clé précédente
+	$validate_case( 'validate_previous_key', array_map( function ( $token ) use ( $user, $product ) {{
+		return array( $token, $user, $product );
+	}}, $tokens ) );
+	$rotated = $generate_case( 'generate_after_rotation' );
+	$validate_case( 'validate_after_rotation', array_map( function ( $token ) use ( $user, $product ) {{
+		return array( $token, $user, $product );
+	}}, $rotated ) );
+}}
+
+echo {php_string(TOKENS_BEGIN)} . wp_json_encode( $report ) . {php_string(TOKENS_END)};
+"""
+
+
+class ReferenceTokenVerifier:
+    """
+    Réimplémentation de TokenGenerator / TokenManager::validate :
+    payload base64url "user:product:timestamp:nonce", signature
+    HMAC-SHA256 hexadécimale, clé courante puis clé précédente
+    """
+
+    def __init__(self, secret: str, previous: Optional[str], ttl: int):
+        self.secret = secret
+        self.previous = previous
+        self.ttl = ttl
+
+    @staticmethod
+    def base64url_encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def sign(payload: str, secret: str) -> str:
+        return hmac.new(secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def generate(self, user_id: int, product_id: int, timestamp: int, nonce: str) -> str:
+        payload = self.base64url_encode(f"{user_id}:{product_id}:{timestamp}:{nonce}".encode("utf-8"))
+        return f"{payload}.{self.sign(payload, self.secret)}"
+
+    @staticmethod
+    def decode_payload(payload: str) -> Optional[Dict]:
+        try:
+            decoded = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            return None
+        parts = decoded.split(":")
+        if len(parts) != 4:
+            return None
+        try:
+            user_id, product_id, timestamp = (int(part) for part in parts[:3])
+        except ValueError:
+            return None
+        return {"user_id": user_id, "product_id": product_id, "timestamp": timestamp, "nonce": parts[3]}
+
+    def validate(self, token: str, user_id: int, product_id: int, now: int) -> Optional[Dict]:
+        """Payload décodé si le jeton est accepté à l'instant `now`, None sinon"""
+        parts = token.split(".")
+        if len(parts) != 2:
+            return None
+        payload, signature = parts
+        decoded = self.decode_payload(payload)
+        if decoded is None:
+            return None
+        secrets = [self.secret] + ([self.previous] if self.previous else [])
+        if not any(hmac.compare_digest(self.sign(payload, secret), signature) for secret in secrets):
+            return None
+        if now - decoded["timestamp"] > self.ttl:
+            return None
+        if decoded["user_id"] != user_id or decoded["product_id"] != product_id:
+            return None
+        return decoded
+
+
+def secret_fingerprint(secret: Optional[str]) -> Optional[str]:
+    """Empreinte courte d'un secret pour les rapports (jamais le secret lui-même)"""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12] if secret else None
+
+
+def cross_check(report: Dict) -> Dict[str, Dict]:
+    """
+    Rejoue chaque validation PHP avec le vérificateur de référence
+
+    Retourne par cas : jetons vérifiés, écarts PHP/Python, verdicts
+    différents de l'attendu et premiers exemples d'écart.
+    """
+    secrets = report["secrets"]
+    before = ReferenceTokenVerifier(secrets["initial"], None, report["ttl"])
+    after = ReferenceTokenVerifier(secrets.get("current") or "", secrets.get("previous"), report["ttl"])
+    rotated_cases = ("validate_previous_key", "validate_after_rotation")
+
+    conformance = {}
+    # Génération : chaque jeton accepté doit être reproduit à l'octet près
+    for name, source, verifier in (
+        ("generate", "validate_valid", before),
+        ("generate_after_rotation", "validate_after_rotation", after),
+    ):
+        if source not in report["cases"]:
+            continue
+        mismatches = []
+        for token, _, _, _ in report["cases"][source]["checks"]:
+            decoded = verifier.decode_payload(token.split(".")[0])
+            rebuilt = verifier.generate(**decoded) if decoded else None
+            if rebuilt != token:
+                mismatches.append({"token": token, "python": rebuilt})
+        conformance[name] = {
+            "checked": len(report["cases"][source]["checks"]),
+            "mismatches": len(mismatches),
+            "unexpected": 0,
+            "samples": mismatches[:5],
+        }
+
+    for name, case in report["cases"].items():
+        if "checks" not in case:
+            continue
+        verifier = after if name in rotated_cases else before
+        mismatches: List[Dict] = []
+        unexpected = 0
+        for token, user_id, product_id, php_valid in case["checks"]:
+            python_valid = verifier.validate(token, user_id, product_id, case["time"]) is not None
+            if python_valid != php_valid:
+                mismatches.append({"token": token, "php": php_valid, "python": python_valid})
+            if php_valid != CASE_EXPECTATIONS.get(name, php_valid):
+                unexpected += 1
+        conformance[name] = {
+            "checked": len(case["checks"]),
+            "mismatches": len(mismatches),
+            "unexpected": unexpected,
+            "samples": mismatches[:5],
+        }
+    return conformance
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Contexte d'isolation d'un worker E2E
+Chaque worker du runner parallèle reçoit son propre utilisateur (ID et
+identifiants de connexion) et son produit formation ; les scénarios qui touchent un état global du site
+(plugin, fixture au périmètre site) sont exécutés seuls (EXCLUSIVE).
+"""
+
+import os
+from typing import Dict, Optional
+
+
+DEFAULT_USER_ID = 1
+DEFAULT_PRODUCT_ID = 4017
+DEFAULT_USERNAME = os.environ.get("E2E_WP_USER", "admin")
+DEFAULT_PASSWORD = os.environ.get("E2E_WP_PASSWORD", "password")
+
+
+class WorkerContext:
+    """
+    Identité d'un worker : utilisateur WordPress et produit dédiés
+    """
+
+    def __init__(
+        self,
+        worker_id: int = 0,
+        user_id: int = DEFAULT_USER_ID,
+        product_id: int = DEFAULT_PRODUCT_ID,
+        alone: bool = True,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+    ):
+        self.worker_id = worker_id
+        self.user_id = user_id
+        self.product_id = product_id
+        # Connexion de l'utilisateur `user_id` (parcours HTTP connectés)
+        self.username = username or DEFAULT_USERNAME
+        self.password = password or DEFAULT_PASSWORD
+        # Aucun autre scénario en cours sur le site (script lancé seul, pool d'un worker)
+        self.alone = alone
+
+    @classmethod
+    def from_env(cls) -> "WorkerContext":
+        """Lit le contexte depuis les variables E2E_WORKER_* (défauts si absentes)"""
+        return cls(
+            worker_id=int(os.environ.get("E2E_WORKER_ID", "0")),
+            user_id=int(os.environ.get("E2E_WORKER_USER_ID", DEFAULT_USER_ID)),
+            product_id=int(os.environ.get("E2E_WORKER_PRODUCT_ID", DEFAULT_PRODUCT_ID)),
+            alone=os.environ.get("E2E_WORKER_ALONE", "1") == "1",
+            username=os.environ.get("E2E_WORKER_USERNAME"),
+            password=os.environ.get("E2E_WORKER_PASSWORD"),
+        )
+
+    def to_env(self) -> Dict[str, str]:
+        """Variables d'environnement équivalentes (pour un processus enfant)"""
+        return {
+            "E2E_WORKER_ID": str(self.worker_id),
+            "E2E_WORKER_USER_ID": str(self.user_id),
+            "E2E_WORKER_PRODUCT_ID": str(self.product_id),
+            "E2E_WORKER_ALONE": "1" if self.alone else "0",
+            "E2E_WORKER_USERNAME": self.username,
+            "E2E_WORKER_PASSWORD": self.password,
+        }
+
+    @property
+    def test_solved_meta_key(self) -> str:
+        """Clé user meta posée par TestValidator pour le produit du worker"""
+        return f"wcqf_test_solved_{self.product_id}"
+
+    def to_dict(self) -> Dict:
+        """Représentation sérialisable (rapports)"""
+        return {
+            "worker_id": self.worker_id,
+            "user_id": self.user_id,
+            "product_id": self.product_id,
+            "username": self.username,
+            "alone": self.alone,
+        }
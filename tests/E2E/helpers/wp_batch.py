@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Sondes PHP groupées pour le framework E2E
+Toutes les sondes d'un lot sont exécutées dans un seul `wp eval-file` :
+WordPress et le plugin ne sont démarrés qu'une fois.
+"""
+
+import base64
+import json
+import uuid
+from typing import Dict, List, Optional
+
+
+BATCH_BEGIN = "__E2E_BATCH_BEGIN__"
+BATCH_END = "__E2E_BATCH_END__"
+
+
+def php_string(value: str) -> str:
+    """Encode une chaîne Python en littéral PHP entre apostrophes"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def extract_marked_json(output: str, begin: str, end: str) -> Optional[Dict]:
+    """Extrait le JSON encadré par des marqueurs (ignore notices/warnings PHP)"""
+    start = output.find(begin)
+    stop = output.find(end, start + 1)
+    if start == -1 or stop == -1:
+        return None
+    try:
+        return json.loads(output[start + len(begin):stop])
+    except json.JSONDecodeError:
+        return None
+
+
+def eval_file_command(project_dir: str, php_code: str, prefix: str = "e2e") -> str:
+    """
+    Construit la commande qui dépose un script PHP dans le projet DDEV
+    puis l'exécute via `wp eval-file` (base64 : aucun souci de quoting)
+    """
+    encoded = base64.b64encode(php_code.encode("utf-8")).decode("ascii")
+    filename = f"{prefix}_{uuid.uuid4().hex}.php"
+    host_path = f".e2e/{filename}"
+    container_path = f"/var/www/html/.e2e/{filename}"
+    return (
+        f"cd {project_dir} && mkdir -p .e2e"
+        f" && echo {encoded} | base64 -d > {host_path}"
+        f" && ddev wp eval-file {container_path};"
+        f" rc=$?; rm -f {host_path}; exit $rc"
+    )
+
+
+# Code de sortie du script témoin : un `wp eval-file` en échec doit le remonter tel quel
+EXIT_CHECK_CODE = 3
+
+
+def exit_check_php() -> str:
+    """Script `wp eval-file` qui échoue volontairement (contrôle du code retour)"""
+    return f"<?php\nexit( {EXIT_CHECK_CODE} );\n"
+
+
+class Probe:
+    """Sonde nommée : un corps de closure PHP qui retourne une valeur"""
+
+    def __init__(self, name: str, description: str, body: str, check: str):
+        self.name = name
+        self.description = description
+        self.body = body
+        # Expression PHP évaluée sur $value pour décider du succès
+        self.check = check
+
+
+class ProbeBatch:
+    """
+    Lot de sondes PHP (classe, hook, constante, option...) à exécuter en une fois
+    """
+
+    def __init__(self, profile: bool = False, read_only: bool = False):
+        self.probes: List[Probe] = []
+        # Relevé du coût serveur de chaque sonde (php_profiler) dans son résultat
+        self.profile = profile
+        # Aucune sonde n'écrit d'option : le cache d'options du run est conservé
+        self.read_only = read_only
+
+    def __len__(self) -> int:
+        return len(self.probes)
+
+    def add(
+        self,
+        name: str,
+        body: str,
+        description: Optional[str] = None,
+        check: str = "false !== $value && null !== $value",
+    ) -> "ProbeBatch":
+        """Ajoute une sonde PHP libre (body = corps d'une closure avec return)"""
+        if any(probe.name == name for probe in self.probes):
+            raise ValueError(f"Sonde déjà déclarée : {name}")
+        self.probes.append(Probe(name, description or name, body, check))
+        return self
+
+    def class_exists(
+        self, name: str, class_name: str, description: Optional[str] = None
+    ) -> "ProbeBatch":
+        """Vérifie qu'une classe est chargeable"""
+        return self.add(
+            name,
+            f"return class_exists( {php_string(class_name)} );",
+            description or f"Classe {class_name} existe ?",
+            check="true === $value",
+        )
+
+    def hook_registered(
+        self,
+        name: str,
+        hook: str,
+        kind: str = "filter",
+        description: Optional[str] = None,
+    ) -> "ProbeBatch":
+        """Vérifie qu'un filtre/action a au moins un callback (valeur = priorité)"""
+        function = "has_action" if kind == "action" else "has_filter"
+        return self.add(
+            name,
+            f"return {function}( {php_string(hook)} );",
+            description or f"Hook {hook} enregistré ?",
+            check="false !== $value",
+        )
+
+    def constant_value(
+        self, name: str, constant: str, description: Optional[str] = None
+    ) -> "ProbeBatch":
+        """Récupère la valeur d'une constante (globale ou Classe::CONST)"""
+        literal = php_string(constant)
+        return self.add(
+            name,
+            f"return defined( {literal} ) ? constant( {literal} ) : null;",
+            description or f"Constante {constant} définie ?",
+        )
+
+    def option_value(
+        self, name: str, option: str, description: Optional[str] = None
+    ) -> "ProbeBatch":
+        """Récupère la valeur d'une option WordPress (null si absente)"""
+        return self.add(
+            name,
+            f"return get_option( {php_string(option)}, null );",
+            description or f"Option {option} présente ?",
+        )
+
+    def to_php(self) -> str:
+        """Génère le script PHP du lot (une closure par sonde, résultat JSON)"""
+        lines = ["<?php", "$__e2e_results = array();"]
+        if self.profile:
+            # Import tardif : php_profiler dépend lui-même de ce module
+            from php_profiler import cost_closures_php
+
+            lines += [
+                cost_closures_php().rstrip(),
+                "$__e2e_probe = static function ( $name, $callback, $check ) use ( &$__e2e_results, $__e2e_cost_start, $__e2e_cost_end ) {",
+                "\t$state = $__e2e_cost_start();",
+                "\ttry {",
+                "\t\t$value = $callback();",
+                "\t\t$cost  = $__e2e_cost_end( $state );",
+                "\t\t$__e2e_results[ $name ] = array( 'passed' => (bool) $check( $value ), 'value' => $value, 'cost' => $cost );",
+                "\t} catch ( \\Throwable $e ) {",
+                "\t\t$__e2e_results[ $name ] = array( 'passed' => false, 'value' => null, 'error' => $e->getMessage(), 'cost' => $__e2e_cost_end( $state ) );",
+                "\t}",
+                "};",
+            ]
+        else:
+            lines += [
+                "$__e2e_probe = static function ( $name, $callback, $check ) use ( &$__e2e_results ) {",
+                "\ttry {",
+                "\t\t$value = $callback();",
+                "\t\t$__e2e_results[ $name ] = array( 'passed' => (bool) $check( $value ), 'value' => $value );",
+                "\t} catch ( \\Throwable $e ) {",
+                "\t\t$__e2e_results[ $name ] = array( 'passed' => false, 'value' => null, 'error' => $e->getMessage() );",
+                "\t}",
+                "};",
+            ]
+        for probe in self.probes:
+            lines.append(
+                f"$__e2e_probe( {php_string(probe.name)}, "
+                f"static function () {{ {probe.body} }}, "
+                f"static function ( $value ) {{ return {probe.check}; }} );"
+            )
+        lines.append(
+            f"echo {php_string(BATCH_BEGIN)} . wp_json_encode( $__e2e_results ) . {php_string(BATCH_END)};"
+        )
+        return "\n".join(lines) + "\n"
+
+    def parse_output(self, output: str) -> Optional[Dict[str, Dict]]:
+        """Extrait les résultats JSON par sonde depuis la sortie de WP-CLI"""
+        return extract_marked_json(output, BATCH_BEGIN, BATCH_END)
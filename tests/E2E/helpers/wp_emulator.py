@@ -0,0 +1,933 @@
+#!/usr/bin/env python3
+"""
+Émulateur WordPress / WP-CLI hors ligne (backend E2E_BACKEND=emulator)
+Les options, user meta et tables wcqf_* vivent dans SQLite ; le code du
+plugin n'est pas exécuté mais indexé depuis src/ :
+
+- class_exists / get_class(new X()) : présence du fichier PSR-4 ;
+- has_filter / has_action : add_filter/add_action présents dans les sources ;
+- constantes de classe : déclarations `const` du fichier de la classe ;
+- schéma des tables : CREATE TABLE de Core/Activator.php.
+
+Sous-ensemble WP-CLI : option get/add/update/delete, user meta get/
+update/delete, plugin is-active/activate/deactivate/list, db query, et eval-file pour les scripts générés
+par le framework (lots de sondes, préchargement d'options, fixtures).
+Le reste échoue explicitement (« non émulé »). L'activation crée les
+tables et rejoue la migration des options de DataMigrator (correspondances
+lues dans Core/DataMigrator.php) ; la migration des tables n'est pas émulée.
+"""
+
+import base64
+import json
+import re
+import shlex
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from executors import CommandExecutor
+from option_cache import OPTIONS_BEGIN, OPTIONS_END
+from state_fixture import FIXTURE_BEGIN, FIXTURE_END, snapshot_name
+from test_impact import ROOT_NAMESPACE, SRC_DIR
+from wp_batch import BATCH_BEGIN, BATCH_END
+
+
+PREFIX = "wp_"
+PLUGIN_SLUG = "wc_qualiopi_formation"
+PLUGIN_BASENAME = f"{PLUGIN_SLUG}/{PLUGIN_SLUG}.php"
+
+# Littéral PHP entre apostrophes (format de wp_batch.php_string)
+_STR = r"'((?:[^'\\]|\\.)*)'"
+
+
+def php_unquote(literal: str) -> str:
+    """Inverse de php_string sur le contenu d'un littéral"""
+    return re.sub(r"\\([\\'])", r"\1", literal)
+
+
+def php_strings(text: str) -> List[str]:
+    return [php_unquote(match) for match in re.findall(_STR, text)]
+
+
+class PhpError(Exception):
+    """Erreur levée par le code PHP émulé (équivalent d'un \\Throwable)"""
+
+
+# ========================================
+# Index des sources du plugin
+# ========================================
+
+class PluginSource:
+    """Classes, hooks, constantes et schéma des tables lus dans src/"""
+
+    def __init__(self, src_dir: Path = SRC_DIR):
+        self.src_dir = src_dir
+
+    def class_file(self, fqcn: str) -> Optional[Path]:
+        parts = [part for part in fqcn.strip("\\").split("\\") if part]
+        if len(parts) < 2 or parts[0] != ROOT_NAMESPACE:
+            return None
+        path = self.src_dir.joinpath(*parts[1:]).with_suffix(".php")
+        return path if path.is_file() else None
+
+    def class_exists(self, fqcn: str) -> bool:
+        return self.class_file(fqcn) is not None
+
+    @lru_cache(maxsize=None)
+    def hooks(self) -> frozenset:
+        pattern = re.compile(r"add_(?:filter|action)\(\s*['\"]([^'\"]+)['\"]")
+        names = set()
+        for path in self.src_dir.rglob("*.php"):
+            names.update(pattern.findall(path.read_text(encoding="utf-8", errors="replace")))
+        return frozenset(names)
+
+    @lru_cache(maxsize=None)
+    def class_constants(self, fqcn: str) -> Dict[str, Any]:
+        """Constantes scalaires (chaîne, entier, flottant, booléen) d'une classe"""
+        path = self.class_file(fqcn)
+        if path is None:
+            raise PhpError(f'Class "{fqcn.strip(chr(92))}" not found')
+        constants = {}
+        source = path.read_text(encoding="utf-8", errors="replace")
+        for name, raw in re.findall(r"\bconst\s+(\w+)\s*=\s*([^;]+);", source):
+            value = _scalar(raw.strip())
+            if value is not _UNKNOWN:
+                constants[name] = value
+        return constants
+
+    def class_constant(self, fqcn: str, name: str) -> Any:
+        constants = self.class_constants(fqcn)
+        if name not in constants:
+            raise PhpError(f"Undefined constant {fqcn.strip(chr(92))}::{name}")
+        return constants[name]
+
+    @lru_cache(maxsize=None)
+    def migration_options(self) -> Dict[str, Dict[str, str]]:
+        """Correspondances d'options de DataMigrator : {"wcqs": {ancienne: nouvelle}, "gfsa": ...}"""
+        source = (self.src_dir / "Core" / "DataMigrator.php").read_text(encoding="utf-8")
+        return {
+            group: dict((php_unquote(old), php_unquote(new)) for old, new in re.findall(_STR + r"\s*=>\s*" + _STR, body))
+            for group, body in re.findall(r"private \$(\w+)_options = array\((.*?)\);", source, re.DOTALL)
+        }
+
+    @lru_cache(maxsize=None)
+    def migrated_settings_keys(self) -> List[str]:
+        """Clés conservées par DataMigrator::transform_gfsa_settings"""
+        source = (self.src_dir / "Core" / "DataMigrator.php").read_text(encoding="utf-8")
+        body = re.search(r"function transform_gfsa_settings\(.*?\n\t\}", source, re.DOTALL)
+        return re.findall(r"isset\( \$old_settings\['(\w+)'\] \)", body.group(0) if body else "")
+
+    @lru_cache(maxsize=None)
+    def table_schemas(self) -> Dict[str, str]:
+        """{table sans préfixe: DDL SQLite} traduit depuis Core/Activator.php"""
+        source = (self.src_dir / "Core" / "Activator.php").read_text(encoding="utf-8")
+        constants = self.class_constants(f"{ROOT_NAMESPACE}\\Core\\Constants")
+        variables = {
+            variable: constants[constant]
+            for variable, constant in re.findall(
+                r"\$(\w+)\s*=\s*Constants::get_table_name\(\s*Constants::(\w+)\s*\)", source
+            )
+        }
+        schemas = {}
+        for variable, body in re.findall(r"CREATE TABLE IF NOT EXISTS \{\$(\w+)\} \((.*?)\n\s*\)", source, re.DOTALL):
+            columns = []
+            for line in body.splitlines():
+                line = line.strip().rstrip(",")
+                if not line or re.match(r"(INDEX|KEY|UNIQUE KEY|PRIMARY KEY\s*\()", line, re.IGNORECASE):
+                    continue
+                line = re.sub(r"\bBIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", line)
+                columns.append(line.replace(" UNSIGNED", ""))
+            schemas[variables[variable]] = ",\n  ".join(columns)
+        return schemas
+
+
+_UNKNOWN = object()
+
+
+def _scalar(raw: str) -> Any:
+    """Valeur d'un littéral PHP scalaire (_UNKNOWN sinon)"""
+    if re.fullmatch(_STR, raw):
+        return php_unquote(raw[1:-1])
+    if re.fullmatch(r'"[^"$\\]*"', raw):
+        return raw[1:-1]
+    if re.fullmatch(r"-?\d+", raw):
+        return int(raw)
+    if re.fullmatch(r"-?\d+\.\d+", raw):
+        return float(raw)
+    if raw.lower() in ("true", "false"):
+        return raw.lower() == "true"
+    return _UNKNOWN
+
+
+# ========================================
+# Expressions PHP des conditions de sonde
+# ========================================
+
+def php_bool(value: Any) -> bool:
+    return value not in (None, False, 0, 0.0, "", "0") and value != [] and value != {}
+
+
+def _php_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if value is None:
+        return "null"
+    if isinstance(value, (list, dict)):
+        return "array"
+    return type(value).__name__
+
+
+def _strict_equal(left: Any, right: Any) -> bool:
+    if _php_type(left) != _php_type(right):
+        return False
+    if isinstance(left, dict) and isinstance(right, list):
+        return left == dict(enumerate(right))
+    return left == right
+
+
+def _loose_equal(left: Any, right: Any) -> bool:
+    for value, other in ((left, right), (right, left)):
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(other, str):
+            try:
+                return float(other) == value
+            except ValueError:
+                return False
+    if isinstance(left, bool) or isinstance(right, bool) or left is None or right is None:
+        return php_bool(left) == php_bool(right)
+    return left == right
+
+
+def php_index(container: Any, key: Any) -> Any:
+    """$container[$key] : None si absent (notice PHP), clés numériques tolérées"""
+    if isinstance(container, dict):
+        for candidate in (key, str(key)):
+            if candidate in container:
+                return container[candidate]
+        if isinstance(key, str) and key.lstrip("-").isdigit():
+            return container.get(int(key))
+        return None
+    if isinstance(container, list):
+        try:
+            index = int(key)
+        except (TypeError, ValueError):
+            return None
+        return container[index] if 0 <= index < len(container) else None
+    return None
+
+
+def php_int(value: Any) -> int:
+    if isinstance(value, str):
+        match = re.match(r"\s*-?\d+", value)
+        return int(match.group()) if match else 0
+    if isinstance(value, (list, dict)):
+        return 1 if value else 0
+    return int(value or 0)
+
+
+def php_strtotime(value: Any) -> Any:
+    if not isinstance(value, str):
+        return False
+    for pattern in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return int(datetime.strptime(value.strip(), pattern).timestamp())
+        except ValueError:
+            continue
+    return False
+
+
+PHP_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "is_array": lambda value: isinstance(value, (list, dict)),
+    "is_string": lambda value: isinstance(value, str),
+    "is_int": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "is_bool": lambda value: isinstance(value, bool),
+    "is_null": lambda value: value is None,
+    "is_numeric": lambda value: not isinstance(value, bool) and bool(re.fullmatch(r"\s*-?\d+(\.\d+)?", str(value))),
+    "empty": lambda value: not php_bool(value),
+    "isset": lambda *values: all(value is not None for value in values),
+    "count": lambda value: len(value) if isinstance(value, (list, dict)) else 1,
+    "strlen": lambda value: len(str(value).encode("utf-8")),
+    "intval": php_int,
+    "boolval": php_bool,
+    "strtotime": php_strtotime,
+    "in_array": lambda needle, haystack: any(
+        _loose_equal(needle, item) for item in (haystack.values() if isinstance(haystack, dict) else haystack or [])
+    ),
+    "array_key_exists": lambda key, array: php_index(array, key) is not None,
+}
+
+_CASTS = {
+    "int": php_int,
+    "bool": php_bool,
+    "string": lambda value: "" if value is None or value is False else "1" if value is True else str(value),
+    "float": lambda value: float(php_int(value)) if not isinstance(value, (int, float)) else float(value),
+    "array": lambda value: value if isinstance(value, (list, dict)) else [] if value is None else [value],
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<str>'(?:[^'\\]|\\.)*')|(?P<num>-?\d+(?:\.\d+)?)|(?P<var>\$\w+)"
+    r"|(?P<cast>\(\s*(?:int|bool|string|float|array)\s*\))"
+    r"|(?P<op>===|!==|==|!=|<=|>=|&&|\|\||[!<>()\[\],])"
+    r"|(?P<name>\\?[A-Za-z_][\w\\]*(?:::\w+)?))"
+)
+
+
+class PhpExpression:
+    """
+    Évaluateur des conditions de sonde (`check` de wp_batch) : littéraux,
+    $value, index, casts, comparaisons, && || ! et fonctions usuelles
+    """
+
+    def __init__(self, source: str, source_index: PluginSource):
+        self.source = source
+        self.index = source_index
+        self.tokens: List[Tuple[str, str]] = []
+        position = 0
+        while position < len(source.rstrip()):
+            match = _TOKEN.match(source, position)
+            if match is None or match.end() == position:
+                raise PhpError(f"Expression non émulée : {source}")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))
+            position = match.end()
+
+    def evaluate(self, value: Any) -> Any:
+        self.position = 0
+        self.variables = {"$value": value}
+        result = self._or()
+        if self.position != len(self.tokens):
+            raise PhpError(f"Expression non émulée : {self.source}")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else None
+
+    def _take(self, expected: Optional[str] = None) -> Tuple[str, str]:
+        if self.position >= len(self.tokens) or (expected and self.tokens[self.position][1] != expected):
+            raise PhpError(f"Expression non émulée : {self.source}")
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def _or(self) -> Any:
+        result = self._and()
+        while self._peek() == "||":
+            self._take()
+            right = self._and()
+            result = php_bool(result) or php_bool(right)
+        return result
+
+    def _and(self) -> Any:
+        result = self._comparison()
+        while self._peek() == "&&":
+            self._take()
+            right = self._comparison()
+            result = php_bool(result) and php_bool(right)
+        return result
+
+    def _comparison(self) -> Any:
+        left = self._unary()
+        operator = self._peek()
+        if operator not in ("===", "!==", "==", "!=", "<", ">", "<=", ">="):
+            return left
+        self._take()
+        right = self._unary()
+        if operator == "===":
+            return _strict_equal(left, right)
+        if operator == "!==":
+            return not _strict_equal(left, right)
+        if operator == "==":
+            return _loose_equal(left, right)
+        if operator == "!=":
+            return not _loose_equal(left, right)
+        try:
+            return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[operator]
+        except TypeError:
+            return False
+
+    def _unary(self) -> Any:
+        kind, text = self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+        if text == "!":
+            self._take()
+            return not php_bool(self._unary())
+        if kind == "cast":
+            self._take()
+            return _CASTS[text.strip("() \t")](self._unary())
+        return self._postfix()
+
+    def _postfix(self) -> Any:
+        result = self._primary()
+        while self._peek() == "[":
+            self._take()
+            key = self._or()
+            self._take("]")
+            result = php_index(result, key)
+        return result
+
+    def _primary(self) -> Any:
+        kind, text = self._take()
+        if kind == "str":
+            return php_unquote(text[1:-1])
+        if kind == "num":
+            return float(text) if "." in text else int(text)
+        if kind == "var":
+            return self.variables.get(text)
+        if text == "(":
+            result = self._or()
+            self._take(")")
+            return result
+        if kind == "name":
+            lowered = text.lower()
+            if lowered in ("true", "false", "null"):
+                return {"true": True, "false": False, "null": None}[lowered]
+            if "::" in text:
+                class_name, constant = text.split("::")
+                return self.index.class_constant(class_name, constant)
+            if text in PHP_FUNCTIONS and self._peek() == "(":
+                self._take("(")
+                arguments = []
+                while self._peek() != ")":
+                    arguments.append(self._or())
+                    if self._peek() == ",":
+                        self._take()
+                self._take(")")
+                return PHP_FUNCTIONS[text](*arguments)
+        raise PhpError(f"Expression non émulée : {self.source}")
+
+
+# ========================================
+# État WordPress (SQLite)
+# ========================================
+
+def _like_clause(column: str, patterns: List[str]) -> Tuple[str, List[str]]:
+    """Motifs LIKE MySQL (échappés par \\) en clause SQLite"""
+    return "(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for _ in patterns) + ")", list(patterns)
+
+
+class WordPressEmulator:
+    """Base WordPress minimale : options, user meta, tables du plugin, plugins actifs"""
+
+    def __init__(self, database: str = ":memory:", source: Optional[PluginSource] = None):
+        self.source = source or PluginSource()
+        self.db = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        self.logs: List[Dict] = []
+        self.db.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS {PREFIX}options (
+              option_id INTEGER PRIMARY KEY AUTOINCREMENT,
+              option_name TEXT NOT NULL UNIQUE,
+              option_value TEXT NOT NULL,
+              autoload TEXT NOT NULL DEFAULT 'yes'
+            );
+            CREATE TABLE IF NOT EXISTS {PREFIX}usermeta (
+              umeta_id INTEGER PRIMARY KEY AUTOINCREMENT,
+              user_id INTEGER NOT NULL DEFAULT 0,
+              meta_key TEXT,
+              meta_value TEXT
+            );
+            """
+        )
+        # Base neuve : plugin actif, tables créées (comme après activation)
+        if self.get_option("active_plugins") is None:
+            self.update_option("active_plugins", [PLUGIN_BASENAME])
+            self.create_plugin_tables()
+
+    # Options
+    def get_option(self, name: str) -> Any:
+        row = self.db.execute(f"SELECT option_value FROM {PREFIX}options WHERE option_name = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def option_exists(self, name: str) -> bool:
+        return self.db.execute(f"SELECT 1 FROM {PREFIX}options WHERE option_name = ?", (name,)).fetchone() is not None
+
+    def update_option(self, name: str, value: Any, autoload: bool = True) -> bool:
+        """False si la valeur est inchangée (comme update_option)"""
+        if self.option_exists(name) and self.get_option(name) == value:
+            return False
+        self.db.execute(
+            f"INSERT INTO {PREFIX}options (option_name, option_value, autoload) VALUES (?, ?, ?) "
+            "ON CONFLICT(option_name) DO UPDATE SET option_value = excluded.option_value",
+            (name, json.dumps(value), "yes" if autoload else "no"),
+        )
+        return True
+
+    def delete_option(self, name: str) -> bool:
+        return self.db.execute(f"DELETE FROM {PREFIX}options WHERE option_name = ?", (name,)).rowcount > 0
+
+    # User meta (une valeur par clé, comme update_user_meta)
+    def get_user_meta(self, user_id: int, key: str) -> Any:
+        row = self.db.execute(
+            f"SELECT meta_value FROM {PREFIX}usermeta WHERE user_id = ? AND meta_key = ?", (user_id, key)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def update_user_meta(self, user_id: int, key: str, value: Any):
+        if self.db.execute(
+            f"UPDATE {PREFIX}usermeta SET meta_value = ? WHERE user_id = ? AND meta_key = ?",
+            (json.dumps(value), user_id, key),
+        ).rowcount == 0:
+            self.db.execute(
+                f"INSERT INTO {PREFIX}usermeta (user_id, meta_key, meta_value) VALUES (?, ?, ?)",
+                (user_id, key, json.dumps(value)),
+            )
+
+    def delete_user_meta(self, user_id: int, key: str) -> bool:
+        return self.db.execute(
+            f"DELETE FROM {PREFIX}usermeta WHERE user_id = ? AND meta_key = ?", (user_id, key)
+        ).rowcount > 0
+
+    # Plugin
+    def plugin_active(self, slug: str) -> bool:
+        return any(basename.split("/")[0] == slug for basename in self.get_option("active_plugins") or [])
+
+    def set_plugin_active(self, slug: str, active: bool):
+        plugins = [basename for basename in self.get_option("active_plugins") or [] if basename.split("/")[0] != slug]
+        if active:
+            plugins.append(f"{slug}/{slug}.php")
+            if slug == PLUGIN_SLUG:
+                self.create_plugin_tables()
+                self.run_data_migration()
+        self.update_option("active_plugins", plugins)
+
+    def create_plugin_tables(self):
+        for table, columns in self.source.table_schemas().items():
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {PREFIX}{table} (\n  {columns}\n)")
+
+    def run_data_migration(self):
+        """DataMigrator::run_migration, options uniquement (ancien plugin détecté par son option principale)"""
+        if php_bool(self.get_option("wcqf_migration_completed")):
+            return
+        detectors = {"wcqs": "wcqs_flags", "gfsa": "gf_siren_settings"}
+        for group, mapping in self.source.migration_options().items():
+            if self.get_option(detectors.get(group, "")) is None:
+                continue
+            for old, new in mapping.items():
+                value = self.get_option(old)
+                if value is None:
+                    continue
+                if old == "gf_siren_settings" and isinstance(value, dict):
+                    value = {key: value[key] for key in self.source.migrated_settings_keys() if key in value}
+                self.update_option(new, value, False)
+        self.update_option("wcqf_migration_completed", True)
+        self.update_option("wcqf_migration_date", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    def table_exists(self, table: str) -> bool:
+        return self.db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+    def table_columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.db.execute(f'PRAGMA table_info("{table}")')]
+
+    # SQL (`wp db query`)
+    def query(self, sql: str) -> Tuple[List[str], List[Tuple]]:
+        """Requête SQL ; SHOW TABLES / DESCRIBE / SHOW COLUMNS traduits pour SQLite"""
+        statement = sql.strip().rstrip(";")
+        match = re.fullmatch(r"SHOW TABLES(?: LIKE '([^']*)')?", statement, re.IGNORECASE)
+        if match:
+            rows = self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                "AND name LIKE ? ESCAPE '\\' ORDER BY name",
+                (match.group(1) or "%",),
+            ).fetchall()
+            return ["Tables"], rows
+        match = re.fullmatch(r"(?:DESCRIBE|SHOW COLUMNS FROM)\s+`?(\w+)`?", statement, re.IGNORECASE)
+        if match:
+            if not self.table_exists(match.group(1)):
+                raise sqlite3.OperationalError(f"Table '{match.group(1)}' doesn't exist")
+            rows = [
+                (row[1], row[2], "NO" if row[3] else "YES", "PRI" if row[5] else "", row[4], "")
+                for row in self.db.execute(f'PRAGMA table_info("{match.group(1)}")')
+            ]
+            return ["Field", "Type", "Null", "Key", "Default", "Extra"], rows
+        cursor = self.db.execute(statement)
+        if cursor.description is None:
+            return [], []
+        return [column[0] for column in cursor.description], cursor.fetchall()
+
+    # Fixtures (state_fixture)
+    def _snapshot_sets(self, code: str) -> Dict[str, Tuple[str, str, List]]:
+        """Lignes couvertes par l'instantané, lues dans le script généré (périmètre site ou worker)"""
+        user_id = int(re.search(r"\$scope_user = (\d+);", code).group(1))
+        patterns = {
+            column: php_strings(re.search(rf"\$where\( '{column}', array\( (.*?) \) \)", code).group(1))
+            for column in ("option_name", "meta_key")
+        }
+        options_clause, options_params = _like_clause("option_name", patterns["option_name"])
+        usermeta_clause, usermeta_params = _like_clause("meta_key", patterns["meta_key"])
+        if user_id:
+            usermeta_clause, usermeta_params = usermeta_clause + " AND user_id = ?", usermeta_params + [user_id]
+        sets = {
+            "options": (f"{PREFIX}options", options_clause, options_params),
+            "usermeta": (f"{PREFIX}usermeta", usermeta_clause, usermeta_params),
+        }
+        rows = php_strings(re.search(r"foreach \( array\((.*?)\) as \$table => \$column \)", code).group(1))
+        for table, column in zip(rows[::2], rows[1::2]):
+            if self.table_exists(f"{PREFIX}{table}"):
+                sets[table] = (f"{PREFIX}{table}", f"{column} = ?", [user_id])
+        return sets
+
+    def snapshot(self, name: str, code: str) -> Dict:
+        snap = f"{PREFIX}e2esnap_{snapshot_name(name)}_"
+        report = {"rows": {}, "tables": {}, "errors": []}
+        sets = self._snapshot_sets(code)
+        for key, (live, clause, params) in sets.items():
+            self.db.execute(f"DROP TABLE IF EXISTS {snap}{key}")
+            self.db.execute(f"CREATE TABLE {snap}{key} AS SELECT * FROM {live} WHERE {clause}", params)
+            report["rows"][key] = self.db.execute(f"SELECT COUNT(*) FROM {snap}{key}").fetchone()[0]
+        for table in php_strings(re.search(r"foreach \( array\((.*?)\) as \$table \)", code).group(1)):
+            self.db.execute(f"DROP TABLE IF EXISTS {snap}{table}")
+            report["tables"][table] = self.table_exists(f"{PREFIX}{table}")
+            if report["tables"][table]:
+                self.db.execute(f"CREATE TABLE {snap}{table} AS SELECT * FROM {PREFIX}{table}")
+                report["rows"][table] = self.db.execute(f"SELECT COUNT(*) FROM {snap}{table}").fetchone()[0]
+        self.update_option(
+            f"e2e_snapshot_{snapshot_name(name)}",
+            {"tables": report["tables"], "sets": list(sets), "rows": report["rows"], "time": int(time.time())},
+            False,
+        )
+        return report
+
+    def restore(self, name: str, code: str, drop: bool = False) -> Dict:
+        snap = f"{PREFIX}e2esnap_{snapshot_name(name)}_"
+        manifest = f"e2e_snapshot_{snapshot_name(name)}"
+        report = {"rows": {}, "tables": {}, "errors": []}
+        state = self.get_option(manifest)
+        if not isinstance(state, dict):
+            report["errors"].append(f"Instantané introuvable : {manifest}")
+            return report
+        sets = self._snapshot_sets(code)
+        for key, (live, clause, params) in sets.items():
+            removed = self.db.execute(f"DELETE FROM {live} WHERE {clause}", params).rowcount
+            restored = (
+                self.db.execute(f"INSERT INTO {live} SELECT * FROM {snap}{key}").rowcount
+                if self.table_exists(f"{snap}{key}") else 0
+            )
+            report["rows"][key] = {"removed": removed, "restored": restored}
+        schemas = self.source.table_schemas()
+        for table, existed in state["tables"].items():
+            live = f"{PREFIX}{table}"
+            if not existed:
+                self.db.execute(f"DROP TABLE IF EXISTS {live}")
+                report["tables"][table] = "dropped"
+                continue
+            if self.table_exists(live):
+                self.db.execute(f"DELETE FROM {live}")
+            else:
+                self.db.execute(f"CREATE TABLE {live} (\n  {schemas[table]}\n)")
+            report["rows"][table] = self.db.execute(f"INSERT INTO {live} SELECT * FROM {snap}{table}").rowcount
+            report["tables"][table] = "restored"
+        if drop:
+            for key in list(sets) + state.get("sets", []) + list(state["tables"]):
+                self.db.execute(f"DROP TABLE IF EXISTS {snap}{key}")
+            self.delete_option(manifest)
+        return report
+
+
+# ========================================
+# Sondes PHP reconnues (corps générés par wp_batch / scenario_dsl)
+# ========================================
+
+def _pattern(regex: str) -> "re.Pattern":
+    return re.compile(regex.replace("STR", _STR), re.DOTALL)
+
+
+class ProbeInterpreter:
+    """Exécute les corps de sonde connus ; les autres échouent (« non émulée »)"""
+
+    def __init__(self, wordpress: WordPressEmulator):
+        self.wp = wordpress
+        self.handlers: List[Tuple["re.Pattern", Callable]] = [
+            (_pattern(r"return class_exists\( STR \);"), lambda m: self.wp.source.class_exists(php_unquote(m[1]))),
+            (_pattern(r"return has_(?:filter|action)\( STR \);"), lambda m: php_unquote(m[1]) in self.wp.source.hooks()),
+            (_pattern(r"return get_option\( STR, null \);"), lambda m: self.wp.get_option(php_unquote(m[1]))),
+            (_pattern(r"return defined\( STR \) \? constant\( STR \) : null;"), self._constant),
+            (_pattern(r"return \\?([\w\\]+)::(\w+);"), lambda m: self.wp.source.class_constant(m[1], m[2])),
+            (_pattern(r"return get_class\( new \\?([\w\\]+)\(\) \);"), self._instantiate),
+            (
+                _pattern(
+                    r"update_option\( STR, json_decode\( STR, true \), (true|false) \); "
+                    r"return get_option\( STR, null \) === json_decode\( STR, true \);"
+                ),
+                self._set_option,
+            ),
+            (
+                _pattern(r"foreach \( array\( (.*?) \) as \$name \) \{ delete_option\( \$name \); \} return true;"),
+                self._delete_options,
+            ),
+            (_pattern(r"global \$wpdb; \$table = \$wpdb->prefix \. STR; .*array_diff\( array\( (.*?) \), .*"), self._missing_columns),
+            (_pattern(r"\\?WcQualiopiFormation\\Helpers\\LoggingHelper::(\w+)\( STR.*\); return true;"), self._log),
+        ]
+
+    def run(self, body: str) -> Any:
+        for pattern, handler in self.handlers:
+            match = pattern.fullmatch(body.strip())
+            if match:
+                return handler(match)
+        raise PhpError(f"Sonde non émulée : {body[:120]}")
+
+    def _constant(self, match) -> Any:
+        name = php_unquote(match[1])
+        if "::" not in name:
+            return None
+        class_name, constant = name.split("::")
+        try:
+            return self.wp.source.class_constant(class_name, constant)
+        except PhpError:
+            return None
+
+    def _instantiate(self, match) -> str:
+        if not self.wp.source.class_exists(match[1]):
+            raise PhpError(f'Class "{match[1]}" not found')
+        return match[1].strip("\\")
+
+    def _set_option(self, match) -> bool:
+        value = json.loads(php_unquote(match[2]))
+        self.wp.update_option(php_unquote(match[1]), value, match[3] == "true")
+        return self.wp.get_option(php_unquote(match[4])) == json.loads(php_unquote(match[5]))
+
+    def _delete_options(self, match) -> bool:
+        for name in php_strings(match[1]):
+            self.wp.delete_option(name)
+        return True
+
+    def _missing_columns(self, match) -> Optional[List[str]]:
+        table = PREFIX + php_unquote(match[1])
+        if not self.wp.table_exists(table):
+            return None
+        columns = self.wp.table_columns(table)
+        return [column for column in php_strings(match[2]) if column not in columns]
+
+    def _log(self, match) -> bool:
+        self.wp.logs.append({"level": match[1], "message": php_unquote(match[2]), "time": time.time()})
+        return True
+
+
+# ========================================
+# Backend d'exécution
+# ========================================
+
+_PROBE_CALL = re.compile(
+    r"\$__e2e_probe\( " + _STR + r", static function \(\) \{ (.*?) \}, "
+    r"static function \( \$value \) \{ return (.*?); \} \);$",
+    re.MULTILINE,
+)
+_EVAL_FILE = re.compile(r"echo ([A-Za-z0-9+/=]+) \| base64 -d > \S+ && ddev wp eval-file ")
+_EXIT_SCRIPT = re.compile(r"<\?php\s+exit\(\s*(\d+)\s*\);\s*")
+
+
+def _result(returncode: int = 0, stdout: str = "", stderr: str = "") -> Dict:
+    return {"returncode": returncode, "stdout": stdout, "stderr": stderr}
+
+
+class EmulatorExecutor(CommandExecutor):
+    """Interprète les commandes `ddev wp ...` du framework sur WordPressEmulator"""
+
+    name = "emulator"
+    child_cpu = False
+
+    def __init__(self, database: str = ":memory:", wordpress: Optional[WordPressEmulator] = None):
+        self.wp = wordpress or WordPressEmulator(database)
+        self.probes = ProbeInterpreter(self.wp)
+
+    def run(self, command: str, timeout: float) -> Dict:
+        with self.wp.lock:
+            match = _EVAL_FILE.search(command)
+            if match:
+                return self.eval_file(base64.b64decode(match.group(1)).decode("utf-8"))
+
+            stdout, stderr = [], []
+            for words in self._segments(command):
+                if words[0] in ("cd", "mkdir", "rm", "exit") or words[0].startswith("rc="):
+                    continue
+                if words[:2] == ["ddev", "wp"]:
+                    words = words[1:]
+                if words[0] != "wp":
+                    return _result(127, "".join(stdout), f"Commande non émulée : {' '.join(words)}\n")
+                result = self.wp_cli(words[1:])
+                stdout.append(result["stdout"])
+                stderr.append(result["stderr"])
+                if result["returncode"] != 0:
+                    return _result(result["returncode"], "".join(stdout), "".join(stderr))
+            return _result(0, "".join(stdout), "".join(stderr))
+
+    @staticmethod
+    def _segments(command: str) -> List[List[str]]:
+        """Commandes simples d'une ligne shell (séparateurs && et ; hors guillemets)"""
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=";&|")
+        lexer.whitespace_split = True
+        segments, current = [], []
+        for token in lexer:
+            if token in ("&&", ";"):
+                if current:
+                    segments.append(current)
+                current = []
+            else:
+                current.append(token)
+        if current:
+            segments.append(current)
+        return segments
+
+    def pipe(self, command: str, chunks, timeout: float) -> Dict:
+        for _ in chunks:
+            pass
+        return _result(127, "", f"Entrée standard non émulée : {command}\n")
+
+    def close(self):
+        self.wp.db.close()
+
+    # WP-CLI
+    def wp_cli(self, arguments: List[str]) -> Dict:
+        flags = {key: value for key, _, value in (arg[2:].partition("=") for arg in arguments if arg.startswith("--"))}
+        words = [arg for arg in arguments if not arg.startswith("--")]
+        command = " ".join(words[:3] if words[:2] == ["user", "meta"] else words[:2])
+        handler = {
+            "user meta get": self._user_meta_get,
+            "user meta update": self._user_meta_update,
+            "user meta add": self._user_meta_update,
+            "user meta delete": self._user_meta_delete,
+            "option get": self._option_get,
+            "option add": self._option_add,
+            "option update": self._option_update,
+            "option delete": self._option_delete,
+            "plugin is-active": self._plugin_is_active,
+            "plugin activate": self._plugin_activate,
+            "plugin deactivate": self._plugin_deactivate,
+            "plugin list": self._plugin_list,
+            "db query": self._db_query,
+        }.get(command)
+        if handler is None:
+            return _result(1, "", f"Error: Commande WP-CLI non émulée : wp {' '.join(arguments)}\n")
+        return handler(words[3:] if command.startswith("user meta") else words[2:], flags)
+
+    @staticmethod
+    def _format(value: Any, flags: Dict[str, str]) -> str:
+        if flags.get("format") == "json" or not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            return json.dumps(value) + "\n"
+        return f"{value}\n"
+
+    @staticmethod
+    def _parse_value(raw: str, flags: Dict[str, str]) -> Any:
+        return json.loads(raw) if flags.get("format") == "json" else raw
+
+    def _option_get(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if not self.wp.option_exists(words[0]):
+            return _result(1, "", f"Error: Could not get '{words[0]}' option. Does it exist?\n")
+        return _result(0, self._format(self.wp.get_option(words[0]), flags))
+
+    def _option_add(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if self.wp.option_exists(words[0]):
+            return _result(1, "", f"Error: Could not add option '{words[0]}'. Does it already exist?\n")
+        self.wp.update_option(words[0], self._parse_value(words[1], flags), flags.get("autoload") != "no")
+        return _result(0, f"Success: Added '{words[0]}' option.\n")
+
+    def _option_update(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if not self.wp.update_option(words[0], self._parse_value(words[1], flags), flags.get("autoload") != "no"):
+            return _result(0, f"Success: Value passed for '{words[0]}' option is unchanged.\n")
+        return _result(0, f"Success: Updated '{words[0]}' option.\n")
+
+    def _option_delete(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        stdout, stderr = "", ""
+        for name in words:
+            if self.wp.delete_option(name):
+                stdout += f"Success: Deleted '{name}' option.\n"
+            else:
+                stderr += f"Warning: Could not delete '{name}' option. Does it exist?\n"
+        return _result(0, stdout, stderr)
+
+    def _user_meta_get(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        value = self.wp.get_user_meta(int(words[0]), words[1])
+        # WP-CLI : méta absente = sortie vide, code 0
+        return _result(0, "" if value is None else self._format(value, flags))
+
+    def _user_meta_update(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        self.wp.update_user_meta(int(words[0]), words[1], self._parse_value(words[2], flags))
+        return _result(0, "Success: Updated custom field.\n")
+
+    def _user_meta_delete(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if not self.wp.delete_user_meta(int(words[0]), words[1]):
+            return _result(1, "", "Error: Failed to delete custom field.\n")
+        return _result(0, "Success: Deleted custom field.\n")
+
+    def _plugin_is_active(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        return _result(0 if self.wp.plugin_active(words[0]) else 1)
+
+    def _plugin_activate(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if words[0] != PLUGIN_SLUG:
+            return _result(1, "", f"Warning: The '{words[0]}' plugin could not be found.\nError: No plugins activated.\n")
+        if self.wp.plugin_active(words[0]):
+            return _result(0, f"Warning: Plugin '{words[0]}' is already active.\nSuccess: Plugin already activated.\n")
+        self.wp.set_plugin_active(words[0], True)
+        return _result(0, f"Plugin '{words[0]}' activated.\nSuccess: Activated 1 of 1 plugins.\n")
+
+    def _plugin_deactivate(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        if not self.wp.plugin_active(words[0]):
+            return _result(0, f"Warning: Plugin '{words[0]}' isn't active.\nSuccess: Plugin already deactivated.\n")
+        self.wp.set_plugin_active(words[0], False)
+        return _result(0, f"Plugin '{words[0]}' deactivated.\nSuccess: Deactivated 1 of 1 plugins.\n")
+
+    def _plugin_list(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        version = self.wp.source.class_constants(f"{ROOT_NAMESPACE}\\Core\\Constants").get("VERSION", "")
+        plugins = [{
+            "name": PLUGIN_SLUG,
+            "status": "active" if self.wp.plugin_active(PLUGIN_SLUG) else "inactive",
+            "update": "none",
+            "version": version,
+        }]
+        if flags.get("name"):
+            plugins = [plugin for plugin in plugins if plugin["name"] == flags["name"]]
+        if flags.get("field"):
+            return _result(0, "".join(f"{plugin[flags['field']]}\n" for plugin in plugins))
+        if flags.get("format") == "json":
+            return _result(0, json.dumps(plugins) + "\n")
+        lines = ["name\tstatus\tupdate\tversion"] + ["\t".join(plugin.values()) for plugin in plugins]
+        return _result(0, "\n".join(lines) + "\n")
+
+    def _db_query(self, words: List[str], flags: Dict[str, str]) -> Dict:
+        try:
+            columns, rows = self.wp.query(" ".join(words))
+        except sqlite3.Error as e:
+            return _result(1, "", f"ERROR at line 1: {e}\n")
+        if not columns:
+            return _result(0)
+        lines = ["\t".join(columns)] + ["\t".join("NULL" if cell is None else str(cell) for cell in row) for row in rows]
+        return _result(0, "\n".join(lines) + "\n")
+
+    # Scripts eval-file générés par le framework
+    def eval_file(self, code: str) -> Dict:
+        if BATCH_BEGIN in code:
+            return _result(0, BATCH_BEGIN + json.dumps(self._probe_batch(code)) + BATCH_END)
+        if OPTIONS_BEGIN in code:
+            match = re.search(r"foreach \( array\( (.*?) \) as \$__e2e_name \)", code)
+            names = php_strings(match.group(1)) if match else []
+            options = {
+                name: {"exists": True, "value": self.wp.get_option(name)} if self.wp.option_exists(name)
+                else {"exists": False, "value": None}
+                for name in names
+            }
+            return _result(0, OPTIONS_BEGIN + json.dumps(options) + OPTIONS_END)
+        if FIXTURE_BEGIN in code:
+            name = php_strings(re.search(r"'e2esnap_' \. (" + _STR + ")", code).group(1))[0]
+            if "CREATE TABLE {$snap}" in code:
+                report = self.wp.snapshot(name, code)
+            else:
+                report = self.wp.restore(name, code, re.search(r"if \( true \) \{\n\tforeach \( array_merge", code) is not None)
+            return _result(0, FIXTURE_BEGIN + json.dumps(report) + FIXTURE_END)
+        match = _EXIT_SCRIPT.fullmatch(code)
+        if match:
+            return _result(int(match.group(1)))
+        first_lines = " ".join(code.splitlines()[1:3])
+        return _result(1, "", f"Error: Script PHP non émulé : {first_lines[:160]}\n")
+
+    def _probe_batch(self, code: str) -> Dict[str, Dict]:
+        results = {}
+        for match in _PROBE_CALL.finditer(code):
+            name, body, check = php_unquote(match.group(1)), match.group(2), match.group(3)
+            try:
+                value = self.probes.run(body)
+                passed = php_bool(PhpExpression(check, self.wp.source).evaluate(value))
+                results[name] = {"passed": passed, "value": value}
+            except PhpError as e:
+                results[name] = {"passed": False, "value": None, "error": str(e)}
+        return results
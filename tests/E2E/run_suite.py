@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Exécution parallèle de la suite E2E
+Usage : python tests/E2E/run_suite.py --workers 3 --user-ids 1,2,3 --user-logins e2e1,e2e2,e2e3 \
+    --product-ids 4017,4018,4019
+Plusieurs workers exigent un utilisateur (ID et identifiant de connexion, mot de
+passe commun --user-password) et un produit distincts par worker ;
+les scénarios EXCLUSIVE (état global du site) sont exécutés seuls, à la fin ;
+state_fixture(scope="worker") ne restaure que l'état du worker et reste dans le pool.
+Seuls les scénarios dont les modules couverts ont changé depuis leur
+dernier passage réussi sont exécutés (--all pour tout relancer) ; un fichier
+de src/ modifié qu'aucun scénario ne couvre relance toute la suite.
+--backend emulator : WordPress émulé hors ligne (itérations rapides, sans ddev).
+--pattern 'BENCH_*.py' : benchmarks avec leurs options par défaut, remplacées par
+E2E_ARGS_<test_id> (ex. E2E_ARGS_BENCH_001="--users 5 --validate-path ...").
+--profile-php : coût serveur (temps, mémoire, requêtes SQL) de chaque sonde dans les rapports.
+--no-baseline / --accept-baseline : comparaison à la référence de performance désactivée / run
+ajouté à la référence malgré ses régressions (changement de performance assumé).
+--plugin-log : logs du plugin suivis pendant chaque scénario, comptés par phase dans les rapports.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "helpers"))
+
+from executors import BACKENDS
+from suite_runner import build_worker_contexts, discover_scenarios, run_suite, save_suite_report
+from test_impact import ImpactState, select_impacted
+
+
+def parse_ids(value: str):
+    """Convertit "1,2,3" en [1, 2, 3]"""
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Runner parallèle des scénarios E2E")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Workers parallèles (> 1 : --user-ids, --user-logins et --product-ids requis)",
+    )
+    parser.add_argument("--pattern", default="E2E_*.py", help="Filtre des scripts")
+    parser.add_argument("--user-ids", type=parse_ids, help="Utilisateurs WP dédiés (un par worker)")
+    parser.add_argument(
+        "--user-logins", type=lambda value: [item.strip() for item in value.split(",") if item.strip()],
+        help="Identifiants de connexion de ces utilisateurs (même ordre que --user-ids)",
+    )
+    parser.add_argument(
+        "--user-password", default=os.environ.get("E2E_WORKER_PASSWORD"),
+        help="Mot de passe commun des utilisateurs des workers (E2E_WORKER_PASSWORD)",
+    )
+    parser.add_argument("--product-ids", type=parse_ids, help="Produits formation dédiés (un par worker)")
+    parser.add_argument("--all", action="store_true", help="Exécute tous les scénarios (ignore l'analyse d'impact)")
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default=os.environ.get("E2E_BACKEND", "wsl"),
+        help="Exécution des commandes : WordPress réel (wsl) ou émulé (emulator)",
+    )
+    parser.add_argument(
+        "--profile-php", action="store_true",
+        help="Relève temps, pic mémoire et requêtes SQL de chaque sonde PHP (E2E_PROFILE_PHP=1)",
+    )
+    parser.add_argument("--no-baseline", action="store_true", help="Sans comparaison à la référence (E2E_BASELINE=0)")
+    parser.add_argument(
+        "--accept-baseline", action="store_true",
+        help="Ajoute les runs à la référence même en cas de régression (E2E_BASELINE_ACCEPT=1)",
+    )
+    parser.add_argument(
+        "--plugin-log", action="append", default=[],
+        help="Log du plugin à suivre (chemin ou motif glob, répétable ; E2E_PLUGIN_LOG)",
+    )
+    args = parser.parse_args()
+    # Hérités par les workers du pool
+    os.environ["E2E_BACKEND"] = args.backend
+    if args.profile_php:
+        os.environ["E2E_PROFILE_PHP"] = "1"
+    if args.no_baseline:
+        os.environ["E2E_BASELINE"] = "0"
+    if args.accept_baseline:
+        os.environ["E2E_BASELINE_ACCEPT"] = "1"
+    if args.plugin_log:
+        os.environ["E2E_PLUGIN_LOG"] = os.pathsep.join(args.plugin_log)
+
+    scenarios = discover_scenarios(args.pattern)
+    if not scenarios:
+        print("❌ Aucun scénario E2ETestFramework trouvé")
+        return 1
+
+    state = ImpactState()
+    impacted = select_impacted(scenarios, state)
+    for scenario in scenarios:
+        name = f"{os.path.basename(scenario['script'])}::{scenario['class_name']}"
+        if scenario["impacted"]:
+            print(f"🎯 {name} : {scenario['reason']}")
+        else:
+            print(f"⏭️  {name} : modules inchangés depuis le dernier succès{' (forcé par --all)' if args.all else ''}")
+    if not args.all:
+        scenarios = impacted
+    if not scenarios:
+        print("\n✅ Aucun scénario impacté : rien à exécuter (--all pour forcer)")
+        return 0
+
+    shared = [scenario for scenario in scenarios if not scenario["exclusive"]]
+    workers = max(1, min(args.workers, len(shared)))
+    try:
+        contexts = build_worker_contexts(
+            workers, args.user_ids, args.product_ids, args.user_logins, args.user_password
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    exclusive = len(scenarios) - len(shared)
+    print(f"🚀 {len(scenarios)} scénarios sur {workers} workers ({exclusive} exécutés seuls)\n")
+    started = time.time()
+    results = run_suite(scenarios, contexts)
+    report = save_suite_report(results, time.time() - started)
+
+    if args.backend != "wsl":
+        # Un succès sur l'émulateur ne dispense pas d'un passage sur WordPress réel
+        print(f"\n📄 Rapport de suite : {report} (backend {args.backend}, succès non enregistrés)")
+        return 0 if all(result["status"] == "passed" for result in results) else 1
+
+    # Empreinte calculée avant l'exécution : une source modifiée pendant le run sera rejouée
+    by_script = {(scenario["script"], scenario["class_name"]): scenario for scenario in scenarios}
+    for result in results:
+        scenario = by_script.get((result["script"], result["class_name"]))
+        if scenario is not None and result["status"] == "passed":
+            state.record_pass(scenario["coverage"], scenario["fingerprint"])
+    if all(result["status"] == "passed" for result in results):
+        # Run entièrement réussi : nouvelle référence des fichiers de src/ non couverts
+        state.record_sources()
+    state.save()
+
+    print(f"\n📄 Rapport de suite : {report}")
+    return 0 if all(result["status"] == "passed" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
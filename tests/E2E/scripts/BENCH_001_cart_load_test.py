@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark 001 : Charge concurrente sur le tunnel panier
+Description : N utilisateurs virtuels enchaînent ajout panier, panier, checkout
+bloqué, validation du test et checkout débloqué (CartGuard / CartRestriction /
+CartBlocker). Rapport : débit, p50/p95/p99 et taux d'erreur par étape.
+
+Usage :
+    python tests/E2E/scripts/BENCH_001_cart_load_test.py --users 50 --ramp-up 10 --soak 60 \
+        --validate-path "<chemin de validation du site>?product_id={product_id}"
+Sans --stub, --validate-path est obligatoire (mu-plugin de test par exemple) :
+un parcours d'essai vérifie qu'il valide réellement le test avant la charge.
+    python tests/E2E/scripts/BENCH_001_cart_load_test.py --stub --users 20
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.load_generator import STUB_VALIDATE_PATH, CartLoadGenerator, LoadProfile, make_path_validator
+
+
+class CartLoadTest(E2ETestFramework):
+    """Charge concurrente sur CartGuard / CartRestriction"""
+
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Cart"]
+
+    # Seuils d'alerte par étape
+    MAX_ERROR_RATE = 1.0
+    MAX_P95_MS = 2000
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_001
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_001"))
+        super().__init__(
+            test_id="BENCH_001",
+            test_name="Cart Load Test",
+            description="Charge concurrente sur le tunnel panier → test → checkout",
+        )
+        self.args = args
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        self.print_phase("Phase 1 : Cible")
+        if self.args.stub:
+            self.start_http_stub(latency=self.args.stub_latency, error_rate=self.args.stub_error_rate)
+        profile = LoadProfile(self.args.users, self.args.ramp_up, self.args.soak, self.args.think_time)
+        self.log_info(f"Cible : {self.http_base_url} - profil {profile.to_dict()}")
+
+        self.print_phase("Phase 2 : Montée en charge et palier")
+        generator = CartLoadGenerator(
+            self.http_base_url,
+            self.worker.product_id,
+            self.args.test_page,
+            profile,
+            validator=make_path_validator(self.args.validate_path),
+            verify_tls=os.environ.get("E2E_HTTP_INSECURE") != "1",
+        )
+        # Sans validation effective, le checkout débloqué ne serait jamais mesuré
+        preflight = generator.preflight()
+        if not preflight["passed"]:
+            self.log_error(f"Parcours d'essai : {preflight['check']} → ERREUR: {preflight['detail']}")
+            self.generate_report()
+            return
+        self.log_success(f"Parcours d'essai : validation du test → OK ({preflight['detail']})")
+        report = generator.run()
+
+        self.print_phase("Phase 3 : Résultats")
+        self.log_info(
+            f"{report['journeys']} parcours en {report['duration']:.1f}s "
+            f"({report['journeys_per_second']:.1f}/s), connexions {report['connections']}"
+        )
+        for step in report["steps"]:
+            message = (
+                f"{step['step']} : {step['count']} req, {step['throughput']:.1f} req/s, "
+                f"p50 {step['p50_ms']:.0f} ms, p95 {step['p95_ms']:.0f} ms, "
+                f"p99 {step['p99_ms']:.0f} ms, erreurs {step['error_rate']:.1f}%"
+            )
+            if step["error_rate"] > self.MAX_ERROR_RATE or step["p95_ms"] > self.MAX_P95_MS:
+                self.log_error(message)
+            else:
+                self.log_success(message)
+        # Latences brutes par étape : comparées à la référence de performance
+        for step, stats in generator.stats.items():
+            self.add_perf_samples(f"panier {step}", [latency * 1000 for latency in stats.latencies.values])
+
+        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.log_info(f"Résultats détaillés : {filename}")
+
+        self.generate_report()
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Charge concurrente sur le tunnel panier")
+    parser.add_argument("--users", type=int, default=10, help="Utilisateurs virtuels concurrents")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Durée de montée en charge (s)")
+    parser.add_argument("--soak", type=float, default=0.0, help="Durée du palier (s), 0 = un parcours par VU")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause entre deux parcours (s)")
+    parser.add_argument("--test-page", default="/4267/", help="Page du test de positionnement")
+    parser.add_argument(
+        "--validate-path",
+        help="Chemin du site qui valide le test ({product_id} remplacé) ; requis sans --stub",
+    )
+    parser.add_argument(
+        "--stub", action="store_true", default=os.environ.get("E2E_HTTP_STUB") == "1",
+        help="Cible le serveur local de remplacement (défaut si E2E_HTTP_STUB=1)",
+    )
+    parser.add_argument("--stub-latency", type=float, default=0.005)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    if args.stub:
+        args.validate_path = args.validate_path or STUB_VALIDATE_PATH
+    elif not args.validate_path or args.validate_path == STUB_VALIDATE_PATH:
+        parser.error(
+            "--validate-path requis sans --stub : /wcqf-validate/ n'existe que sur le serveur de remplacement"
+        )
+    return args
+
+
+# Exécution
+if __name__ == "__main__":
+    test = CartLoadTest(parse_args())
+    test.run()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark 002 : Rejeu de recherches SIRET contre une API SIREN de remplacement
+Description : un corpus de SIRET est rejoué à travers le chemin AJAX
+wcqf_verify_siret (SirenAutocomplete / SirenCache / SirenApiClient), l'API
+étant simulée localement (latence, erreurs 503, rafales de 429).
+Rapport : distribution des latences, ratio de hits du cache, temps des retries
+et ratio de hits simulé par durée de cache.
+
+Usage :
+    python tests/E2E/scripts/BENCH_002_siren_replay.py --lookups 500 --distinct 120
+    python tests/E2E/scripts/BENCH_002_siren_replay.py --error-rate 0.1 --burst-every 50 --burst-length 5
+    python tests/E2E/scripts/BENCH_002_siren_replay.py --reference --retry-wait 0.1
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.siren_stub import SirenStubServer
+from helpers.siren_replay import (
+    REPLAY_BEGIN,
+    REPLAY_END,
+    SIREN_RETRY_WAIT,
+    ReferenceSirenClient,
+    analyze_lookups,
+    generate_corpus,
+    load_corpus,
+    replay_php,
+    simulate_ttl_hit_ratios,
+)
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class SirenReplayBenchmark(E2ETestFramework):
+    """Rejeu SIRET : latences, SirenCache et retries face à une API dégradée"""
+
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Form/Siren"]
+
+    # Le rejeu complet tient dans un seul `wp eval-file`
+    COMMAND_TIMEOUT = 3600
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_002
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_002"))
+        super().__init__(
+            test_id="BENCH_002",
+            test_name="SIREN Replay",
+            description="Rejeu de recherches SIRET via wcqf_verify_siret contre une API simulée",
+        )
+        self.args = args
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        self.print_phase("Phase 1 : Corpus et API de remplacement")
+        if self.args.corpus:
+            corpus = load_corpus(self.args.corpus)
+        else:
+            corpus = generate_corpus(self.args.lookups, self.args.distinct, self.args.span * 3600)
+        self.log_info(
+            f"Corpus : {len(corpus)} recherches, {len({siret for _, siret in corpus})} SIRET distincts"
+        )
+
+        api = SirenStubServer(
+            latency=self.args.latency,
+            error_rate=self.args.error_rate,
+            burst_every=self.args.burst_every,
+            burst_length=self.args.burst_length,
+            host=self.args.stub_host,
+            port=self.args.stub_port,
+        )
+        api.set_corpus([siret for _, siret in corpus])
+        with api:
+            self.log_info(f"API SIREN simulée : {api.base_url}")
+
+            self.print_phase("Phase 2 : Rejeu")
+            lookups = self.replay_reference(api, corpus) if self.args.reference else self.replay_wordpress(api)
+            stub_stats = api.state.stats()
+
+        if lookups is None:
+            self.generate_report()
+            return
+
+        self.print_phase("Phase 3 : Résultats")
+        analysis = analyze_lookups(lookups)
+        mode = "reference" if self.args.reference else "wordpress"
+        self.add_perf_samples(f"siren lookup ({mode})", [lookup["elapsed"] * 1000 for lookup in lookups])
+        ttl_ratios = simulate_ttl_hit_ratios(corpus)
+        self.log_results(analysis, ttl_ratios)
+
+        report = {
+            "mode": mode,
+            "api_profile": {
+                "latency": self.args.latency,
+                "error_rate": self.args.error_rate,
+                "burst_every": self.args.burst_every,
+                "burst_length": self.args.burst_length,
+            },
+            "analysis": analysis,
+            "simulated_ttl_hit_ratios": ttl_ratios,
+            "stub": stub_stats,
+            "lookups": lookups if self.args.keep_lookups else [],
+        }
+        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.log_info(f"Résultats détaillés : {filename}")
+
+        self.generate_report()
+
+    def replay_wordpress(self, api: SirenStubServer):
+        """Rejeu dans WordPress : un seul `wp eval-file` pour tout le corpus"""
+        stub_url = self.args.stub_public_url or f"http://host.docker.internal:{api.port}"
+        self.log_info(f"URL du stub vue depuis le conteneur : {stub_url}")
+        command = eval_file_command(
+            self.WP_PROJECT_DIR,
+            replay_php(stub_url, self.args.form_id, not self.args.keep_cache),
+            "siren",
+        )
+        result = self.execute_ssh_command("Rejeu du corpus via wcqf_verify_siret", command)
+        data = extract_marked_json(result.get("output", ""), REPLAY_BEGIN, REPLAY_END)
+        if data is None:
+            self.log_error("Sortie du rejeu illisible")
+            return None
+        if data.get("error"):
+            self.log_error(f"Rejeu impossible : {data['error']}")
+            return None
+        return data["lookups"]
+
+    def replay_reference(self, api: SirenStubServer, corpus):
+        """Rejeu sans WordPress (SirenCache + SirenApiClient reproduits en Python)"""
+        client = ReferenceSirenClient(api.base_url, retry_wait=self.args.retry_wait)
+        lookups = client.replay(corpus)
+        self.log_success(f"Rejeu de référence : {len(lookups)} recherches")
+        return lookups
+
+    def log_results(self, analysis, ttl_ratios):
+        """Journalise les indicateurs clés"""
+        latency = analysis["latency"]
+        retries = analysis["retries"]
+        self.log_info(
+            f"{analysis['lookups']} recherches, succès {analysis['success_rate']:.1f}%, "
+            f"hits SirenCache {analysis['cache_hit_ratio']:.1f}%"
+        )
+        self.log_info(
+            f"Latence : p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+            f"p99 {latency['p99_ms']:.0f} ms, max {latency['max_ms']:.0f} ms"
+        )
+        self.log_info(
+            f"Misses : p95 {analysis['latency_misses']['p95_ms']:.0f} ms - "
+            f"Hits : p95 {analysis['latency_hits']['p95_ms']:.0f} ms"
+        )
+        message = (
+            f"Retries : {retries['lookups_with_retries']} recherches, {retries['time_s']:.1f}s "
+            f"({retries['share_of_total']:.1f}% du temps total), statuts API {analysis['api_statuses']}"
+        )
+        if retries["lookups_with_retries"]:
+            self.log_warning(message)
+        else:
+            self.log_info(message)
+        for error, count in analysis["errors"].items():
+            self.log_warning(f"Erreur x{count} : {error}")
+        self.log_info(
+            "Hits simulés par durée de cache : "
+            + ", ".join(f"{int(ttl) // 3600}h → {ratio:.1f}%" for ttl, ratio in ttl_ratios.items())
+        )
+        if analysis["lookups"]:
+            self.log_success("Rejeu SIREN analysé")
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rejeu SIRET contre une API SIREN simulée")
+    parser.add_argument("--corpus", help="Fichier corpus (siret[,décalage_s] par ligne)")
+    parser.add_argument("--lookups", type=int, default=200, help="Recherches du corpus généré")
+    parser.add_argument("--distinct", type=int, default=50, help="SIRET distincts du corpus généré")
+    parser.add_argument("--span", type=float, default=168, help="Période couverte par le corpus généré (h)")
+    parser.add_argument("--latency", type=float, default=0.08, help="Latence moyenne de l'API (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part de réponses 503")
+    parser.add_argument("--burst-every", type=int, default=0, help="Période des rafales de 429 (requêtes)")
+    parser.add_argument("--burst-length", type=int, default=0, help="Longueur des rafales de 429")
+    parser.add_argument("--stub-host", default="0.0.0.0", help="Interface d'écoute du stub")
+    parser.add_argument("--stub-port", type=int, default=0)
+    parser.add_argument("--stub-public-url", help="URL du stub vue depuis le conteneur DDEV")
+    parser.add_argument("--form-id", type=int, default=1, help="form_id transmis à l'action AJAX")
+    parser.add_argument("--keep-cache", action="store_true", help="Ne vide pas SirenCache avant le rejeu")
+    parser.add_argument("--reference", action="store_true", help="Rejeu Python sans WordPress")
+    parser.add_argument(
+        "--retry-wait", type=float, default=SIREN_RETRY_WAIT, help="Attente entre retries (mode --reference)"
+    )
+    parser.add_argument("--keep-lookups", action="store_true", help="Inclut chaque recherche dans le JSON")
+    return parser.parse_args(argv)
+
+
+# Exécution
+if __name__ == "__main__":
+    test = SirenReplayBenchmark(parse_args())
+    test.run()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark 003 : DataMigrator sur de gros volumes hérités
+Description : pour chaque échelle, amorce des options wcqs_* / gf_siren_* et
+une table gf_siren_tracking synthétiques, mesure la migration (temps,
+mémoire, requêtes), vérifie les données wcqf_* puis restaure l'état initial.
+Échoue si la migration dépasse la référence (risque de timeout à l'activation).
+
+Usage :
+    python tests/E2E/scripts/BENCH_003_data_migration_scale.py --scales 10,1000,100000
+    python tests/E2E/scripts/BENCH_003_data_migration_scale.py --scales 50000 --max-seconds 5
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.legacy_seed import MIGRATION_BEGIN, MIGRATION_END, migration_bench_php
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class DataMigrationScaleBenchmark(E2ETestFramework):
+    """DataMigrator : temps, mémoire et requêtes selon le volume hérité"""
+
+    # Amorçage + migration de 100k entrées dans un seul `wp eval-file`
+    COMMAND_TIMEOUT = 3600
+
+    # Réécrit les options wcqs_* / gf_siren_* / wcqf_* du site : jamais en parallèle
+    EXCLUSIVE = True
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_003
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_003"))
+        super().__init__(
+            test_id="BENCH_003",
+            test_name="Data Migration Scale",
+            description="DataMigrator sur des données wcqs_* / gf_siren_* synthétiques à grande échelle",
+        )
+        self.args = args
+        self.passed = True
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        measures = []
+        for scale in self.args.scales:
+            rows = scale if self.args.tracking_rows is None else self.args.tracking_rows
+            self.print_phase(f"Échelle {scale} : {scale} mappings, {rows} lignes de tracking")
+            measure = self.run_scale(scale, rows)
+            if measure is not None:
+                measures.append(measure)
+
+        self.print_phase("Résultats")
+        if measures:
+            self.log_info("Échelle | Temps | Requêtes | Mémoire (delta / pic)")
+            for measure in measures:
+                migration = measure["migration"]
+                self.log_info(
+                    f"{measure['entries']} | {migration['seconds']:.3f}s | {migration['queries']} | "
+                    f"{migration['memory_delta'] / 1048576:.1f} Mo / {migration['memory_peak'] / 1048576:.1f} Mo"
+                )
+
+            filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(filename, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"baseline": self.baseline(), "measures": measures, "passed": self.passed}, f, indent=2
+                )
+            self.log_info(f"Résultats détaillés : {filename}")
+
+        self.generate_report()
+
+    def baseline(self):
+        return {
+            "max_seconds": self.args.max_seconds,
+            "max_queries": self.args.max_queries,
+            "max_memory_mb": self.args.max_memory_mb,
+        }
+
+    def run_scale(self, entries: int, rows: int):
+        """Amorce, migre, vérifie et restaure pour une échelle donnée"""
+        command = eval_file_command(
+            self.WP_PROJECT_DIR, migration_bench_php(entries, rows, self.args.insert_batch), "migration"
+        )
+        result = self.execute_ssh_command(f"Migration de {entries} entrées", command)
+        measure = extract_marked_json(result.get("output", ""), MIGRATION_BEGIN, MIGRATION_END)
+
+        if measure is None or measure.get("error") or "migration" not in measure:
+            error = (measure or {}).get("error", "sortie illisible")
+            self.log_error(f"Échelle {entries} : {error}")
+            self.passed = False
+            return None
+
+        migration = measure["migration"]
+        self.log_info(
+            f"Amorçage {measure['seed_seconds']:.2f}s - migration {migration['seconds']:.3f}s, "
+            f"{migration['queries']} requêtes, options {migration['results']['options_migrated']}, "
+            f"tables {migration['results']['tables_migrated']}"
+        )
+        for error in migration["results"].get("errors", []):
+            self.log_error(f"DataMigrator : {error}")
+            self.passed = False
+        if migration.get("last_error"):
+            self.log_warning(f"Dernière erreur SQL : {migration['last_error']}")
+
+        for check in measure.get("checks", []):
+            if check["passed"]:
+                self.log_success(f"Données : {check['name']}")
+            else:
+                self.log_error(f"Données : {check['name']}")
+                self.passed = False
+
+        self.check_baseline(entries, migration)
+        self.add_perf_samples(f"migration {entries} entrées", [migration["seconds"]], "s")
+        self.add_perf_samples(f"migration {entries} entrées", [migration["queries"]], "requêtes")
+        return measure
+
+    def check_baseline(self, entries: int, migration):
+        """Compare la mesure aux seuils de référence"""
+        limits = [
+            ("temps", migration["seconds"], self.args.max_seconds, "s"),
+            ("requêtes", migration["queries"], self.args.max_queries, ""),
+            ("pic mémoire", migration["memory_peak"] / 1048576, self.args.max_memory_mb, " Mo"),
+        ]
+        for name, value, limit, unit in limits:
+            if limit is None:
+                continue
+            if value > limit:
+                self.log_error(f"Échelle {entries} : {name} {value:.2f}{unit} > référence {limit}{unit}")
+                self.passed = False
+            else:
+                self.log_success(f"Échelle {entries} : {name} {value:.2f}{unit} ≤ {limit}{unit}")
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_scales(value: str):
+    return [int(scale) for scale in value.split(",") if scale.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DataMigrator sur de gros volumes hérités")
+    parser.add_argument("--scales", type=parse_scales, default=[10, 1000, 10000, 100000],
+                        help="Nombres de mappings à amorcer (liste séparée par des virgules)")
+    parser.add_argument("--tracking-rows", type=int, help="Lignes gf_siren_tracking (défaut : échelle)")
+    parser.add_argument("--insert-batch", type=int, default=1000, help="Lignes par INSERT multi-valeurs")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Référence de temps de migration (s)")
+    parser.add_argument("--max-queries", type=int, help="Référence du nombre de requêtes")
+    parser.add_argument("--max-memory-mb", type=float, help="Référence du pic mémoire (Mo)")
+    return parser.parse_args(argv)
+
+
+# Exécution
+if __name__ == "__main__":
+    test = DataMigrationScaleBenchmark(parse_args())
+    test.run()
+    sys.exit(0 if test.passed else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark 004 : Passage à l'échelle des tables wcqf_tracking / wcqf_progress / wcqf_audit
+Description : amorce les trois tables par INSERT multi-valeurs (flux vers
+`ddev mysql`) jusqu'à chaque palier, chronomètre les méthodes de requête du
+plugin (TrackingStorage, TrackingStore, ProgressStorage, ProgressStore,
+AuditStore) et capture leurs plans EXPLAIN.
+Rapport : courbe de passage à l'échelle par requête, parcours complets signalés.
+
+Usage :
+    python tests/E2E/scripts/BENCH_004_table_scaling.py --scales 10000,1000000,10000000
+    python tests/E2E/scripts/BENCH_004_table_scaling.py --scales 10000 --keep-rows
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.query_bench import (
+    QUERIES_BEGIN,
+    QUERIES_END,
+    SCHEMA_BEGIN,
+    SCHEMA_END,
+    queries_php,
+    schema_php,
+    scaling_curves,
+)
+from helpers.table_seeder import TABLE_GENERATORS, TableSeeder
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class TableScalingBenchmark(E2ETestFramework):
+    """Requêtes du plugin à 10k / 1M / 10M lignes"""
+
+    # Les DELETE mesurés (puis annulés) sur 10M lignes sont longs
+    COMMAND_TIMEOUT = 3600
+
+    # Amorce des millions de lignes dans les tables du plugin : jamais en parallèle
+    EXCLUSIVE = True
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_004
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_004"))
+        super().__init__(
+            test_id="BENCH_004",
+            test_name="Table Scaling",
+            description="Amorçage massif des tables du plugin et mesure de ses requêtes",
+        )
+        self.args = args
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        self.print_phase("Phase 1 : Schéma")
+        schema = self.read_schema()
+        if schema is None:
+            self.generate_report()
+            return
+        seeders = {
+            table: TableSeeder(table, schema["prefix"], info["columns"], self.args.insert_batch)
+            for table, info in schema["tables"].items()
+        }
+        seeded = {table: info["seeded"] for table, info in schema["tables"].items()}
+        for table, seeder in seeders.items():
+            self.log_info(f"{seeder.full_name} : {len(seeder.columns)} colonnes alimentées, {seeded[table]} lignes déjà amorcées")
+
+        measures = []
+        for scale in sorted(self.args.scales):
+            self.print_phase(f"Palier {scale} lignes")
+            for table, seeder in seeders.items():
+                seeded[table] = self.seed(seeder, seeded[table], scale)
+            measure = self.measure(scale)
+            if measure is not None:
+                measures.append(measure)
+
+        self.print_phase("Courbes de passage à l'échelle")
+        curves = scaling_curves(measures)
+        self.log_curves(curves)
+
+        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"schema": schema, "curves": curves, "measures": measures}, f, indent=2)
+        self.log_info(f"Résultats détaillés : {filename}")
+
+        if not self.args.keep_rows:
+            self.print_phase("Nettoyage")
+            for table, seeder in seeders.items():
+                self.pipe_to_command(
+                    f"Suppression des {seeded[table]} lignes amorcées de {seeder.full_name}",
+                    self.mysql_command(),
+                    seeder.cleanup_statements(seeded[table]),
+                    timeout=self.args.seed_timeout,
+                )
+
+        self.generate_report()
+
+    def mysql_command(self) -> str:
+        return f"cd {self.WP_PROJECT_DIR} && ddev mysql"
+
+    def read_schema(self):
+        """Préfixe, colonnes réelles et lignes déjà amorcées des trois tables"""
+        command = eval_file_command(self.WP_PROJECT_DIR, schema_php(), "schema")
+        result = self.execute_ssh_command("Lecture du schéma des tables wcqf_*", command)
+        schema = extract_marked_json(result.get("output", ""), SCHEMA_BEGIN, SCHEMA_END)
+        if schema is None:
+            self.log_error("Schéma illisible")
+            return None
+        missing = [table for table in TABLE_GENERATORS if table not in schema["tables"]]
+        for table in missing:
+            self.log_warning(f"Table {schema['prefix']}{table} absente : ignorée")
+        if len(missing) == len(TABLE_GENERATORS):
+            self.log_error("Aucune table du plugin : activer le plugin avant le benchmark")
+            return None
+        return schema
+
+    def seed(self, seeder: TableSeeder, current: int, target: int) -> int:
+        """Complète la table jusqu'à `target` lignes amorcées ; retourne le nouveau total"""
+        if current >= target:
+            if current > target:
+                self.log_warning(f"{seeder.full_name} : déjà {current} lignes amorcées (> {target})")
+            return current
+        started = time.time()
+        result = self.pipe_to_command(
+            f"Amorçage de {seeder.full_name} : {current} → {target} lignes",
+            self.mysql_command(),
+            seeder.sql_stream(current, target),
+            timeout=self.args.seed_timeout,
+        )
+        if not result["success"]:
+            return current
+        elapsed = time.time() - started
+        self.log_info(f"{target - current} lignes en {elapsed:.1f}s ({(target - current) / elapsed:.0f} lignes/s)")
+        return target
+
+    def measure(self, scale: int):
+        """Chronomètre les méthodes du plugin et capture leurs plans"""
+        command = eval_file_command(
+            self.WP_PROJECT_DIR,
+            queries_php(scale // 2, self.args.repeat, not self.args.skip_deletes),
+            "queries",
+        )
+        result = self.execute_ssh_command(f"Mesure des requêtes à {scale} lignes", command)
+        queries = extract_marked_json(result.get("output", ""), QUERIES_BEGIN, QUERIES_END)
+        if queries is None:
+            self.log_error(f"Palier {scale} : sortie des mesures illisible")
+            return None
+        for name, entry in queries.items():
+            if entry["error"]:
+                self.log_error(f"{name} : {entry['error']}")
+            else:
+                self.log_info(f"{name} : médiane {entry['median'] * 1000:.2f} ms ({entry['runs']} exécutions)")
+        return {"rows": scale, "queries": queries}
+
+    def log_curves(self, curves):
+        """Une ligne par requête : temps à chaque palier, pente, parcours complets"""
+        for name, points in curves.items():
+            series = " → ".join(f"{point['rows']}: {point['median_ms']:.1f} ms" for point in points)
+            slopes = [point["slope"] for point in points if point["slope"] is not None]
+            scans = points[-1]["full_scans"]
+            message = f"{name} | {series}"
+            if slopes:
+                message += f" | pente {slopes[-1]:.2f}"
+            if points[-1]["error"]:
+                self.log_error(f"{message} | erreur : {points[-1]['error']}")
+            elif scans:
+                self.log_warning(f"{message} | parcours complet : {', '.join(scans)}")
+            else:
+                self.log_success(message)
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_scales(value: str):
+    return [int(scale) for scale in value.split(",") if scale.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Passage à l'échelle des tables du plugin")
+    parser.add_argument("--scales", type=parse_scales, default=[10000, 1000000, 10000000],
+                        help="Paliers de lignes amorcées par table (liste séparée par des virgules)")
+    parser.add_argument("--insert-batch", type=int, default=2000, help="Lignes par INSERT multi-valeurs")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions par requête (médiane)")
+    parser.add_argument("--skip-deletes", action="store_true", help="Ne mesure pas cleanup_old / delete_old")
+    parser.add_argument("--seed-timeout", type=float, default=7200, help="Délai maximal d'amorçage par table (s)")
+    parser.add_argument("--keep-rows", action="store_true", help="Conserve les lignes amorcées (reprise)")
+    return parser.parse_args(argv)
+
+
+# Exécution
+if __name__ == "__main__":
+    test = TableScalingBenchmark(parse_args())
+    test.run()
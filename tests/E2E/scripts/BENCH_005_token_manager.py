@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark 005 : Débit et conformité de TokenManager
+Description : lots de generate / validate (jetons valides, mauvais
+utilisateur, altérés, expirés, signés avec la clé précédente après
+rotate_key) dans un seul démarrage WordPress ; coût de la rotation et de
+la recherche du secret (cache froid / chaud). Chaque verdict PHP est
+rejoué par une implémentation Python de référence.
+Rapport : opérations/s et latences p50/p95/p99 par cas, écarts PHP/Python.
+
+Usage :
+    python tests/E2E/scripts/BENCH_005_token_manager.py --tokens 5000
+    python tests/E2E/scripts/BENCH_005_token_manager.py --tokens 1000 --skip-rotation
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.token_bench import (
+    TOKENS_BEGIN,
+    TOKENS_END,
+    cross_check,
+    secret_fingerprint,
+    token_bench_php,
+)
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class TokenManagerBenchmark(E2ETestFramework):
+    """Débit de TokenManager et conformité avec un vérificateur de référence"""
+
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Security/TokenManager", "Security/Token", "Security/SecretManager", "Security/Secret"]
+
+    # state_fixture restaure l'état du plugin pour tout le site : exécuté seul par run_suite
+    EXCLUSIVE = True
+
+    # Tous les lots tiennent dans un seul `wp eval-file`
+    COMMAND_TIMEOUT = 1800
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_005
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_005"))
+        super().__init__(
+            test_id="BENCH_005",
+            test_name="TokenManager Throughput",
+            description="Lots de génération / validation de jetons HMAC, rotation de clé et vérification croisée",
+        )
+        self.args = args
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        # rotate_key() réécrit wcqf_hmac_key / wcqf_hmac_secret_prev : état restauré en fin de run
+        with self.state_fixture(f"bench_005_w{self.worker.worker_id}"):
+            self.print_phase("Phase 1 : Lots generate / validate")
+            bench = self.run_bench()
+        if bench is None:
+            self.generate_report()
+            return
+
+        self.print_phase("Phase 2 : Débit et latences")
+        self.log_throughput(bench)
+
+        self.print_phase("Phase 3 : Secret et rotation")
+        self.log_secret_costs(bench)
+
+        self.print_phase("Phase 4 : Conformité PHP / Python")
+        conformance = cross_check(bench)
+        self.log_conformance(conformance)
+
+        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "tokens": self.args.tokens,
+                    "ttl": bench["ttl"],
+                    "secret_sources": bench.get("secret_sources"),
+                    # Empreintes seulement : les secrets ne quittent pas la mémoire du run
+                    "secrets": {role: secret_fingerprint(value) for role, value in bench["secrets"].items()},
+                    "cases": {name: case["stats"] for name, case in bench["cases"].items()},
+                    "conformance": conformance,
+                },
+                f,
+                indent=2,
+            )
+        self.log_info(f"Résultats détaillés : {filename}")
+
+        self.generate_report()
+
+    def run_bench(self):
+        """Exécute tous les lots et retourne la sortie structurée du script PHP"""
+        php = token_bench_php(
+            self.args.tokens,
+            self.args.user_id,
+            self.args.product_id,
+            # Clé jetable : les jetons du benchmark ne valent rien hors du run
+            secrets.token_hex(32),
+            rotate=not self.args.skip_rotation,
+            cold_lookups=self.args.cold_lookups,
+        )
+        command = eval_file_command(self.WP_PROJECT_DIR, php, "tokens")
+        result = self.execute_ssh_command(f"Benchmark TokenManager ({self.args.tokens} jetons par cas)", command)
+        bench = extract_marked_json(result.get("output", ""), TOKENS_BEGIN, TOKENS_END)
+        if bench is None:
+            self.log_error("Sortie du benchmark illisible")
+        return bench
+
+    @staticmethod
+    def format_stats(stats) -> str:
+        rate = f"{stats['ops_per_s']:.0f} op/s" if stats["ops_per_s"] else "n/a"
+        return (
+            f"{rate} | p50 {stats['p50_us']:.1f} µs, p95 {stats['p95_us']:.1f} µs, "
+            f"p99 {stats['p99_us']:.1f} µs, max {stats['max_us']:.1f} µs"
+        )
+
+    def log_throughput(self, bench):
+        """Une ligne par cas : débit et percentiles de latence"""
+        for name, case in bench["cases"].items():
+            if name.startswith("secret_lookup") or name == "rotate_key":
+                continue
+            self.log_info(f"{name} ({case['stats']['count']}) : {self.format_stats(case['stats'])}")
+
+        expired = bench["cases"]["is_expired"]
+        if expired["flagged"] == expired["stats"]["count"]:
+            self.log_success(f"is_expired : {expired['flagged']}/{expired['stats']['count']} jetons expirés détectés")
+        else:
+            self.log_error(f"is_expired : {expired['flagged']}/{expired['stats']['count']} jetons expirés détectés")
+
+    def log_secret_costs(self, bench):
+        """Recherche du secret froide / chaude, rotation et surcoût de la clé précédente"""
+        cases = bench["cases"]
+        cold, warm = cases["secret_lookup_cold"]["stats"], cases["secret_lookup_warm"]["stats"]
+        sources = bench.get("secret_sources") or {}
+        active = [source for source, present in sources.items() if present]
+        self.log_info(f"Sources du secret : {', '.join(active) or 'aucune'}")
+        self.log_info(f"Recherche du secret, cache vidé : {self.format_stats(cold)}")
+        self.log_info(f"Recherche du secret, en cache : {self.format_stats(warm)}")
+        if warm["p50_us"]:
+            self.log_info(f"Cache du secret : ×{cold['p50_us'] / warm['p50_us']:.0f} (p50)")
+
+        if "rotate_key" not in cases:
+            self.log_warning("Rotation non mesurée (--skip-rotation)")
+            return
+        self.log_info(f"rotate_key : {cases['rotate_key']['stats']['max_us'] / 1000:.2f} ms")
+        # Une variable d'environnement ou une constante prime sur l'option écrite par rotate_key()
+        if sources.get("env_var") or sources.get("constant"):
+            self.log_warning("Clé fournie par env/constante : rotate_key() n'en change pas la valeur effective")
+        elif bench["secrets"].get("current") == bench["secrets"].get("initial"):
+            self.log_error("La clé effective n'a pas changé après rotate_key()")
+
+        current, previous = cases["validate_valid"]["stats"], cases["validate_previous_key"]["stats"]
+        if current["p50_us"]:
+            self.log_info(
+                f"Validation via la clé précédente : p50 {previous['p50_us']:.1f} µs "
+                f"(×{previous['p50_us'] / current['p50_us']:.2f} par rapport à la clé courante)"
+            )
+
+    def log_conformance(self, conformance):
+        """Écarts entre verdicts PHP et implémentation de référence, verdicts inattendus"""
+        for name, entry in conformance.items():
+            message = f"{name} : {entry['checked']} jetons rejoués"
+            if entry["mismatches"]:
+                self.log_error(f"{message}, {entry['mismatches']} écart(s) PHP/Python : {entry['samples'][:2]}")
+            elif entry["unexpected"]:
+                self.log_error(f"{message}, {entry['unexpected']} verdict(s) PHP inattendu(s)")
+            else:
+                self.log_success(f"{message}, conformes")
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Débit et conformité de TokenManager")
+    parser.add_argument("--tokens", type=int, default=2000, help="Jetons par cas (generate, validate, ...)")
+    parser.add_argument("--user-id", type=int, default=1, help="Utilisateur des jetons")
+    parser.add_argument("--product-id", type=int, default=4017, help="Produit des jetons")
+    parser.add_argument("--cold-lookups", type=int, default=200,
+                        help="Recherches du secret cache vidé (chacune journalise un avertissement si la clé est en option)")
+    parser.add_argument("--skip-rotation", action="store_true", help="Ne mesure pas rotate_key ni la clé précédente")
+    return parser.parse_args(argv)
+
+
+# Exécution
+if __name__ == "__main__":
+    test = TokenManagerBenchmark(parse_args())
+    test.run()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark 006 : Parcours apprenants concurrents sur wcqf_progress
+Description : des workers PHP parallèles font avancer des milliers de
+parcours cart → form → checkout → completed (avec abandons) via
+ProgressStorage, et des add_data concurrents sur des jetons partagés.
+Rapport : écritures/s, latences par méthode, mises à jour perdues,
+attentes de verrous InnoDB et croissance de la table.
+
+Usage :
+    python tests/E2E/scripts/BENCH_006_progress_journeys.py --workers 8 --journeys 500
+    python tests/E2E/scripts/BENCH_006_progress_journeys.py --abandon-rate 0.4 --hot-writes 200 --keep-rows
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.journey_sim import (
+    SIM_BEGIN,
+    SIM_END,
+    cleanup_php,
+    finish_php,
+    lock_waits,
+    lost_updates,
+    setup_php,
+    summarize_workers,
+    worker_php,
+)
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class ProgressJourneyBenchmark(E2ETestFramework):
+    """Charge d'écriture et contention de ProgressStorage"""
+
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Data/Progress", "Security/TokenManager", "Helpers/SanitizationHelper"]
+
+    COMMAND_TIMEOUT = 3600
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_006
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_006"))
+        super().__init__(
+            test_id="BENCH_006",
+            test_name="Progress Journeys",
+            description="Parcours concurrents start → update_step → add_data → complete / abandon sur wcqf_progress",
+        )
+        self.args = args
+        # Tous les workers PHP doivent tourner en même temps
+        self.ASYNC_MAX_CONCURRENCY = max(self.ASYNC_MAX_CONCURRENCY, args.workers)
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        self.print_phase("Phase 1 : Préparation")
+        setup = self.eval_php("Sonde du jeton et création des lignes chaudes", setup_php(
+            self.args.run_as, self.worker.product_id, self.args.hot_tokens,
+        ), "journeys_setup")
+        if setup is None or setup["errors"]:
+            for error in (setup or {}).get("errors", []):
+                self.log_error(error)
+            self.cleanup()
+            self.generate_report()
+            return
+        self.log_plugin_token(setup.get("plugin_token"))
+
+        self.print_phase(f"Phase 2 : {self.args.workers} workers × {self.args.journeys} parcours")
+        workers = self.run_workers(setup["server_time"])
+        if not workers:
+            self.cleanup()
+            self.generate_report()
+            return
+        summary = summarize_workers(workers)
+        self.log_throughput(summary)
+
+        self.print_phase("Phase 3 : Contention et croissance")
+        final = self.eval_php("État final de wcqf_progress", finish_php(self.args.hot_tokens), "journeys_finish")
+        contention = None
+        if final is not None:
+            contention = self.log_contention(setup["before"], final)
+
+        filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "parameters": vars(self.args),
+                    "plugin_token": setup.get("plugin_token"),
+                    "summary": summary,
+                    "contention": contention,
+                    "before": setup["before"],
+                    "after": final["after"] if final else None,
+                },
+                f,
+                indent=2,
+            )
+        self.log_info(f"Résultats détaillés : {filename}")
+
+        self.cleanup()
+        self.generate_report()
+
+    def eval_php(self, description: str, php: str, prefix: str):
+        """Exécute un script du simulateur et retourne sa sortie structurée"""
+        result = self.execute_ssh_command(description, eval_file_command(self.WP_PROJECT_DIR, php, prefix))
+        output = extract_marked_json(result.get("output", ""), SIM_BEGIN, SIM_END)
+        if output is None:
+            self.log_error(f"{description} : sortie illisible")
+        return output
+
+    def log_plugin_token(self, probe):
+        """ProgressStorage retrouve-t-il une ligne avec le jeton de start() ?"""
+        if probe is None:
+            return
+        if probe["update_step_rows"]:
+            self.log_success("Jeton de start() retrouvé par update_step")
+        else:
+            self.log_warning(
+                "Jeton de start() non retrouvé par update_step (sanitize_siret ne garde que les chiffres) : "
+                "les parcours simulés utilisent des jetons numériques"
+            )
+
+    def run_workers(self, server_time: float):
+        """Lance les workers en parallèle, départ commun sur l'horloge du serveur"""
+        start_at = server_time + self.args.barrier_delay
+        commands = [
+            (
+                f"Worker {worker} : {self.args.journeys} parcours",
+                eval_file_command(
+                    self.WP_PROJECT_DIR,
+                    worker_php(
+                        worker,
+                        self.args.journeys,
+                        self.args.run_as,
+                        self.worker.product_id,
+                        self.args.abandon_rate,
+                        self.args.hot_tokens,
+                        self.args.hot_writes,
+                        start_at,
+                        self.args.seed,
+                    ),
+                    f"journeys_w{worker}",
+                ),
+            )
+            for worker in range(self.args.workers)
+        ]
+        started = time.time()
+        results = asyncio.run(self.execute_many_async(commands))
+        self.log_info(f"Workers terminés en {time.time() - started:.1f}s (démarrage WordPress inclus)")
+
+        workers = []
+        for (description, _), result in zip(commands, results):
+            output = extract_marked_json(result.get("output", ""), SIM_BEGIN, SIM_END)
+            if output is None:
+                self.log_error(f"{description} : sortie illisible")
+            else:
+                workers.append(output)
+        return workers
+
+    def log_throughput(self, summary):
+        """Écritures par seconde, latences par méthode, issues des parcours"""
+        if summary["late_workers"]:
+            self.log_warning(
+                f"{summary['late_workers']} worker(s) démarré(s) après le départ commun : "
+                "augmenter --barrier-delay pour garantir la simultanéité"
+            )
+        rate = f"{summary['writes_per_s']:.0f} écritures/s" if summary["writes_per_s"] else "n/a"
+        self.log_info(f"{summary['writes']} écritures en {summary['window_s']:.2f}s ({rate})")
+        for op, entry in summary["operations"].items():
+            message = (
+                f"{op} : {entry['count']} appels, p50 {entry['p50_ms']:.2f} ms, p95 {entry['p95_ms']:.2f} ms, "
+                f"p99 {entry['p99_ms']:.2f} ms, max {entry['max_ms']:.2f} ms"
+            )
+            if entry["errors"]:
+                self.log_error(f"{message}, {entry['errors']} erreur(s)")
+            elif entry["missed"]:
+                self.log_error(f"{message}, {entry['missed']} écriture(s) sans ligne correspondante")
+            else:
+                self.log_success(message)
+
+        outcomes = summary["outcomes"]
+        total = sum(outcomes.values())
+        abandoned = outcomes["abandoned"] / total * 100 if total else 0.0
+        message = (
+            f"Parcours : {outcomes['completed']} terminés, {outcomes['abandoned']} abandonnés "
+            f"({abandoned:.1f}%, cible {self.args.abandon_rate * 100:.0f}%), {outcomes['failed']} en échec"
+        )
+        if outcomes["failed"]:
+            self.log_error(message)
+        else:
+            self.log_success(message)
+
+    def log_contention(self, before, final):
+        """Mises à jour perdues, attentes de verrous, croissance de la table"""
+        lost = lost_updates(final["hot_keys"], self.args.workers * self.args.hot_writes)
+        message = (
+            f"add_data concurrents sur {self.args.hot_tokens} jeton(s) : "
+            f"{lost['present']}/{lost['expected']} clés présentes"
+        )
+        if lost["lost"]:
+            self.log_error(f"{message}, {lost['lost']} mise(s) à jour perdue(s) ({lost['lost_rate']:.1f}%)")
+        else:
+            self.log_success(f"{message}, aucune mise à jour perdue")
+
+        locks = lock_waits(before, final["after"])
+        self.log_info(
+            f"Verrous InnoDB (serveur entier) : {locks['waits']} attente(s), {locks['time_ms']} ms "
+            f"(moyenne {locks['avg_ms']:.1f} ms, max {locks['max_ms']} ms)"
+        )
+
+        rows, after = final["rows"], final["after"]
+        self.log_info(
+            f"Lignes simulées : {rows['total']} ({rows['completed']} terminées, {rows['abandoned']} abandonnées, "
+            f"{rows['at_cart']} restées à l'étape cart)"
+        )
+        self.log_info(
+            f"collected_data : {float(rows['avg_data'] or 0):.0f} octets en moyenne, {rows['max_data']} au maximum"
+        )
+        if before["data_length"] is not None and after["data_length"] is not None:
+            growth = (after["data_length"] + after["index_length"]) - (before["data_length"] + before["index_length"])
+            self.log_info(
+                f"Table : {before['rows']} → {after['rows']} lignes (estimation InnoDB), "
+                f"+{growth / 1024:.0f} Kio données + index, ligne moyenne {after['avg_row']} octets"
+            )
+        return {"lost_updates": lost, "lock_waits": locks, "rows": rows}
+
+    def cleanup(self):
+        if self.args.keep_rows:
+            self.log_info("Lignes simulées conservées (--keep-rows)")
+            return
+        self.print_phase("Nettoyage")
+        result = self.eval_php("Suppression des lignes simulées", cleanup_php(), "journeys_cleanup")
+        if result is not None:
+            self.log_info(f"{result['deleted']} ligne(s) supprimée(s)")
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parcours apprenants concurrents sur ProgressStorage")
+    parser.add_argument("--workers", type=int, default=4, help="Workers PHP parallèles (wp eval-file)")
+    parser.add_argument("--journeys", type=int, default=250, help="Parcours entrelacés par worker")
+    parser.add_argument("--abandon-rate", type=float, default=0.3, help="Probabilité d'abandon d'un parcours (0-1)")
+    parser.add_argument("--hot-tokens", type=int, default=2, help="Jetons partagés par tous les workers")
+    parser.add_argument("--hot-writes", type=int, default=50, help="add_data par worker et par jeton partagé")
+    parser.add_argument("--barrier-delay", type=float, default=10.0,
+                        help="Délai avant le départ commun (s), doit couvrir le démarrage de WordPress")
+    parser.add_argument("--run-as", type=int, default=1,
+                        help="Utilisateur courant des workers (capacité manage_woocommerce requise par start())")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des abandons")
+    parser.add_argument("--keep-rows", action="store_true", help="Conserve les lignes simulées")
+    return parser.parse_args(argv)
+
+
+# Exécution
+if __name__ == "__main__":
+    test = ProgressJourneyBenchmark(parse_args())
+    test.run()
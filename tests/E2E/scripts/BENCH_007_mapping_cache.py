@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark 007 : MappingCache à l'échelle du catalogue
+Description : pour chaque échelle (100, 10k, 100k produits formation),
+amorce wcqf_product_form_mapping et mesure get() à froid (chargement et
+normalisation), get() à chaud, refresh() et migrate_old_mapping(), sans
+cache objet persistant puis avec un remplaçant (entrées sérialisées
+réinjectées à chaque requête simulée).
+Rapport : coût par requête HTTP de la recherche du mapping, mémoire,
+taille et autoload de l'option.
+
+Usage :
+    python tests/E2E/scripts/BENCH_007_mapping_cache.py --scales 100,10000,100000
+    python tests/E2E/scripts/BENCH_007_mapping_cache.py --scales 10000 --repeat 50 --modes none
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+# Ajouter le chemin du helper au PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from helpers.test_framework import E2ETestFramework
+from helpers.mapping_bench import (
+    CACHE_MODES,
+    MAPPING_BEGIN,
+    MAPPING_END,
+    MEMCACHED_ITEM_LIMIT,
+    is_autoloaded,
+    mapping_bench_php,
+    summarize_scale,
+)
+from helpers.perf_baseline import HOT_PATHS
+from helpers.wp_batch import eval_file_command, extract_marked_json
+
+
+class MappingCacheBenchmark(E2ETestFramework):
+    """MappingCache : coût par requête selon la taille du mapping et le cache objet"""
+
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Utils/Mapping", "Core/Constants"]
+
+    # state_fixture restaure l'état du plugin pour tout le site : exécuté seul par run_suite
+    EXCLUSIVE = True
+
+    # Amorçage de 100k produits et réécritures de l'option dans un seul `wp eval-file`
+    COMMAND_TIMEOUT = 1800
+
+    # Consulté à chaque requête panier / checkout : une régression fait échouer le run
+    PERF_HOT_PATHS = HOT_PATHS + ("mapping",)
+
+    def __init__(self, args: Optional[argparse.Namespace] = None):
+        # Lancé par run_suite : arguments par défaut, complétés par E2E_ARGS_BENCH_007
+        args = args if args is not None else parse_args(self.scenario_argv("BENCH_007"))
+        super().__init__(
+            test_id="BENCH_007",
+            test_name="Mapping Cache Scale",
+            description="MappingCache::get / refresh / migrate_old_mapping sur un mapping de 100 à 100k produits",
+        )
+        self.args = args
+
+    def run(self):
+        """Exécution principale du benchmark"""
+        print(f"\n🚀 Démarrage du benchmark : {self.test_name}\n")
+
+        measures = []
+        # wcqf_product_form_mapping et wcqs_testpos_mapping réécrits : état restauré en fin de run
+        with self.state_fixture(f"bench_007_w{self.worker.worker_id}"):
+            for scale in self.args.scales:
+                self.print_phase(f"Échelle {scale} produits")
+                measure = self.run_scale(scale)
+                if measure is not None:
+                    measures.append(measure)
+
+        if measures:
+            self.print_phase("Coût par requête")
+            self.log_per_request(measures)
+
+            filename = f"tests/E2E/reports/{self.test_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(filename, "w", encoding="utf-8") as f:
+                json.dump({"parameters": vars(self.args), "measures": measures}, f, indent=2)
+            self.log_info(f"Résultats détaillés : {filename}")
+
+        self.generate_report()
+
+    def run_scale(self, entries: int):
+        """Amorce le mapping, mesure chaque opération dans chaque mode de cache"""
+        php = mapping_bench_php(
+            entries, self.args.repeat, self.args.warm_calls, self.args.migrate_repeat, self.args.modes
+        )
+        command = eval_file_command(self.WP_PROJECT_DIR, php, "mapping")
+        result = self.execute_ssh_command(f"Mesure de MappingCache à {entries} produits", command)
+        report = extract_marked_json(result.get("output", ""), MAPPING_BEGIN, MAPPING_END)
+        if report is None:
+            self.log_error(f"Échelle {entries} : sortie illisible")
+            return None
+        for error in report["errors"]:
+            self.log_error(f"Échelle {entries} : {error}")
+
+        summary = summarize_scale(report)
+        self.log_option(summary)
+        for mode, data in report["modes"].items():
+            for operation, values in data["samples"].items():
+                self.add_perf_samples(f"mapping {entries} {operation} ({mode})", values)
+            self.log_mode(entries, mode, summary["modes"][mode])
+        if not report["errors"]:
+            self.log_success(f"Échelle {entries} : {report['entries']} produits normalisés et migrés")
+        return summary
+
+    def log_option(self, summary):
+        """Taille sérialisée, autoload et cache objet réel du site"""
+        size_kb = summary["serialized_bytes"] / 1024
+        self.log_info(
+            f"Option : {size_kb:.0f} Kio sérialisée, autoload « {summary['autoload']} », "
+            f"cache objet persistant du site : {'oui' if summary['ext_object_cache'] else 'non'}"
+        )
+        if not is_autoloaded(summary["autoload"]):
+            # WordPress ≥ 6.6 n'autocharge plus les options volumineuses (auto-off)
+            self.log_warning(
+                f"Option non autochargée : une requête SQL dédiée par requête HTTP sans cache objet ({size_kb:.0f} Kio)"
+            )
+        if summary["serialized_bytes"] > MEMCACHED_ITEM_LIMIT:
+            self.log_warning(
+                f"Option de {size_kb:.0f} Kio > 1 Mio : refusée par Memcached avec sa taille d'élément par défaut"
+            )
+
+    def log_mode(self, entries: int, mode: str, data):
+        """Une ligne par opération : médiane, p95, mémoire"""
+        operations = data["operations"]
+        for name, stats in operations.items():
+            unit = "µs" if name == "warm_get" else "ms"
+            scale = 1000 if unit == "µs" else 1
+            message = (
+                f"[{mode}] {name} ({stats['count']}) : médiane {stats['median'] * scale:.2f} {unit}, "
+                f"p95 {stats['p95'] * scale:.2f} {unit}, max {stats['max'] * scale:.2f} {unit}"
+            )
+            memory = data["memory_kb"].get(f"{name}_peak")
+            if memory:
+                message += f", pic {memory['median']:.0f} Kio"
+            self.log_info(message)
+
+    def log_per_request(self, measures):
+        """Surcoût d'un get() à froid par requête HTTP, par échelle et par mode"""
+        self.log_info("Produits | Option | " + " | ".join(f"get() à froid {mode}" for mode in self.args.modes))
+        for measure in measures:
+            cells = []
+            for mode in self.args.modes:
+                data = measure["modes"].get(mode)
+                if data is None:
+                    cells.append("-")
+                    continue
+                cold = data["operations"]["cold_get"]
+                retained = data["memory_kb"]["cold_get"]["median"]
+                cells.append(f"{cold['median']:.2f} ms (p95 {cold['p95']:.2f}), {retained:.0f} Kio")
+            self.log_info(f"{measure['entries']} | {measure['serialized_bytes'] / 1024:.0f} Kio | " + " | ".join(cells))
+
+            budget = self.args.max_cold_ms
+            if budget is None:
+                continue
+            for mode, data in measure["modes"].items():
+                median = data["operations"]["cold_get"]["median"]
+                if median > budget:
+                    self.log_error(f"{measure['entries']} produits [{mode}] : get() à froid {median:.2f} ms > {budget} ms")
+                else:
+                    self.log_success(f"{measure['entries']} produits [{mode}] : get() à froid {median:.2f} ms ≤ {budget} ms")
+
+    def generate_report(self):
+        """Génère le rapport final"""
+        report = {
+            "test_id": self.test_id,
+            "test_name": self.test_name,
+            "duration": self.get_duration(),
+            "phases": self.get_phases_summary(),
+            "observations": self.get_all_observations(),
+            "success_rate": self.calculate_success_rate(),
+        }
+
+        self.save_markdown_report(report)
+        self.print_summary()
+
+
+def parse_list(value: str):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MappingCache à l'échelle du catalogue")
+    parser.add_argument("--scales", type=lambda value: [int(item) for item in parse_list(value)],
+                        default=[100, 10000, 100000], help="Produits du mapping (liste séparée par des virgules)")
+    parser.add_argument("--repeat", type=int, default=20, help="Requêtes simulées par mode (get à froid, refresh)")
+    parser.add_argument("--warm-calls", type=int, default=1000, help="Appels get() par mesure à chaud")
+    parser.add_argument("--migrate-repeat", type=int, default=3, help="Migrations mesurées par mode")
+    parser.add_argument("--modes", type=parse_list, default=list(CACHE_MODES),
+                        help="Modes de cache objet : none, standin")
+    parser.add_argument("--max-cold-ms", type=float, help="Budget d'un get() à froid (médiane, ms)")
+    args = parser.parse_args(argv)
+    unknown = [mode for mode in args.modes if mode not in CACHE_MODES]
+    if unknown:
+        parser.error(f"Modes inconnus : {', '.join(unknown)}")
+    return args
+
+
+# Exécution
+if __name__ == "__main__":
+    test = MappingCacheBenchmark(parse_args())
+    test.run()
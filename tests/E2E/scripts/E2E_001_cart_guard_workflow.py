@@ -6,22 +6,30 @@ Description : Teste le blocage du checkout si test non validé + déblocage apr
 
 import sys
 import os
+import time
+from typing import Optional
 
 # Ajouter le chemin du helper au PYTHONPATH
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from helpers.test_framework import E2ETestFramework
+from helpers.expectations import Check, CommandOutputMatches
 
 
 class CartGuardWorkflowTest(E2ETestFramework):
     """Test du workflow complet Cart Guard"""
 
+    # Modules de src/ couverts (analyse d'impact de run_suite.py)
+    COVERS = ["Cart", "Security/SessionManager"]
+
     def __init__(self):
         super().__init__(
             test_id="E2E_001",
             test_name="Cart Guard Workflow",
             description="Test du blocage checkout si test non validé + déblocage après validation",
         )
+        # Page de test du produit du worker (mapping lu en phase 1)
+        self.test_page: Optional[str] = None
 
     def phase_1_configuration(self):
         """Phase 1 : Vérification configuration admin"""
@@ -43,15 +51,27 @@ class CartGuardWorkflowTest(E2ETestFramework):
         mapping = self.get_wp_option("wcqf_product_form_mapping")
         self.log_info(f"Mapping récupéré : {mapping}")
 
-        if mapping and "4017" in str(mapping):
-            self.log_success("Mapping trouvé pour produit 4017")
+        product_id = self.worker.product_id
+        self.test_page = self.test_page_path(mapping, product_id)
+        if self.test_page:
+            self.log_success(f"Mapping trouvé pour produit {product_id} : page de test {self.test_page}")
         else:
             self.log_warning(
-                "Mapping non trouvé pour produit 4017 - Le test pourrait échouer"
+                f"Mapping non trouvé pour produit {product_id} - Le test pourrait échouer"
             )
 
         self.wait_user_confirmation("Configuration vérifiée ?")
 
+    @staticmethod
+    def test_page_path(mapping, product_id: int) -> Optional[str]:
+        """Chemin de la page de test du produit ({produit: page} ou ancien format {"product_<id>": {...}})"""
+        if not isinstance(mapping, dict):
+            return None
+        entry = mapping.get(str(product_id), mapping.get(f"product_{product_id}"))
+        if isinstance(entry, dict):
+            entry = entry.get("page_id")
+        return f"/{entry}/" if entry else None
+
     def phase_2_test_blocage(self):
         """Phase 2 : Test du blocage checkout sans validation"""
         self.print_phase("Phase 2 : Test Blocage Checkout")
@@ -59,7 +79,7 @@ class CartGuardWorkflowTest(E2ETestFramework):
         self.print_instruction(
             "1. Ouvrez une fenêtre de navigation privée",
             "2. Allez sur https://tb-wp-dev.ddev.site",
-            "3. Ajoutez un produit formation au panier (ID 4017 si configuré)",
+            f"3. Ajoutez un produit formation au panier (ID {self.worker.product_id} si configuré)",
             "4. Allez sur /panier/",
             "5. Observez le bouton 'Commander'",
         )
@@ -83,13 +103,34 @@ console.log('Notices:', notices.length);
 notices.forEach(n => console.log('- ', n.textContent.trim()));
 """
 
-        self.print_javascript_test(js_check)
+        if not self.headless:
+            self.print_javascript_test(js_check)
+
+        # Parcours automatisé avec le driver HTTP (visiteur anonyme)
+        flow = self.new_cart_flow("visiteur")
+        self.record_http_check(flow.add_to_cart(self.worker.product_id))
+        cart_check, cart_page = flow.view_cart()
+        self.record_http_check(cart_check)
+        blocked, cta, notice = flow.check_blocked(cart_page)
+        for check in (blocked, cta, notice):
+            self.record_http_check(check)
 
-        # Collecte observations utilisateur
+        # Collecte observations utilisateur (résultats du driver en mode headless,
+        # déjà journalisés par record_http_check : recorded=True)
         observations = self.collect_observations([
-            "Le bouton 'Commander' est-il visible ?",
-            "Le bouton dit-il 'Passer le test de positionnement' ?",
-            "Y a-t-il un message expliquant le blocage ?",
+            (
+                "Le bouton 'Commander' est-il visible ?",
+                Check(lambda _: bool(cart_page.buttons) or bool(cart_page.blocks_test_url),
+                      "Bouton checkout présent sur /panier/"),
+            ),
+            (
+                "Le bouton dit-il 'Passer le test de positionnement' ?",
+                Check(lambda _: cta["passed"], cta["check"], recorded=True),
+            ),
+            (
+                "Y a-t-il un message expliquant le blocage ?",
+                Check(lambda _: notice["passed"], notice["check"], recorded=True),
+            ),
         ])
 
         # Tentative de clic
@@ -98,18 +139,30 @@ notices.forEach(n => console.log('- ', n.textContent.trim()));
             "7. Observez où vous êtes redirigé",
         )
 
-        # Vérification redirection
-        js_check_redirect = """
+        # Vérification redirection (page de test lue dans le mapping en phase 1)
+        expected_page = self.test_page or "page de test absente du mapping"
+        js_check_redirect = f"""
 // Vérifier l'URL actuelle
 console.log('URL actuelle:', window.location.href);
-console.log('Contient /4267/ ?', window.location.href.includes('/4267/') || window.location.href.includes('test-positionnement'));
+console.log('Contient {expected_page} ?', window.location.href.includes('{expected_page}') || window.location.href.includes('test-positionnement'));
 """
 
-        self.print_javascript_test(js_check_redirect)
+        if not self.headless:
+            self.print_javascript_test(js_check_redirect)
+
+        redirect = flow.open_checkout(expected_page)
+        self.record_http_check(redirect)
 
         observations2 = self.collect_observations([
-            "Avez-vous été redirigé vers la page de test de positionnement ?",
-            "La redirection était-elle claire et rapide ?",
+            (
+                "Avez-vous été redirigé vers la page de test de positionnement ?",
+                Check(lambda _: redirect["passed"], redirect["check"], recorded=True),
+            ),
+            (
+                "La redirection était-elle claire et rapide ?",
+                Check(lambda _: redirect["passed"] and redirect["timing"]["elapsed_ms"] < 2000,
+                      "Redirection en moins de 2 s"),
+            ),
         ])
 
         self.wait_user_confirmation("Test de blocage terminé ?")
@@ -120,19 +173,21 @@ console.log('Contient /4267/ ?', window.location.href.includes('/4267/') || wind
 
         self.log_info("Forçage de la validation du test via WP-CLI...")
 
-        # Forcer validation pour user ID 1 et produit 4017
+        # Forcer validation pour l'utilisateur et le produit du worker
+        user_id = self.worker.user_id
+        meta_key = self.worker.test_solved_meta_key
         result = self.execute_ssh_command(
-            "Forcer validation test pour user 1",
-            'cd ~/projects/tb-wp-dev && ddev wp eval \'update_user_meta(1, "wcqf_test_solved_4017", time()); echo "OK";\'',
+            f"Forcer validation test pour user {user_id}",
+            f"cd {self.WP_PROJECT_DIR} && ddev wp user meta update {user_id} {meta_key} {int(time.time())}",
         )
 
         if result["success"]:
-            self.log_success("Test forcé comme validé pour user ID 1")
+            self.log_success(f"Test forcé comme validé pour user ID {user_id}")
         else:
             self.log_error("Échec du forçage de validation")
 
         self.print_instruction(
-            "1. Retournez sur /panier/ (en mode connecté avec admin)",
+            f"1. Retournez sur /panier/ (en mode connecté avec {self.worker.username})",
             "2. Rechargez la page (F5)",
             "3. Le bouton 'Commander' devrait maintenant pointer vers /commander/",
         )
@@ -148,12 +203,37 @@ if (checkoutBtn) {
 }
 """
 
-        self.print_javascript_test(js_check_unlocked)
+        if not self.headless:
+            self.print_javascript_test(js_check_unlocked)
+
+        # Parcours automatisé avec le driver HTTP, connecté comme l'utilisateur dont la meta a été posée
+        flow = self.new_cart_flow(self.worker.username)
+        self.record_http_check(flow.login(self.worker.username, self.worker.password))
+        self.record_http_check(flow.add_to_cart(self.worker.product_id))
+        cart_check, cart_page = flow.view_cart()
+        self.record_http_check(cart_check)
+        unblocked = flow.check_unblocked(cart_page)
+        self.record_http_check(unblocked)
+        checkout = flow.open_checkout("/commander/")
+        self.record_http_check(checkout)
 
         observations = self.collect_observations([
-            "Le bouton affiche-t-il maintenant 'Commander' (texte normal) ?",
-            "Le clic redirige-t-il vers /commander/ ?",
-            "Le workflow de déblocage fonctionne-t-il correctement ?",
+            (
+                "Le bouton affiche-t-il maintenant 'Commander' (texte normal) ?",
+                Check(lambda _: unblocked["passed"], unblocked["check"], recorded=True),
+            ),
+            (
+                "Le clic redirige-t-il vers /commander/ ?",
+                Check(lambda _: checkout["passed"], checkout["check"], recorded=True),
+            ),
+            (
+                "Le workflow de déblocage fonctionne-t-il correctement ?",
+                CommandOutputMatches(
+                    f"cd {self.WP_PROJECT_DIR} && ddev wp user meta get {user_id} {meta_key}",
+                    r"^\d+$",
+                    description=f"Meta {meta_key} posée pour user {user_id}",
+                ),
+            ),
         ])
 
         self.wait_user_confirmation("Test de déblocage terminé ?")
@@ -178,10 +258,11 @@ if (checkoutBtn) {
             print(f"\n🚀 Démarrage du test : {self.test_name}\n")
             print(f"📝 {self.description}\n")
 
-            # Exécution des phases
-            self.phase_1_configuration()
-            self.phase_2_test_blocage()
-            self.phase_3_test_deblocage()
+            # Exécution des phases (user meta et options du produit du worker restaurées en fin de test)
+            with self.state_fixture(f"e2e_001_w{self.worker.worker_id}", scope="worker"):
+                self.phase_1_configuration()
+                self.phase_2_test_blocage()
+                self.phase_3_test_deblocage()
 
             # Génération rapport
             self.generate_report()